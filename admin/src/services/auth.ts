@@ -45,7 +45,6 @@ export enum PermissionTarget {
     ENTRY = "entry",
     EVENT = "event",
     TICKET_VOTE_CODE = "ticketvotecode",
-    VOTE = "vote",
     LIVE_VOTING_STATE = "livevotingstate",
     VOTE_CODE_REQUEST = "votecoderequest",
     VOTE_GROUP = "votegroup",
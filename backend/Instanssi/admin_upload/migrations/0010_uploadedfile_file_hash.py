@@ -0,0 +1,23 @@
+# Generated by Django 6.0.7 on 2026-10-18 09:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("admin_upload", "0009_alter_uploadedfile_options_alter_uploadedfile_date_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadedfile",
+            name="file_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name="File SHA-256"),
+        ),
+        migrations.AddField(
+            model_name="uploadedfile",
+            name="file_size",
+            field=models.BigIntegerField(blank=True, editable=False, null=True, verbose_name="File size"),
+        ),
+    ]
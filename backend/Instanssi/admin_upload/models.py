@@ -1,5 +1,6 @@
 import os.path
 from pathlib import Path
+from typing import Any
 
 from auditlog.registry import auditlog
 from django.conf import settings
@@ -7,7 +8,11 @@ from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from Instanssi.common.file_handling import clean_filename, generate_upload_path
+from Instanssi.common.file_handling import (
+    clean_filename,
+    file_sha256,
+    generate_upload_path,
+)
 from Instanssi.kompomaatti.models import Event
 
 
@@ -29,6 +34,8 @@ class UploadedFile(models.Model):
     )
     description = models.TextField(_("Description"), blank=True)
     file = models.FileField(_("File"), max_length=255, upload_to=generate_file_path)
+    file_hash = models.CharField(_("File SHA-256"), max_length=64, blank=True, editable=False)
+    file_size = models.BigIntegerField(_("File size"), null=True, blank=True, editable=False)
     date = models.DateTimeField(_("Date"), default=timezone.now, db_index=True)
 
     def __str__(self) -> str:
@@ -37,5 +44,20 @@ class UploadedFile(models.Model):
     def name(self) -> str:
         return os.path.basename(self.file.name or "")
 
+    def update_file_hash(self) -> None:
+        """Hash the file. Called by save() when a new file is assigned."""
+        if self.file:
+            self.file_hash = file_sha256(self.file)
+            self.file_size = self.file.size
+        else:
+            self.file_hash = ""
+            self.file_size = None
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        # Files assigned since the last save have not been written to storage yet
+        if not getattr(self.file, "_committed", True):
+            self.update_file_hash()
+        super().save(*args, **kwargs)
+
 
 auditlog.register(UploadedFile)
@@ -1,8 +1,9 @@
-from .archiver_serializer import ArchiverStatusSerializer
+from .archiver_serializer import ArchiverJobSerializer, ArchiverStatusSerializer
 from .other_video_category_serializer import OtherVideoCategorySerializer
 from .other_video_serializer import OtherVideoSerializer
 
 __all__ = [
+    "ArchiverJobSerializer",
     "ArchiverStatusSerializer",
     "OtherVideoCategorySerializer",
     "OtherVideoSerializer",
@@ -4,6 +4,19 @@ from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
 
+class ArchiverJobSerializer(serializers.Serializer[Any]):
+    """Serializer for the progress of a background archiver job."""
+
+    action = serializers.CharField(
+        help_text=_("Archiver action being run (optimize_scores, remove_old_votes or export_static)")
+    )
+    state = serializers.ChoiceField(
+        choices=["queued", "running", "done", "failed"], help_text=_("State of the job")
+    )
+    processed = serializers.IntegerField(help_text=_("Number of items processed so far"))
+    total = serializers.IntegerField(help_text=_("Total number of items to process, if known"))
+
+
 class ArchiverStatusSerializer(serializers.Serializer[Any]):
     """Serializer for archiver status response."""
 
@@ -16,3 +29,6 @@ class ArchiverStatusSerializer(serializers.Serializer[Any]):
         help_text=_("Whether voting results need to be pre-calculated (archive_score/archive_rank not set)")
     )
     old_votes_found = serializers.BooleanField(help_text=_("Whether there are old vote records to clean up"))
+    job = ArchiverJobSerializer(
+        allow_null=True, help_text=_("Current or most recently finished background job, if any")
+    )
@@ -1,6 +1,10 @@
-from rest_framework.fields import SerializerMethodField
+from typing import Any
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework.fields import SerializerMethodField, UUIDField
 from rest_framework.serializers import ModelSerializer
 
+from Instanssi.api.v2.utils.entry_uploads import validate_upload_fields
 from Instanssi.api.v2.utils.youtube_url_field import YoutubeUrlField
 from Instanssi.kompomaatti.models import Entry
 
@@ -19,6 +23,16 @@ class CompoEntrySerializer(ModelSerializer[Entry]):
     computed_rank = SerializerMethodField()
     computed_score = SerializerMethodField()
     alternate_files = AlternateEntryFileSerializer(many=True, read_only=True)
+    entryfile_upload = UUIDField(
+        write_only=True, required=False, help_text=_("Id of a complete upload to use as the entry file")
+    )
+    sourcefile_upload = UUIDField(
+        write_only=True, required=False, help_text=_("Id of a complete upload to use as the source file")
+    )
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        validate_upload_fields(attrs, require_entryfile=self.instance is None)
+        return attrs
 
     def get_entryfile_url(self, obj: Entry) -> str | None:
         if obj.entryfile:
@@ -66,6 +80,8 @@ class CompoEntrySerializer(ModelSerializer[Entry]):
             "order_index",
             "entryfile",
             "sourcefile",
+            "entryfile_upload",
+            "sourcefile_upload",
             "imagefile_original",
             "entryfile_url",
             "sourcefile_url",
@@ -81,6 +97,14 @@ class CompoEntrySerializer(ModelSerializer[Entry]):
             "computed_score",
             "computed_rank",
             "alternate_files",
+            "loudness",
+            "true_peak",
+            "entryfile_hash",
+            "entryfile_size",
+            "sourcefile_hash",
+            "sourcefile_size",
+            "imagefile_hash",
+            "imagefile_size",
         )
         read_only_fields = (
             "entryfile_url",
@@ -91,8 +115,18 @@ class CompoEntrySerializer(ModelSerializer[Entry]):
             "computed_score",
             "computed_rank",
             "alternate_files",
+            "loudness",
+            "true_peak",
+            "entryfile_hash",
+            "entryfile_size",
+            "sourcefile_hash",
+            "sourcefile_size",
+            "imagefile_hash",
+            "imagefile_size",
         )
         extra_kwargs = {
+            # Or entryfile_upload (checked in validate())
+            "entryfile": {"required": False},
             # allow_null=True lets DRF convert empty string to None for clearing
             "sourcefile": {"required": False, "allow_null": True},
             "imagefile_original": {"required": False, "allow_null": True},
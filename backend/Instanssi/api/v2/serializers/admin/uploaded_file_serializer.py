@@ -19,6 +19,8 @@ class UploadedFileSerializer(ModelSerializer[UploadedFile]):
             "file",
             "file_url",
             "filename",
+            "file_hash",
+            "file_size",
             "date",
         )
         read_only_fields = (
@@ -26,6 +28,8 @@ class UploadedFileSerializer(ModelSerializer[UploadedFile]):
             "event",  # Set from URL, not request body
             "file_url",
             "filename",
+            "file_hash",
+            "file_size",
             "date",
         )
 
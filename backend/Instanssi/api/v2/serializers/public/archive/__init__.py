@@ -1,7 +1,9 @@
+from .entry_search_result_serializer import PublicEntrySearchResultSerializer
 from .other_video_category_serializer import PublicOtherVideoCategorySerializer
 from .other_video_serializer import PublicOtherVideoSerializer
 
 __all__ = [
+    "PublicEntrySearchResultSerializer",
     "PublicOtherVideoCategorySerializer",
     "PublicOtherVideoSerializer",
 ]
@@ -0,0 +1,39 @@
+from rest_framework.fields import FloatField, IntegerField, SerializerMethodField
+from rest_framework.serializers import CharField, ModelSerializer
+
+from Instanssi.kompomaatti.models import Entry
+
+
+class PublicEntrySearchResultSerializer(ModelSerializer[Entry]):
+    """Public serializer for archive search results.
+
+    Results are filtered rows, so rank and score are left out (use the compo entries endpoint
+    for those). search_rank tells how well the entry matched the query, higher is better.
+    """
+
+    event = IntegerField(source="compo.event_id", read_only=True)
+    event_name = CharField(source="compo.event.name", read_only=True)
+    compo_name = CharField(source="compo.name", read_only=True)
+    imagefile_thumbnail_url = SerializerMethodField()
+    search_rank = FloatField(read_only=True)
+
+    def get_imagefile_thumbnail_url(self, obj: Entry) -> str | None:
+        if obj.imagefile_thumbnail:
+            return str(self.context["request"].build_absolute_uri(obj.imagefile_thumbnail.url))
+        return None
+
+    class Meta:
+        model = Entry
+        fields = (
+            "id",
+            "event",
+            "event_name",
+            "compo",
+            "compo_name",
+            "name",
+            "creator",
+            "platform",
+            "description",
+            "imagefile_thumbnail_url",
+            "search_rank",
+        )
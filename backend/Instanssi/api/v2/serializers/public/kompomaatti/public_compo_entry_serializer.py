@@ -26,6 +26,8 @@ class PublicCompoEntrySerializer(ModelSerializer[Entry]):
     disqualified = SerializerMethodField()
     disqualified_reason = SerializerMethodField()
     alternate_files = PublicAlternateEntryFileSerializer(many=True, read_only=True)
+    waveform_url = SerializerMethodField()
+    playback_gain = SerializerMethodField()
 
     def get_imagefile_original_url(self, obj: Entry) -> str | None:
         if obj.imagefile_original:
@@ -42,6 +44,14 @@ class PublicCompoEntrySerializer(ModelSerializer[Entry]):
             return str(self.context["request"].build_absolute_uri(obj.imagefile_thumbnail.url))
         return None
 
+    def get_waveform_url(self, obj: Entry) -> str | None:
+        if obj.waveformfile:
+            return str(self.context["request"].build_absolute_uri(obj.waveformfile.url))
+        return None
+
+    def get_playback_gain(self, obj: Entry) -> float | None:
+        return obj.playback_gain
+
     def get_computed_rank(self, obj: Entry) -> int | None:
         if obj.compo.show_voting_results:
             return obj.computed_rank
@@ -81,4 +91,8 @@ class PublicCompoEntrySerializer(ModelSerializer[Entry]):
             "computed_score",
             "computed_rank",
             "alternate_files",
+            "waveform_url",
+            "loudness",
+            "true_peak",
+            "playback_gain",
         )
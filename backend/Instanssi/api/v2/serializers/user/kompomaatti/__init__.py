@@ -2,6 +2,7 @@ from .user_competition_participation_serializer import (
     UserCompetitionParticipationSerializer,
 )
 from .user_compo_entry_serializer import UserCompoEntrySerializer
+from .user_entry_upload_serializer import UserEntryUploadSerializer
 from .user_ticket_vote_code_serializer import UserTicketVoteCodeSerializer
 from .user_vote_code_request_serializer import UserVoteCodeRequestSerializer
 from .user_vote_group_serializer import UserVoteGroupSerializer
@@ -9,6 +10,7 @@ from .user_vote_group_serializer import UserVoteGroupSerializer
 __all__ = [
     "UserCompoEntrySerializer",
     "UserCompetitionParticipationSerializer",
+    "UserEntryUploadSerializer",
     "UserTicketVoteCodeSerializer",
     "UserVoteCodeRequestSerializer",
     "UserVoteGroupSerializer",
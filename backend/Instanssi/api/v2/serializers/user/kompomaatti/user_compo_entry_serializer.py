@@ -1,9 +1,13 @@
-from rest_framework.fields import SerializerMethodField
+from typing import Any
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework.fields import SerializerMethodField, UUIDField
 from rest_framework.serializers import ModelSerializer
 
 from Instanssi.api.v2.serializers.admin.kompomaatti.alternate_entry_file_serializer import (
     AlternateEntryFileSerializer,
 )
+from Instanssi.api.v2.utils.entry_uploads import validate_upload_fields
 from Instanssi.api.v2.utils.youtube_url_field import YoutubeUrlField
 from Instanssi.kompomaatti.models import Entry
 
@@ -22,6 +26,16 @@ class UserCompoEntrySerializer(ModelSerializer[Entry]):
     disqualified = SerializerMethodField()
     disqualified_reason = SerializerMethodField()
     alternate_files = AlternateEntryFileSerializer(many=True, read_only=True)
+    entryfile_upload = UUIDField(
+        write_only=True, required=False, help_text=_("Id of a complete upload to use as the entry file")
+    )
+    sourcefile_upload = UUIDField(
+        write_only=True, required=False, help_text=_("Id of a complete upload to use as the source file")
+    )
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        validate_upload_fields(attrs, require_entryfile=self.instance is None)
+        return attrs
 
     def get_entryfile_url(self, obj: Entry) -> str | None:
         # User can always see their own entry files
@@ -81,6 +95,8 @@ class UserCompoEntrySerializer(ModelSerializer[Entry]):
             "platform",
             "entryfile",
             "sourcefile",
+            "entryfile_upload",
+            "sourcefile_upload",
             "imagefile_original",
             "entryfile_url",
             "sourcefile_url",
@@ -96,7 +112,8 @@ class UserCompoEntrySerializer(ModelSerializer[Entry]):
         )
         extra_kwargs = {
             "id": {"read_only": True},
-            "entryfile": {"write_only": True},
+            # Or entryfile_upload (checked in validate())
+            "entryfile": {"write_only": True, "required": False},
             # allow_null=True lets DRF convert empty string to None for clearing
             "sourcefile": {"write_only": True, "required": False, "allow_null": True},
             "imagefile_original": {"write_only": True, "required": False, "allow_null": True},
@@ -0,0 +1,31 @@
+from rest_framework.fields import SerializerMethodField
+from rest_framework.serializers import ModelSerializer
+
+from Instanssi.kompomaatti.models import EntryUpload
+
+
+class UserEntryUploadSerializer(ModelSerializer[EntryUpload]):
+    """Serializer for the user's own resumable uploads of entry files.
+
+    The file itself is sent in chunks after the upload is created. The offset is the number of
+    bytes received so far, and the upload is complete once it reaches the size.
+
+    Field values:
+    - entryfile: Entry file
+    - sourcefile: Source code
+    """
+
+    offset = SerializerMethodField()
+
+    def get_offset(self, obj: EntryUpload) -> int:
+        return obj.offset
+
+    class Meta:
+        model = EntryUpload
+        fields = ("id", "compo", "field", "filename", "size", "offset", "created_at", "expires_at")
+        extra_kwargs = {
+            "id": {"read_only": True},
+            "size": {"min_value": 1},
+            "created_at": {"read_only": True},
+            "expires_at": {"read_only": True},
+        }
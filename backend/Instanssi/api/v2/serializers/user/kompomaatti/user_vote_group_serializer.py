@@ -1,12 +1,12 @@
 from django.utils.translation import gettext_lazy as _
 from rest_framework.serializers import (
+    IntegerField,
     ListField,
     ModelSerializer,
-    PrimaryKeyRelatedField,
     SerializerMethodField,
 )
 
-from Instanssi.kompomaatti.models import Entry, VoteGroup
+from Instanssi.kompomaatti.models import Compo, VoteGroup
 
 
 class UserVoteGroupSerializer(ModelSerializer[VoteGroup]):
@@ -17,9 +17,11 @@ class UserVoteGroupSerializer(ModelSerializer[VoteGroup]):
     Re-submitting votes replaces previous votes for the same compo.
     """
 
+    # Entry ids are validated against the cached votable entries of the compo in the viewset,
+    # instead of fetching every entry separately here.
     entries = ListField(
         min_length=1,
-        child=PrimaryKeyRelatedField(queryset=Entry.objects.all()),
+        child=IntegerField(),
         write_only=True,
         help_text=_("List of entry IDs in order of preference (first = highest rank)"),
     )
@@ -27,12 +29,15 @@ class UserVoteGroupSerializer(ModelSerializer[VoteGroup]):
 
     def get_voted_entries(self, obj: VoteGroup) -> list[int]:
         """Return the list of entry IDs in ranked order."""
-        return [entry.id for entry in obj.entries]
+        return list(obj.ranking)
 
     class Meta:
         model = VoteGroup
         fields = ("id", "compo", "entries", "voted_entries")
         extra_kwargs = {
             "id": {"read_only": True},
-            "compo": {"required": True},
+            "compo": {
+                "required": True,
+                "queryset": Compo.objects.select_related("event", "live_voting_state"),
+            },
         }
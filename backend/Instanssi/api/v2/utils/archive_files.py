@@ -0,0 +1,72 @@
+"""Checking the entry files of an event before they are downloaded as an archive.
+
+Media storage may be a network mount, where every stat() is a round trip. The files are checked by
+a pool of threads. Validating an archive always scans the files, and caches the results briefly,
+so that a download started right after it does not scan them again.
+"""
+
+import hashlib
+import stat
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Final, NamedTuple
+
+from django.core.cache import cache
+
+from Instanssi.kompomaatti.models import Entry
+
+# Files checked at once. Enough to hide the latency of a network mount, without flooding it.
+ARCHIVE_STAT_WORKERS: Final[int] = 16
+
+# Seconds the results are cached. Long enough to start a download after validating the archive.
+ARCHIVE_STAT_TIMEOUT: Final[int] = 60
+
+
+class FileStat(NamedTuple):
+    size: int
+    modified_at: float
+
+
+class ArchiveFile(NamedTuple):
+    entry: Entry
+    name: str  # Path in the archive
+    path: Path
+    size: int
+    modified_at: float
+
+
+def _stat_file(path: Path) -> FileStat | None:
+    try:
+        file_stat = path.stat()
+    except OSError:
+        return None
+    if not stat.S_ISREG(file_stat.st_mode):
+        return None
+    return FileStat(file_stat.st_size, file_stat.st_mtime)
+
+
+def stat_archive_files(event_id: int, paths: Sequence[Path], fresh: bool = False) -> list[FileStat | None]:
+    """Get the size and modification time of files, or None for the ones that are missing.
+
+    The results are cached by the list of paths. An entry file is renamed whenever it is replaced,
+    so the key changes along with the entries. Results with missing files are not cached, so that
+    a restored file is found on the next check.
+
+    Args:
+        fresh: Scan the files even if the results are cached. A file modified in place keeps its
+            path, so checks of file integrity must not trust cached results.
+    """
+    digest = hashlib.sha256("\n".join(str(path) for path in paths).encode()).hexdigest()
+    key = f"kompomaatti:archive-files:{event_id}:{digest}"
+    stats: list[FileStat | None] | None = None if fresh else cache.get(key)
+    if stats is not None:
+        return stats
+    if not paths:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(ARCHIVE_STAT_WORKERS, len(paths))) as pool:
+        stats = list(pool.map(_stat_file, paths))
+    if None not in stats:
+        cache.set(key, stats, ARCHIVE_STAT_TIMEOUT)
+    return stats
@@ -38,31 +38,9 @@ def validate_entry_files(
     if image_file and not compo.is_imagefile_allowed:
         raise ValidationError({"imagefile_original": [_("Image file is not allowed for this compo")]})
 
-    # File validation configuration per field
-    check_files_on = {
-        "entryfile": (
-            compo.entry_format_list,
-            compo.readable_entry_formats,
-            compo.max_entry_size,
-            compo.readable_max_entry_size,
-        ),
-        "sourcefile": (
-            compo.source_format_list,
-            compo.readable_source_formats,
-            compo.max_source_size,
-            compo.readable_max_source_size,
-        ),
-        "imagefile_original": (
-            compo.image_format_list,
-            compo.readable_image_formats,
-            compo.max_image_size,
-            compo.readable_max_image_size,
-        ),
-    }
-
     # Validate each file and aggregate errors
     errors = {}
-    for key, args in check_files_on.items():
+    for key, args in _get_file_limits(compo).items():
         if file := data.get(key):
             field_errors = _validate_file(file, *args, skip_size_check=skip_size_check)
             if field_errors:
@@ -78,6 +56,18 @@ def validate_entry_files(
         raise ValidationError(errors)
 
 
+def validate_entry_upload(
+    field: str, name: str, size: int, compo: Compo, *, skip_size_check: bool = False
+) -> None:
+    """Validate the name and size of a file before it is uploaded in chunks.
+
+    The complete file is validated again by validate_entry_files() when it is attached to an entry.
+    """
+    limits = _get_file_limits(compo)[field]
+    if errors := _validate_file_name_and_size(name, size, *limits, skip_size_check=skip_size_check):
+        raise ValidationError({"filename": errors})
+
+
 def maybe_copy_entry_to_image(instance: Entry) -> None:
     """If necessary, copy entry file to image file for thumbnail generation."""
     if instance.compo.is_imagefile_copied and instance.entryfile:
@@ -91,6 +81,30 @@ def maybe_copy_entry_to_image(instance: Entry) -> None:
         instance.imagefile_original.save(name, instance.entryfile)
 
 
+def _get_file_limits(compo: Compo) -> dict[str, tuple[list[str], str, int, str]]:
+    """Accepted formats and maximum size of each file field, also in human-readable form."""
+    return {
+        "entryfile": (
+            compo.entry_format_list,
+            compo.readable_entry_formats,
+            compo.max_entry_size,
+            compo.readable_max_entry_size,
+        ),
+        "sourcefile": (
+            compo.source_format_list,
+            compo.readable_source_formats,
+            compo.max_source_size,
+            compo.readable_max_source_size,
+        ),
+        "imagefile_original": (
+            compo.image_format_list,
+            compo.readable_image_formats,
+            compo.max_image_size,
+            compo.readable_max_image_size,
+        ),
+    }
+
+
 def _is_readable_image(file: File[Any]) -> bool:
     try:
         file.seek(0)
@@ -113,17 +127,38 @@ def _validate_file(
     skip_size_check: bool = False,
 ) -> list[str]:
     """Validate file size and format, returning list of error messages."""
+    return _validate_file_name_and_size(
+        file.name,
+        file.size,
+        accept_formats,
+        accept_formats_readable,
+        max_size,
+        max_readable_size,
+        skip_size_check=skip_size_check,
+    )
+
+
+def _validate_file_name_and_size(
+    name: str | None,
+    size: int | None,
+    accept_formats: list[str],
+    accept_formats_readable: str,
+    max_size: int,
+    max_readable_size: str,
+    *,
+    skip_size_check: bool = False,
+) -> list[str]:
     errors: list[str] = []
 
     # Check file size
-    if not skip_size_check and file.size is not None and file.size > max_size:
+    if not skip_size_check and size is not None and size > max_size:
         errors.append(_("Maximum allowed file size is %(size)s") % {"size": max_readable_size})
 
     # Check file extension — use all suffixes so that e.g. ".tar.gz" is
     # matched as "tar.gz" first, falling back to the last suffix alone ("gz").
-    if file.name:
-        all_ext = "".join(Path(file.name).suffixes).lower().lstrip(".")
-        last_ext = Path(file.name).suffix.lower().lstrip(".")
+    if name:
+        all_ext = "".join(Path(name).suffixes).lower().lstrip(".")
+        last_ext = Path(name).suffix.lower().lstrip(".")
         if all_ext not in accept_formats and last_ext not in accept_formats:
             errors.append(_("Allowed file types are %(types)s") % {"types": accept_formats_readable})
 
@@ -0,0 +1,68 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, Mapping
+
+from django.utils import timezone
+from django.utils.http import http_date
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import ValidationError
+
+from Instanssi.kompomaatti.misc.uploads import AssembledUpload
+from Instanssi.kompomaatti.models import Compo, EntryUpload
+from Instanssi.users.models import User
+
+UPLOAD_FIELDS = ("entryfile", "sourcefile")
+
+# Content type of the chunks of an upload, as in tus
+UPLOAD_CHUNK_CONTENT_TYPE = "application/offset+octet-stream"
+
+
+def get_upload_headers(upload: EntryUpload) -> dict[str, str]:
+    """State of an upload, in the headers tus clients look for."""
+    return {
+        "Upload-Offset": str(upload.offset),
+        "Upload-Length": str(upload.size),
+        "Upload-Expires": http_date(upload.expires_at.timestamp()),
+        "Cache-Control": "no-store",
+    }
+
+
+@contextmanager
+def attach_entry_uploads(data: dict[str, Any], user: User, compo: Compo) -> Iterator[None]:
+    """Put the files of complete uploads in place of the entryfile_upload and sourcefile_upload ids.
+
+    The files can then be validated and saved like regular uploads. Once the block finishes without
+    errors, the uploads are done with and are removed.
+    """
+    uploads: list[EntryUpload] = []
+    for field in UPLOAD_FIELDS:
+        if (upload_id := data.pop(f"{field}_upload", None)) is None:
+            continue
+        upload = EntryUpload.objects.filter(
+            pk=upload_id, user=user, compo=compo, field=field, expires_at__gt=timezone.now()
+        ).first()
+        if upload is None:
+            raise ValidationError({f"{field}_upload": [_("Upload not found")]})
+        if not upload.is_complete:
+            raise ValidationError({f"{field}_upload": [_("Upload is not complete")]})
+        uploads.append(upload)
+
+    files = [AssembledUpload(upload) for upload in uploads]
+    try:
+        for upload, file in zip(uploads, files):
+            data[upload.field] = file
+        yield
+    finally:
+        for file in files:
+            file.close()
+    for upload in uploads:
+        upload.delete()
+
+
+def validate_upload_fields(attrs: Mapping[str, Any], *, require_entryfile: bool) -> None:
+    """Check that each file of an entry is given either directly or as an upload, not both."""
+    for field in UPLOAD_FIELDS:
+        if attrs.get(field) and f"{field}_upload" in attrs:
+            raise ValidationError({f"{field}_upload": [_("Give either a file or an upload, not both")]})
+    if require_entryfile and not attrs.get("entryfile") and "entryfile_upload" not in attrs:
+        raise ValidationError({"entryfile": [_("This field is required.")]})
@@ -0,0 +1,41 @@
+"""Parsing of HTTP Range request headers (RFC 9110, section 14.2)."""
+
+import re
+
+_BYTE_RANGE = re.compile(r"bytes=([0-9]*)-([0-9]*)")
+
+
+class RangeNotSatisfiable(Exception):
+    """The requested range starts past the end of the content."""
+
+
+def parse_range_header(header: str | None, size: int) -> tuple[int, int] | None:
+    """Get the first and last byte requested by a Range header.
+
+    Only a single range of bytes is supported. For a missing or malformed header, or one that asks for
+    several ranges, None is returned, and the whole content should be sent.
+
+    Args:
+        header: Value of the Range header.
+        size: Size of the content in bytes.
+
+    Raises:
+        RangeNotSatisfiable: No byte of the range is within the content.
+    """
+    if not header or not (match := _BYTE_RANGE.fullmatch(header.strip())):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range, the last N bytes
+        if not last:
+            return None
+        if int(last) == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, end
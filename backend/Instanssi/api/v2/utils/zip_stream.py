@@ -1,36 +1,300 @@
+"""Streaming ZIP archives of files on disk, with a known size and support for byte ranges.
+
+Files are stored without compression in the ZIP64 format, so the size of every record follows from
+the member names and file sizes alone. ZipPlan lays the archive out from those before any file is
+read, which gives the response a Content-Length, and lets any byte range of the archive be generated
+by seeking straight to the member it starts in.
+
+The CRC-32 of each file goes to a data descriptor after the file data, so that the files are read only
+once when the whole archive is streamed. The checksums are cached on the way, so that the central
+directory at the end can be written on a resumed download without reading every file again.
+
+Responses should stream the archive with ZipPlan.astream(). Under ASGI, Django reads a synchronous
+iterator into a list before sending any of it, which would build the whole archive in memory.
+"""
+
+import hashlib
 import stat
-from collections.abc import Iterable, Iterator
+import zlib
+from collections.abc import AsyncIterator, Iterator, Sequence
 from datetime import UTC, datetime
 from pathlib import Path
+from struct import Struct
+from typing import Final, NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+# Size of the chunks files are read in
+CHUNK_SIZE: Final[int] = 65536
+
+# Seconds the checksums of files are cached. Long enough to resume a download on the next day.
+CRC32_CACHE_TIMEOUT: Final[int] = 24 * 60 * 60
+
+_LOCAL_HEADER = Struct("<4sHHH4sIIIHH")
+_ZIP64_LOCAL_EXTRA = Struct("<2sHQQ")
+_DATA_DESCRIPTOR = Struct("<4sIQQ")
+_CENTRAL_DIRECTORY_HEADER = Struct("<4sBBBBHH4sIIIHHHHHII")
+_ZIP64_CENTRAL_DIRECTORY_EXTRA = Struct("<2sHQQQ")
+_UNIX_TIME_EXTRA = Struct("<2sH1sl")
+_ZIP64_END_OF_CENTRAL_DIRECTORY = Struct("<4sQHHIIQQQQ")
+_ZIP64_END_OF_CENTRAL_DIRECTORY_LOCATOR = Struct("<4sIQI")
+_END_OF_CENTRAL_DIRECTORY = Struct("<4sHHHHIIH")
+_DOS_TIME = Struct("<HH")
+
+_VERSION: Final[int] = 45  # ZIP64
+_FLAGS: Final[int] = 0x0008 | 0x0800  # Sizes and CRC-32 in a data descriptor, UTF-8 names
+_EXTERNAL_ATTR: Final[int] = (stat.S_IFREG | 0o644) << 16
+_DOS_EPOCH: Final[datetime] = datetime(1980, 1, 1, tzinfo=UTC)
+_DOS_MAX: Final[datetime] = datetime(2107, 12, 31, 23, 59, 58, tzinfo=UTC)
+
+
+class ZipMember(NamedTuple):
+    name: str  # Path in the archive
+    path: Path
+    size: int
+    modified_at: float  # Timestamp
+
+
+class _PlannedMember(NamedTuple):
+    member: ZipMember
+    offset: int  # Of the local header
+    local_header: bytes
+    name: bytes
+    extra: bytes  # Extra fields shared by the local and central directory headers
+    dos_time: bytes
+
+    @property
+    def data_offset(self) -> int:
+        return self.offset + len(self.local_header)
+
+    @property
+    def descriptor_offset(self) -> int:
+        return self.data_offset + self.member.size
+
+    @property
+    def end(self) -> int:
+        return self.descriptor_offset + _DATA_DESCRIPTOR.size
 
-from stream_zip import NO_COMPRESSION_64, MemberFile, stream_zip
 
+def _slice(data: bytes, offset: int, start: int, stop: int) -> bytes:
+    """Get the part of data, found at offset in the archive, that is between start and stop."""
+    return data[max(start - offset, 0) : max(stop - offset, 0)]
 
-def generate_zip_stream(
-    files: Iterable[tuple[str, Path]],
-) -> Iterator[bytes]:
-    """Generate a streaming ZIP archive.
 
-    Args:
-        files: Iterable of (archive_name, file_path) tuples.
-            archive_name: Path within the archive (e.g., "dir/file.txt")
-            file_path: Path to the file on disk
+def _read_file(member: ZipMember, skip: int = 0, length: int | None = None) -> Iterator[bytes]:
+    """Read a file in chunks, failing if it is no longer the size it was planned with."""
+    remaining = member.size - skip if length is None else length
+    with member.path.open("rb") as fd:
+        fd.seek(skip)
+        while remaining > 0:
+            chunk = fd.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                raise OSError(f"File {member.path} was truncated while archiving")
+            remaining -= len(chunk)
+            yield chunk
 
-    Yields:
-        Chunks of ZIP data.
+
+def _next_chunk(chunks: Iterator[bytes]) -> bytes | None:
+    return next(chunks, None)
+
+
+def _crc32_cache_key(member: ZipMember) -> str:
+    digest = hashlib.sha256(f"{member.path}:{member.size}:{member.modified_at}".encode()).hexdigest()
+    return f"zip-stream:crc32:{digest}"
+
+
+def file_crc32(member: ZipMember) -> int:
+    """Get the CRC-32 of a file, from the cache if it has been read before."""
+    crc: int | None = cache.get(_crc32_cache_key(member))
+    if crc is None:
+        crc = 0
+        for chunk in _read_file(member):
+            crc = zlib.crc32(chunk, crc)
+        cache.set(_crc32_cache_key(member), crc, CRC32_CACHE_TIMEOUT)
+    return crc
+
+
+class ZipPlan:
+    """Layout of a ZIP archive of files, stored without compression.
+
+    Attributes:
+        size: Size of the archive in bytes.
+        etag: Strong entity tag of the archive. Changes when any member is renamed, resized or
+            modified, so that If-Range does not resume a download of an older archive.
     """
 
-    def _member_files() -> Iterator[MemberFile]:
-        for arcname, file_path in files:
-            file_stat = file_path.stat()
-            modified_at = datetime.fromtimestamp(file_stat.st_mtime, tz=UTC)
-            perms = stat.S_IFREG | 0o644
+    def __init__(self, members: Sequence[ZipMember]) -> None:
+        self._members: list[_PlannedMember] = []
+        etag = hashlib.sha256()
+        offset = 0
+        for member in members:
+            name = member.name.encode()
+            # MS-DOS times start from 1980, and the UNIX time field is 32 bits
+            modified_at = min(max(datetime.fromtimestamp(member.modified_at, tz=UTC), _DOS_EPOCH), _DOS_MAX)
+            dos_time = _DOS_TIME.pack(
+                modified_at.second // 2 | modified_at.minute << 5 | modified_at.hour << 11,
+                modified_at.day | modified_at.month << 5 | (modified_at.year - 1980) << 9,
+            )
+            extra = _UNIX_TIME_EXTRA.pack(b"UT", 5, b"\x01", min(max(int(member.modified_at), 0), 2**31 - 1))
+            # Sizes are in the data descriptor, so the ZIP64 extra field of the local header has zeros
+            local_extra = _ZIP64_LOCAL_EXTRA.pack(b"\x01\x00", 16, 0, 0) + extra
+            local_header = (
+                _LOCAL_HEADER.pack(
+                    b"PK\x03\x04",
+                    _VERSION,
+                    _FLAGS,
+                    0,  # Stored
+                    dos_time,
+                    0,  # CRC-32, in the data descriptor
+                    0xFFFFFFFF,  # Compressed size, in ZIP64 extra
+                    0xFFFFFFFF,  # Uncompressed size, in ZIP64 extra
+                    len(name),
+                    len(local_extra),
+                )
+                + name
+                + local_extra
+            )
+            planned = _PlannedMember(member, offset, local_header, name, extra, dos_time)
+            self._members.append(planned)
+            offset = planned.end
+            etag.update(f"{member.name}\0{member.size}\0{member.modified_at}\0".encode())
+
+        self._central_directory_offset = offset
+        self._central_directory_size = sum(
+            _CENTRAL_DIRECTORY_HEADER.size
+            + len(planned.name)
+            + _ZIP64_CENTRAL_DIRECTORY_EXTRA.size
+            + len(planned.extra)
+            for planned in self._members
+        )
+        self._end_records = self._pack_end_records()
+        self.size = self._central_directory_offset + self._central_directory_size + len(self._end_records)
+        self.etag = f'"{etag.hexdigest()[:32]}"'
+
+    def _pack_end_records(self) -> bytes:
+        count = len(self._members)
+        end_offset = self._central_directory_offset + self._central_directory_size
+        return (
+            _ZIP64_END_OF_CENTRAL_DIRECTORY.pack(
+                b"PK\x06\x06",
+                _ZIP64_END_OF_CENTRAL_DIRECTORY.size - 12,  # Size of the rest of the record
+                _VERSION,  # Made by
+                _VERSION,  # Needed
+                0,  # This disk
+                0,  # Disk of the central directory
+                count,  # On this disk
+                count,  # In total
+                self._central_directory_size,
+                self._central_directory_offset,
+            )
+            + _ZIP64_END_OF_CENTRAL_DIRECTORY_LOCATOR.pack(
+                b"PK\x06\x07",
+                0,  # Disk of the ZIP64 end of central directory
+                end_offset,
+                1,  # Number of disks
+            )
+            + _END_OF_CENTRAL_DIRECTORY.pack(
+                b"PK\x05\x06",
+                0xFFFF,  # This disk, in ZIP64 record
+                0xFFFF,  # Disk of the central directory, in ZIP64 record
+                0xFFFF,  # Entries on this disk, in ZIP64 record
+                0xFFFF,  # Entries in total, in ZIP64 record
+                0xFFFFFFFF,  # Size of the central directory, in ZIP64 record
+                0xFFFFFFFF,  # Offset of the central directory, in ZIP64 record
+                0,  # Comment length
+            )
+        )
+
+    def _pack_descriptor(self, planned: _PlannedMember, crc: int) -> bytes:
+        size = planned.member.size
+        return _DATA_DESCRIPTOR.pack(b"PK\x07\x08", crc, size, size)
+
+    def _pack_central_directory(self, crcs: dict[int, int]) -> bytes:
+        records = []
+        for index, planned in enumerate(self._members):
+            crc = crcs[index] if index in crcs else file_crc32(planned.member)
+            size = planned.member.size
+            extra = _ZIP64_CENTRAL_DIRECTORY_EXTRA.pack(b"\x01\x00", 24, size, size, planned.offset)
+            records.append(
+                _CENTRAL_DIRECTORY_HEADER.pack(
+                    b"PK\x01\x02",
+                    _VERSION,  # Made by
+                    3,  # On UNIX
+                    _VERSION,  # Needed
+                    0,
+                    _FLAGS,
+                    0,  # Stored
+                    planned.dos_time,
+                    crc,
+                    0xFFFFFFFF,  # Compressed size, in ZIP64 extra
+                    0xFFFFFFFF,  # Uncompressed size, in ZIP64 extra
+                    len(planned.name),
+                    len(extra) + len(planned.extra),
+                    0,  # Comment length
+                    0,  # Disk of the local header
+                    0,  # Internal attributes
+                    _EXTERNAL_ATTR,
+                    0xFFFFFFFF,  # Offset of the local header, in ZIP64 extra
+                )
+                + planned.name
+                + extra
+                + planned.extra
+            )
+        return b"".join(records)
+
+    def _stream_data(self, index: int, start: int, stop: int, crcs: dict[int, int]) -> Iterator[bytes]:
+        """Read the part of a member file that is between start and stop in the archive.
+
+        When the whole file is read, its CRC-32 is computed on the way, and stored in crcs by the
+        index of the member.
+        """
+        planned = self._members[index]
+        skip = max(start - planned.data_offset, 0)
+        length = min(stop - planned.data_offset, planned.member.size) - skip
+        whole = skip == 0 and length == planned.member.size
+        crc = 0
+        for chunk in _read_file(planned.member, skip, length):
+            if whole:
+                crc = zlib.crc32(chunk, crc)
+            yield chunk
+        if whole:
+            crcs[index] = crc
+            cache.set(_crc32_cache_key(planned.member), crc, CRC32_CACHE_TIMEOUT)
+
+    def stream(self, first: int = 0, last: int | None = None) -> Iterator[bytes]:
+        """Generate the archive, or the bytes from first to last (inclusive) of it.
 
-            def _read_chunks(p: Path = file_path) -> Iterator[bytes]:
-                with p.open("rb") as f:
-                    while chunk := f.read(65536):
-                        yield chunk
+        Members that end before first are skipped without reading them. Checksums needed for the
+        requested bytes that were not computed on the way are read from the cache, or from the files.
+        """
+        start = first
+        stop = self.size if last is None else last + 1
+        crcs: dict[int, int] = {}
+        for index, planned in enumerate(self._members):
+            if planned.end <= start:
+                continue
+            if planned.offset >= stop:
+                return
+            if chunk := _slice(planned.local_header, planned.offset, start, stop):
+                yield chunk
+            if planned.data_offset < stop and planned.descriptor_offset > start:
+                yield from self._stream_data(index, start, stop, crcs)
+            if planned.descriptor_offset < stop:
+                crc = crcs[index] if index in crcs else file_crc32(planned.member)
+                yield _slice(self._pack_descriptor(planned, crc), planned.descriptor_offset, start, stop)
 
-            yield arcname, modified_at, perms, NO_COMPRESSION_64, _read_chunks()
+        if self._central_directory_offset < stop:
+            central_directory = self._pack_central_directory(crcs)
+            if chunk := _slice(central_directory, self._central_directory_offset, start, stop):
+                yield chunk
+            end_records_offset = self._central_directory_offset + len(central_directory)
+            if chunk := _slice(self._end_records, end_records_offset, start, stop):
+                yield chunk
 
-    yield from stream_zip(_member_files())
+    async def astream(self, first: int = 0, last: int | None = None) -> AsyncIterator[bytes]:
+        """Generate the archive like stream(), reading the files a chunk at a time in a worker thread."""
+        chunks = self.stream(first, last)
+        read_chunk = sync_to_async(_next_chunk, thread_sensitive=False)
+        while (chunk := await read_chunk(chunks)) is not None:
+            yield chunk
@@ -1,6 +1,5 @@
 import logging
 
-from django.db.models import QuerySet
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import extend_schema
 from rest_framework import status
@@ -11,15 +10,15 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
 from Instanssi.api.v2.serializers.admin.arkisto import ArchiverStatusSerializer
-from Instanssi.arkisto import utils
-from Instanssi.kompomaatti.models import (
-    CompetitionParticipation,
-    Compo,
-    Entry,
-    Event,
-    Vote,
-    VoteGroup,
+from Instanssi.arkisto import export, utils
+from Instanssi.arkisto.jobs import get_archiver_job, queue_archiver_job
+from Instanssi.arkisto.tasks import (
+    export_event_static,
+    optimize_event_scores,
+    remove_event_votes,
+    update_static_archive,
 )
+from Instanssi.kompomaatti.models import CompetitionParticipation, Entry, Event
 from Instanssi.users.models import User
 
 logger = logging.getLogger(__name__)
@@ -34,6 +33,7 @@ class ArchiverViewSet(ViewSet):
     - Optimize voting scores (pre-calculate ranks)
     - Remove old vote records
     - Transfer entry/participation rights to archive user
+    - Export static archive pages for nginx
     """
 
     permission_classes = [IsAdminUser, IsAuthenticated]
@@ -44,44 +44,26 @@ class ArchiverViewSet(ViewSet):
         event_id = int(self.kwargs["event_pk"])
         return get_object_or_404(Event, pk=event_id)
 
-    def get_compos(self, event: Event) -> QuerySet[Compo]:
-        """Get compos for the event."""
-        return Compo.objects.filter(event=event)
-
-    def _build_status_response(self) -> Response:
+    def _build_status_response(self, event: Event, status_code: int = status.HTTP_200_OK) -> Response:
         """Build and return the archiver status response."""
-        event = self.get_event()
-        compos = self.get_compos(event)
-
-        # Check if there are any compo/competition entries not owned by archive user
-        try:
-            archive_user = User.objects.get(username="arkisto")
-            has_non_archived_items = (
-                Entry.objects.filter(compo__in=compos).exclude(user=archive_user).exists()
-            )
-            if not has_non_archived_items:
-                has_non_archived_items = (
-                    CompetitionParticipation.objects.filter(competition__event=event)
-                    .exclude(user=archive_user)
-                    .exists()
-                )
-        except User.DoesNotExist:
-            # If archive user doesn't exist, all items are "non-archived"
-            has_non_archived_items = (
-                Entry.objects.filter(compo__in=compos).exists()
-                or CompetitionParticipation.objects.filter(competition__event=event).exists()
-            )
-
+        lifecycle = utils.get_event_lifecycle_status(event)
         data = {
             "is_archived": event.archived,
-            "has_non_archived_items": has_non_archived_items,
-            "ongoing_activity": utils.is_event_ongoing(event),
-            "votes_unoptimized": utils.is_votes_unoptimized(compos),
-            "old_votes_found": Vote.objects.filter(compo__in=compos).exists(),
+            "has_non_archived_items": lifecycle.has_non_archived_items,
+            "ongoing_activity": lifecycle.ongoing,
+            "votes_unoptimized": lifecycle.votes_unoptimized,
+            "old_votes_found": lifecycle.old_votes_found,
+            "job": get_archiver_job(event.id),
         }
 
         serializer = ArchiverStatusSerializer(data)
-        return Response(serializer.data)
+        return Response(serializer.data, status=status_code)
+
+    def _job_conflict_response(self) -> Response:
+        return Response(
+            {"detail": "Another archiver job is already running for this event"},
+            status=status.HTTP_409_CONFLICT,
+        )
 
     @extend_schema(
         responses={200: ArchiverStatusSerializer},
@@ -91,7 +73,7 @@ class ArchiverViewSet(ViewSet):
     @action(detail=False, methods=["get"], url_path="status")
     def status(self, request: Request, event_pk: int) -> Response:
         """Get archiver status for the event."""
-        return self._build_status_response()
+        return self._build_status_response(self.get_event())
 
     @extend_schema(
         request=None,
@@ -108,8 +90,10 @@ class ArchiverViewSet(ViewSet):
         event = self.get_event()
         event.archived = True
         event.save()
+        if export.is_export_enabled():
+            update_static_archive.delay()
         logger.info("Event set as visible in archive", extra={"user": request.user, "event": event})
-        return self._build_status_response()
+        return self._build_status_response(event)
 
     @extend_schema(
         request=None,
@@ -126,14 +110,16 @@ class ArchiverViewSet(ViewSet):
         event = self.get_event()
         event.archived = False
         event.save()
+        if export.is_export_enabled():
+            update_static_archive.delay()
         logger.info("Event set as hidden in archive", extra={"user": request.user, "event": event})
-        return self._build_status_response()
+        return self._build_status_response(event)
 
     @extend_schema(
         request=None,
-        responses={200: ArchiverStatusSerializer},
+        responses={202: ArchiverStatusSerializer},
         summary="Optimize voting scores",
-        description="Pre-calculates and stores entry ranks and scores. Cannot be run while event is ongoing.",
+        description="Starts a background job that pre-calculates and stores entry ranks and scores. Progress is reported in the archiver status. Cannot be run while event is ongoing.",
     )
     @action(detail=False, methods=["post"], url_path="optimize-scores")
     def optimize_scores(self, request: Request, event_pk: int) -> Response:
@@ -150,52 +136,48 @@ class ArchiverViewSet(ViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Set score and rank to database
-        entries = Entry.objects.filter(compo__event=event).with_rank()
-        for entry in entries:
-            entry.archive_rank = entry.computed_rank
-            entry.archive_score = entry.computed_score
-            entry.save()
+        if not queue_archiver_job(event.id, "optimize_scores"):
+            return self._job_conflict_response()
+        optimize_event_scores.delay(event.id)
 
-        logger.info("Event scores optimized", extra={"user": request.user, "event": event})
-        return self._build_status_response()
+        logger.info("Event score optimization started", extra={"user": request.user, "event": event})
+        return self._build_status_response(event, status.HTTP_202_ACCEPTED)
 
     @extend_schema(
         request=None,
-        responses={200: ArchiverStatusSerializer},
+        responses={202: ArchiverStatusSerializer},
         summary="Remove old votes",
-        description="Deletes vote records after scores have been optimized. Cannot be run while event is ongoing or if scores are not optimized.",
+        description="Starts a background job that deletes vote records after scores have been optimized. Progress is reported in the archiver status. Cannot be run while event is ongoing or if scores are not optimized.",
     )
     @action(detail=False, methods=["post"], url_path="remove-old-votes")
     def remove_old_votes(self, request: Request, event_pk: int) -> Response:
-        """Remove old vote records. Requires kompomaatti.delete_vote permission."""
-        if not request.user.has_perm("kompomaatti.delete_vote"):
+        """Remove old vote records. Requires kompomaatti.delete_votegroup permission."""
+        if not request.user.has_perm("kompomaatti.delete_votegroup"):
             return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
 
         event = self.get_event()
-        compos = self.get_compos(event)
+        lifecycle = utils.get_event_lifecycle_status(event)
 
         # Don't proceed if the event is still ongoing
-        if utils.is_event_ongoing(event):
+        if lifecycle.ongoing:
             return Response(
                 {"detail": "Cannot remove votes while event is ongoing"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
         # Don't allow removing votes if votes haven't yet been consolidated
-        if utils.is_votes_unoptimized(compos):
+        if lifecycle.votes_unoptimized:
             return Response(
                 {"detail": "Scores must be optimized before removing votes"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Delete votes belonging to compos in this event
-        for group in VoteGroup.objects.filter(compo__in=compos):
-            group.delete_votes()
-            group.delete()
+        if not queue_archiver_job(event.id, "remove_old_votes"):
+            return self._job_conflict_response()
+        remove_event_votes.delay(event.id)
 
-        logger.info("Event old votes removed", extra={"user": request.user, "event": event})
-        return self._build_status_response()
+        logger.info("Event old vote removal started", extra={"user": request.user, "event": event})
+        return self._build_status_response(event, status.HTTP_202_ACCEPTED)
 
     @extend_schema(
         request=None,
@@ -219,9 +201,41 @@ class ArchiverViewSet(ViewSet):
             )
 
         # Transfer all user rights on entries and competition participations
-        archive_user = get_object_or_404(User, username="arkisto")
+        archive_user = get_object_or_404(User, username=utils.ARCHIVE_USERNAME)
         Entry.objects.filter(compo__event=event).update(user=archive_user)
         CompetitionParticipation.objects.filter(competition__event=event).update(user=archive_user)
 
         logger.info("Event rights transferred", extra={"user": request.user, "event": event})
-        return self._build_status_response()
+        return self._build_status_response(event)
+
+    @extend_schema(
+        request=None,
+        responses={202: ArchiverStatusSerializer},
+        summary="Export static archive pages",
+        description="Starts a background job that pre-renders the public archive pages of the event into static files served by nginx. Progress is reported in the archiver status. The event must be visible in the archive, and the export must be enabled in the settings.",
+    )
+    @action(detail=False, methods=["post"], url_path="export-static")
+    def export_static(self, request: Request, event_pk: int) -> Response:
+        """Export static archive pages. Requires kompomaatti.change_event permission."""
+        if not request.user.has_perm("kompomaatti.change_event"):
+            return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+
+        event = self.get_event()
+
+        if not export.is_export_enabled():
+            return Response(
+                {"detail": "Static archive export is not enabled"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not event.archived:
+            return Response(
+                {"detail": "Only events visible in the archive can be exported"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not queue_archiver_job(event.id, "export_static"):
+            return self._job_conflict_response()
+        export_event_static.delay(event.id)
+
+        logger.info("Event static export started", extra={"user": request.user, "event": event})
+        return self._build_status_response(event, status.HTTP_202_ACCEPTED)
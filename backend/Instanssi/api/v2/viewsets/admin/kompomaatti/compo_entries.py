@@ -1,7 +1,7 @@
 from pathlib import Path
 
 from django.db.models import QuerySet
-from django.http import StreamingHttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext as _
 from drf_spectacular.utils import OpenApiParameter, extend_schema, inline_serializer
@@ -13,14 +13,19 @@ from rest_framework.response import Response
 from rest_framework.serializers import BaseSerializer
 
 from Instanssi.api.v2.serializers.admin.kompomaatti import CompoEntrySerializer
+from Instanssi.api.v2.utils.archive_files import ArchiveFile, stat_archive_files
 from Instanssi.api.v2.utils.base import PermissionViewSet
 from Instanssi.api.v2.utils.entry_file_validation import (
     maybe_copy_entry_to_image,
     validate_entry_files,
 )
-from Instanssi.api.v2.utils.zip_stream import generate_zip_stream
-from Instanssi.common.file_handling import clean_filename
+from Instanssi.api.v2.utils.entry_uploads import attach_entry_uploads
+from Instanssi.api.v2.utils.http_range import RangeNotSatisfiable, parse_range_header
+from Instanssi.api.v2.utils.zip_stream import ZipMember, ZipPlan
+from Instanssi.common.file_handling import clean_filename, file_sha256
 from Instanssi.kompomaatti.models import Compo, Entry, Event
+from Instanssi.kompomaatti.querysets import EntryQuerySet
+from Instanssi.users.models import User
 
 
 class CompoEntryViewSet(PermissionViewSet):
@@ -45,7 +50,8 @@ class CompoEntryViewSet(PermissionViewSet):
         "order_index",
     )
     search_fields = ("name", "creator", "description")
-    filterset_fields = ("compo", "disqualified", "user")
+    # Entries with the same entryfile_hash are duplicates
+    filterset_fields = ("compo", "disqualified", "user", "entryfile_hash")
 
     def get_queryset(self) -> QuerySet[Entry]:
         """Filter entries by event from URL."""
@@ -72,10 +78,13 @@ class CompoEntryViewSet(PermissionViewSet):
         return self.request.query_params.get("skip_size_check") == "true"
 
     def perform_create(self, serializer: BaseSerializer[Entry]) -> None:  # type: ignore[override]
-        if compo := serializer.validated_data.get("compo"):
-            self.validate_compo_belongs_to_event(compo)
+        compo = serializer.validated_data["compo"]
+        self.validate_compo_belongs_to_event(compo)
+        # Uploads are the staff member's own, see UserEntryUploadViewSet
+        user: User = self.request.user  # type: ignore[assignment]
+        with attach_entry_uploads(serializer.validated_data, user, compo):
             validate_entry_files(serializer.validated_data, compo, skip_size_check=self._skip_size_check())
-        instance = serializer.save()
+            instance = serializer.save()
         maybe_copy_entry_to_image(instance)
         self._refresh_with_annotations(serializer)
 
@@ -84,13 +93,15 @@ class CompoEntryViewSet(PermissionViewSet):
         if new_compo := serializer.validated_data.get("compo"):
             if new_compo.id != serializer.instance.compo_id:
                 raise serializers.ValidationError({"compo": [_("Cannot change compo after creation")]})
-        validate_entry_files(
-            serializer.validated_data,
-            serializer.instance.compo,
-            serializer.instance,
-            skip_size_check=self._skip_size_check(),
-        )
-        instance = serializer.save()
+        user: User = self.request.user  # type: ignore[assignment]
+        with attach_entry_uploads(serializer.validated_data, user, serializer.instance.compo):
+            validate_entry_files(
+                serializer.validated_data,
+                serializer.instance.compo,
+                serializer.instance,
+                skip_size_check=self._skip_size_check(),
+            )
+            instance = serializer.save()
         maybe_copy_entry_to_image(instance)
         self._refresh_with_annotations(serializer)
 
@@ -148,42 +159,73 @@ class CompoEntryViewSet(PermissionViewSet):
             return f"{entry.order_index:05d}"
         return f"{entry.id:05d}"
 
+    def _get_archive_queryset(self, event_pk: int) -> EntryQuerySet:
+        return (
+            self.queryset.filter(compo__event_id=event_pk)
+            .filter(disqualified=False)
+            .exclude(entryfile="")
+            .select_related("compo")
+        )
+
+    def _find_changed_files(self, files: list[ArchiveFile], verify: bool = False) -> list[str]:
+        """Check entry files against the size and hash recorded when they were saved.
+
+        Sizes are compared to the ones found by _collect_archive_files(). Only when verify is set,
+        the files are read and hashed. Files saved before hashes were recorded are skipped.
+
+        Returns:
+            Human-readable descriptions of entries whose files have changed.
+        """
+        changed_files: list[str] = []
+        for file in files:
+            entry = file.entry
+            if entry.entryfile_size is None:
+                continue
+            changed = file.size != entry.entryfile_size
+            if not changed and verify and entry.entryfile_hash:
+                with entry.entryfile.open("rb") as fd:
+                    changed = file_sha256(fd) != entry.entryfile_hash
+            if changed:
+                changed_files.append(f"[{entry.compo.name}] Entry {entry.id}: {entry.name}")
+        return changed_files
+
     def _collect_archive_files(
-        self, event_pk: int, prefix_mode: str = "id"
-    ) -> tuple[list[tuple[str, Path]], list[str]]:
+        self, event_pk: int, prefix_mode: str = "id", fresh: bool = False
+    ) -> tuple[list[ArchiveFile], list[str]]:
         """Collect entry files for archiving and check for missing files.
 
         Returns a tuple of (files, missing_files) where files is a list of
-        (archive_name, file_path) tuples and missing_files is a list of
-        human-readable descriptions of entries with missing files on disk.
+        ArchiveFile tuples with the archive name, path and size of each file,
+        and missing_files is a list of human-readable descriptions of entries
+        with missing files on disk. The files are checked in parallel, and the
+        results are cached for a while (see stat_archive_files()).
 
         Args:
             event_pk: Event primary key.
             prefix_mode: Filename prefix mode - "id" (default), "rank", or "order".
+            fresh: Check the files even if the results are cached.
         """
-        base_queryset = (
-            self.queryset.filter(compo__event_id=event_pk)
-            .filter(disqualified=False)
-            .exclude(entryfile="")
-            .select_related("compo")
-        )
+        base_queryset = self._get_archive_queryset(event_pk)
         if prefix_mode == "rank":
             base_queryset = base_queryset.with_rank()
         elif prefix_mode == "order":
             base_queryset = base_queryset.order_by("compo", "order_index")
-        queryset = self.filter_queryset(base_queryset)
+        entries = list(self.filter_queryset(base_queryset))
+        paths = [Path(entry.entryfile.path) for entry in entries]
+        stats = stat_archive_files(event_pk, paths, fresh)
 
-        files: list[tuple[str, Path]] = []
+        files: list[ArchiveFile] = []
         missing_files: list[str] = []
 
-        for entry in queryset.iterator():
-            file_path = Path(entry.entryfile.path)
-            if not file_path.is_file():
+        for entry, file_path, file_stat in zip(entries, paths, stats):
+            if file_stat is None:
                 missing_files.append(f"[{entry.compo.name}] Entry {entry.id}: {entry.name}")
             else:
                 prefix = self._get_entry_prefix(entry, prefix_mode)
                 archive_name = f"{clean_filename(entry.compo.name)}/{prefix}__{file_path.name}"
-                files.append((archive_name, file_path))
+                files.append(
+                    ArchiveFile(entry, archive_name, file_path, file_stat.size, file_stat.modified_at)
+                )
 
         return files, missing_files
 
@@ -196,6 +238,11 @@ class CompoEntryViewSet(PermissionViewSet):
                 description="Filename prefix mode: 'id' (default), 'rank', or 'order'",
                 enum=["id", "rank", "order"],
             ),
+            OpenApiParameter(
+                "verify",
+                bool,
+                description="Also read the files and compare them to their SHA-256 hashes",
+            ),
         ],
         responses={
             200: inline_serializer(
@@ -203,6 +250,7 @@ class CompoEntryViewSet(PermissionViewSet):
                 fields={
                     "ok": serializers.BooleanField(),
                     "count": serializers.IntegerField(),
+                    "size": serializers.IntegerField(help_text="Total size of the files in bytes"),
                 },
             ),
             400: inline_serializer(
@@ -215,22 +263,28 @@ class CompoEntryViewSet(PermissionViewSet):
         },
         summary="Validate entry files archive",
         description=(
-            "Checks that all entry files exist on disk before downloading. "
+            "Checks that all entry files exist on disk before downloading, and that their sizes "
+            "match the ones recorded when they were uploaded. With verify=true, the files are also "
+            "hashed and compared to their recorded SHA-256. "
             "Call this before download-archive to get actionable error messages."
         ),
     )
     @action(detail=False, methods=["get"], url_path="validate-archive")
     def validate_archive(self, request: Request, event_pk: int = 0) -> Response:
-        """Validate that all entry files are present on disk.
+        """Validate that all entry files are present on disk and unchanged.
 
-        Returns 200 with entry count on success, or 400 with details about
-        missing files. Supports the same query parameters as download-archive.
+        Returns 200 with entry count and total size on success, or 400 with details about
+        missing or changed files. Supports the same query parameters as
+        download-archive, and verify=true to compare the file contents to
+        their recorded hashes.
         """
         get_object_or_404(Event, pk=event_pk)
         prefix_mode = request.query_params.get("prefix", "id")
         if prefix_mode not in self.ARCHIVE_PREFIX_CHOICES:
             prefix_mode = "id"
-        files, missing_files = self._collect_archive_files(event_pk, prefix_mode)
+        # Files may have been modified in place since they were last checked, so never trust the
+        # cache here. The fresh results are cached for the download that follows.
+        files, missing_files = self._collect_archive_files(event_pk, prefix_mode, fresh=True)
 
         if missing_files:
             return Response(
@@ -238,7 +292,14 @@ class CompoEntryViewSet(PermissionViewSet):
                 status=400,
             )
 
-        return Response({"ok": True, "count": len(files)})
+        verify = request.query_params.get("verify") == "true"
+        if changed_files := self._find_changed_files(files, verify):
+            return Response(
+                {"error": "Entry files have changed on disk", "entries": changed_files},
+                status=400,
+            )
+
+        return Response({"ok": True, "count": len(files), "size": sum(file.size for file in files)})
 
     @extend_schema(
         parameters=[
@@ -249,19 +310,41 @@ class CompoEntryViewSet(PermissionViewSet):
                 description="Filename prefix mode: 'id' (default), 'rank', or 'order'",
                 enum=["id", "rank", "order"],
             ),
+            OpenApiParameter(
+                "Range",
+                str,
+                OpenApiParameter.HEADER,
+                description="Single byte range of the archive to download, e.g. 'bytes=1000-'",
+            ),
+            OpenApiParameter(
+                "If-Range",
+                str,
+                OpenApiParameter.HEADER,
+                description="ETag of the archive the range is from. The whole archive is sent if it has changed.",
+            ),
         ],
-        responses={(200, "application/zip"): bytes},
+        responses={(200, "application/zip"): bytes, (206, "application/zip"): bytes, 416: None},
         summary="Download entry files archive",
-        description="Streams all entry files as a ZIP archive organized by compo directory.",
+        description=(
+            "Streams all entry files as a ZIP archive organized by compo directory. "
+            "The size of the archive is known up front, and an interrupted download can be "
+            "resumed with a Range request."
+        ),
     )
     @action(detail=False, methods=["get"], url_path="download-archive")
-    def download_archive(self, request: Request, event_pk: int = 0) -> StreamingHttpResponse | Response:
+    def download_archive(
+        self, request: Request, event_pk: int = 0
+    ) -> StreamingHttpResponse | HttpResponse | Response:
         """Download entry files as a .zip archive.
 
         Streams all entry files organized by compo directory, prefixed by
         entry ID, rank, or order_index depending on the 'prefix' parameter.
         Disqualified entries are excluded. Supports filtering via query params.
 
+        The archive is laid out before streaming, so the response has a
+        Content-Length, and a single byte range of it can be requested to
+        resume a download. If-Range is checked against the ETag of the archive.
+
         Query parameters (inherited from viewset):
             compo: Filter by compo ID
             user: Filter by user ID
@@ -279,10 +362,27 @@ class CompoEntryViewSet(PermissionViewSet):
                 status=400,
             )
 
-        response = StreamingHttpResponse(
-            generate_zip_stream(files),
-            content_type="application/zip",
-        )
+        plan = ZipPlan([ZipMember(file.name, file.path, file.size, file.modified_at) for file in files])
+        try:
+            byte_range = parse_range_header(request.headers.get("Range"), plan.size)
+        except RangeNotSatisfiable:
+            return HttpResponse(status=416, headers={"Content-Range": f"bytes */{plan.size}"})
+        if_range = request.headers.get("If-Range")
+        if byte_range and if_range and if_range != plan.etag:
+            byte_range = None
+
+        if byte_range:
+            first, last = byte_range
+            response = StreamingHttpResponse(
+                plan.astream(first, last), content_type="application/zip", status=206
+            )
+            response["Content-Range"] = f"bytes {first}-{last}/{plan.size}"
+            response["Content-Length"] = str(last - first + 1)
+        else:
+            response = StreamingHttpResponse(plan.astream(), content_type="application/zip")
+            response["Content-Length"] = str(plan.size)
+        response["Accept-Ranges"] = "bytes"
+        response["ETag"] = plan.etag
         name_parts = [f"entries_{event.tag or event.id}"]
         if compo_id := request.query_params.get("compo"):
             compo = Compo.objects.filter(pk=compo_id, event_id=event_pk).first()
@@ -16,6 +16,8 @@ from Instanssi.api.v2.serializers.admin.kompomaatti import (
     LiveVotingUpdateSerializer,
 )
 from Instanssi.api.v2.utils.base import FullDjangoModelPermissions
+from Instanssi.kompomaatti.misc.live_voting import publish_live_voting_state
+from Instanssi.kompomaatti.misc.voting import invalidate_votable_entry_ids
 from Instanssi.kompomaatti.models import Compo, Entry, LiveVotingState
 
 
@@ -67,6 +69,7 @@ class LiveVotingViewSet(GenericViewSet[LiveVotingState]):
             state.current_entry = entry
 
         state.save()
+        publish_live_voting_state(state)
         return self._serialize_state(state, request)
 
     @extend_schema(request=LiveVotingEntryActionSerializer, responses={200: LiveVotingStateSerializer})
@@ -97,9 +100,11 @@ class LiveVotingViewSet(GenericViewSet[LiveVotingState]):
             if next_entry is None or next_entry.pk != entry.pk:
                 raise ValidationError(_("Entries must be revealed in order."))
             Entry.objects.filter(pk=entry.pk).update(live_voting_revealed=True)
+            invalidate_votable_entry_ids(compo.id)
 
         state.current_entry = entry
         state.save()
+        publish_live_voting_state(state)
         return self._serialize_state(state, request)
 
     @extend_schema(request=LiveVotingEntryActionSerializer, responses={200: LiveVotingStateSerializer})
@@ -125,10 +130,12 @@ class LiveVotingViewSet(GenericViewSet[LiveVotingState]):
             if last_revealed is None or last_revealed.pk != entry.pk:
                 raise ValidationError(_("Only the last revealed entry can be hidden."))
             Entry.objects.filter(pk=entry.pk).update(live_voting_revealed=False)
+            invalidate_votable_entry_ids(compo.id)
 
         if state.current_entry_id == entry.pk:
             state.current_entry = None
         state.save()
+        publish_live_voting_state(state)
 
         return self._serialize_state(state, request)
 
@@ -140,8 +147,10 @@ class LiveVotingViewSet(GenericViewSet[LiveVotingState]):
         state = self._get_state(compo, for_update=True)
 
         Entry.objects.filter(compo=compo, live_voting_revealed=False).update(live_voting_revealed=True)
+        invalidate_votable_entry_ids(compo.id)
 
         state.save()
+        publish_live_voting_state(state)
         return self._serialize_state(state, request)
 
     @extend_schema(request=None, responses={200: LiveVotingStateSerializer})
@@ -152,8 +161,10 @@ class LiveVotingViewSet(GenericViewSet[LiveVotingState]):
         state = self._get_state(compo, for_update=True)
 
         Entry.objects.filter(compo=compo).update(live_voting_revealed=False)
+        invalidate_votable_entry_ids(compo.id)
         state.current_entry = None
         state.save()
+        publish_live_voting_state(state)
 
         return self._serialize_state(state, request)
 
@@ -165,8 +176,10 @@ class LiveVotingViewSet(GenericViewSet[LiveVotingState]):
         state = self._get_state(compo, for_update=True)
 
         Entry.objects.filter(compo=compo).update(live_voting_revealed=False)
+        invalidate_votable_entry_ids(compo.id)
         state.voting_open = False
         state.current_entry = None
         state.save()
+        publish_live_voting_state(state)
 
         return self._serialize_state(state, request)
@@ -1,3 +1,6 @@
+from Instanssi.api.v2.viewsets.public.archive.entry_search import (
+    PublicEntrySearchViewSet,
+)
 from Instanssi.api.v2.viewsets.public.archive.other_video_categories import (
     PublicOtherVideoCategoryViewSet,
 )
@@ -26,6 +29,7 @@ __all__ = [
     "PublicCompoViewSet",
     "PublicCompetitionParticipationViewSet",
     "PublicCompetitionViewSet",
+    "PublicEntrySearchViewSet",
     "PublicEventViewSet",
     "PublicOtherVideoCategoryViewSet",
     "PublicOtherVideoViewSet",
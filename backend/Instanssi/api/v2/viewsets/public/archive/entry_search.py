@@ -0,0 +1,46 @@
+from typing import Any
+
+from django.db.models import QuerySet
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework.mixins import ListModelMixin
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.permissions import AllowAny
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.viewsets import GenericViewSet
+
+from Instanssi.api.v2.serializers.public.archive import (
+    PublicEntrySearchResultSerializer,
+)
+from Instanssi.arkisto.search import search_entries
+from Instanssi.kompomaatti.models import Entry
+
+
+class EntrySearchPagination(LimitOffsetPagination):
+    default_limit = 20
+    max_limit = 100
+
+
+class PublicEntrySearchViewSet(ListModelMixin, GenericViewSet[Entry]):
+    """Public full-text search over the entries of all archived events.
+
+    Every word of the query must match the beginning of a word in the entry name, creator,
+    platform, compo, event or description. Results are ordered by relevance, and are always
+    paginated since a short query can match most of the archive.
+    """
+
+    permission_classes = [AllowAny]
+    authentication_classes: list[type] = []
+    pagination_class = EntrySearchPagination
+    serializer_class = PublicEntrySearchResultSerializer
+    queryset = Entry.objects.all()
+
+    def get_queryset(self) -> QuerySet[Entry]:
+        return search_entries(self.request.query_params.get("q", "")).select_related("compo", "compo__event")
+
+    @extend_schema(
+        parameters=[OpenApiParameter("q", str, description="Search query. Returns no results if empty.")],
+        summary="Search the archive",
+    )
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        return super().list(request, *args, **kwargs)
@@ -1,5 +1,9 @@
-from django.http import Http404
-from django.utils.http import http_date, parse_http_date_safe
+from typing import AsyncIterator, Final
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpRequest, StreamingHttpResponse
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from django.views import View
 from drf_spectacular.utils import extend_schema, inline_serializer
 from rest_framework import serializers
 from rest_framework.permissions import AllowAny
@@ -7,15 +11,34 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from Instanssi.kompomaatti.models import Compo, Entry, LiveVotingState
+from Instanssi.common.pubsub import get_pubsub
+from Instanssi.kompomaatti.misc.live_voting import (
+    LiveVotingSnapshot,
+    format_live_voting_event,
+    get_live_voting_snapshot,
+    live_voting_channel,
+    live_voting_etag,
+)
+
+# Comment lines are sent this often on idle streams, so that proxies don't drop the connection.
+KEEPALIVE_INTERVAL: Final[float] = 20.0
+
+
+def get_public_snapshot(event_pk: int, compo_pk: int) -> LiveVotingSnapshot:
+    """Get the live voting snapshot of a public compo, or raise Http404."""
+    snapshot = get_live_voting_snapshot(compo_pk)
+    if snapshot is None or snapshot["event"] != event_pk or not snapshot["public"]:
+        raise Http404
+    return snapshot
 
 
 class PublicLiveVotingView(APIView):
     """Public polling endpoint for live voting state.
 
     Returns the current live voting state for a compo, including which entries
-    have been revealed. Supports conditional requests via If-Modified-Since
-    for efficient polling.
+    have been revealed. The state is served from a cached snapshot, and supports
+    conditional requests via If-None-Match (ETag) and If-Modified-Since for
+    efficient polling.
     """
 
     permission_classes = [AllowAny]
@@ -38,44 +61,59 @@ class PublicLiveVotingView(APIView):
         }
     )
     def get(self, request: Request, event_pk: int, compo_pk: int) -> Response:
-        try:
-            compo = Compo.objects.select_related("live_voting_state").get(
-                pk=compo_pk,
-                event_id=event_pk,
-                event__hidden=False,
-                active=True,
-            )
-        except Compo.DoesNotExist:
-            raise Http404
-
-        try:
-            state = compo.live_voting_state
-        except LiveVotingState.DoesNotExist:
-            raise Http404
-
-        # Check If-Modified-Since for polling efficiency
-        ims = request.META.get("HTTP_IF_MODIFIED_SINCE")
-        if ims:
-            ims_timestamp = parse_http_date_safe(ims)
-            if ims_timestamp is not None:
-                state_timestamp = int(state.updated_at.timestamp())
-                if state_timestamp <= ims_timestamp:
-                    return Response(status=304)
-
-        revealed_entry_ids = list(
-            Entry.objects.filter(compo=compo, live_voting_revealed=True)
-            .order_by("order_index", "id")
-            .values_list("id", flat=True)
-        )
+        snapshot = get_public_snapshot(event_pk, compo_pk)
+        etag = live_voting_etag(snapshot)
 
-        data = {
-            "compo": compo.pk,
-            "voting_open": state.voting_open,
-            "current_entry": state.current_entry_id,
-            "updated_at": state.updated_at.isoformat(),
-            "revealed_entries": revealed_entry_ids,
-        }
+        # Check If-None-Match first, it is exact even when several changes happen within a second
+        inm = request.META.get("HTTP_IF_NONE_MATCH")
+        if inm:
+            if etag in parse_etags(inm) or inm.strip() == "*":
+                return self.not_modified(snapshot, etag)
+        else:
+            # Check If-Modified-Since for polling efficiency
+            ims = request.META.get("HTTP_IF_MODIFIED_SINCE")
+            if ims:
+                ims_timestamp = parse_http_date_safe(ims)
+                if ims_timestamp is not None:
+                    if int(snapshot["updated_at"]) <= ims_timestamp:
+                        return self.not_modified(snapshot, etag)
+
+        response = Response(snapshot["data"])
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(snapshot["updated_at"])
+        return response
 
-        response = Response(data)
-        response["Last-Modified"] = http_date(state.updated_at.timestamp())
+    @staticmethod
+    def not_modified(snapshot: LiveVotingSnapshot, etag: str) -> Response:
+        response = Response(status=304)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(snapshot["updated_at"])
         return response
+
+
+class PublicLiveVotingStreamView(View):
+    """Server-sent event stream of the live voting state.
+
+    Sends the current state on connect, and then a new "state" event every time staff changes it.
+    Updates are pushed through the pub/sub backend, so idle connections don't touch the database.
+    """
+
+    async def get(self, request: HttpRequest, event_pk: int, compo_pk: int) -> StreamingHttpResponse:
+        await sync_to_async(get_public_snapshot)(event_pk, compo_pk)
+        response = StreamingHttpResponse(
+            self.stream(compo_pk),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def stream(self, compo_id: int) -> AsyncIterator[bytes]:
+        # Subscribe before reading the initial state, so that no update can fall in between.
+        async with get_pubsub().subscribe(live_voting_channel(compo_id)) as subscription:
+            snapshot = await sync_to_async(get_live_voting_snapshot)(compo_id)
+            if snapshot is not None:
+                yield b"retry: 5000\n" + format_live_voting_event(snapshot)
+            while True:
+                message = await subscription.get(timeout=KEEPALIVE_INTERVAL)
+                yield b": keepalive\n\n" if message is None else message
@@ -7,12 +7,14 @@ from Instanssi.api.v2.viewsets.public import (
     PublicCompetitionViewSet,
     PublicCompoEntryViewSet,
     PublicCompoViewSet,
+    PublicEntrySearchViewSet,
     PublicEventViewSet,
     PublicOtherVideoCategoryViewSet,
     PublicOtherVideoViewSet,
     PublicProgramEventViewSet,
 )
 from Instanssi.api.v2.viewsets.public.kompomaatti.live_voting import (
+    PublicLiveVotingStreamView,
     PublicLiveVotingView,
 )
 from Instanssi.api.v2.viewsets.public.notifications import VapidPublicKeyView
@@ -28,6 +30,10 @@ public_router = routers.SimpleRouter()
 public_router.register("events", PublicEventViewSet, basename="public_events")
 public_router.register("blog_entries", PublicBlogEntryViewSet, basename="public_blog_entries")
 
+# /api/v2/public/archive/... - Spans all archived events
+archive_search_router = routers.SimpleRouter()
+archive_search_router.register("search", PublicEntrySearchViewSet, basename="public_archive_search")
+
 # /api/v2/public/event/<event_pk>/kompomaatti/...
 kompomaatti_router = routers.SimpleRouter()
 kompomaatti_router.register("compos", PublicCompoViewSet, basename="public_kompomaatti_compos")
@@ -59,6 +65,7 @@ store_router.register("checkout", PublicStoreTransactionCheckoutViewSet, basenam
 
 urlpatterns: list[URLPattern | URLResolver] = [
     path("", include(public_router.urls)),
+    path("archive/", include(archive_search_router.urls)),
     path(
         "notifications/vapid-key/",
         VapidPublicKeyView.as_view(),
@@ -70,6 +77,11 @@ urlpatterns: list[URLPattern | URLResolver] = [
         PublicLiveVotingView.as_view(),
         name="public_kompomaatti_live_voting",
     ),
+    path(
+        "event/<int:event_pk>/kompomaatti/live_voting/<int:compo_pk>/stream/",
+        PublicLiveVotingStreamView.as_view(),
+        name="public_kompomaatti_live_voting_stream",
+    ),
     path("event/<int:event_pk>/program/", include(program_router.urls)),
     path("event/<int:event_pk>/archive/", include(archive_router.urls)),
     path("store/", include(store_router.urls)),
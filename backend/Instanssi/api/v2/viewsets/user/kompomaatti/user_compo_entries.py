@@ -14,6 +14,7 @@ from Instanssi.api.v2.utils.entry_file_validation import (
     maybe_copy_entry_to_image,
     validate_entry_files,
 )
+from Instanssi.api.v2.utils.entry_uploads import attach_entry_uploads
 from Instanssi.kompomaatti.models import Compo, Entry
 from Instanssi.users.models import User
 
@@ -66,18 +67,19 @@ class UserCompoEntryViewSet(ModelViewSet[Entry]):
         serializer.instance = self.get_queryset().get(pk=serializer.instance.pk)
 
     def perform_create(self, serializer: BaseSerializer[Entry]) -> None:
-        if compo := serializer.validated_data.get("compo"):
-            self.validate_compo_belongs_to_event(compo)
+        compo = serializer.validated_data["compo"]
+        self.validate_compo_belongs_to_event(compo)
 
-            if not compo.active:
-                raise serializers.ValidationError({"compo": [_("Compo not found or not active")]})
+        if not compo.active:
+            raise serializers.ValidationError({"compo": [_("Compo not found or not active")]})
 
-            if not compo.is_adding_open():
-                raise serializers.ValidationError({"compo": [_("Compo entry adding time has ended")]})
+        if not compo.is_adding_open():
+            raise serializers.ValidationError({"compo": [_("Compo entry adding time has ended")]})
 
+        user: User = self.request.user  # type: ignore[assignment]
+        with attach_entry_uploads(serializer.validated_data, user, compo):
             validate_entry_files(serializer.validated_data, compo)
-
-        instance = serializer.save(user=self.request.user)
+            instance = serializer.save(user=user)
         maybe_copy_entry_to_image(instance)
         self._refresh_with_annotations(serializer)
 
@@ -87,8 +89,10 @@ class UserCompoEntryViewSet(ModelViewSet[Entry]):
 
         serializer.validated_data.pop("compo", None)
         self._validate_editing_allowed(instance.compo)
-        validate_entry_files(serializer.validated_data, instance.compo, instance)
-        instance = serializer.save()
+        user: User = self.request.user  # type: ignore[assignment]
+        with attach_entry_uploads(serializer.validated_data, user, instance.compo):
+            validate_entry_files(serializer.validated_data, instance.compo, instance)
+            instance = serializer.save()
         maybe_copy_entry_to_image(instance)
         self._refresh_with_annotations(serializer)
 
@@ -0,0 +1,159 @@
+from typing import Any
+
+from django.db.models import QuerySet
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import serializers, status
+from rest_framework.exceptions import UnsupportedMediaType
+from rest_framework.mixins import (
+    CreateModelMixin,
+    DestroyModelMixin,
+    ListModelMixin,
+    RetrieveModelMixin,
+)
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+from rest_framework.viewsets import GenericViewSet
+
+from Instanssi.api.v2.serializers.user.kompomaatti import UserEntryUploadSerializer
+from Instanssi.api.v2.utils.entry_file_validation import validate_entry_upload
+from Instanssi.api.v2.utils.entry_uploads import (
+    UPLOAD_CHUNK_CONTENT_TYPE,
+    get_upload_headers,
+)
+from Instanssi.kompomaatti.misc.uploads import (
+    UPLOAD_EXPIRY,
+    UPLOAD_MAX_CHUNK_SIZE,
+    UPLOAD_MAX_SESSIONS,
+    UploadBusy,
+    UploadOffsetMismatch,
+    append_chunk,
+)
+from Instanssi.kompomaatti.models import EntryUpload
+from Instanssi.users.models import User
+
+
+class UserEntryUploadViewSet(
+    CreateModelMixin, RetrieveModelMixin, ListModelMixin, DestroyModelMixin, GenericViewSet[EntryUpload]
+):
+    """Resumable uploads of the current user's entry and source files.
+
+    Create an upload with the name and size of the file, then send the file in chunks as PATCH
+    requests (Content-Type: application/offset+octet-stream), each with an Upload-Offset header
+    telling where the chunk starts. After a dropped connection, HEAD or GET the upload for the
+    offset to resume from. Give the id of a complete upload as entryfile_upload or
+    sourcefile_upload when creating or editing an entry.
+
+    Uploads expire 24 hours after their last chunk.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = UserEntryUploadSerializer
+    parser_classes = (JSONParser,)
+    pagination_class = LimitOffsetPagination
+    queryset = EntryUpload.objects.all()
+
+    def get_queryset(self) -> QuerySet[EntryUpload]:
+        """Return only the current user's unexpired uploads for this event."""
+        event_id = int(self.kwargs["event_pk"])
+        user: User = self.request.user  # type: ignore[assignment]
+        return self.queryset.filter(
+            compo__event_id=event_id, user=user, expires_at__gt=timezone.now()
+        ).order_by("created_at")
+
+    def perform_create(self, serializer: BaseSerializer[EntryUpload]) -> None:
+        event_id = int(self.kwargs["event_pk"])
+        user: User = self.request.user  # type: ignore[assignment]
+        compo = serializer.validated_data["compo"]
+        if compo.event_id != event_id:
+            raise serializers.ValidationError({"compo": [_("Compo does not belong to this event")]})
+        if compo.event.hidden or not compo.active:
+            raise serializers.ValidationError({"compo": [_("Compo not found or not active")]})
+
+        # Staff may attach files to entries after the deadlines (see CompoEntryViewSet)
+        is_staff = user.has_perm("kompomaatti.change_entry")
+        if not is_staff and not compo.is_editing_open():
+            raise serializers.ValidationError({"compo": [_("Compo edit time has ended")]})
+        validate_entry_upload(
+            serializer.validated_data["field"],
+            serializer.validated_data["filename"],
+            serializer.validated_data["size"],
+            compo,
+            skip_size_check=is_staff,
+        )
+
+        active = EntryUpload.objects.filter(user=user, expires_at__gt=timezone.now()).count()
+        if active >= UPLOAD_MAX_SESSIONS:
+            raise serializers.ValidationError({"error": _("Too many unfinished uploads")})
+        serializer.save(user=user, expires_at=timezone.now() + UPLOAD_EXPIRY)
+
+    def get_success_headers(self, data: Any) -> dict[str, str]:
+        url = reverse(
+            "api-v2:event_user_kompomaatti_uploads-detail",
+            kwargs={"event_pk": self.kwargs["event_pk"], "pk": data["id"]},
+        )
+        return {"Location": self.request.build_absolute_uri(url)}
+
+    @extend_schema(summary="Get the state of an upload, including the offset to resume from")
+    def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        upload = self.get_object()
+        return Response(self.get_serializer(upload).data, headers=get_upload_headers(upload))
+
+    @extend_schema(
+        request={UPLOAD_CHUNK_CONTENT_TYPE: OpenApiTypes.BINARY},
+        parameters=[
+            OpenApiParameter(
+                "Upload-Offset",
+                int,
+                OpenApiParameter.HEADER,
+                required=True,
+                description="Offset of the chunk in the file. Must match the offset of the upload.",
+            )
+        ],
+        responses={204: None},
+        summary="Append a chunk to an upload",
+        description=(
+            "The request body is the chunk, of at most 16 MiB. Responds with the new offset in the "
+            "Upload-Offset header. If the offset does not match, responds with 409 and the current offset."
+        ),
+    )
+    def partial_update(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        upload = self.get_object()
+        content_type = request.content_type.split(";")[0].strip()
+        if content_type != UPLOAD_CHUNK_CONTENT_TYPE:
+            raise UnsupportedMediaType(content_type)
+        try:
+            offset = int(request.headers["Upload-Offset"])
+            length = int(request.headers.get("Content-Length") or 0)
+        except (KeyError, ValueError):
+            raise serializers.ValidationError({"error": _("Upload-Offset header is required")})
+        if length > UPLOAD_MAX_CHUNK_SIZE:
+            return Response(
+                {"detail": _("Chunk is too large")}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        if offset < 0 or offset + length > upload.size:
+            raise serializers.ValidationError({"error": _("Chunk does not fit in the file")})
+
+        if length:
+            try:
+                append_chunk(upload, offset, request.stream, length)
+            except UploadOffsetMismatch:
+                return Response(
+                    {"detail": _("Upload-Offset does not match the upload")},
+                    status=status.HTTP_409_CONFLICT,
+                    headers=get_upload_headers(upload),
+                )
+            except UploadBusy:
+                return Response(
+                    {"detail": _("Another chunk of the upload is being sent")},
+                    status=status.HTTP_409_CONFLICT,
+                    headers=get_upload_headers(upload),
+                )
+        return Response(status=status.HTTP_204_NO_CONTENT, headers=get_upload_headers(upload))
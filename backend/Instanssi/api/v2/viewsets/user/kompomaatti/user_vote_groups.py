@@ -13,13 +13,8 @@ from rest_framework.viewsets import GenericViewSet
 from Instanssi.api.v2.serializers.user.kompomaatti.user_vote_group_serializer import (
     UserVoteGroupSerializer,
 )
-from Instanssi.kompomaatti.models import (
-    Compo,
-    Entry,
-    TicketVoteCode,
-    VoteCodeRequest,
-    VoteGroup,
-)
+from Instanssi.kompomaatti.misc.voting import get_votable_entry_ids, has_voting_rights
+from Instanssi.kompomaatti.models import Compo, Entry, VoteGroup
 from Instanssi.users.models import User
 
 
@@ -63,13 +58,25 @@ class UserVoteGroupViewSet(CreateModelMixin, RetrieveModelMixin, ListModelMixin,
         if compo.event.hidden:
             raise serializers.ValidationError({"compo": [_("Compo is not active")]})
 
-    def validate_entries(self, entries: list[Entry], compo: Compo) -> None:
+    def validate_entries(self, entry_ids: list[int], compo: Compo) -> None:
         """Validate that entries are unique, belong to the compo, and are not disqualified."""
-        ids = [entry.id for entry in entries]
-        if len(ids) > len(set(ids)):
+        if len(entry_ids) > len(set(entry_ids)):
             raise serializers.ValidationError({"entries": [_("You can only vote for each entry once")]})
 
-        for entry in entries:
+        # Valid ballots are checked against the cached set of votable entries. Only invalid ones
+        # need the entries from the database, to tell the user what exactly is wrong with them.
+        votable_ids = get_votable_entry_ids(compo.id)
+        invalid_ids = [entry_id for entry_id in entry_ids if entry_id not in votable_ids]
+        if not invalid_ids:
+            return
+
+        entries = Entry.objects.in_bulk(invalid_ids)
+        for entry_id in invalid_ids:
+            entry = entries.get(entry_id)
+            if entry is None:
+                raise serializers.ValidationError(
+                    {"entries": [_('Invalid pk "%(pk)s" - object does not exist.') % {"pk": entry_id}]}
+                )
             if entry.compo_id != compo.id:
                 raise serializers.ValidationError(
                     {
@@ -90,11 +97,7 @@ class UserVoteGroupViewSet(CreateModelMixin, RetrieveModelMixin, ListModelMixin,
 
     def validate_voting_rights(self, user: User, compo: Compo) -> None:
         """Validate that the user has voting rights for the compo's event."""
-        has_ticket_code = TicketVoteCode.objects.filter(associated_to=user, event=compo.event).exists()
-        has_approved_request = VoteCodeRequest.objects.filter(
-            user=user, event=compo.event, status=1
-        ).exists()
-        if not has_ticket_code and not has_approved_request:
+        if not has_voting_rights(user.id, compo.event_id):
             raise serializers.ValidationError(
                 {"non_field_errors": [_("You do not have voting rights for this event")]}
             )
@@ -103,7 +106,7 @@ class UserVoteGroupViewSet(CreateModelMixin, RetrieveModelMixin, ListModelMixin,
     def perform_create(self, serializer: BaseSerializer[VoteGroup]) -> None:
         """Validate and create/replace votes for a compo."""
         compo: Compo = serializer.validated_data["compo"]
-        entries: list[Entry] = serializer.validated_data["entries"]
+        entry_ids: list[int] = serializer.validated_data["entries"]
         user: User = self.request.user  # type: ignore[assignment]
 
         self.validate_compo_belongs_to_event(compo)
@@ -115,14 +118,17 @@ class UserVoteGroupViewSet(CreateModelMixin, RetrieveModelMixin, ListModelMixin,
             raise serializers.ValidationError({"compo": [_("Voting is not open for this compo")]})
 
         self.validate_voting_rights(user, compo)
-        self.validate_entries(entries, compo)
+        self.validate_entries(entry_ids, compo)
 
-        # Upsert: delete old votes and create new ones
-        group = VoteGroup.objects.filter(compo=compo, user=user).first()
+        # Upsert: replace the old ballot with the new one. The group is locked so that parallel
+        # submissions by the same user can't remove the old ballot from entry scores twice.
+        group = VoteGroup.objects.select_for_update().filter(compo=compo, user=user).first()
         if group:
-            group.delete_votes()
+            # Reuse the objects at hand, so that the audit log doesn't fetch them again
+            group.compo = compo
+            group.user = user
         else:
-            group = VoteGroup.objects.create(compo=compo, user=user)
+            group = VoteGroup(compo=compo, user=user)
 
-        group.create_votes(entries)
+        group.set_ranking(entry_ids)
         serializer.instance = group
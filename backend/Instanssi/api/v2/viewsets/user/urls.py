@@ -7,6 +7,9 @@ from Instanssi.api.v2.viewsets.user.kompomaatti.user_competition_participations
 from Instanssi.api.v2.viewsets.user.kompomaatti.user_compo_entries import (
     UserCompoEntryViewSet,
 )
+from Instanssi.api.v2.viewsets.user.kompomaatti.user_entry_uploads import (
+    UserEntryUploadViewSet,
+)
 from Instanssi.api.v2.viewsets.user.kompomaatti.user_ticket_vote_codes import (
     UserTicketVoteCodeViewSet,
 )
@@ -36,6 +39,7 @@ notifications_router.register(
 # /api/v2/event/<event_pk>/user/kompomaatti/...
 kompomaatti_router = routers.SimpleRouter()
 kompomaatti_router.register("entries", UserCompoEntryViewSet, basename="event_user_kompomaatti_entries")
+kompomaatti_router.register("uploads", UserEntryUploadViewSet, basename="event_user_kompomaatti_uploads")
 kompomaatti_router.register(
     "participations", UserCompetitionParticipationViewSet, basename="event_user_kompomaatti_participations"
 )
@@ -0,0 +1,209 @@
+"""Caching for the public archive pages.
+
+Archived events hardly ever change, but rendering their pages takes a lot of queries. Rendered
+pages are cached by URL and language, keyed by a version that is bumped whenever something shown
+on the pages changes (see the save() and delete() methods of the archived models). The same
+version is used as the ETag of the pages, so clients and mirrors can revalidate cheaply.
+
+Pages of an event depend on its own data, and also on the list of all archived events (shown in
+the navigation). Each event has its own version, and there is a shared version for the event list.
+"""
+
+import hashlib
+import time
+from collections.abc import AsyncIterator, Callable, Iterator
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Any, Final, TypedDict, TypeVar, cast
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.http.response import HttpResponseBase
+from django.utils.translation import get_language
+from django.views.decorators.http import condition
+
+ARCHIVE_PAGE_TIMEOUT: Final[int] = 24 * 60 * 60
+
+# Streaming responses larger than this are not cached
+ARCHIVE_PAGE_MAX_SIZE: Final[int] = 8 * 1024 * 1024
+
+# Response headers that are stored along with the cached content
+CACHED_HEADERS: Final[tuple[str, ...]] = ("Content-Type", "Content-Disposition")
+
+ArchiveView = TypeVar("ArchiveView", bound=Callable[..., HttpResponseBase])
+
+
+class ArchiveVersion(TypedDict):
+    version: int
+    modified: float
+
+
+class CachedPage(TypedDict):
+    content: bytes
+    headers: dict[str, str]
+    streaming: bool
+
+
+def archive_version_key(event_id: int | None) -> str:
+    return f"arkisto:version:{'events' if event_id is None else event_id}"
+
+
+def _new_version() -> ArchiveVersion:
+    return {"version": time.time_ns(), "modified": time.time()}
+
+
+def get_archive_version(event_id: int | None) -> ArchiveVersion:
+    """Get the current version of an event (or of the event list, if event_id is None)."""
+    key = archive_version_key(event_id)
+    version: ArchiveVersion | None = cache.get(key)
+    if version is None:
+        # The version may have been evicted, so start a new one. Pages cached with the old one
+        # are simply never used again.
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version or _new_version()
+
+
+def bump_archive_version(event_id: int | None) -> None:
+    """Invalidate the cached pages of an event, now and again after the current transaction commits.
+
+    Use event_id=None when the list of events changes, which invalidates the pages of all events.
+    """
+    key = archive_version_key(event_id)
+    cache.set(key, _new_version(), None)
+    transaction.on_commit(lambda: cache.set(key, _new_version(), None))
+
+
+def _page_versions(event_id: int | None) -> list[ArchiveVersion]:
+    if event_id is not None:
+        return [get_archive_version(None), get_archive_version(event_id)]
+    # Pages spanning the whole archive depend on every archived event.
+    from Instanssi.kompomaatti.models import Event
+
+    event_ids = Event.objects.filter(archived=True).order_by("id").values_list("id", flat=True)
+    return [get_archive_version(None)] + [get_archive_version(pk) for pk in event_ids]
+
+
+def _page_event_id(args: tuple[Any, ...], kwargs: dict[str, Any]) -> int | None:
+    event_id: int | None = kwargs.get("event_id", args[0] if args else None)
+    return event_id
+
+
+def archive_page_version(event_id: int | None) -> str:
+    """Get the version of the pages of an event, or of the pages spanning the whole archive."""
+    versions = _page_versions(event_id)
+    if event_id is None:
+        digest = hashlib.md5("-".join(str(v["version"]) for v in versions).encode()).hexdigest()
+        return f"all-{digest}"
+    events_version, event_version = versions
+    return f"{event_id}-{event_version['version']}-{events_version['version']}"
+
+
+def _is_anonymous(request: HttpRequest) -> bool:
+    user = getattr(request, "user", None)
+    return user is None or not user.is_authenticated
+
+
+def _page_etag(request: HttpRequest, *args: Any, **kwargs: Any) -> str:
+    etag = f"{archive_page_version(_page_event_id(args, kwargs))}-{get_language()}"
+    # The navigation bar of logged in users is personal, so they must not revalidate against
+    # the anonymous version of the page.
+    return etag if _is_anonymous(request) else f"{etag}-{request.user.pk}"
+
+
+def _page_last_modified(request: HttpRequest, *args: Any, **kwargs: Any) -> datetime:
+    modified = max(version["modified"] for version in _page_versions(_page_event_id(args, kwargs)))
+    return datetime.fromtimestamp(modified, tz=timezone.utc)
+
+
+def _page_cache_key(request: HttpRequest, etag: str) -> str:
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f"arkisto:archive_page:{url}:{etag}"
+
+
+def _cached_page(response: HttpResponseBase, content: bytes) -> CachedPage:
+    headers = {name: response[name] for name in CACHED_HEADERS if response.has_header(name)}
+    return {"content": content, "headers": headers, "streaming": response.streaming}
+
+
+def _cache_streaming_content(key: str, response: StreamingHttpResponse) -> None:
+    """Cache a streaming response once it has been sent in full, if it is not too large.
+
+    The content is passed on a chunk at a time. Asynchronous content is kept asynchronous, so that
+    ASGI servers send it as it is generated, instead of reading all of it into memory first.
+    """
+    buffered: list[bytes] | None = []
+    size = 0
+
+    def buffer(chunk: bytes) -> None:
+        nonlocal buffered, size
+        if buffered is not None:
+            size += len(chunk)
+            if size <= ARCHIVE_PAGE_MAX_SIZE:
+                buffered.append(chunk)
+            else:
+                buffered = None
+
+    chunks = response.streaming_content
+    if isinstance(chunks, AsyncIterator):
+        async_chunks = chunks
+
+        async def async_caching_iterator() -> AsyncIterator[bytes]:
+            async for chunk in async_chunks:
+                buffer(chunk)
+                yield chunk
+            if buffered is not None:
+                await cache.aset(key, _cached_page(response, b"".join(buffered)), ARCHIVE_PAGE_TIMEOUT)
+
+        response.streaming_content = async_caching_iterator()
+    else:
+        sync_chunks = chunks
+
+        def caching_iterator() -> Iterator[bytes]:
+            for chunk in sync_chunks:
+                buffer(chunk)
+                yield chunk
+            if buffered is not None:
+                cache.set(key, _cached_page(response, b"".join(buffered)), ARCHIVE_PAGE_TIMEOUT)
+
+        response.streaming_content = caching_iterator()
+
+
+async def _cached_streaming_content(content: bytes) -> AsyncIterator[bytes]:
+    yield content
+
+
+def cache_archive_page(view: ArchiveView) -> ArchiveView:
+    """Cache an archive page, and serve it with ETag and Last-Modified headers.
+
+    The page belongs to the event given as the first argument (or the event_id keyword argument)
+    of the view. Views without one span the whole archive, and are invalidated by any archived
+    event. Streaming responses are cached after they have been sent, unless they are very large.
+    Only pages rendered for anonymous visitors, and without a CSRF token, are cached.
+    """
+
+    @wraps(view)
+    def cached_view(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponseBase:
+        if not _is_anonymous(request):
+            return view(request, *args, **kwargs)
+        key = _page_cache_key(request, _page_etag(request, *args, **kwargs))
+        page: CachedPage | None = cache.get(key)
+        if page is not None:
+            if page["streaming"]:
+                return StreamingHttpResponse(
+                    _cached_streaming_content(page["content"]), headers=page["headers"]
+                )
+            return HttpResponse(page["content"], headers=page["headers"])
+        response = view(request, *args, **kwargs)
+        # A page that rendered a CSRF token belongs to the visitor it was rendered for
+        if response.status_code == 200 and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+            if isinstance(response, StreamingHttpResponse):
+                _cache_streaming_content(key, response)
+            elif isinstance(response, HttpResponse):
+                cache.set(key, _cached_page(response, response.content), ARCHIVE_PAGE_TIMEOUT)
+        return response
+
+    return cast(
+        ArchiveView, condition(etag_func=_page_etag, last_modified_func=_page_last_modified)(cached_view)
+    )
@@ -0,0 +1,290 @@
+"""Static export of the public archive.
+
+Archived events hardly ever change, so their pages can be rendered ahead of time and served by
+the web server without reaching Django at all. Pages are rendered for anonymous visitors, in every
+language, into a directory tree under settings.ARCHIVE_EXPORT_ROOT that mirrors the URLs:
+
+    <root>/<language>/arkisto/event/<id>/index.html
+    <root>/<language>/arkisto/text_event/<id>/index.txt
+    <root>/<language>/arkisto/json_event/<id>/index.json
+    <root>/<language>/arkisto/m3u8/<id>/index.m3u8
+    ...
+
+Every file gets a precompressed .gz sibling (and a .br sibling, if the brotli package is
+installed) for gzip_static and brotli_static. See examples/conf/nginx.conf for serving the tree.
+The export is disabled unless ARCHIVE_EXPORT_ROOT is set.
+
+The export is incremental. The archive page version of each exported event (see caching.py) is
+stored in a manifest along with the files it produced, and an event is only rendered again once
+its version has changed. Files of events that are no longer archived are removed. Exports may
+run concurrently (from the management command and from background tasks), so every read-modify-write
+of the manifest holds an exclusive lock on a file next to it.
+"""
+
+import fcntl
+import gzip
+import json
+import logging
+import os
+import tempfile
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Final, TypedDict
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.utils import translation
+
+from Instanssi.arkisto.caching import archive_page_version
+from Instanssi.arkisto.models import OtherVideo
+from Instanssi.kompomaatti.models import Compo, Entry, Event
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+log = logging.getLogger(__name__)
+
+MANIFEST_NAME: Final[str] = ".manifest.json"
+MANIFEST_LOCK_NAME: Final[str] = ".manifest.lock"
+
+# Manifest key of the pages that span the whole archive (the archive front page and playlist)
+ARCHIVE_KEY: Final[str] = "archive"
+
+ExportProgress = Callable[[int, int], None]
+
+
+class ExportedPages(TypedDict):
+    version: str
+    files: list[str]
+
+
+Manifest = dict[str, ExportedPages]
+
+# Pages to export, as (URL path, file extension) pairs
+Pages = list[tuple[str, str]]
+
+
+def event_key(event_id: int) -> str:
+    return f"event:{event_id}"
+
+
+def is_export_enabled() -> bool:
+    return settings.ARCHIVE_EXPORT_ROOT is not None
+
+
+def get_export_root() -> Path:
+    if settings.ARCHIVE_EXPORT_ROOT is None:
+        raise ImproperlyConfigured("ARCHIVE_EXPORT_ROOT is not set, static archive export is disabled")
+    return Path(settings.ARCHIVE_EXPORT_ROOT)
+
+
+def load_manifest() -> Manifest:
+    try:
+        manifest: Manifest = json.loads((get_export_root() / MANIFEST_NAME).read_bytes())
+    except FileNotFoundError:
+        return {}
+    return manifest
+
+
+@contextmanager
+def _manifest_lock() -> Iterator[None]:
+    """Hold an exclusive lock on the manifest, waiting for any other export to finish first."""
+    root = get_export_root()
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / MANIFEST_LOCK_NAME, "a") as fd:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def _save_manifest(manifest: Manifest) -> None:
+    _write_atomic(get_export_root() / MANIFEST_NAME, json.dumps(manifest, indent=2).encode())
+
+
+def _write_atomic(path: Path, content: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=".export-")
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(content)
+        os.chmod(temp_name, 0o644)
+        os.replace(temp_name, path)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+
+
+def _write_page(relative_path: str, content: bytes) -> list[str]:
+    """Write a page and its precompressed siblings. Returns the written paths relative to the root."""
+    root = get_export_root()
+    written = [relative_path]
+    _write_atomic(root / relative_path, content)
+    _write_atomic(root / f"{relative_path}.gz", gzip.compress(content, compresslevel=9, mtime=0))
+    written.append(f"{relative_path}.gz")
+    if brotli is not None:
+        _write_atomic(root / f"{relative_path}.br", brotli.compress(content))
+        written.append(f"{relative_path}.br")
+    return written
+
+
+def _remove_files(relative_paths: list[str]) -> None:
+    root = get_export_root()
+    for relative_path in relative_paths:
+        path = root / relative_path
+        path.unlink(missing_ok=True)
+        # Clean up the directories that were left empty
+        for parent in path.parents:
+            if parent == root or not parent.is_relative_to(root):
+                break
+            try:
+                parent.rmdir()
+            except OSError:
+                break
+
+
+def _read_streaming_content(chunks: Iterator[bytes] | AsyncIterator[bytes]) -> bytes:
+    if isinstance(chunks, AsyncIterator):
+        return async_to_sync(_read_async_content)(chunks)
+    return b"".join(chunks)
+
+
+async def _read_async_content(chunks: AsyncIterator[bytes]) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+def _render_page(path: str) -> bytes | None:
+    """Render a page through its view, as an anonymous visitor would see it in the current language."""
+    url = urlsplit(settings.ARCHIVE_EXPORT_URL)
+    request = RequestFactory().get(path, HTTP_HOST=url.netloc, secure=url.scheme == "https")
+    request.user = AnonymousUser()
+    request.LANGUAGE_CODE = translation.get_language()
+    match = resolve(path)
+    response = match.func(request, *match.args, **match.kwargs)
+    if response.status_code != 200:
+        return None
+    if response.streaming:
+        return _read_streaming_content(response.streaming_content)
+    content: bytes = response.content
+    return content
+
+
+def _export_pages(pages: Pages, progress: ExportProgress | None = None) -> list[str]:
+    files: list[str] = []
+    total = len(pages) * len(settings.LANGUAGES)
+    processed = 0
+    for language, _name in settings.LANGUAGES:
+        with translation.override(language):
+            for path, extension in pages:
+                content = _render_page(path)
+                if content is not None:
+                    relative_path = f"{language}/{path.strip('/')}/index.{extension}"
+                    files.extend(_write_page(relative_path, content))
+                processed += 1
+                if progress is not None:
+                    progress(processed, total)
+    return files
+
+
+def _replace_export(key: str, version: str, pages: Pages, progress: ExportProgress | None) -> None:
+    files = _export_pages(pages, progress)
+    manifest = load_manifest()
+    if previous := manifest.get(key):
+        _remove_files(sorted(set(previous["files"]) - set(files)))
+    manifest[key] = {"version": version, "files": files}
+    _save_manifest(manifest)
+
+
+def get_event_pages(event: Event) -> Pages:
+    compos = Compo.objects.filter(event=event, active=True, hide_from_archive=False)
+    entry_ids = Entry.objects.filter(compo__in=compos).order_by("id").values_list("id", flat=True)
+    video_ids = OtherVideo.objects.filter(category__event=event).order_by("id").values_list("id", flat=True)
+    return (
+        [
+            (reverse("archive:event", args=[event.id]), "html"),
+            (reverse("archive:text_event", args=[event.id]), "txt"),
+            (reverse("archive:json_event", args=[event.id]), "json"),
+            (reverse("archive:entries_m3u8", args=[event.id]), "m3u8"),
+        ]
+        + [
+            (reverse("archive:compo_m3u8", args=[event.id, compo_id]), "m3u8")
+            for compo_id in compos.order_by("id").values_list("id", flat=True)
+        ]
+        + [(reverse("archive:entry", args=[entry_id]), "html") for entry_id in entry_ids]
+        + [(reverse("archive:video", args=[video_id]), "html") for video_id in video_ids]
+    )
+
+
+def get_archive_pages() -> Pages:
+    return [(reverse("archive:index"), "html"), (reverse("archive:archive_m3u8"), "m3u8")]
+
+
+def export_event(event: Event, force: bool = False, progress: ExportProgress | None = None) -> bool:
+    """Export the pages of an archived event, unless they are already up to date.
+
+    Returns:
+        True if the pages were exported.
+    """
+    key = event_key(event.id)
+    version = archive_page_version(event.id)
+    with _manifest_lock():
+        previous = load_manifest().get(key)
+        if not force and previous is not None and previous["version"] == version:
+            return False
+        _replace_export(key, version, get_event_pages(event), progress)
+    log.info("Exported archive pages of event %d", event.id)
+    return True
+
+
+def export_archive_pages(force: bool = False) -> bool:
+    """Export the pages that span the whole archive, unless they are already up to date."""
+    version = archive_page_version(None)
+    with _manifest_lock():
+        previous = load_manifest().get(ARCHIVE_KEY)
+        if not force and previous is not None and previous["version"] == version:
+            return False
+        _replace_export(ARCHIVE_KEY, version, get_archive_pages(), None)
+    return True
+
+
+def remove_stale_exports() -> list[int]:
+    """Remove the exported pages of events that are no longer archived. Returns their ids."""
+    archived_ids = set(Event.objects.filter(archived=True).values_list("id", flat=True))
+    removed = []
+    with _manifest_lock():
+        manifest = load_manifest()
+        for key in list(manifest):
+            if key == ARCHIVE_KEY:
+                continue
+            event_id = int(key.removeprefix("event:"))
+            if event_id not in archived_ids:
+                _remove_files(manifest.pop(key)["files"])
+                removed.append(event_id)
+        if removed:
+            _save_manifest(manifest)
+    return removed
+
+
+def update_export(force: bool = False) -> tuple[list[int], list[int]]:
+    """Bring the whole export up to date with the archive.
+
+    Returns:
+        Ids of the events that were exported, and of the events whose pages were removed.
+    """
+    removed = remove_stale_exports()
+    exported = [
+        event.id
+        for event in Event.objects.filter(archived=True).order_by("id")
+        if export_event(event, force)
+    ]
+    export_archive_pages(force or bool(removed))
+    return exported, removed
@@ -0,0 +1,65 @@
+"""Progress tracking for the long-running archiver jobs.
+
+Archiver jobs run in Celery, so their progress is kept in the cache where the archiver status
+endpoint can read it. There is at most one job per event at a time. Records expire after a while,
+so that a crashed worker can't block the event forever.
+"""
+
+from typing import Final, Literal, TypedDict
+
+from django.core.cache import cache
+
+ARCHIVER_JOB_TIMEOUT: Final[int] = 3600
+
+ArchiverJobAction = Literal["optimize_scores", "remove_old_votes", "export_static"]
+ArchiverJobState = Literal["queued", "running", "done", "failed"]
+
+
+class ArchiverJob(TypedDict):
+    action: ArchiverJobAction
+    state: ArchiverJobState
+    processed: int
+    total: int
+
+
+def archiver_job_key(event_id: int) -> str:
+    return f"arkisto:archiver_job:{event_id}"
+
+
+def get_archiver_job(event_id: int) -> ArchiverJob | None:
+    """Get the current or most recently finished archiver job of the event."""
+    job: ArchiverJob | None = cache.get(archiver_job_key(event_id))
+    return job
+
+
+def is_archiver_job_active(job: ArchiverJob | None) -> bool:
+    return job is not None and job["state"] in ("queued", "running")
+
+
+def archiver_job_lock_key(event_id: int) -> str:
+    return f"arkisto:archiver_job_lock:{event_id}"
+
+
+def queue_archiver_job(event_id: int, action: ArchiverJobAction) -> bool:
+    """Mark a job as queued for the event. Returns False if another job is still in progress.
+
+    The job takes a lock that is held until it is done or failed. The lock is taken with a single
+    cache.add(), so that of two requests at the same time, only one can queue a job.
+    """
+    if not cache.add(archiver_job_lock_key(event_id), action, ARCHIVER_JOB_TIMEOUT):
+        return False
+    job: ArchiverJob = {"action": action, "state": "queued", "processed": 0, "total": 0}
+    cache.set(archiver_job_key(event_id), job, ARCHIVER_JOB_TIMEOUT)
+    return True
+
+
+def update_archiver_job(
+    event_id: int, action: ArchiverJobAction, state: ArchiverJobState, processed: int = 0, total: int = 0
+) -> None:
+    job: ArchiverJob = {"action": action, "state": state, "processed": processed, "total": total}
+    cache.set(archiver_job_key(event_id), job, ARCHIVER_JOB_TIMEOUT)
+    if is_archiver_job_active(job):
+        # Also taken by jobs started without queue_archiver_job(), eg. from the shell
+        cache.set(archiver_job_lock_key(event_id), action, ARCHIVER_JOB_TIMEOUT)
+    else:
+        cache.delete(archiver_job_lock_key(event_id))
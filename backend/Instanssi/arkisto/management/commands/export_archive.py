@@ -0,0 +1,41 @@
+import sys
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from Instanssi.arkisto import export
+from Instanssi.kompomaatti.models import Event
+
+
+class Command(BaseCommand):
+    help = "pre-render the public archive into static files for nginx (only events that have changed)"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("-i", "--event", required=False, help="Only export this event", type=int)
+        parser.add_argument(
+            "-f", "--force", action="store_true", help="Export events even if they have not changed"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if not export.is_export_enabled():
+            raise CommandError("ARCHIVE_EXPORT_ROOT is not set, static archive export is disabled")
+
+        if event_id := options.get("event"):
+            try:
+                event = Event.objects.get(pk=event_id, archived=True)
+            except Event.DoesNotExist:
+                raise CommandError(f"Event {event_id} does not exist or is not archived")
+            if export.export_event(event, options["force"]):
+                sys.stderr.write(f"Exported {event}\n")
+            else:
+                sys.stderr.write(f"{event} is up to date\n")
+            export.export_archive_pages(options["force"])
+            return
+
+        exported, removed = export.update_export(options["force"])
+        for event in Event.objects.filter(pk__in=exported).order_by("id"):
+            sys.stderr.write(f"Exported {event}\n")
+        for removed_id in removed:
+            sys.stderr.write(f"Removed event {removed_id}\n")
+        if not exported and not removed:
+            sys.stderr.write("Static archive is up to date\n")
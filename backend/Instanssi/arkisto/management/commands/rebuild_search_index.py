@@ -0,0 +1,14 @@
+import sys
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from Instanssi.arkisto.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "rebuild the full-text search index of the archive"
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        indexed = rebuild_search_index()
+        sys.stderr.write(f"Indexed {indexed} entries\n")
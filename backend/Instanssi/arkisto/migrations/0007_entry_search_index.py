@@ -0,0 +1,62 @@
+"""Create the full-text search index of the archive (see Instanssi/arkisto/search.py).
+
+PostgreSQL gets a table of weighted tsvectors with a GIN index, other databases an FTS5 table.
+The index is populated with the entries that are currently shown in the archive.
+"""
+
+from typing import Any
+
+from django.db import migrations
+
+SEARCH_INDEX_TABLE = "arkisto_entry_search"
+
+SEARCHABLE_ENTRIES = """
+    FROM kompomaatti_entry e
+    JOIN kompomaatti_compo c ON c.id = e.compo_id
+    JOIN kompomaatti_event ev ON ev.id = c.event_id
+    WHERE ev.archived AND NOT ev.hidden AND c.active AND NOT c.hide_from_archive
+"""
+
+
+def create_search_index(apps: Any, schema_editor: Any) -> None:
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE TABLE {SEARCH_INDEX_TABLE} (entry_id bigint PRIMARY KEY, document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX {SEARCH_INDEX_TABLE}_document_idx ON {SEARCH_INDEX_TABLE} USING GIN (document)"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_INDEX_TABLE} (entry_id, document) SELECT e.id, "
+            "setweight(to_tsvector('simple', e.name || ' ' || e.creator), 'A') || "
+            "setweight(to_tsvector('simple', "
+            "coalesce(e.platform, '') || ' ' || c.name || ' ' || ev.name), 'B') || "
+            "setweight(to_tsvector('simple', e.description), 'C')" + SEARCHABLE_ENTRIES
+        )
+    else:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SEARCH_INDEX_TABLE} USING fts5("
+            "name, creator, platform, compo, event, description, "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_INDEX_TABLE} (rowid, name, creator, platform, compo, event, description) "
+            "SELECT e.id, e.name, e.creator, coalesce(e.platform, ''), c.name, ev.name, e.description"
+            + SEARCHABLE_ENTRIES
+        )
+
+
+def drop_search_index(apps: Any, schema_editor: Any) -> None:
+    schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_INDEX_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("arkisto", "0006_alter_othervideo_options_and_more"),
+        ("kompomaatti", "0030_competition_participation_score_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
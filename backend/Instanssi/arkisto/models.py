@@ -1,7 +1,10 @@
+from typing import Any
+
 from auditlog.registry import auditlog
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from Instanssi.arkisto.caching import bump_archive_version
 from Instanssi.common.youtube import YoutubeVideoField
 from Instanssi.kompomaatti.models import Event
 
@@ -13,6 +16,15 @@ class OtherVideoCategory(models.Model):
     def __str__(self) -> str:
         return self.name
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save and drop the cached archive pages of the event"""
+        super().save(*args, **kwargs)
+        bump_archive_version(self.event_id)
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        bump_archive_version(self.event_id)
+        return super().delete(*args, **kwargs)
+
 
 class OtherVideo(models.Model):
     category = models.ForeignKey(OtherVideoCategory, verbose_name=_("Category"), on_delete=models.CASCADE)
@@ -23,6 +35,15 @@ class OtherVideo(models.Model):
     def __str__(self) -> str:
         return self.name
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save and drop the cached archive pages of the event"""
+        super().save(*args, **kwargs)
+        bump_archive_version(self.category.event_id)
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        bump_archive_version(self.category.event_id)
+        return super().delete(*args, **kwargs)
+
 
 auditlog.register(OtherVideoCategory)
 auditlog.register(OtherVideo)
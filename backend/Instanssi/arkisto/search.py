@@ -0,0 +1,168 @@
+"""Full-text search over the entries of the public archive.
+
+The search index lives in its own table (see migration 0007_entry_search_index), with a row per
+entry that is shown in the archive. On PostgreSQL each row holds a weighted tsvector, with a GIN
+index over it. Other databases (SQLite in development and tests) get an FTS5 table instead, keyed
+by the entry id. Both use plain tokenization without stemming, as entry names and handles are not
+words of any single language.
+
+The index is kept up to date by the save() and delete() methods of entries, compos and events.
+Bulk updates skip those, so use the rebuild_search_index command after them.
+
+Every word of a query must match, as a prefix of some word in the entry name, creator, platform,
+compo, event or description. Matches in the name and creator weigh the most, and the description
+the least.
+"""
+
+import re
+from collections.abc import Iterable, Sequence
+from typing import Any, Final
+
+from django.db import connection
+from django.db.models import FloatField, QuerySet
+from django.db.models.expressions import RawSQL
+
+from Instanssi.kompomaatti.models import Entry
+
+SEARCH_INDEX_TABLE: Final[str] = "arkisto_entry_search"
+
+# Entries are (re)indexed in batches of this size
+SEARCH_INDEX_BATCH_SIZE: Final[int] = 500
+
+# Words beyond this are ignored, so that a long query can't make the search arbitrarily slow
+MAX_QUERY_TERMS: Final[int] = 8
+
+# Relative weights of the FTS5 columns: name, creator, platform, compo, event, description
+_FTS5_WEIGHTS: Final[str] = "10.0, 10.0, 3.0, 3.0, 3.0, 1.0"
+
+_INDEXED_FIELDS: Final[tuple[str, ...]] = (
+    "id",
+    "name",
+    "creator",
+    "platform",
+    "compo__name",
+    "compo__event__name",
+    "description",
+)
+
+# Entries that are shown in the public archive
+SEARCHABLE_ENTRIES: Final[dict[str, Any]] = {
+    "compo__event__archived": True,
+    "compo__event__hidden": False,
+    "compo__active": True,
+    "compo__hide_from_archive": False,
+}
+
+
+def _is_postgresql() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def _batches(items: Sequence[Any]) -> Iterable[Sequence[Any]]:
+    for start in range(0, len(items), SEARCH_INDEX_BATCH_SIZE):
+        yield items[start : start + SEARCH_INDEX_BATCH_SIZE]
+
+
+def _delete_rows(entry_ids: Sequence[int]) -> None:
+    key = "entry_id" if _is_postgresql() else "rowid"
+    with connection.cursor() as cursor:
+        for batch in _batches(entry_ids):
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(f"DELETE FROM {SEARCH_INDEX_TABLE} WHERE {key} IN ({placeholders})", batch)
+
+
+def _insert_rows(rows: Sequence[tuple[Any, ...]]) -> None:
+    if _is_postgresql():
+        sql = (
+            f"INSERT INTO {SEARCH_INDEX_TABLE} (entry_id, document) VALUES (%s, "
+            "setweight(to_tsvector('simple', %s), 'A') || "
+            "setweight(to_tsvector('simple', %s), 'B') || "
+            "setweight(to_tsvector('simple', %s), 'C'))"
+        )
+        params = [
+            (pk, f"{name} {creator}", f"{platform or ''} {compo} {event}", description)
+            for pk, name, creator, platform, compo, event, description in rows
+        ]
+    else:
+        sql = (
+            f"INSERT INTO {SEARCH_INDEX_TABLE} (rowid, name, creator, platform, compo, event, description) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s)"
+        )
+        params = [(pk, name, creator, platform or "", *rest) for pk, name, creator, platform, *rest in rows]
+    with connection.cursor() as cursor:
+        for batch in _batches(params):
+            cursor.executemany(sql, batch)
+
+
+def update_search_index(**filters: Any) -> None:
+    """Reindex the entries matching the filters, eg. update_search_index(compo_id=1).
+
+    Entries that are no longer shown in the archive are dropped from the index.
+    """
+    entries = Entry.objects.filter(**filters)
+    entry_ids = list(entries.values_list("id", flat=True))
+    if not entry_ids:
+        return
+    rows = list(entries.filter(**SEARCHABLE_ENTRIES).order_by("id").values_list(*_INDEXED_FIELDS))
+    _delete_rows(entry_ids)
+    _insert_rows(rows)
+
+
+def remove_from_search_index(entry_ids: Sequence[int]) -> None:
+    _delete_rows(entry_ids)
+
+
+def rebuild_search_index() -> int:
+    """Rebuild the whole search index. Returns the number of indexed entries."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_INDEX_TABLE}")
+    rows = list(Entry.objects.filter(**SEARCHABLE_ENTRIES).order_by("id").values_list(*_INDEXED_FIELDS))
+    _insert_rows(rows)
+    return len(rows)
+
+
+def parse_query_terms(query: str) -> list[str]:
+    """Split a search query into the words to match. Anything but letters and digits is ignored."""
+    return re.findall(r"\w+", query.lower())[:MAX_QUERY_TERMS]
+
+
+def search_entries(query: str) -> QuerySet[Entry]:
+    """Find archived entries matching every word of the query as a prefix.
+
+    The entries are annotated with search_rank (higher is better) and ordered by it.
+    """
+    terms = parse_query_terms(query)
+    if not terms:
+        return Entry.objects.none()
+
+    entry_table = Entry._meta.db_table
+    if _is_postgresql():
+        ts_query = " & ".join(f"{term}:*" for term in terms)
+        matches = RawSQL(
+            f"SELECT entry_id FROM {SEARCH_INDEX_TABLE} WHERE document @@ to_tsquery('simple', %s)",
+            [ts_query],
+        )
+        rank = RawSQL(
+            f"SELECT ts_rank_cd(document, to_tsquery('simple', %s)) FROM {SEARCH_INDEX_TABLE} "
+            f"WHERE entry_id = {entry_table}.id",
+            [ts_query],
+            output_field=FloatField(),
+        )
+    else:
+        fts_query = " ".join(f'"{term}"*' for term in terms)
+        matches = RawSQL(
+            f"SELECT rowid FROM {SEARCH_INDEX_TABLE} WHERE {SEARCH_INDEX_TABLE} MATCH %s", [fts_query]
+        )
+        # bm25() is lower for better matches
+        rank = RawSQL(
+            f"SELECT -bm25({SEARCH_INDEX_TABLE}, {_FTS5_WEIGHTS}) FROM {SEARCH_INDEX_TABLE} "
+            f"WHERE {SEARCH_INDEX_TABLE} MATCH %s AND rowid = {entry_table}.id",
+            [fts_query],
+            output_field=FloatField(),
+        )
+
+    return (
+        Entry.objects.filter(pk__in=matches, **SEARCHABLE_ENTRIES)
+        .annotate(search_rank=rank)
+        .order_by("-search_rank", "-compo__event__date", "id")
+    )
@@ -0,0 +1,83 @@
+import logging
+
+from celery import shared_task
+from django.db import transaction
+
+from Instanssi.arkisto import export
+from Instanssi.arkisto.jobs import get_archiver_job, update_archiver_job
+from Instanssi.kompomaatti.misc.results import freeze_compo_results
+from Instanssi.kompomaatti.models import Compo, EntryScore, Event, VoteGroup
+
+log = logging.getLogger(__name__)
+
+
+@shared_task  # type: ignore[untyped-decorator]
+def optimize_event_scores(event_id: int) -> None:
+    """Freeze the results of every compo in the event, so that they no longer depend on the ballots."""
+    update_archiver_job(event_id, "optimize_scores", "running")
+    try:
+        compo_ids = list(Compo.objects.filter(event_id=event_id).order_by("id").values_list("id", flat=True))
+        total = len(compo_ids)
+        for processed, compo_id in enumerate(compo_ids, start=1):
+            freeze_compo_results(compo_id)
+            update_archiver_job(event_id, "optimize_scores", "running", processed, total)
+    except Exception:
+        update_archiver_job(event_id, "optimize_scores", "failed")
+        raise
+
+    update_archiver_job(event_id, "optimize_scores", "done", total, total)
+    log.info("Optimized scores of %d compos in event %d", total, event_id)
+
+
+@shared_task  # type: ignore[untyped-decorator]
+def remove_event_votes(event_id: int) -> None:
+    """Delete the ballots and running scores of all compos in the event.
+
+    Ballots are deleted through QuerySet.delete(), so that the removal is audit logged like the
+    rest of the archiver. There is a single VoteGroup row per ballot, so this stays cheap.
+    """
+    update_archiver_job(event_id, "remove_old_votes", "running")
+    try:
+        with transaction.atomic():
+            _, counts = VoteGroup.objects.filter(compo__event_id=event_id).delete()
+            deleted = counts.get(VoteGroup._meta.label, 0)
+            EntryScore.objects.filter(entry__compo__event_id=event_id).delete()
+    except Exception:
+        update_archiver_job(event_id, "remove_old_votes", "failed")
+        raise
+
+    update_archiver_job(event_id, "remove_old_votes", "done", deleted, deleted)
+    log.info("Removed %d old ballots from event %d", deleted, event_id)
+
+
+@shared_task  # type: ignore[untyped-decorator]
+def export_event_static(event_id: int) -> None:
+    """Export the archive pages of the event (and the pages spanning the whole archive) for nginx."""
+    update_archiver_job(event_id, "export_static", "running")
+    try:
+        event = Event.objects.get(pk=event_id)
+        export.export_event(
+            event,
+            force=True,
+            progress=lambda processed, total: update_archiver_job(
+                event_id, "export_static", "running", processed, total
+            ),
+        )
+        export.export_archive_pages()
+    except Exception:
+        update_archiver_job(event_id, "export_static", "failed")
+        raise
+
+    job = get_archiver_job(event_id)
+    total = job["total"] if job is not None else 0
+    update_archiver_job(event_id, "export_static", "done", total, total)
+
+
+@shared_task  # type: ignore[untyped-decorator]
+def update_static_archive() -> None:
+    """Export the archive pages that have changed, and remove the pages of events no longer archived."""
+    if not export.is_export_enabled():
+        return
+    exported, removed = export.update_export()
+    if exported or removed:
+        log.info("Exported archive pages of %d events, removed %d", len(exported), len(removed))
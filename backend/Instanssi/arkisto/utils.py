@@ -1,48 +1,93 @@
+from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
-from django.db.models import QuerySet
+from django.db.models import Exists, OuterRef, Q
 from django.utils import timezone
 
-from Instanssi.kompomaatti.models import Competition, Compo, Entry
+from Instanssi.kompomaatti.models import (
+    Competition,
+    CompetitionParticipation,
+    Compo,
+    Entry,
+    Event,
+    VoteGroup,
+)
 
 if TYPE_CHECKING:
-    from Instanssi.kompomaatti.models import Event
+    from django.db.models import QuerySet
 
+ARCHIVE_USERNAME = "arkisto"
 
-def is_votes_unoptimized(compo_ids: QuerySet[Compo]) -> bool:
-    entries = Entry.objects.filter(compo__in=compo_ids, archive_score=None)
-    if len(entries) > 0:
-        return True
 
-    entries = Entry.objects.filter(compo__in=compo_ids, archive_rank=None)
-    if len(entries) > 0:
-        return True
+@dataclass(frozen=True)
+class EventLifecycleStatus:
+    """Where an event is in its lifecycle, as far as archiving is concerned."""
 
-    return False
+    ongoing: bool
+    votes_unoptimized: bool
+    old_votes_found: bool
+    has_non_archived_items: bool
 
 
-def is_event_ongoing(event: "Event") -> bool:
-    if event.date > timezone.now().date():
-        return True
+def get_event_lifecycle_status(event: Event) -> EventLifecycleStatus:
+    """Get the lifecycle flags of an event with a single query.
 
-    compos = Compo.objects.filter(event=event, voting_end__gt=timezone.now())
-    if len(compos) > 0:
-        return True
+    Every flag is an EXISTS subquery, so the database can stop at the first matching row instead
+    of returning any rows to us.
+    """
+    now = timezone.now()
+    event_ref = OuterRef("pk")
+    flags = (
+        Event.objects.filter(pk=event.pk)
+        .annotate(
+            ongoing_compos=Exists(
+                Compo.objects.filter(event=event_ref).filter(
+                    Q(voting_end__gt=now) | Q(compo_start__gt=now) | Q(adding_end__gt=now)
+                )
+            ),
+            ongoing_competitions=Exists(
+                Competition.objects.filter(event=event_ref).filter(Q(end__gt=now) | Q(start__gt=now))
+            ),
+            unoptimized_entries=Exists(
+                Entry.objects.filter(compo__event=event_ref).filter(
+                    Q(archive_score__isnull=True) | Q(archive_rank__isnull=True)
+                )
+            ),
+            vote_groups=Exists(VoteGroup.objects.filter(compo__event=event_ref)),
+            non_archived_entries=Exists(
+                Entry.objects.filter(compo__event=event_ref).exclude(user__username=ARCHIVE_USERNAME)
+            ),
+            non_archived_participations=Exists(
+                CompetitionParticipation.objects.filter(competition__event=event_ref).exclude(
+                    user__username=ARCHIVE_USERNAME
+                )
+            ),
+        )
+        .values(
+            "ongoing_compos",
+            "ongoing_competitions",
+            "unoptimized_entries",
+            "vote_groups",
+            "non_archived_entries",
+            "non_archived_participations",
+        )
+        .get()
+    )
+    return EventLifecycleStatus(
+        ongoing=event.date > now.date() or flags["ongoing_compos"] or flags["ongoing_competitions"],
+        votes_unoptimized=flags["unoptimized_entries"],
+        old_votes_found=flags["vote_groups"],
+        has_non_archived_items=flags["non_archived_entries"] or flags["non_archived_participations"],
+    )
 
-    compos = Compo.objects.filter(event=event, compo_start__gt=timezone.now())
-    if len(compos) > 0:
-        return True
 
-    compos = Compo.objects.filter(event=event, adding_end__gt=timezone.now())
-    if len(compos) > 0:
-        return True
+def is_votes_unoptimized(compo_ids: "QuerySet[Compo]") -> bool:
+    return (
+        Entry.objects.filter(compo__in=compo_ids)
+        .filter(Q(archive_score__isnull=True) | Q(archive_rank__isnull=True))
+        .exists()
+    )
 
-    competitions = Competition.objects.filter(event=event, end__gt=timezone.now())
-    if len(competitions) > 0:
-        return True
 
-    competitions = Competition.objects.filter(event=event, start__gt=timezone.now())
-    if len(competitions) > 0:
-        return True
-
-    return False
+def is_event_ongoing(event: Event) -> bool:
+    return get_event_lifecycle_status(event).ongoing
@@ -1,14 +1,29 @@
+from collections.abc import AsyncIterator, Callable
 from copy import copy
-from typing import Any
-
-from django.http import Http404, HttpRequest, HttpResponse
-from django.http.response import JsonResponse
+from typing import Any, Final
+
+import orjson
+from django.core.files.storage import default_storage
+from django.db.models import (
+    Case,
+    F,
+    IntegerField,
+    OuterRef,
+    QuerySet,
+    Subquery,
+    Value,
+    When,
+)
+from django.http import Http404, HttpRequest, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
 from django.utils.text import slugify
+from imagekit.cachefiles import ImageCacheFile
 
+from Instanssi.arkisto.caching import cache_archive_page
 from Instanssi.arkisto.models import OtherVideo, OtherVideoCategory
 from Instanssi.kompomaatti.enums import MediaContainer
 from Instanssi.kompomaatti.models import (
+    AlternateEntryFile,
     Competition,
     CompetitionParticipation,
     Compo,
@@ -17,6 +32,7 @@ from Instanssi.kompomaatti.models import (
 )
 
 
+@cache_archive_page
 def text_event(request: HttpRequest, event_id: int) -> HttpResponse:
     event = get_object_or_404(Event, pk=event_id, archived=True)
 
@@ -33,7 +49,10 @@ def text_event(request: HttpRequest, event_id: int) -> HttpResponse:
     competitions: list[Any] = []
     for comp in Competition.objects.filter(event=event, active=True, hide_from_archive=False):
         comp.participants = (  # type: ignore[attr-defined]
-            CompetitionParticipation.objects.filter(competition=comp).with_rank().order_by("computed_rank")  # type: ignore[misc]
+            CompetitionParticipation.objects.filter(competition=comp)
+            .select_related("competition")
+            .with_rank()
+            .order_by("computed_rank")  # type: ignore[misc]
         )
         competitions.append(comp)
 
@@ -45,78 +64,196 @@ def text_event(request: HttpRequest, event_id: int) -> HttpResponse:
     )
 
 
+def _absolute_url_builder(request: HttpRequest) -> Callable[[str], str]:
+    # Most media URLs are root-relative, so join them against a base resolved once per request.
+    base_url = request.build_absolute_uri("/")
+
+    def absolute_url(url: str) -> str:
+        if url.startswith("/") and not url.startswith("//"):
+            return base_url + url[1:]
+        return request.build_absolute_uri(url)
+
+    return absolute_url
+
+
+# Entries of the JSON export are fetched and encoded in chunks of this size
+JSON_EVENT_CHUNK_SIZE: Final[int] = 500
+
+
+def _generated_image_url(image: ImageCacheFile) -> str:
+    """URL of an image generated from an entry image, without checking that it exists in storage.
+
+    The images are generated when the original is saved (see IMAGEKIT_DEFAULT_CACHEFILE_STRATEGY).
+    """
+    return str(image.storage.url(image.name))
+
+
+async def _json_event_chunks(
+    request: HttpRequest, compos: list[Compo], entries: QuerySet[Entry]
+) -> AsyncIterator[bytes]:
+    absolute_url = _absolute_url_builder(request)
+    results_shown = {c.pk for c in compos if c.show_voting_results}
+    entry_counts = dict.fromkeys((c.pk for c in compos), 0)
+
+    yield b'{"entries":['
+    separator = b""
+    async for e in entries.aiterator(chunk_size=JSON_EVENT_CHUNK_SIZE):
+        show_results = e.compo_id in results_shown
+        entry_counts[e.compo_id] += 1
+        yield separator + orjson.dumps(
+            {
+                "id": e.id,
+                "compo_name": e.compo.name,
+                "compo_id": e.compo_id,
+                "entry_name": e.name,
+                "entry_author": e.creator,
+                "entry_score": round(e.computed_score, 2) if show_results else 0,
+                "entry_rank": e.computed_rank if show_results else 0,
+                "entry_result_url": absolute_url(e.entryfile.url),
+                "entry_source_url": absolute_url(e.sourcefile.url) if e.sourcefile else None,
+                "entry_youtube_url": e.youtube_url.link_url if e.youtube_url else None,
+                "entry_image_thumbnail": (
+                    absolute_url(_generated_image_url(e.imagefile_thumbnail))
+                    if e.imagefile_original
+                    else None
+                ),
+                "entry_image_medium": (
+                    absolute_url(_generated_image_url(e.imagefile_medium)) if e.imagefile_original else None
+                ),
+                "entry_image_original": (
+                    absolute_url(e.imagefile_original.url) if e.imagefile_original else None
+                ),
+            }
+        )
+        separator = b","
+    yield b'],"compos":'
+    yield orjson.dumps([{"id": c.pk, "name": c.name, "entry_count": entry_counts[c.pk]} for c in compos])
+    yield b"}"
+
+
+@cache_archive_page
 def json_event(request: HttpRequest, event_id: int) -> HttpResponse:
     event = get_object_or_404(Event, pk=event_id, archived=True)
 
     # Get all compos that are active but not hidden from archive
-    entries_out = []
-    compos_out = []
-    for c in Compo.objects.filter(event=event, active=True, hide_from_archive=False):
-        if c.show_voting_results:
-            entries = Entry.objects.filter(compo=c).with_rank().order_by("computed_rank")  # type: ignore[misc]
-        else:
-            entries = Entry.objects.filter(compo=c).order_by("name")
-
-        compos_out.append({"id": c.pk, "name": c.name, "entry_count": len(entries)})
-
-        for e in entries:
-            entries_out.append(
-                {
-                    "id": e.id,
-                    "compo_name": c.name,
-                    "compo_id": c.pk,
-                    "entry_name": e.name,
-                    "entry_author": e.creator,
-                    "entry_score": round(e.computed_score, 2) if hasattr(e, "computed_score") else 0,
-                    "entry_rank": e.computed_rank if hasattr(e, "computed_rank") else 0,
-                    "entry_result_url": request.build_absolute_uri(e.entryfile.url),
-                    "entry_source_url": (
-                        request.build_absolute_uri(e.sourcefile.url) if e.sourcefile else None
-                    ),
-                    "entry_youtube_url": e.youtube_url.link_url if e.youtube_url else None,
-                    "entry_image_thumbnail": (
-                        request.build_absolute_uri(e.imagefile_thumbnail.url)
-                        if e.imagefile_thumbnail
-                        else None
-                    ),
-                    "entry_image_medium": (
-                        request.build_absolute_uri(e.imagefile_medium.url) if e.imagefile_medium else None
-                    ),
-                    "entry_image_original": (
-                        request.build_absolute_uri(e.imagefile_original.url)
-                        if e.imagefile_original
-                        else None
-                    ),
-                }
+    compos = list(Compo.objects.filter(event=event, active=True, hide_from_archive=False).order_by("id"))
+
+    # Entries of all compos are ranked in a single query. Compos without shown results list their
+    # entries by name, and don't get a score or a rank.
+    entries = (
+        Entry.objects.filter(compo__in=compos)
+        .select_related("compo")
+        .with_rank()
+        .annotate(
+            result_order=Case(
+                When(compo__show_voting_results=True, then=F("computed_rank")),
+                default=Value(0),
+                output_field=IntegerField(),
             )
+        )
+        .order_by("compo_id", "result_order", "name", "id")
+    )
+
+    return StreamingHttpResponse(  # type: ignore[return-value]
+        _json_event_chunks(request, compos, entries), content_type="application/json"
+    )
 
-    return JsonResponse({"entries": entries_out, "compos": compos_out})
 
+# Entries of the M3U8 playlists are fetched in chunks of this size
+M3U8_CHUNK_SIZE: Final[int] = 500
 
-def entries_m3u8(request: HttpRequest, event_id: int) -> HttpResponse:
-    event = get_object_or_404(Event, pk=event_id, archived=True)
 
-    response = HttpResponse(
+def _playlist_entries(entries: QuerySet[Entry]) -> QuerySet[Entry]:
+    """Annotate archived entries with their WEBM audio file, and put them in playing order.
+
+    Compos are played in the order they were held. Entries are played by rank if the results of
+    the compo are shown, otherwise in the order they were shown at the party.
+    """
+    webm_files = (
+        AlternateEntryFile.objects.filter(entry=OuterRef("pk"), container=MediaContainer.WEBM)
+        .order_by("id")
+        .values("file")[:1]
+    )
+    playlist: QuerySet[Entry] = (
+        entries.filter(compo__active=True, compo__hide_from_archive=False)
+        .with_rank()  # type: ignore[attr-defined]
+        .annotate(
+            webm_file=Subquery(webm_files),
+            result_order=Case(
+                When(compo__show_voting_results=True, then=F("computed_rank")),
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+        )
+        .order_by(
+            "compo__event__date",
+            "compo__event_id",
+            "compo__compo_start",
+            "compo_id",
+            "result_order",
+            "order_index",
+            "name",
+            "id",
+        )
+    )
+    return playlist
+
+
+async def _m3u8_lines(request: HttpRequest, title: str, entries: QuerySet[Entry]) -> AsyncIterator[bytes]:
+    absolute_url = _absolute_url_builder(request)
+    safe_title = title.replace("\r", "").replace("\n", "")
+    yield f"#EXTM3U\r\n#EXTALB:{safe_title}\r\n\r\n".encode()
+    async for entry in entries.aiterator(chunk_size=M3U8_CHUNK_SIZE):
+        # Ranks are computed over all entries of the compo, so entries without audio are only
+        # skipped here.
+        webm_file: str | None = entry.webm_file  # type: ignore[attr-defined]
+        if not webm_file:
+            continue
+        url = absolute_url(default_storage.url(webm_file))
+        safe_creator = entry.creator.replace("\r", "").replace("\n", "")
+        safe_name = entry.name.replace("\r", "").replace("\n", "")
+        yield f"#EXTINF:0,{safe_creator} - {safe_name}\r\n{url}\r\n\r\n".encode()
+
+
+def _m3u8_response(
+    request: HttpRequest, title: str, filename: str, entries: QuerySet[Entry]
+) -> HttpResponse:
+    return StreamingHttpResponse(  # type: ignore[return-value]
+        _m3u8_lines(request, title, _playlist_entries(entries)),
         content_type="text/plain",
-        headers={"Content-Disposition": f'attachment; filename="{slugify(event.name)}.m3u8"'},
+        headers={"Content-Disposition": f'attachment; filename="{slugify(filename)}.m3u8"'},
+    )
+
+
+@cache_archive_page
+def entries_m3u8(request: HttpRequest, event_id: int) -> HttpResponse:
+    event = get_object_or_404(Event, pk=event_id, archived=True)
+    return _m3u8_response(request, event.name, event.name, Entry.objects.filter(compo__event=event))
+
+
+@cache_archive_page
+def compo_m3u8(request: HttpRequest, event_id: int, compo_id: int) -> HttpResponse:
+    compo = get_object_or_404(
+        Compo.objects.select_related("event"),
+        pk=compo_id,
+        event_id=event_id,
+        event__archived=True,
+        active=True,
+        hide_from_archive=False,
+    )
+    title = f"{compo.event.name} – {compo.name}"
+    return _m3u8_response(
+        request, title, f"{compo.event.name} {compo.name}", Entry.objects.filter(compo=compo)
     )
-    response.write("#EXTM3U\r\n".encode())
-    response.write(f"#EXTALB:{event.name}\r\n\r\n".encode())
 
-    entries = Entry.objects.filter(compo__event=event, compo__active=True, compo__hide_from_archive=False)
-    for entry in entries:
-        first = entry.alternate_files.filter(container=MediaContainer.WEBM).only("file").first()
-        if first is not None:
-            url = request.build_absolute_uri(first.file.url)
-            safe_creator = entry.creator.replace("\r", "").replace("\n", "")
-            safe_name = entry.name.replace("\r", "").replace("\n", "")
-            response.write(f"#EXTINF:0,{safe_creator} - {safe_name}\r\n".encode())
-            response.write(url)
-            response.write("\r\n\r\n".encode())
 
-    return response
+@cache_archive_page
+def archive_m3u8(request: HttpRequest) -> HttpResponse:
+    entries = Entry.objects.filter(compo__event__archived=True)
+    return _m3u8_response(request, "Instanssi", "instanssi", entries)
 
 
+@cache_archive_page
 def event_index(request: HttpRequest, event_id: int) -> HttpResponse:
     event = get_object_or_404(Event, pk=event_id, archived=True)
 
@@ -146,7 +283,10 @@ def event_index(request: HttpRequest, event_id: int) -> HttpResponse:
     competition_list: list[Any] = []
     for comp in competitions_q:
         comp.participants = (  # type: ignore[attr-defined]
-            CompetitionParticipation.objects.filter(competition=comp).with_rank().order_by("computed_rank")  # type: ignore[misc]
+            CompetitionParticipation.objects.filter(competition=comp)
+            .select_related("competition")
+            .with_rank()
+            .order_by("computed_rank")  # type: ignore[misc]
         )
         competition_list.append(copy(comp))
 
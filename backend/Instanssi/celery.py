@@ -1,9 +1,24 @@
 import os
 
 from celery import Celery
+from kombu.exceptions import ChannelError
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Instanssi.settings")
 
 app = Celery("proj")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+
+def get_queue_depths() -> dict[str, int]:
+    """Get the number of messages waiting in each task queue (not counting ones taken by workers)."""
+    depths = {}
+    with app.connection_for_read() as connection:
+        channel = connection.default_channel
+        for name in app.amqp.queues:
+            try:
+                depths[name] = channel.queue_declare(queue=name, passive=True).message_count
+            except ChannelError:
+                # Queues that have never had messages don't exist yet
+                depths[name] = 0
+    return depths
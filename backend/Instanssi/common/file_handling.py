@@ -1,11 +1,10 @@
-import tempfile
-import uuid
-from contextlib import contextmanager
+import hashlib
 from datetime import datetime
 from pathlib import Path
 from secrets import token_hex
-from typing import Generator
 
+from django.core.files import File
+from django.core.files.storage import default_storage
 from django.utils.text import slugify
 
 
@@ -13,16 +12,6 @@ def clean_filename(name: str) -> str:
     return slugify(name.replace(" ", "_").replace("ä", "a").replace("ö", "o").replace("å", "a"))
 
 
-@contextmanager
-def temp_file(output_format: str) -> Generator[Path, None, None]:
-    with tempfile.TemporaryDirectory() as tmp:
-        tmp_path = Path(tmp)
-        tmp_file = f"tmp_{uuid.uuid4().hex}.{output_format}"
-        output_file = tmp_path.with_name(tmp_file)
-        yield output_file
-        output_file.unlink()
-
-
 def generate_upload_path(
     original_file: str, path: str, slug: str, timestamp: datetime, group_by_year: bool = True
 ) -> str:
@@ -35,3 +24,34 @@ def generate_upload_path(
         return f"{path}/{year}/{filename}"
     else:
         return f"{path}/{filename}"
+
+
+def file_sha256(file: File) -> str:  # type: ignore[type-arg]
+    """Hash the contents of a file, reading it in chunks.
+
+    Uploads were already hashed as they were received (see upload_handlers.py), and are not read again.
+    """
+    # A new file assigned to a FileField is wrapped in a FieldFile
+    for candidate in (file, getattr(file, "_file", None)):
+        if sha256 := getattr(candidate, "sha256", None):
+            return str(sha256)
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def delete_storage_directory(path: str) -> None:
+    """Delete a directory and everything in it from the default storage"""
+    if not default_storage.exists(path):
+        return
+    directories, files = default_storage.listdir(path)
+    for name in files:
+        default_storage.delete(f"{path}/{name}")
+    for name in directories:
+        delete_storage_directory(f"{path}/{name}")
+    # Storages without real directories have nothing left to delete
+    try:
+        default_storage.delete(path)
+    except OSError:
+        pass
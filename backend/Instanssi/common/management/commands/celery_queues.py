@@ -0,0 +1,14 @@
+import sys
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from Instanssi.celery import get_queue_depths
+
+
+class Command(BaseCommand):
+    help = "show the number of tasks waiting in each celery queue"
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        for name, depth in get_queue_depths().items():
+            sys.stderr.write(f"{name}: {depth}\n")
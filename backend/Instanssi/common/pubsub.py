@@ -0,0 +1,152 @@
+"""Lightweight publish/subscribe for pushing server-side events to long-lived async connections.
+
+Publishing is synchronous, so it can be called from regular Django views and tasks. Subscribing
+is asynchronous, and is meant to be used from async views (eg. server-sent event streams).
+
+Each process keeps a single local registry of subscribers, and fans incoming messages out to
+them. The backend only decides how messages get to that registry: InProcessPubSub delivers
+directly (development and tests), and RedisPubSub delivers through Redis so that a message
+published in one worker reaches subscribers in all of them.
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from functools import cache
+from types import TracebackType
+from typing import Final
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import RedisError
+
+log = logging.getLogger(__name__)
+
+# Subscribers that fall this far behind lose their oldest messages instead of buffering forever.
+SUBSCRIPTION_BUFFER_SIZE: Final[int] = 16
+
+
+class Subscription:
+    """Single subscriber to a channel. Use as an async context manager."""
+
+    def __init__(self, pubsub: "PubSub", channel: str) -> None:
+        self.pubsub = pubsub
+        self.channel = channel
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=SUBSCRIPTION_BUFFER_SIZE)
+
+    async def __aenter__(self) -> "Subscription":
+        self._loop = asyncio.get_running_loop()
+        await self.pubsub.attach(self)
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.pubsub.detach(self)
+
+    async def get(self, timeout: float | None = None) -> bytes | None:
+        """Wait for the next message. Returns None if nothing arrived within the timeout."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except TimeoutError:
+            return None
+
+    def deliver(self, message: bytes) -> None:
+        """Queue a message for this subscriber. Safe to call from any thread."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message: bytes) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(message)
+
+
+class PubSub(ABC):
+    """Base class for pub/sub backends. Keeps track of the subscribers of this process."""
+
+    def __init__(self) -> None:
+        self._subscribers: dict[str, set[Subscription]] = {}
+
+    def subscribe(self, channel: str) -> Subscription:
+        return Subscription(self, channel)
+
+    @abstractmethod
+    def publish(self, channel: str, message: bytes) -> None:
+        """Send a message to the subscribers of a channel in every process."""
+
+    async def attach(self, subscription: Subscription) -> None:
+        self._subscribers.setdefault(subscription.channel, set()).add(subscription)
+
+    def detach(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.channel)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.channel]
+
+    def dispatch(self, channel: str, message: bytes) -> None:
+        """Fan a message out to the subscribers of this process."""
+        for subscription in list(self._subscribers.get(channel, ())):
+            subscription.deliver(message)
+
+
+class InProcessPubSub(PubSub):
+    """Delivers messages only to subscribers in the current process."""
+
+    def publish(self, channel: str, message: bytes) -> None:
+        self.dispatch(channel, message)
+
+
+class RedisPubSub(PubSub):
+    """Delivers messages to subscribers in all processes through Redis.
+
+    Every process holds one Redis connection with a single pattern subscription, no matter how
+    many local subscribers it has. Idle subscribers cost nothing besides their queue.
+    """
+
+    def __init__(self, url: str, prefix: str = "instanssi:") -> None:
+        super().__init__()
+        self.url = url
+        self.prefix = prefix
+        self._redis = Redis.from_url(url)
+        self._listener: asyncio.Task[None] | None = None
+
+    def publish(self, channel: str, message: bytes) -> None:
+        try:
+            self._redis.publish(f"{self.prefix}{channel}", message)
+        except RedisError:
+            log.exception("Unable to publish message to channel %s", channel)
+
+    async def attach(self, subscription: Subscription) -> None:
+        await super().attach(subscription)
+        loop = asyncio.get_running_loop()
+        if self._listener is None or self._listener.done() or self._listener.get_loop() is not loop:
+            self._listener = loop.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        prefix_len = len(self.prefix)
+        while True:
+            try:
+                async with AsyncRedis.from_url(self.url) as client, client.pubsub() as pubsub:
+                    await pubsub.psubscribe(f"{self.prefix}*")
+                    async for message in pubsub.listen():
+                        if message["type"] == "pmessage":
+                            self.dispatch(message["channel"].decode()[prefix_len:], message["data"])
+            except RedisError:
+                log.exception("Pub/sub connection lost, reconnecting")
+                await asyncio.sleep(1.0)
+
+
+@cache
+def get_pubsub() -> PubSub:
+    """Get the pub/sub backend configured in settings.PUBSUB."""
+    conf = dict(settings.PUBSUB)
+    backend = import_string(conf.pop("BACKEND"))
+    return backend(**conf)  # type: ignore[no-any-return]
@@ -0,0 +1,54 @@
+"""Upload handlers that hash files as they are received.
+
+The SHA-256 of each uploaded file is computed from the chunks of the request body as they arrive,
+and set as the sha256 attribute of the resulting UploadedFile. file_sha256() picks it up from
+there, so saving an upload does not read the whole file again just to hash it.
+"""
+
+import hashlib
+from typing import Any
+
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+
+
+class HashingMemoryFileUploadHandler(MemoryFileUploadHandler):
+    """Keep small uploads in memory, and hash them on the way in."""
+
+    def new_file(self, *args: Any, **kwargs: Any) -> None:
+        # Set first, as handlers that take the file end new_file() with StopFutureHandlers
+        self.digest = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data: bytes, start: int) -> bytes | None:
+        # Chunks of files too big for memory are passed on to the next handler, which hashes them
+        if self.activated:
+            self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size: int) -> UploadedFile | None:  # type: ignore[type-arg]
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.digest.hexdigest()  # type: ignore[attr-defined]
+        return file
+
+
+class HashingTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """Write big uploads to a temporary file, and hash them on the way in."""
+
+    def new_file(self, *args: Any, **kwargs: Any) -> None:
+        self.digest = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data: bytes, start: int) -> bytes | None:
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size: int) -> UploadedFile | None:  # type: ignore[type-arg]
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.digest.hexdigest()  # type: ignore[attr-defined]
+        return file
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.http import HttpRequest, HttpResponseRedirect, JsonResponse
+from django.middleware.csrf import get_token
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+
+
+@never_cache
+@require_GET
+def csrf_token(request: HttpRequest) -> JsonResponse:
+    """Get a CSRF token for a form on a cached or pre-rendered page, which can't carry its own.
+
+    Only scripts on this site can read the response, so the token is not exposed to other sites.
+    """
+    return JsonResponse({"token": get_token(request)})
+
+
+@never_cache
+@require_GET
+def switch_language(request: HttpRequest, language: str) -> HttpResponseRedirect:
+    """Set the language cookie from a plain link, and go back to the page given in "next".
+
+    This is the language switcher for browsers without JavaScript, which can't fetch a CSRF token for
+    set_language. The language is only a display preference, so changing it needs no protection.
+    """
+    next_url = request.GET.get("next", "/")
+    if not url_has_allowed_host_and_scheme(
+        next_url, allowed_hosts={request.get_host()}, require_https=request.is_secure()
+    ):
+        next_url = "/"
+    response = HttpResponseRedirect(next_url)
+    if language in dict(settings.LANGUAGES):
+        response.set_cookie(
+            settings.LANGUAGE_COOKIE_NAME,
+            language,
+            max_age=settings.LANGUAGE_COOKIE_AGE,
+            path=settings.LANGUAGE_COOKIE_PATH,
+            domain=settings.LANGUAGE_COOKIE_DOMAIN,
+            secure=settings.LANGUAGE_COOKIE_SECURE,
+            httponly=settings.LANGUAGE_COOKIE_HTTPONLY,
+            samesite=settings.LANGUAGE_COOKIE_SAMESITE,
+        )
+    return response
@@ -3,6 +3,7 @@ from pathlib import Path
 from typing import Any
 
 from celery.schedules import crontab
+from kombu import Queue
 
 PROJECT_DIR = Path(__file__).resolve(strict=True).parent
 BASE_DIR = PROJECT_DIR.parent
@@ -28,6 +29,15 @@ MEDIA_URL = "/uploads/"
 STATIC_ROOT = BASE_DIR / "content" / "static"
 STATIC_URL = "/static/"
 
+# Pre-rendered archive pages (see Instanssi/arkisto/export.py), and the site URL they are rendered
+# for. The export is disabled unless a directory is set.
+ARCHIVE_EXPORT_ROOT: Path | None = None
+ARCHIVE_EXPORT_URL: str = "https://instanssi.org"
+
+# Entry files that are being uploaded in chunks (see Instanssi/kompomaatti/misc/uploads.py). Kept
+# out of MEDIA_ROOT, so that unfinished uploads are never served.
+ENTRY_UPLOAD_ROOT: Path = BASE_DIR / "content" / "entry_uploads"
+
 # These configuration options are revealed to templates via settings.OPTION_NAME.
 TEMPLATE_SETTINGS_EXPORT = ["GOOGLE_API_KEY"]
 
@@ -38,19 +48,59 @@ SERVE_QR_CODE_IMAGE_PATH = ""
 # Max size for request body (8M)
 DATA_UPLOAD_MAX_MEMORY_SIZE = 8 * 1024 * 1024
 
+# The default handlers, but hashing the files as they are received
+FILE_UPLOAD_HANDLERS = [
+    "Instanssi.common.upload_handlers.HashingMemoryFileUploadHandler",
+    "Instanssi.common.upload_handlers.HashingTemporaryFileUploadHandler",
+]
+
 # Celery
 CELERY_TASK_SERIALIZER = "json"
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
+
+# Task queues, in the order workers should consume them. Media processing (transcoding, archive
+# exports and other slow batch jobs) comes in bursts, eg. when entries are uploaded near a compo
+# deadline, so it gets its own queue and workers and can't delay receipts or push notifications.
+# A worker started without -Q consumes all of them. See examples/conf/ for running a worker per
+# queue, and the celery_queues command for the queue depths.
+CELERY_TASK_QUEUES = (
+    Queue("notifications"),  # Push notifications and the frequent scheduled jobs
+    Queue("mail"),
+    Queue("default"),
+    Queue("media"),
+)
+CELERY_TASK_DEFAULT_QUEUE = "default"
+CELERY_TASK_ROUTES = {
+    "Instanssi.notifications.tasks.cleanup_old_sent_notifications": {"queue": "default"},
+    "Instanssi.notifications.tasks.*": {"queue": "notifications"},
+    "Instanssi.kompomaatti.tasks.freeze_finished_compo_results": {"queue": "notifications"},
+    "Instanssi.store.tasks.*": {"queue": "mail"},
+    "Instanssi.kompomaatti.tasks.generate_alternate_audio_files": {"queue": "media"},
+    "Instanssi.kompomaatti.tasks.generate_alternate_video_files": {"queue": "media"},
+    "Instanssi.arkisto.tasks.*": {"queue": "media"},
+}
 CELERY_BEAT_SCHEDULE = {
     "check-upcoming-events": {
         "task": "Instanssi.notifications.tasks.check_upcoming_events",
         "schedule": timedelta(minutes=5),
     },
+    "freeze-finished-compo-results": {
+        "task": "Instanssi.kompomaatti.tasks.freeze_finished_compo_results",
+        "schedule": timedelta(minutes=1),
+    },
+    "update-static-archive": {
+        "task": "Instanssi.arkisto.tasks.update_static_archive",
+        "schedule": timedelta(minutes=10),
+    },
     "cleanup-old-sent-notifications": {
         "task": "Instanssi.notifications.tasks.cleanup_old_sent_notifications",
         "schedule": timedelta(days=1),
     },
+    "cleanup-expired-entry-uploads": {
+        "task": "Instanssi.kompomaatti.tasks.cleanup_expired_entry_uploads",
+        "schedule": timedelta(hours=1),
+    },
     "cleanup-old-audit-logs": {
         "task": "Instanssi.common.tasks.cleanup_old_audit_logs",
         "schedule": crontab(hour=3, minute=0),
@@ -62,6 +112,7 @@ MEDIA_COMPO_ALTERNATES: str = "kompomaatti/alternates"
 MEDIA_COMPO_ENTRIES: str = "kompomaatti/entries"
 MEDIA_COMPO_SOURCES: str = "kompomaatti/sources"
 MEDIA_COMPO_IMAGES: str = "kompomaatti/images"
+MEDIA_COMPO_WAVEFORMS: str = "kompomaatti/waveforms"
 MEDIA_PROGRAMME_IMAGES: str = "programme/images"
 MEDIA_STORE_IMAGES: str = "store/images"
 MEDIA_UPLOAD_FILES: str = "files"
@@ -263,7 +314,14 @@ LOGGING = {
 
 
 def make_celery_conf(debug_mode: bool) -> tuple[str, dict[str, Any]]:
-    return "redis://127.0.0.1:6379/3", {}
+    # Workers consuming several queues empty them in the order given, instead of round-robin. Redis
+    # delivers unacknowledged tasks again after visibility_timeout (an hour by default), so it must be
+    # longer than the longest acks_late task (video transcodes, see kompomaatti/tasks.py), or those are
+    # run twice at once.
+    return "redis://127.0.0.1:6379/3", {
+        "queue_order_strategy": "priority",
+        "visibility_timeout": 2 * 60 * 60,
+    }
 
 
 def make_cache_conf(debug_mode: bool) -> dict[str, Any]:
@@ -283,6 +341,16 @@ def make_cache_conf(debug_mode: bool) -> dict[str, Any]:
         }
 
 
+def make_pubsub_conf(debug_mode: bool) -> dict[str, Any]:
+    if debug_mode:
+        return {"BACKEND": "Instanssi.common.pubsub.InProcessPubSub"}
+    else:
+        return {
+            "BACKEND": "Instanssi.common.pubsub.RedisPubSub",
+            "url": "redis://127.0.0.1:6379/4",
+        }
+
+
 def make_email_conf(debug_mode: bool) -> str:
     if debug_mode:
         return "django.core.mail.backends.console.EmailBackend"
@@ -9,7 +9,6 @@ from Instanssi.kompomaatti.models import (
     Entry,
     Event,
     TicketVoteCode,
-    Vote,
     VoteCodeRequest,
     VoteGroup,
 )
@@ -44,6 +43,14 @@ class EntryAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
         "disqualified",
         "admin_thumbnail",
     ]
+    readonly_fields = [
+        "entryfile_hash",
+        "entryfile_size",
+        "sourcefile_hash",
+        "sourcefile_size",
+        "imagefile_hash",
+        "imagefile_size",
+    ]
     admin_thumbnail = AdminThumbnail(image_field="imagefile_thumbnail")
 
 
@@ -55,13 +62,18 @@ class AlternateEntryFileAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
         "created_at",
         "updated_at",
         "file",
+        "file_size",
+    ]
+    readonly_fields = [
+        "source_hash",
+        "file_hash",
+        "file_size",
     ]
 
 
 admin.site.register(Compo)
 admin.site.register(Entry, EntryAdmin)
 admin.site.register(Event)
-admin.site.register(Vote)
 admin.site.register(VoteGroup)
 admin.site.register(TicketVoteCode, TicketVoteCodeAdmin)
 admin.site.register(VoteCodeRequest, VoteCodeRequestAdmin)
@@ -6,11 +6,13 @@ from django.db.models import IntegerChoices
 class MediaCodec(IntegerChoices):
     AAC = 0
     OPUS = 1
+    H264 = 2
 
 
 class MediaContainer(IntegerChoices):
     MP4 = 0
     WEBM = 1
+    HLS = 2
 
 
 WEB_AUDIO_FORMATS: Final[List[Tuple[MediaCodec, MediaContainer]]] = [
@@ -18,6 +20,11 @@ WEB_AUDIO_FORMATS: Final[List[Tuple[MediaCodec, MediaContainer]]] = [
     (MediaCodec.AAC, MediaContainer.MP4),
 ]
 
+# Adaptive streams, with a few renditions of the video in one HLS playlist
+WEB_VIDEO_FORMATS: Final[List[Tuple[MediaCodec, MediaContainer]]] = [
+    (MediaCodec.H264, MediaContainer.HLS),
+]
+
 AUDIO_FILE_EXTENSIONS: Final[List[str]] = [
     ".mp3",
     ".ogg",
@@ -42,3 +49,16 @@ BROWSER_AUDIO_EXTENSIONS: Final[Dict[str, str]] = {
     ".mp4": "audio/mp4",
     ".aac": "audio/aac",
 }
+
+# Extensions that may hold video. Some of these (eg. .mp4) are used for audio-only files too.
+VIDEO_FILE_EXTENSIONS: Final[List[str]] = [
+    ".mp4",
+    ".m4v",
+    ".mkv",
+    ".webm",
+    ".avi",
+    ".mov",
+    ".wmv",
+    ".flv",
+    ".ogv",
+]
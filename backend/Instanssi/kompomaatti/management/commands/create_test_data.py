@@ -22,7 +22,6 @@ from Instanssi.kompomaatti.models import (
     Entry,
     Event,
     TicketVoteCode,
-    Vote,
     VoteCodeRequest,
     VoteGroup,
 )
@@ -248,7 +247,8 @@ class Command(BaseCommand):
             self.created_vote_groups.append(vote_group)
             self.stdout.write(f"  Created vote group for {user_username} in {compo_name}")
 
-        # Create individual votes
+        # Fill in the ballots. These go through the vote group so that entry scores are kept up to date.
+        ranked_entries: dict[int, list[tuple[int, Entry]]] = {}
         for vote_data in votes:
             group_index = vote_data["group_index"]
             entry_name = vote_data["entry_name"]
@@ -258,21 +258,26 @@ class Command(BaseCommand):
                 self.stderr.write(f"  Vote group index {group_index} out of range, skipping vote...")
                 continue
 
-            vote_group = self.created_vote_groups[group_index]
             entry = self.created_entries.get(entry_name)
 
             if not entry:
                 self.stderr.write(f"  Entry {entry_name} not found, skipping vote...")
                 continue
 
-            if Vote.objects.filter(user=vote_group.user, compo=vote_group.compo, entry=entry).exists():
-                self.stdout.write(f"  Vote already exists, skipping...")
+            ranked_entries.setdefault(group_index, []).append((rank, entry))
+
+        for group_index, group_votes in ranked_entries.items():
+            vote_group = self.created_vote_groups[group_index]
+            if vote_group.ranking:
+                self.stdout.write(f"  Votes by {vote_group.user.username} already exist, skipping...")
                 continue
 
-            Vote.objects.create(
-                user=vote_group.user, compo=vote_group.compo, entry=entry, rank=rank, group=vote_group
-            )
-            self.stdout.write(f"  Created vote: {entry.name} ranked {rank} by {vote_group.user.username}")
+            group_entries = [entry for _, entry in sorted(group_votes, key=lambda v: v[0])]
+            vote_group.set_votes(group_entries)
+            for rank, entry in enumerate(group_entries, start=1):
+                self.stdout.write(
+                    f"  Created vote: {entry.name} ranked {rank} by {vote_group.user.username}"
+                )
 
     def setup_competitions(self) -> None:
         """Create competitions"""
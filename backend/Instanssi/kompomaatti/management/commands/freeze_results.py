@@ -0,0 +1,45 @@
+import sys
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from Instanssi.kompomaatti.misc.results import (
+    freeze_compo_results,
+    get_unfrozen_finished_compos,
+    recompute_compo_results,
+)
+from Instanssi.kompomaatti.models import Compo
+
+
+class Command(BaseCommand):
+    help = "freeze the results of compos whose voting has ended, or recompute already frozen results"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "-i", "--event", required=False, help="Only handle compos in this event", type=int
+        )
+        parser.add_argument("-c", "--compo", required=False, help="Only handle this compo", type=int)
+        parser.add_argument(
+            "-r",
+            "--recompute",
+            action="store_true",
+            help="Recompute already frozen results (eg. after disqualifying entries)",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["recompute"]:
+            compos = Compo.objects.all()
+        else:
+            compos = get_unfrozen_finished_compos()
+        if event_id := options.get("event"):
+            compos = compos.filter(event_id=event_id)
+        if compo_id := options.get("compo"):
+            compos = compos.filter(pk=compo_id)
+
+        for compo in compos.order_by("id"):
+            if options["recompute"]:
+                count = recompute_compo_results(compo.id)
+                sys.stderr.write(f"Recomputed results of {count} entries in {compo}\n")
+            else:
+                count = freeze_compo_results(compo.id)
+                sys.stderr.write(f"Froze results of {count} entries in {compo}\n")
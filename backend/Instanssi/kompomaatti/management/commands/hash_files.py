@@ -0,0 +1,90 @@
+import sys
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import Q
+
+from Instanssi.admin_upload.models import UploadedFile
+from Instanssi.kompomaatti.models import AlternateEntryFile, Entry
+
+
+class Command(BaseCommand):
+    help = "record the SHA-256 and size of entry, alternate and uploaded files saved without them"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "-i",
+            "--event",
+            required=False,
+            help="Only hash files in this event",
+            type=int,
+        )
+        parser.add_argument(
+            "-f",
+            "--force",
+            action="store_true",
+            help="Hash all the files again, not only the ones without a hash",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        event_id = options.get("event")
+        force = options["force"]
+
+        entries = Entry.objects.get_queryset()
+        alternates = AlternateEntryFile.objects.get_queryset()
+        uploads = UploadedFile.objects.get_queryset()
+        if event_id:
+            entries = entries.filter(compo__event_id=event_id)
+            alternates = alternates.filter(entry__compo__event_id=event_id)
+            uploads = uploads.filter(event_id=event_id)
+        if not force:
+            unhashed = Q()
+            for name, hash_field, _size_field in Entry.HASHED_FILE_FIELDS:
+                unhashed |= Q(**{hash_field: ""}) & ~Q(**{name: ""})
+            entries = entries.filter(unhashed)
+            alternates = alternates.filter(file_hash="").exclude(file="")
+            uploads = uploads.filter(file_hash="").exclude(file="")
+
+        # Saved with update(), as saving an entry would reindex and transcode it
+        count = 0
+        for entry in entries.iterator():
+            try:
+                entry.update_file_hashes()
+            except OSError as e:
+                sys.stderr.write(f"Skipping entry {entry.id}: {e}\n")
+                continue
+            Entry.objects.filter(pk=entry.pk).update(
+                **{
+                    field: getattr(entry, field)
+                    for _name, hash_field, size_field in Entry.HASHED_FILE_FIELDS
+                    for field in (hash_field, size_field)
+                }
+            )
+            count += 1
+        sys.stderr.write(f"Hashed files of {count} entries\n")
+
+        count = 0
+        for alt in alternates.iterator():
+            try:
+                alt.update_file_hash()
+            except OSError as e:
+                sys.stderr.write(f"Skipping alternate file {alt.id}: {e}\n")
+                continue
+            AlternateEntryFile.objects.filter(pk=alt.pk).update(
+                file_hash=alt.file_hash, file_size=alt.file_size
+            )
+            count += 1
+        sys.stderr.write(f"Hashed {count} alternate file(s)\n")
+
+        count = 0
+        for upload in uploads.iterator():
+            try:
+                upload.update_file_hash()
+            except OSError as e:
+                sys.stderr.write(f"Skipping uploaded file {upload.id}: {e}\n")
+                continue
+            UploadedFile.objects.filter(pk=upload.pk).update(
+                file_hash=upload.file_hash, file_size=upload.file_size
+            )
+            count += 1
+        sys.stderr.write(f"Hashed {count} uploaded file(s)\n")
@@ -0,0 +1,25 @@
+import sys
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+
+from Instanssi.kompomaatti.models import Compo, EntryScore
+
+
+class Command(BaseCommand):
+    help = "rebuild the denormalized entry vote scores from the stored ballots"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "-i", "--event", required=False, help="Only rebuild entries in this event", type=int
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        compos = None
+        if event_id := options.get("event"):
+            sys.stderr.write(f"Rebuilding scores for entries in event {event_id}\n")
+            compos = Compo.objects.filter(event_id=int(event_id))
+        with transaction.atomic():
+            count = EntryScore.objects.rebuild(compos)
+        sys.stderr.write(f"Rebuilt scores for {count} voted entries\n")
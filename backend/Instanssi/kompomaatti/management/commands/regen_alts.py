@@ -1,24 +1,182 @@
 import sys
-from typing import Any
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, TextIO
 
-from django.core.management.base import BaseCommand, CommandParser
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection
 
+from Instanssi.kompomaatti.enums import WEB_AUDIO_FORMATS, MediaCodec
+from Instanssi.kompomaatti.misc.alternates import (
+    AudioFormat,
+    format_name,
+    plan_alternate_regeneration,
+    transcode_audio_alternates,
+)
+from Instanssi.kompomaatti.misc.video import entry_has_video
+from Instanssi.kompomaatti.misc.waveform import generate_entry_waveform
 from Instanssi.kompomaatti.models import Entry
+from Instanssi.kompomaatti.tasks import generate_alternate_audio_files
+
+
+def _load_finished(state_file: Path | None) -> set[int]:
+    if state_file is None or not state_file.exists():
+        return set()
+    return {int(line) for line in state_file.read_text().split() if line.isdigit()}
+
+
+def _regenerate(entry_id: int, formats: list[AudioFormat], force: bool, in_thread: bool) -> None:
+    try:
+        entry = Entry.objects.get(pk=entry_id)
+        # The file may have been replaced with a video since the plan was made
+        if entry_has_video(entry):
+            return
+        transcode_audio_alternates(entry, formats, force=force)
+        generate_entry_waveform(entry)
+    finally:
+        # Worker threads each get their own database connection
+        if in_thread:
+            connection.close()
 
 
 class Command(BaseCommand):
-    help = "regenerate entry alternate audio files"
+    help = "regenerate entry alternate audio files (and waveforms that are out of date)"
 
     def add_arguments(self, parser: CommandParser) -> None:
         parser.add_argument(
             "-i", "--event", required=False, help="Only regenerate entries in this event", type=int
         )
+        parser.add_argument(
+            "-c", "--compo", required=False, help="Only regenerate entries in this compo", type=int
+        )
+        parser.add_argument(
+            "--codec",
+            action="append",
+            choices=[codec.name.lower() for codec in MediaCodec],
+            help="Only regenerate this codec (can be given more than once)",
+        )
+        parser.add_argument(
+            "-m",
+            "--missing-only",
+            action="store_true",
+            help="Only generate files that are missing or were built from an older entry file",
+        )
+        parser.add_argument(
+            "-n", "--dry-run", action="store_true", help="Only list the files that would be generated"
+        )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            default=1,
+            type=int,
+            help="Number of ffmpeg transcodes to run at once (with --celery, the worker concurrency applies)",
+        )
+        parser.add_argument(
+            "--celery",
+            action="store_true",
+            help="Queue the transcodes to the Celery workers instead of running them here",
+        )
+        parser.add_argument(
+            "--state-file",
+            type=Path,
+            help="Record finished entries in this file, and skip the entries already recorded in it",
+        )
 
     def handle(self, *args: Any, **options: Any) -> None:
+        if options["jobs"] < 1:
+            raise CommandError("--jobs must be at least 1")
+
         qs = Entry.objects.get_queryset()
         if event_id := options.get("event"):
             sys.stderr.write(f"Regenerating entries in event {event_id}\n")
             qs = qs.filter(compo__event_id=int(event_id))
-        for entry in qs.iterator():
-            sys.stderr.write(f"Generating alternate audio files for entry {entry}\n")
-            entry.generate_alternates()
+        if compo_id := options.get("compo"):
+            sys.stderr.write(f"Regenerating entries in compo {compo_id}\n")
+            qs = qs.filter(compo_id=int(compo_id))
+        codecs = options.get("codec")
+        formats = [fmt for fmt in WEB_AUDIO_FORMATS if not codecs or fmt[0].name.lower() in codecs]
+        force = not options["missing_only"]
+
+        state_file: Path | None = options.get("state_file")
+        finished = _load_finished(state_file)
+        plan = [
+            (entry, entry_formats)
+            for entry, entry_formats in plan_alternate_regeneration(qs, formats, options["missing_only"])
+            if entry.id not in finished
+        ]
+        if finished:
+            sys.stderr.write(f"Skipping {len(finished)} entries already finished in {state_file}\n")
+
+        if options["dry_run"]:
+            for entry, entry_formats in plan:
+                sys.stderr.write(
+                    f"Would generate {', '.join(map(format_name, entry_formats))} for {entry}\n"
+                )
+            sys.stderr.write(f"{len(plan)} entries would be regenerated\n")
+            return
+
+        if options["celery"]:
+            for entry, entry_formats in plan:
+                generate_alternate_audio_files.delay(
+                    entry.id, force, [[int(codec), int(container)] for codec, container in entry_formats]
+                )
+            sys.stderr.write(f"Queued {len(plan)} entries for regeneration\n")
+            return
+
+        state = state_file.open("a") if state_file is not None else None
+        try:
+            self._run(plan, force, options["jobs"], state)
+        except KeyboardInterrupt:
+            resume = " with the same --state-file" if state_file is not None else " with --missing-only"
+            sys.stderr.write(f"Interrupted, run again{resume} to continue\n")
+        finally:
+            if state is not None:
+                state.close()
+
+    def _run(
+        self, plan: list[tuple[Entry, list[AudioFormat]]], force: bool, jobs: int, state: TextIO | None
+    ) -> None:
+        total = len(plan)
+        finished = failed = 0
+        started = time.monotonic()
+
+        def report(entry: Entry, error: BaseException | None) -> None:
+            nonlocal finished, failed
+            finished += 1
+            if error is not None:
+                failed += 1
+                sys.stderr.write(f"[{finished}/{total}] Failed {entry}: {error}\n")
+                return
+            if state is not None:
+                state.write(f"{entry.id}\n")
+                state.flush()
+            elapsed = time.monotonic() - started
+            eta = timedelta(seconds=round(elapsed / finished * (total - finished)))
+            rate = finished / elapsed * 60 if elapsed else 0.0
+            sys.stderr.write(f"[{finished}/{total}] Generated {entry} ({rate:.1f} entries/min, ETA {eta})\n")
+
+        if jobs == 1:
+            for entry, formats in plan:
+                try:
+                    _regenerate(entry.id, formats, force, in_thread=False)
+                except Exception as e:
+                    report(entry, e)
+                else:
+                    report(entry, None)
+        else:
+            # The transcoding happens in ffmpeg processes, so threads are enough to keep them busy
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                futures: dict[Future[None], Entry] = {
+                    executor.submit(_regenerate, entry.id, formats, force, True): entry
+                    for entry, formats in plan
+                }
+                try:
+                    for future in as_completed(futures):
+                        report(futures[future], future.exception())
+                except KeyboardInterrupt:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise
+
+        sys.stderr.write(f"Regenerated {finished - failed} entries, {failed} failed\n")
@@ -0,0 +1,58 @@
+"""Add a denormalized per-entry vote score table.
+
+Scores were previously aggregated from the Vote table on every read. EntryScore keeps
+the running score and vote count of each entry, and is filled here from existing votes.
+"""
+
+from typing import Any
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_entry_scores(apps: Any, schema_editor: Any) -> None:
+    Vote = apps.get_model("kompomaatti", "Vote")
+    EntryScore = apps.get_model("kompomaatti", "EntryScore")
+
+    totals: dict[int, tuple[float, int]] = {}
+    for entry_id, rank in Vote.objects.values_list("entry_id", "rank").iterator():
+        if rank < 1:
+            continue
+        points, count = totals.get(entry_id, (0.0, 0))
+        totals[entry_id] = (round(points + round(1.0 / rank, 9), 9), count + 1)
+
+    EntryScore.objects.bulk_create(
+        [
+            EntryScore(entry_id=entry_id, score=points, vote_count=count)
+            for entry_id, (points, count) in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kompomaatti", "0026_add_imagefile_sizelimit"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EntryScore",
+            fields=[
+                (
+                    "entry",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="vote_score",
+                        serialize=False,
+                        to="kompomaatti.entry",
+                    ),
+                ),
+                ("score", models.FloatField(default=0.0, verbose_name="Score")),
+                ("vote_count", models.IntegerField(default=0, verbose_name="Vote count")),
+            ],
+        ),
+        migrations.RunPython(backfill_entry_scores, migrations.RunPython.noop),
+    ]
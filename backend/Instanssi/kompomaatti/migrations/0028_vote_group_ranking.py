@@ -0,0 +1,67 @@
+"""Store ranked ballots on VoteGroup instead of one Vote row per ranked entry.
+
+Existing votes are packed into VoteGroup.ranking in rank order. Votes that predate vote groups
+(group is null) are attached to the matching (user, compo) group, which is created if needed.
+"""
+
+from typing import Any
+
+from django.db import migrations, models
+
+
+def pack_votes(apps: Any, schema_editor: Any) -> None:
+    Vote = apps.get_model("kompomaatti", "Vote")
+    VoteGroup = apps.get_model("kompomaatti", "VoteGroup")
+
+    rankings: dict[tuple[int, int], list[int]] = {}
+    for user_id, compo_id, entry_id in (
+        Vote.objects.filter(rank__gte=1)
+        .order_by("user_id", "compo_id", "rank", "id")
+        .values_list("user_id", "compo_id", "entry_id")
+        .iterator()
+    ):
+        ranking = rankings.setdefault((user_id, compo_id), [])
+        if entry_id not in ranking:
+            ranking.append(entry_id)
+
+    for (user_id, compo_id), ranking in rankings.items():
+        VoteGroup.objects.update_or_create(user_id=user_id, compo_id=compo_id, defaults={"ranking": ranking})
+
+
+def unpack_votes(apps: Any, schema_editor: Any) -> None:
+    Vote = apps.get_model("kompomaatti", "Vote")
+    VoteGroup = apps.get_model("kompomaatti", "VoteGroup")
+
+    Vote.objects.bulk_create(
+        [
+            Vote(
+                user_id=group.user_id,
+                compo_id=group.compo_id,
+                entry_id=entry_id,
+                rank=rank,
+                group=group,
+            )
+            for group in VoteGroup.objects.iterator()
+            for rank, entry_id in enumerate(group.ranking, start=1)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kompomaatti", "0027_entry_score"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="votegroup",
+            name="ranking",
+            field=models.JSONField(blank=True, default=list, verbose_name="Ranking"),
+        ),
+        migrations.RunPython(pack_votes, unpack_votes),
+        migrations.DeleteModel(
+            name="Vote",
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.7 on 2026-10-18 07:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kompomaatti", "0028_vote_group_ranking"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="livevotingstate",
+            name="version",
+            field=models.PositiveIntegerField(default=0, verbose_name="Version"),
+        ),
+    ]
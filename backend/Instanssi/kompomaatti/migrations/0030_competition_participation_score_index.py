@@ -0,0 +1,19 @@
+# Generated by Django 6.0.7 on 2026-10-18 08:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kompomaatti", "0029_live_voting_state_version"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="competitionparticipation",
+            index=models.Index(fields=["competition", "score"], name="kompomaatti_part_comp_score"),
+        ),
+    ]
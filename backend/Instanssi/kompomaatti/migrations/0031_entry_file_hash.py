@@ -0,0 +1,28 @@
+# Generated by Django 6.0.7 on 2026-10-18 08:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kompomaatti", "0030_competition_participation_score_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="alternateentryfile",
+            name="source_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="entry",
+            name="entryfile_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name="File SHA-256"),
+        ),
+        migrations.AddField(
+            model_name="entry",
+            name="entryfile_size",
+            field=models.BigIntegerField(blank=True, editable=False, null=True, verbose_name="File size"),
+        ),
+    ]
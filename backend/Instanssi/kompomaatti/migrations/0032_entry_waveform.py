@@ -0,0 +1,33 @@
+# Generated by Django 6.0.7 on 2026-10-18 08:52
+
+from django.db import migrations, models
+
+import Instanssi.kompomaatti.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kompomaatti", "0031_entry_file_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="entry",
+            name="waveform_source_hash",
+            field=models.CharField(
+                blank=True, editable=False, max_length=64, verbose_name="Waveform source SHA-256"
+            ),
+        ),
+        migrations.AddField(
+            model_name="entry",
+            name="waveformfile",
+            field=models.FileField(
+                blank=True,
+                editable=False,
+                max_length=255,
+                upload_to=Instanssi.kompomaatti.models.generate_entry_waveform_path,
+                verbose_name="Waveform",
+            ),
+        ),
+    ]
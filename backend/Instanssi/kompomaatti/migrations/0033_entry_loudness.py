@@ -0,0 +1,25 @@
+# Generated by Django 6.0.7 on 2026-10-18 08:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kompomaatti", "0032_entry_waveform"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="entry",
+            name="loudness",
+            field=models.FloatField(
+                blank=True, editable=False, null=True, verbose_name="Integrated loudness (LUFS)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="entry",
+            name="true_peak",
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name="True peak (dBTP)"),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.7 on 2026-10-18 09:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kompomaatti", "0033_entry_loudness"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="alternateentryfile",
+            name="codec",
+            field=models.IntegerField(choices=[(0, "Aac"), (1, "Opus"), (2, "H264")]),
+        ),
+        migrations.AlterField(
+            model_name="alternateentryfile",
+            name="container",
+            field=models.IntegerField(choices=[(0, "Mp4"), (1, "Webm"), (2, "Hls")]),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 6.0.7 on 2026-10-18 09:08
+
+import uuid
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kompomaatti", "0034_video_alternates"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EntryUpload",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False),
+                ),
+                (
+                    "field",
+                    models.CharField(
+                        choices=[("entryfile", "File"), ("sourcefile", "Source code")],
+                        max_length=16,
+                        verbose_name="Field",
+                    ),
+                ),
+                ("filename", models.CharField(max_length=255, verbose_name="File name")),
+                ("size", models.BigIntegerField(verbose_name="File size")),
+                (
+                    "created_at",
+                    models.DateTimeField(default=django.utils.timezone.now, verbose_name="Created at"),
+                ),
+                ("expires_at", models.DateTimeField(verbose_name="Expires at")),
+                (
+                    "compo",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="kompomaatti.compo",
+                        verbose_name="compo",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="User",
+                    ),
+                ),
+            ],
+        ),
+    ]
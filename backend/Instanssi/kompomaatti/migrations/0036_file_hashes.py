@@ -0,0 +1,54 @@
+# Generated by Django 6.0.7 on 2026-10-18 09:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kompomaatti", "0035_entry_upload"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="alternateentryfile",
+            name="file_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="alternateentryfile",
+            name="file_size",
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="entry",
+            name="imagefile_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name="Image SHA-256"),
+        ),
+        migrations.AddField(
+            model_name="entry",
+            name="imagefile_size",
+            field=models.BigIntegerField(blank=True, editable=False, null=True, verbose_name="Image size"),
+        ),
+        migrations.AddField(
+            model_name="entry",
+            name="sourcefile_hash",
+            field=models.CharField(
+                blank=True, editable=False, max_length=64, verbose_name="Source code SHA-256"
+            ),
+        ),
+        migrations.AddField(
+            model_name="entry",
+            name="sourcefile_size",
+            field=models.BigIntegerField(
+                blank=True, editable=False, null=True, verbose_name="Source code size"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="entry",
+            name="entryfile_hash",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=64, verbose_name="File SHA-256"
+            ),
+        ),
+    ]
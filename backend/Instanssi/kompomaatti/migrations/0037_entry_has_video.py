@@ -0,0 +1,18 @@
+# Generated by Django 6.0.7 on 2026-10-18 09:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kompomaatti", "0036_file_hashes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="entry",
+            name="has_video",
+            field=models.BooleanField(blank=True, editable=False, null=True, verbose_name="Has video"),
+        ),
+    ]
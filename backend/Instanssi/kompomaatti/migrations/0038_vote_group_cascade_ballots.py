@@ -0,0 +1,35 @@
+# Generated by Django 6.0.7 on 2026-10-18 09:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+import Instanssi.kompomaatti.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kompomaatti", "0037_entry_has_video"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="votegroup",
+            name="compo",
+            field=models.ForeignKey(
+                on_delete=Instanssi.kompomaatti.models.cascade_ballots,
+                to="kompomaatti.compo",
+                verbose_name="compo",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="votegroup",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=Instanssi.kompomaatti.models.cascade_ballots,
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="user",
+            ),
+        ),
+    ]
@@ -0,0 +1,188 @@
+"""Alternate versions of audio entries, transcoded for playback in browsers.
+
+Every format in WEB_AUDIO_FORMATS is produced by a single ffmpeg run with one output per format,
+so the entry file is only read and decoded once, and ffmpeg runs the encoders in parallel. Each
+AlternateEntryFile records the hash of the entry file it was built from, so formats that are up to
+date can be skipped.
+"""
+
+import logging
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Final, List, Sequence, Set, Tuple
+
+import ffmpeg
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from Instanssi.kompomaatti.enums import WEB_AUDIO_FORMATS, MediaCodec, MediaContainer
+from Instanssi.kompomaatti.models import AlternateEntryFile, Entry
+
+log = logging.getLogger(__name__)
+
+AudioFormat = Tuple[MediaCodec, MediaContainer]
+
+# Predefined bit-rates for known formats. Otherwise, use a guess.
+# These sound pretty good, and make decently small files.
+FFMPEG_BITRATE: Final[Dict[MediaCodec, str]] = {
+    MediaCodec.OPUS: "128k",
+    MediaCodec.AAC: "160k",
+}
+
+# Map codec to ffmpeg encoder name
+FFMPEG_ENCODERS: Final[Dict[MediaCodec, str]] = {
+    MediaCodec.AAC: "aac",
+    MediaCodec.OPUS: "libopus",
+}
+
+# ffmpeg gives up after this many seconds of CPU time. Transcoding a track takes seconds, so only
+# broken or absurdly long files get anywhere near it.
+FFMPEG_TIME_LIMIT: Final[int] = 10 * 60
+
+
+def format_name(audio_format: AudioFormat) -> str:
+    codec, container = audio_format
+    return f"{codec.name.lower()}/{container.name.lower()}"
+
+
+def ensure_entryfile_hash(entry: Entry) -> None:
+    """Hash the entry file, if it was saved before hashes were stored."""
+    if not entry.entryfile_hash:
+        entry.update_entryfile_hash()
+        Entry.objects.filter(pk=entry.pk).update(
+            entryfile_hash=entry.entryfile_hash, entryfile_size=entry.entryfile_size
+        )
+
+
+def _save_alternate_files(entry: Entry, outputs: Dict[AudioFormat, Path], source_hash: str) -> None:
+    """Save the transcoded files of an entry, replacing any earlier versions of them.
+
+    The rows are written in a single transaction, so the archive never shows a mix of old and new
+    files. Replaced files are removed from storage only once the transaction has committed.
+    """
+    existing = {(alt.codec, alt.container): alt for alt in AlternateEntryFile.objects.filter(entry=entry)}
+    replaced_files: List[str] = []
+    with transaction.atomic():
+        for (codec, container), output_file in outputs.items():
+            alt = existing.get((codec, container))
+            if alt is not None:
+                if alt.file.name:
+                    replaced_files.append(alt.file.name)
+                alt.updated_at = timezone.now()
+            else:
+                alt = AlternateEntryFile(entry=entry, codec=codec, container=container)
+            alt.source_hash = source_hash
+            with open(output_file, "rb") as fd:
+                alt.file = File(fd, name=output_file.name)
+                alt.save()
+            log.info("Saved %s version of entry %d to %s", output_file.name, entry.id, alt.file.name)
+
+        def delete_replaced_files() -> None:
+            for name in replaced_files:
+                default_storage.delete(name)
+
+        transaction.on_commit(delete_replaced_files)
+
+
+def transcode_audio_alternates(
+    entry: Entry, formats: Sequence[AudioFormat] | None = None, force: bool = False
+) -> List[AudioFormat]:
+    """Transcode an audio entry to the given formats (all of WEB_AUDIO_FORMATS by default).
+
+    Formats that are already up to date with the entry file are skipped, unless force is set.
+
+    Returns:
+        The formats that were transcoded.
+    """
+    source_file = Path(entry.entryfile.path)
+
+    # Some quick sanity checks for the input.
+    if not entry.is_audio:
+        log.error("Unable to convert -- Input file is not an audio file")
+        return []
+
+    ensure_entryfile_hash(entry)
+    selected = list(WEB_AUDIO_FORMATS if formats is None else formats)
+    if not force:
+        outdated = entry.get_outdated_alternate_formats()
+        selected = [audio_format for audio_format in selected if audio_format in outdated]
+    if not selected:
+        log.info("Alternate files of entry %d are up to date", entry.id)
+        return []
+
+    log.info(
+        "Received file %s for processing -- converting to %s",
+        source_file,
+        ", ".join(format_name(audio_format) for audio_format in selected),
+    )
+
+    # Create a temporary directory, and write the recoded audio files there.
+    with tempfile.TemporaryDirectory(prefix="alternates-") as temp_dir:
+        outputs = {
+            (codec, container): Path(temp_dir) / f"{codec.name.lower()}.{container.name.lower()}"
+            for codec, container in selected
+        }
+        try:
+            input_audio = ffmpeg.input(source_file.resolve()).audio
+            pipeline = ffmpeg.merge_outputs(
+                *(
+                    ffmpeg.output(
+                        input_audio,
+                        filename=str(output_file),
+                        format=container.name.lower(),
+                        acodec=FFMPEG_ENCODERS[codec],
+                        audio_bitrate=FFMPEG_BITRATE[codec],
+                    )
+                    for (codec, container), output_file in outputs.items()
+                )
+            )
+            pipeline.global_args(
+                "-hide_banner", "-nostats", "-loglevel", "warning", "-timelimit", str(FFMPEG_TIME_LIMIT)
+            ).run()
+        except Exception as e:
+            log.exception("Unable to convert -- %s", str(e))
+            raise
+
+        _save_alternate_files(entry, outputs, entry.entryfile_hash)
+    log.info("Entry %d processed", entry.id)
+    return selected
+
+
+def plan_alternate_regeneration(
+    entries: QuerySet[Entry], formats: Sequence[AudioFormat], missing_only: bool = False
+) -> List[Tuple[Entry, List[AudioFormat]]]:
+    """Work out which formats of which audio entries need to be transcoded.
+
+    Without missing_only every audio entry gets all the formats. With it, only formats that are
+    missing or were built from another version of the entry file are included. Entries without a
+    stored hash can't be checked, so they get all the formats (and their hash is computed when
+    they are transcoded). Entries with video (eg. an .mp4) are streamed instead, so they are skipped.
+    """
+    # video.py builds on this module
+    from Instanssi.kompomaatti.misc.video import entry_has_video
+
+    built: Dict[int, Set[Tuple[int, int, str]]] = defaultdict(set)
+    if missing_only:
+        for entry_id, codec, container, source_hash in AlternateEntryFile.objects.filter(
+            entry__in=entries.values("id")
+        ).values_list("entry_id", "codec", "container", "source_hash"):
+            built[entry_id].add((codec, container, source_hash))
+
+    plan = []
+    for entry in entries.order_by("id").iterator():
+        if not entry.is_audio or entry_has_video(entry):
+            continue
+        outdated = [
+            (codec, container)
+            for codec, container in formats
+            if not missing_only
+            or not entry.entryfile_hash
+            or (codec, container, entry.entryfile_hash) not in built[entry.id]
+        ]
+        if outdated:
+            plan.append((entry, outdated))
+    return plan
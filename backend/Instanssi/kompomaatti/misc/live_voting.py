@@ -0,0 +1,122 @@
+import time
+from typing import Any, Final, TypedDict
+
+import orjson
+from django.core.cache import cache
+from django.db import transaction
+
+from Instanssi.common.pubsub import get_pubsub
+from Instanssi.kompomaatti.models import Compo, Entry, LiveVotingState
+
+# Snapshots are refreshed on every staff change. The timeout only bounds how long changes to the
+# compo or event visibility take to show up.
+SNAPSHOT_TIMEOUT: Final[int] = 60
+
+# Snapshots are stored under a lock that is held only for a get and a set
+SNAPSHOT_LOCK_TIMEOUT: Final[int] = 5
+SNAPSHOT_LOCK_ATTEMPTS: Final[int] = 20
+SNAPSHOT_LOCK_WAIT: Final[float] = 0.01
+
+
+class LiveVotingSnapshot(TypedDict):
+    """Cached public live voting state of a compo, with everything needed to serve it."""
+
+    event: int
+    public: bool
+    version: int
+    updated_at: float
+    data: dict[str, Any]
+
+
+def live_voting_channel(compo_id: int) -> str:
+    return f"live_voting:{compo_id}"
+
+
+def live_voting_snapshot_key(compo_id: int) -> str:
+    return f"live_voting:snapshot:{compo_id}"
+
+
+def live_voting_etag(snapshot: LiveVotingSnapshot) -> str:
+    return f'"{snapshot["data"]["compo"]}-{snapshot["version"]}"'
+
+
+def format_live_voting_event(snapshot: LiveVotingSnapshot) -> bytes:
+    """Format the snapshot as a server-sent "state" event."""
+    return b"id: %d\nevent: state\ndata: %s\n\n" % (snapshot["version"], orjson.dumps(snapshot["data"]))
+
+
+def get_public_live_voting_state(state: LiveVotingState) -> dict[str, Any]:
+    """Public representation of the live voting state, as shown to the audience."""
+    revealed_entry_ids = list(
+        Entry.objects.filter(compo_id=state.compo_id, live_voting_revealed=True)
+        .order_by("order_index", "id")
+        .values_list("id", flat=True)
+    )
+    return {
+        "compo": state.compo_id,
+        "voting_open": state.voting_open,
+        "current_entry": state.current_entry_id,
+        "updated_at": state.updated_at.isoformat(),
+        "revealed_entries": revealed_entry_ids,
+    }
+
+
+def build_live_voting_snapshot(state: LiveVotingState) -> LiveVotingSnapshot:
+    compo = Compo.objects.select_related("event").get(pk=state.compo_id)
+    return {
+        "event": compo.event_id,
+        "public": compo.active and not compo.event.hidden,
+        "version": state.version,
+        "updated_at": state.updated_at.timestamp(),
+        "data": get_public_live_voting_state(state),
+    }
+
+
+def store_live_voting_snapshot(snapshot: LiveVotingSnapshot) -> None:
+    """Cache the snapshot, unless the same or a newer version has already been stored.
+
+    The version is checked and the snapshot written under a short lock, so that a writer with an
+    older snapshot can't replace a newer one stored in between. If the lock can't be taken, the
+    cached snapshot is dropped instead, and the next reader builds it from the database.
+    """
+    key = live_voting_snapshot_key(snapshot["data"]["compo"])
+    lock_key = f"{key}:lock"
+    for _ in range(SNAPSHOT_LOCK_ATTEMPTS):
+        if cache.add(lock_key, True, SNAPSHOT_LOCK_TIMEOUT):
+            try:
+                current: LiveVotingSnapshot | None = cache.get(key)
+                if current is None or current["version"] < snapshot["version"]:
+                    cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+            finally:
+                cache.delete(lock_key)
+            return
+        time.sleep(SNAPSHOT_LOCK_WAIT)
+    cache.delete(key)
+
+
+def get_live_voting_snapshot(compo_id: int) -> LiveVotingSnapshot | None:
+    """Get the live voting snapshot of a compo from cache, or build it if it's missing.
+
+    Returns None if the compo has no live voting state.
+    """
+    snapshot: LiveVotingSnapshot | None = cache.get(live_voting_snapshot_key(compo_id))
+    if snapshot is None:
+        try:
+            state = LiveVotingState.objects.get(compo_id=compo_id)
+        except LiveVotingState.DoesNotExist:
+            return None
+        snapshot = build_live_voting_snapshot(state)
+        store_live_voting_snapshot(snapshot)
+    return snapshot
+
+
+def publish_live_voting_state(state: LiveVotingState) -> None:
+    """Refresh the cached snapshot and push it to all subscribers once the transaction commits."""
+    snapshot = build_live_voting_snapshot(state)
+    channel = live_voting_channel(state.compo_id)
+
+    def publish() -> None:
+        store_live_voting_snapshot(snapshot)
+        get_pubsub().publish(channel, format_live_voting_event(snapshot))
+
+    transaction.on_commit(publish)
@@ -0,0 +1,45 @@
+"""EBU R128 loudness of audio entries, so that players can even out the volume between entries.
+
+Loudness is measured by the ebur128 filter of ffmpeg, while the entry is decoded for its waveform
+(see waveform.py). Entries are not altered. Instead, players apply playback_gain() to reach
+LOUDNESS_TARGET, without pushing the true peak over TRUE_PEAK_CEILING.
+"""
+
+import re
+from typing import Final, NamedTuple
+
+# Integrated loudness to play entries at, in LUFS
+LOUDNESS_TARGET: Final[float] = -16.0
+
+# Highest true peak allowed after the gain, in dBTP. Leaves room for lossy alternate files.
+TRUE_PEAK_CEILING: Final[float] = -1.0
+
+_SUMMARY_RE: Final[re.Pattern[str]] = re.compile(
+    r"Integrated loudness:\s+I:\s+(?P<loudness>-?\d+(?:\.\d+)?|-inf) LUFS"
+    r".*?True peak:\s+Peak:\s+(?P<true_peak>-?\d+(?:\.\d+)?|-inf) dBFS",
+    re.DOTALL,
+)
+
+
+class Loudness(NamedTuple):
+    loudness: float
+    true_peak: float | None  # None for digital silence
+
+
+def parse_ebur128_summary(log: str) -> Loudness | None:
+    """Read the loudness from the summary that the ebur128 filter logs (with peak=true) at the end."""
+    match = _SUMMARY_RE.search(log, log.rfind("Summary:"))
+    if match is None:
+        return None
+    true_peak = match["true_peak"]
+    return Loudness(
+        loudness=float(match["loudness"]),
+        true_peak=None if true_peak == "-inf" else float(true_peak),
+    )
+
+
+def playback_gain(loudness: float | None, true_peak: float | None) -> float | None:
+    """Gain in dB that brings an entry to LOUDNESS_TARGET, or as close as the peak ceiling allows."""
+    if loudness is None or true_peak is None:
+        return None
+    return round(min(LOUDNESS_TARGET - loudness, TRUE_PEAK_CEILING - true_peak), 1)
@@ -0,0 +1,81 @@
+"""Frozen compo results.
+
+Until the results of a compo are frozen, every rank lookup computes a DENSE_RANK window over the
+running vote scores. Once voting has ended the scores can't change anymore (short of entries being
+disqualified), so they are written to the archive_score and archive_rank fields of the entries,
+which with_score() and with_rank() then use as is.
+"""
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q, QuerySet
+from django.utils import timezone
+
+from Instanssi.arkisto.caching import bump_archive_version
+from Instanssi.kompomaatti.models import Compo, Entry, VoteGroup
+
+
+def get_unfrozen_finished_compos() -> QuerySet[Compo]:
+    """Get compos whose voting has ended, but that have entries without frozen results."""
+    unfrozen_entries = Entry.objects.filter(compo=OuterRef("pk")).filter(
+        Q(archive_score__isnull=True) | Q(archive_rank__isnull=True)
+    )
+    return Compo.objects.filter(voting_end__lte=timezone.now()).filter(Exists(unfrozen_entries))
+
+
+def freeze_compo_results(compo_id: int) -> int:
+    """Freeze the results of a compo. Entries that are already frozen keep their results.
+
+    Returns:
+        Number of entries in the compo.
+    """
+    with transaction.atomic():
+        count = Entry.objects.filter(compo_id=compo_id).freeze_results()
+    _bump_compo_archive_version(compo_id)
+    return count
+
+
+def unfreeze_reopened_compo_results(compo_id: int) -> int:
+    """Clear the frozen results of a compo whose voting end has been moved into the future.
+
+    Results are only cleared while the ballots still exist. Once the archiver has removed them,
+    the frozen results are all that is left, and they are kept.
+
+    Returns:
+        Number of entries whose results were cleared.
+    """
+    ballots = VoteGroup.objects.filter(compo=OuterRef("pk"))
+    reopened = Compo.objects.filter(pk=compo_id, voting_end__gt=timezone.now()).filter(Exists(ballots))
+    if not reopened.exists():
+        return 0
+    frozen_entries = Entry.objects.filter(compo_id=compo_id).filter(
+        Q(archive_score__isnull=False) | Q(archive_rank__isnull=False)
+    )
+    count = frozen_entries.update(archive_score=None, archive_rank=None)
+    if count:
+        _bump_compo_archive_version(compo_id)
+    return count
+
+
+def recompute_compo_results(compo_id: int) -> int:
+    """Recompute the frozen results of a compo, eg. after entries have been disqualified.
+
+    Scores are recomputed from the ballots if they still exist. Once the archiver has removed the
+    ballots, only the ranks are recomputed from the frozen scores.
+
+    Returns:
+        Number of entries in the compo.
+    """
+    entries = Entry.objects.filter(compo_id=compo_id)
+    with transaction.atomic():
+        if VoteGroup.objects.filter(compo_id=compo_id).exists():
+            entries.update(archive_score=None, archive_rank=None)
+        else:
+            entries.update(archive_rank=None)
+        count = entries.freeze_results()
+    _bump_compo_archive_version(compo_id)
+    return count
+
+
+def _bump_compo_archive_version(compo_id: int) -> None:
+    # Entries are bulk updated, so their save() won't do this for us
+    bump_archive_version(Compo.objects.values_list("event_id", flat=True).get(pk=compo_id))
@@ -0,0 +1,130 @@
+"""Resumable uploads of entry files, so that a dropped connection near a deadline is not a restart.
+
+The protocol follows the core of tus (https://tus.io/protocols/resumable-upload):
+
+1. The client creates an EntryUpload with the name and size of the file, and the compo and entry
+   field it is for. The name and size are checked against the compo before anything is sent.
+2. The file is sent in chunks, each a PATCH carrying the Upload-Offset it starts at. Chunks are
+   appended to a file under ENTRY_UPLOAD_ROOT, so the offset is the size of that file.
+3. After a dropped connection, the client asks for the offset (HEAD or GET) and carries on from it.
+4. The complete upload is attached to an entry by giving its id as entryfile_upload or
+   sourcefile_upload when creating or editing the entry. It is validated like any uploaded file,
+   and moved into place without copying.
+
+Uploads expire UPLOAD_EXPIRY after their last chunk, and are removed by cleanup_expired_uploads().
+"""
+
+import fcntl
+import logging
+import os
+from datetime import timedelta
+from pathlib import Path
+from typing import BinaryIO, Final
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from Instanssi.kompomaatti.models import EntryUpload
+
+log = logging.getLogger(__name__)
+
+UPLOAD_EXPIRY: Final[timedelta] = timedelta(hours=24)
+
+# Largest chunk accepted in one request. Keeps a failed request cheap to retry, and each request
+# well under the body size limits of proxies.
+UPLOAD_MAX_CHUNK_SIZE: Final[int] = 16 * 1024 * 1024
+
+# Unfinished uploads a user may have at a time
+UPLOAD_MAX_SESSIONS: Final[int] = 10
+
+_COPY_BUFFER_SIZE: Final[int] = 256 * 1024
+
+
+class UploadOffsetMismatch(Exception):
+    """The chunk does not start where the upload left off."""
+
+    def __init__(self, offset: int) -> None:
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+
+class UploadBusy(Exception):
+    """Another chunk of the upload is being written."""
+
+
+class AssembledUpload(File):  # type: ignore[type-arg]
+    """A complete upload, opened for attaching to an entry.
+
+    Storages move files that have a temporary_file_path() instead of copying them, so a big entry
+    file is not written twice.
+    """
+
+    def __init__(self, upload: EntryUpload) -> None:
+        super().__init__(open(upload.get_path(), "rb"), name=upload.filename)
+
+    def temporary_file_path(self) -> str:
+        return str(self.file.name)  # type: ignore[union-attr]
+
+
+def append_chunk(upload: EntryUpload, offset: int, stream: BinaryIO, length: int) -> int:
+    """Append a chunk of length bytes from stream to the upload, starting at offset.
+
+    The part file is locked while the chunk is written, so that concurrent requests can't
+    interleave their chunks. If the stream ends early (eg. the client went away), whatever was
+    received is kept, and the client can resume from there.
+
+    Returns:
+        The new offset.
+    """
+    path = upload.get_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "ab") as fd:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadBusy() from None
+        current = fd.seek(0, os.SEEK_END)
+        if current != offset:
+            raise UploadOffsetMismatch(current)
+        remaining = length
+        try:
+            while remaining > 0:
+                data = stream.read(min(remaining, _COPY_BUFFER_SIZE))
+                if not data:
+                    break
+                fd.write(data)
+                remaining -= len(data)
+        except OSError as e:
+            log.info("Upload %s was interrupted -- %s", upload.id, str(e))
+        new_offset = fd.tell()
+
+    upload.expires_at = timezone.now() + UPLOAD_EXPIRY
+    EntryUpload.objects.filter(pk=upload.pk).update(expires_at=upload.expires_at)
+    return new_offset
+
+
+def cleanup_expired_uploads() -> int:
+    """Remove expired uploads, and any part files left without an upload.
+
+    Returns:
+        The number of removed uploads.
+    """
+    now = timezone.now()
+    count = 0
+    for upload in EntryUpload.objects.filter(expires_at__lte=now):
+        upload.delete()
+        count += 1
+
+    root = Path(settings.ENTRY_UPLOAD_ROOT)
+    if root.is_dir():
+        # Uploads removed in bulk (eg. along with their compo) leave their files behind. Recent
+        # files are skipped, as their upload may have been created after the query.
+        known = {f"{pk}.part" for pk in EntryUpload.objects.values_list("id", flat=True)}
+        cutoff = (now - UPLOAD_EXPIRY).timestamp()
+        for path in root.glob("*.part"):
+            if path.name not in known and path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+    if count:
+        log.info("Removed %d expired uploads", count)
+    return count
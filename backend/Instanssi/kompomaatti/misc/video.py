@@ -0,0 +1,212 @@
+"""Adaptive streams of video entries, so that they can be watched without downloading the original.
+
+The entry file is transcoded by a single ffmpeg run into a few H.264/AAC renditions (see
+HLS_RENDITIONS, ones taller than the original are left out). The renditions are cut into
+fragmented MP4 (CMAF) segments with aligned keyframes, and listed in an HLS master playlist:
+
+    <alternates>/<year>/<entry>.<year>.<guid>.hls/master.m3u8
+    <alternates>/<year>/<entry>.<year>.<guid>.hls/v0/index.m3u8
+    <alternates>/<year>/<entry>.<year>.<guid>.hls/v0/init.mp4
+    <alternates>/<year>/<entry>.<year>.<guid>.hls/v0/segment000.m4s
+    ...
+
+The master playlist is stored as an AlternateEntryFile (H264/HLS). Players pick a rendition to
+suit their connection, and switch between them as it changes.
+"""
+
+import logging
+import tempfile
+from pathlib import Path
+from typing import Final, NamedTuple
+
+import ffmpeg
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from Instanssi.common.file_handling import generate_upload_path
+from Instanssi.kompomaatti.enums import MediaCodec, MediaContainer
+from Instanssi.kompomaatti.misc.alternates import ensure_entryfile_hash
+from Instanssi.kompomaatti.models import AlternateEntryFile, Entry
+
+log = logging.getLogger(__name__)
+
+
+class Rendition(NamedTuple):
+    height: int
+    video_bitrate: str
+    audio_bitrate: str
+
+
+HLS_RENDITIONS: Final[tuple[Rendition, ...]] = (
+    Rendition(360, "800k", "96k"),
+    Rendition(720, "2800k", "128k"),
+    Rendition(1080, "5000k", "160k"),
+)
+
+# Segment length in seconds. Keyframes are forced at the segment boundaries of every rendition,
+# so that players can switch between them at any segment.
+HLS_SEGMENT_DURATION: Final[int] = 6
+
+HLS_MASTER_PLAYLIST: Final[str] = "master.m3u8"
+
+# Seconds of CPU time ffmpeg may use. Encoding several renditions of a long demo takes a while.
+VIDEO_FFMPEG_TIME_LIMIT: Final[int] = 60 * 60
+
+
+class VideoInfo(NamedTuple):
+    height: int
+    has_audio: bool
+
+
+def probe_video(source_file: Path) -> VideoInfo | None:
+    """Find out the size of the video in a file. Returns None if the file has no video.
+
+    Cover art of audio files shows up as a video stream too, but is not counted.
+    """
+    streams = ffmpeg.probe(str(source_file))["streams"]
+    videos = [
+        stream
+        for stream in streams
+        if stream["codec_type"] == "video" and not stream.get("disposition", {}).get("attached_pic")
+    ]
+    if not videos:
+        return None
+    return VideoInfo(
+        height=int(videos[0]["height"]),
+        has_audio=any(stream["codec_type"] == "audio" for stream in streams),
+    )
+
+
+def _store_has_video(entry: Entry, has_video: bool) -> None:
+    entry.has_video = has_video
+    Entry.objects.filter(pk=entry.pk).update(has_video=has_video)
+
+
+def entry_has_video(entry: Entry) -> bool:
+    """Find out whether the entry file holds video, probing it only if that is not known yet."""
+    if entry.has_video is None:
+        _store_has_video(entry, entry.is_video and probe_video(Path(entry.entryfile.path)) is not None)
+    return bool(entry.has_video)
+
+
+def select_renditions(height: int) -> list[Rendition]:
+    """Renditions no taller than the original, or just the smallest at the original size."""
+    renditions = [rendition for rendition in HLS_RENDITIONS if rendition.height <= height]
+    if not renditions:
+        renditions = [HLS_RENDITIONS[0]._replace(height=height - height % 2)]
+    return renditions
+
+
+def _transcode_stream(source_file: Path, info: VideoInfo, output_dir: Path) -> None:
+    renditions = select_renditions(info.height)
+    source = ffmpeg.input(str(source_file.resolve()))
+    videos = source.video.filter_multi_output("split", len(renditions))
+    audios = source.audio.filter_multi_output("asplit", len(renditions)) if info.has_audio else None
+
+    streams = []
+    stream_map = []
+    bitrates: dict[str, str] = {}
+    for index, rendition in enumerate(renditions):
+        streams.append(videos.stream(index).filter("scale", -2, rendition.height))
+        bitrates[f"b:v:{index}"] = rendition.video_bitrate
+        bitrates[f"maxrate:v:{index}"] = rendition.video_bitrate
+        bitrates[f"bufsize:v:{index}"] = rendition.video_bitrate
+        if audios is not None:
+            streams.append(audios.stream(index))
+            bitrates[f"b:a:{index}"] = rendition.audio_bitrate
+            stream_map.append(f"v:{index},a:{index}")
+        else:
+            stream_map.append(f"v:{index}")
+
+    (
+        ffmpeg.output(
+            *streams,
+            str(output_dir / "v%v" / "index.m3u8"),
+            format="hls",
+            vcodec="libx264",
+            acodec="aac",
+            pix_fmt="yuv420p",
+            preset="veryfast",
+            sc_threshold=0,
+            force_key_frames=f"expr:gte(t,n_forced*{HLS_SEGMENT_DURATION})",
+            hls_time=HLS_SEGMENT_DURATION,
+            hls_playlist_type="vod",
+            hls_segment_type="fmp4",
+            hls_fmp4_init_filename="init.mp4",
+            hls_segment_filename=str(output_dir / "v%v" / "segment%03d.m4s"),
+            hls_flags="independent_segments",
+            master_pl_name=HLS_MASTER_PLAYLIST,
+            var_stream_map=" ".join(stream_map),
+            **bitrates,
+        )
+        .global_args(
+            "-hide_banner", "-nostats", "-loglevel", "warning", "-timelimit", str(VIDEO_FFMPEG_TIME_LIMIT)
+        )
+        .run()
+    )
+
+
+def _save_stream(entry: Entry, output_dir: Path, source_hash: str) -> None:
+    """Copy the files of a stream to storage, and point the entry's HLS alternate file at them."""
+    stream_dir = generate_upload_path(
+        "stream.hls", settings.MEDIA_COMPO_ALTERNATES, entry.name_slug, entry.created_at
+    )
+    for path in sorted(output_dir.rglob("*")):
+        if path.is_file():
+            name = f"{stream_dir}/{path.relative_to(output_dir).as_posix()}"
+            with open(path, "rb") as fd:
+                saved_name = default_storage.save(name, File(fd))
+            # Playlists refer to the other files by name, so they must not be renamed
+            if saved_name != name:
+                raise RuntimeError(f"Stream file {name} was saved as {saved_name}")
+
+    with transaction.atomic():
+        alt = AlternateEntryFile.objects.filter(
+            entry=entry, codec=MediaCodec.H264, container=MediaContainer.HLS
+        ).first()
+        if alt is not None:
+            alt.delete_stream_files_on_commit()
+            alt.updated_at = timezone.now()
+        else:
+            alt = AlternateEntryFile(entry=entry, codec=MediaCodec.H264, container=MediaContainer.HLS)
+        alt.file.name = f"{stream_dir}/{HLS_MASTER_PLAYLIST}"
+        alt.source_hash = source_hash
+        alt.update_file_hash()
+        alt.save()
+    log.info("Saved stream of entry %d to %s", entry.id, stream_dir)
+
+
+def transcode_video_alternates(entry: Entry, force: bool = False) -> bool:
+    """Transcode a video entry to an adaptive stream, unless it is up to date with the entry file.
+
+    Returns:
+        True if the stream was transcoded.
+    """
+    if not entry.is_video:
+        log.error("Unable to convert -- Input file is not a video file")
+        return False
+    ensure_entryfile_hash(entry)
+    if not force and not entry.get_outdated_video_formats():
+        log.info("Stream of entry %d is up to date", entry.id)
+        return False
+
+    source_file = Path(entry.entryfile.path)
+    info = probe_video(source_file)
+    _store_has_video(entry, info is not None)
+    if info is None:
+        log.info("Entry %d has no video, not streaming it", entry.id)
+        return False
+
+    log.info("Received file %s for processing -- converting to a %dp stream", source_file, info.height)
+    with tempfile.TemporaryDirectory(prefix="stream-") as temp_dir:
+        try:
+            _transcode_stream(source_file, info, Path(temp_dir))
+        except Exception as e:
+            log.exception("Unable to convert -- %s", str(e))
+            raise
+        _save_stream(entry, Path(temp_dir), entry.entryfile_hash)
+    log.info("Entry %d processed", entry.id)
+    return True
@@ -0,0 +1,84 @@
+"""Cached lookups for validating vote submissions.
+
+Vote submissions peak right before voting ends, and every one of them needs to know whether the
+user may vote and which entries can be voted for. Both are kept in the cache as id sets, so that
+checking a ballot is a set lookup no matter how many entries it ranks.
+
+The sets are invalidated when the underlying rows change (see the save() and delete() methods of
+the kompomaatti models), and also expire after a while in case a bulk update skipped that.
+"""
+
+from typing import Final
+
+from django.core.cache import cache
+from django.db import transaction
+
+from Instanssi.kompomaatti.models import Entry, TicketVoteCode, VoteCodeRequest
+
+VOTING_CACHE_TIMEOUT: Final[int] = 300
+
+
+def voter_ids_key(event_id: int) -> str:
+    return f"kompomaatti:voters:{event_id}"
+
+
+def votable_entry_ids_key(compo_id: int) -> str:
+    return f"kompomaatti:votable_entries:{compo_id}"
+
+
+def get_voter_ids(event_id: int) -> frozenset[int]:
+    """Get the ids of users that have voting rights for the event."""
+    key = voter_ids_key(event_id)
+    voter_ids: frozenset[int] | None = cache.get(key)
+    if voter_ids is None:
+        ticket_users = TicketVoteCode.objects.filter(
+            event_id=event_id, associated_to__isnull=False
+        ).values_list("associated_to_id", flat=True)
+        request_users = VoteCodeRequest.objects.filter(event_id=event_id, status=1).values_list(
+            "user_id", flat=True
+        )
+        voter_ids = frozenset(ticket_users.union(request_users))
+        cache.set(key, voter_ids, VOTING_CACHE_TIMEOUT)
+    return voter_ids
+
+
+def has_voting_rights(user_id: int, event_id: int) -> bool:
+    """Check whether the user has voting rights for the event (ticket vote code or approved request)."""
+    if user_id in get_voter_ids(event_id):
+        return True
+    # The cached set may predate the user getting their rights, so misses are always verified.
+    # Users without voting rights should be rare at this point, so this is not a hot path.
+    return (
+        TicketVoteCode.objects.filter(associated_to_id=user_id, event_id=event_id).exists()
+        or VoteCodeRequest.objects.filter(user_id=user_id, event_id=event_id, status=1).exists()
+    )
+
+
+def get_votable_entry_ids(compo_id: int) -> frozenset[int]:
+    """Get the ids of entries in the compo that can currently be voted for."""
+    key = votable_entry_ids_key(compo_id)
+    entry_ids: frozenset[int] | None = cache.get(key)
+    if entry_ids is None:
+        entry_ids = frozenset(
+            Entry.objects.filter(
+                compo_id=compo_id, disqualified=False, live_voting_revealed=True
+            ).values_list("id", flat=True)
+        )
+        cache.set(key, entry_ids, VOTING_CACHE_TIMEOUT)
+    return entry_ids
+
+
+def invalidate_voter_ids(event_id: int | None) -> None:
+    """Drop the cached voter set of the event, now and again after the current transaction commits."""
+    if event_id is None:
+        return
+    key = voter_ids_key(event_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def invalidate_votable_entry_ids(compo_id: int) -> None:
+    """Drop the cached votable entry set of the compo, now and again after the current transaction commits."""
+    key = votable_entry_ids_key(compo_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
@@ -0,0 +1,174 @@
+"""Waveform peaks of audio entries, so that players can draw a waveform without the audio itself.
+
+The entry file is decoded by ffmpeg to 8 kHz mono PCM, and reduced to the smallest and largest
+sample of each slice of the track. The peaks are stored at a few resolutions, each a quarter of
+the previous one, so clients can pick the one closest to the width they draw at:
+
+    {
+        "version": 1,
+        "duration": 183.5,
+        "levels": [
+            {"length": 2048, "peaks": [min, max, min, max, ...]},
+            {"length": 512, "peaks": [...]},
+            {"length": 128, "peaks": [...]}
+        ]
+    }
+
+Peaks are scaled to -128..127. The JSON is saved to Entry.waveformfile, along with the hash of
+the entry file it was computed from, and is about 10 kB when compressed. The loudness of the
+entry is measured in the same ffmpeg run (see loudness.py).
+"""
+
+import json
+import logging
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Any, Final, TypedDict
+
+import ffmpeg
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from Instanssi.kompomaatti.misc.alternates import (
+    FFMPEG_TIME_LIMIT,
+    ensure_entryfile_hash,
+)
+from Instanssi.kompomaatti.misc.loudness import Loudness, parse_ebur128_summary
+from Instanssi.kompomaatti.models import Entry
+
+log = logging.getLogger(__name__)
+
+WAVEFORM_VERSION: Final[int] = 1
+
+# Plenty for drawing, and even 8 bits per peak is more than a few hundred pixels tall can show
+WAVEFORM_SAMPLE_RATE: Final[int] = 8000
+
+# Peak pairs over the whole track, at the finest resolution. Coarser levels are made from this.
+WAVEFORM_PEAKS: Final[int] = 2048
+WAVEFORM_LEVELS: Final[int] = 3
+WAVEFORM_LEVEL_FACTOR: Final[int] = 4
+
+_SAMPLE_SIZE: Final[int] = 2  # Signed 16-bit PCM
+
+
+class WaveformLevel(TypedDict):
+    length: int
+    peaks: list[int]
+
+
+class Waveform(TypedDict):
+    version: int
+    duration: float
+    levels: list[WaveformLevel]
+
+
+def _read_samples(fd: Any, count: int) -> array[int]:
+    samples = array("h")
+    samples.frombytes(fd.read(count * _SAMPLE_SIZE))
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return samples
+
+
+def compute_peaks(pcm_file: Path, length: int = WAVEFORM_PEAKS) -> list[int]:
+    """Reduce a raw s16le file to at most length (min, max) pairs, flattened to a list.
+
+    The file is read one slice at a time, so long tracks don't need to fit in memory.
+    """
+    total = pcm_file.stat().st_size // _SAMPLE_SIZE
+    length = min(length, total)
+    peaks: list[int] = []
+    with open(pcm_file, "rb") as fd:
+        for index in range(length):
+            samples = _read_samples(fd, (index + 1) * total // length - index * total // length)
+            peaks.append(min(samples) >> 8)
+            peaks.append(max(samples) >> 8)
+    return peaks
+
+
+def reduce_peaks(peaks: list[int], factor: int = WAVEFORM_LEVEL_FACTOR) -> list[int]:
+    """Combine every factor consecutive (min, max) pairs into one."""
+    step = factor * 2
+    reduced: list[int] = []
+    for start in range(0, len(peaks), step):
+        chunk = peaks[start : start + step]
+        reduced.append(min(chunk[0::2]))
+        reduced.append(max(chunk[1::2]))
+    return reduced
+
+
+def compute_waveform(pcm_file: Path) -> Waveform:
+    """Compute the waveform of a raw s16le file, decoded at WAVEFORM_SAMPLE_RATE."""
+    peaks = compute_peaks(pcm_file)
+    levels: list[WaveformLevel] = []
+    while peaks and len(levels) < WAVEFORM_LEVELS:
+        levels.append({"length": len(peaks) // 2, "peaks": peaks})
+        if len(peaks) <= 2:
+            break
+        peaks = reduce_peaks(peaks)
+    return {
+        "version": WAVEFORM_VERSION,
+        "duration": round(pcm_file.stat().st_size / _SAMPLE_SIZE / WAVEFORM_SAMPLE_RATE, 3),
+        "levels": levels,
+    }
+
+
+def _decode_pcm(source_file: Path, pcm_file: Path) -> Loudness | None:
+    """Decode the audio to raw PCM for the waveform, measuring its loudness on the way."""
+    _, stderr = (
+        ffmpeg.input(source_file.resolve())
+        .audio.filter("ebur128", peak="true", framelog="verbose")
+        .filter("aformat", sample_fmts="s16", sample_rates=WAVEFORM_SAMPLE_RATE, channel_layouts="mono")
+        .output(str(pcm_file), format="s16le", acodec="pcm_s16le")
+        # The ebur128 summary is logged at the info level
+        .global_args("-hide_banner", "-nostats", "-loglevel", "info", "-timelimit", str(FFMPEG_TIME_LIMIT))
+        .run(capture_stderr=True)
+    )
+    loudness = parse_ebur128_summary(stderr.decode(errors="replace"))
+    if loudness is None:
+        log.warning("Unable to measure loudness of %s", source_file)
+    return loudness
+
+
+def generate_entry_waveform(entry: Entry, force: bool = False) -> bool:
+    """Compute the waveform and loudness of an audio entry, unless they are up to date with the entry file.
+
+    Returns:
+        True if the waveform was computed.
+    """
+    if not entry.is_audio:
+        return False
+    ensure_entryfile_hash(entry)
+    if not force and not entry.is_waveform_outdated:
+        log.info("Waveform of entry %d is up to date", entry.id)
+        return False
+
+    with tempfile.TemporaryDirectory(prefix="waveform-") as temp_dir:
+        pcm_file = Path(temp_dir) / "audio.pcm"
+        try:
+            loudness = _decode_pcm(Path(entry.entryfile.path), pcm_file)
+        except Exception as e:
+            log.exception("Unable to decode -- %s", str(e))
+            raise
+        waveform = compute_waveform(pcm_file)
+
+    # Saved without Entry.save(), which would queue the alternate files for checking again
+    replaced_file = entry.waveformfile.name
+    content = json.dumps(waveform, separators=(",", ":")).encode()
+    entry.waveformfile.save("waveform.json", ContentFile(content), save=False)
+    entry.waveform_source_hash = entry.entryfile_hash
+    entry.loudness, entry.true_peak = loudness if loudness is not None else (None, None)
+    with transaction.atomic():
+        Entry.objects.filter(pk=entry.pk).update(
+            waveformfile=entry.waveformfile.name,
+            waveform_source_hash=entry.waveform_source_hash,
+            loudness=entry.loudness,
+            true_peak=entry.true_peak,
+        )
+        if replaced_file:
+            transaction.on_commit(lambda: default_storage.delete(replaced_file))
+    log.info("Saved waveform of entry %d to %s", entry.id, entry.waveformfile.name)
+    return True
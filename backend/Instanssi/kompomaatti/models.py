@@ -1,29 +1,40 @@
-from pathlib import Path
+import uuid
+from pathlib import Path, PurePosixPath
 from typing import Any, Iterable
 
 from auditlog.registry import auditlog
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from imagekit.models import ImageSpecField
 from imagekit.processors import ResizeToFill
 
-from Instanssi.common.file_handling import clean_filename, generate_upload_path
+from Instanssi.common.file_handling import (
+    clean_filename,
+    delete_storage_directory,
+    file_sha256,
+    generate_upload_path,
+)
 from Instanssi.common.html.fields import SanitizedHtmlField
 from Instanssi.common.youtube.fields import YoutubeVideoField
 from Instanssi.kompomaatti.enums import (
     AUDIO_FILE_EXTENSIONS,
     BROWSER_AUDIO_EXTENSIONS,
+    VIDEO_FILE_EXTENSIONS,
     WEB_AUDIO_FORMATS,
+    WEB_VIDEO_FORMATS,
     MediaCodec,
     MediaContainer,
 )
 from Instanssi.kompomaatti.misc import sizeformat
+from Instanssi.kompomaatti.misc.loudness import playback_gain
 from Instanssi.kompomaatti.querysets import (
     CompetitionParticipationQuerySet,
     EntryQuerySet,
+    EntryScoreQuerySet,
+    VoteGroupQuerySet,
 )
 
 
@@ -38,6 +49,25 @@ class Event(models.Model):
     def __str__(self) -> str:
         return self.name
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save, reindex the entries and drop the cached archive pages (all of them list the events)"""
+        from Instanssi.arkisto.caching import bump_archive_version
+        from Instanssi.arkisto.search import update_search_index
+
+        super().save(*args, **kwargs)
+        bump_archive_version(None)
+        update_search_index(compo__event_id=self.pk)
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        from Instanssi.arkisto.caching import bump_archive_version
+        from Instanssi.arkisto.search import remove_from_search_index
+
+        bump_archive_version(None)
+        remove_from_search_index(
+            list(Entry.objects.filter(compo__event_id=self.pk).values_list("id", flat=True))
+        )
+        return super().delete(*args, **kwargs)
+
 
 class VoteCodeRequest(models.Model):
     STATUS_TYPES = (
@@ -63,6 +93,19 @@ class VoteCodeRequest(models.Model):
     def __str__(self) -> str:
         return self.user.username
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save and drop the cached voting rights of the event"""
+        from Instanssi.kompomaatti.misc.voting import invalidate_voter_ids
+
+        super().save(*args, **kwargs)
+        invalidate_voter_ids(self.event_id)
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        from Instanssi.kompomaatti.misc.voting import invalidate_voter_ids
+
+        invalidate_voter_ids(self.event_id)
+        return super().delete(*args, **kwargs)
+
     class Meta:
         unique_together = (("event", "user"),)
 
@@ -106,6 +149,19 @@ class TicketVoteCode(models.Model):
     def __str__(self) -> str:
         return "{}: {}".format(self.key, self.associated_username)
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save and drop the cached voting rights of the event"""
+        from Instanssi.kompomaatti.misc.voting import invalidate_voter_ids
+
+        super().save(*args, **kwargs)
+        invalidate_voter_ids(self.event_id)
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        from Instanssi.kompomaatti.misc.voting import invalidate_voter_ids
+
+        invalidate_voter_ids(self.event_id)
+        return super().delete(*args, **kwargs)
+
     class Meta:
         unique_together = (("event", "ticket"), ("event", "associated_to"))
 
@@ -252,6 +308,29 @@ class Compo(models.Model):
         """Is imagefile copied from entryfile"""
         return self.thumbnail_pref == 1
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save, reindex the entries and drop the cached archive pages of the event.
+
+        If voting has been extended past the current time, results that were frozen when it
+        first ended are cleared, so that they are computed again from the later ballots too.
+        """
+        from Instanssi.arkisto.caching import bump_archive_version
+        from Instanssi.arkisto.search import update_search_index
+        from Instanssi.kompomaatti.misc.results import unfreeze_reopened_compo_results
+
+        super().save(*args, **kwargs)
+        unfreeze_reopened_compo_results(self.pk)
+        bump_archive_version(self.event_id)
+        update_search_index(compo_id=self.pk)
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        from Instanssi.arkisto.caching import bump_archive_version
+        from Instanssi.arkisto.search import remove_from_search_index
+
+        bump_archive_version(self.event_id)
+        remove_from_search_index(list(Entry.objects.filter(compo_id=self.pk).values_list("id", flat=True)))
+        return super().delete(*args, **kwargs)
+
 
 def generate_entry_file_path(entry: "Entry", filename: str) -> str:
     return generate_upload_path(filename, settings.MEDIA_COMPO_ENTRIES, entry.name_slug, entry.created_at)
@@ -265,6 +344,10 @@ def generate_entry_image_path(entry: "Entry", filename: str) -> str:
     return generate_upload_path(filename, settings.MEDIA_COMPO_IMAGES, entry.name_slug, entry.created_at)
 
 
+def generate_entry_waveform_path(entry: "Entry", filename: str) -> str:
+    return generate_upload_path(filename, settings.MEDIA_COMPO_WAVEFORMS, entry.name_slug, entry.created_at)
+
+
 class Entry(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -283,18 +366,28 @@ class Entry(models.Model):
         blank=True,
     )
     entryfile = models.FileField(_("File"), max_length=255, upload_to=generate_entry_file_path)
+    # Set when the entry file is written. Alternate files record the hash they were built from, and
+    # entries with the same hash are duplicates.
+    entryfile_hash = models.CharField(
+        _("File SHA-256"), max_length=64, blank=True, editable=False, db_index=True
+    )
+    entryfile_size = models.BigIntegerField(_("File size"), null=True, blank=True, editable=False)
     sourcefile = models.FileField(
         _("Source code"),
         max_length=255,
         upload_to=generate_entry_source_path,
         blank=True,
     )
+    sourcefile_hash = models.CharField(_("Source code SHA-256"), max_length=64, blank=True, editable=False)
+    sourcefile_size = models.BigIntegerField(_("Source code size"), null=True, blank=True, editable=False)
     imagefile_original = models.ImageField(
         _("Image"),
         max_length=255,
         upload_to=generate_entry_image_path,
         blank=True,
     )
+    imagefile_hash = models.CharField(_("Image SHA-256"), max_length=64, blank=True, editable=False)
+    imagefile_size = models.BigIntegerField(_("Image size"), null=True, blank=True, editable=False)
     imagefile_thumbnail = ImageSpecField(
         [ResizeToFill(160, 100)],
         source="imagefile_original",
@@ -307,6 +400,23 @@ class Entry(models.Model):
         format="JPEG",
         options={"quality": 90},
     )
+    # Waveform peaks of audio entries (see misc/waveform.py), and the entryfile_hash they were computed from
+    waveformfile = models.FileField(
+        _("Waveform"),
+        max_length=255,
+        upload_to=generate_entry_waveform_path,
+        blank=True,
+        editable=False,
+    )
+    waveform_source_hash = models.CharField(
+        _("Waveform source SHA-256"), max_length=64, blank=True, editable=False
+    )
+    # EBU R128 loudness of audio entries, measured along with the waveform (see misc/loudness.py)
+    loudness = models.FloatField(_("Integrated loudness (LUFS)"), null=True, blank=True, editable=False)
+    true_peak = models.FloatField(_("True peak (dBTP)"), null=True, blank=True, editable=False)
+    # Whether the entry file holds video, as probed by the transcoders (see misc/video.py). None until the
+    # file has been probed, and reset when a new entry file is assigned.
+    has_video = models.BooleanField(_("Has video"), null=True, blank=True, editable=False)
     youtube_url = YoutubeVideoField(_("Youtube URL"), null=True, blank=True)
     order_index = models.IntegerField(_("Order index"), default=0, db_index=True)
     live_voting_revealed = models.BooleanField(_("Revealed in live voting"), default=False)
@@ -317,6 +427,13 @@ class Entry(models.Model):
 
     objects = EntryQuerySet.as_manager()
 
+    # File fields with a stored SHA-256 and size, as (file field, hash field, size field)
+    HASHED_FILE_FIELDS = (
+        ("entryfile", "entryfile_hash", "entryfile_size"),
+        ("sourcefile", "sourcefile_hash", "sourcefile_size"),
+        ("imagefile_original", "imagefile_hash", "imagefile_size"),
+    )
+
     # Annotation attributes added by EntryQuerySet.with_score() / with_rank()
     computed_score: float
     computed_rank: int
@@ -341,6 +458,11 @@ class Entry(models.Model):
     def is_audio(self) -> bool:
         return self.entry_file_ext in AUDIO_FILE_EXTENSIONS
 
+    @property
+    def is_video(self) -> bool:
+        """Entry file may hold video. Some of these files only have audio, the transcoders check that."""
+        return self.entry_file_ext.lower() in VIDEO_FILE_EXTENSIONS
+
     def get_audio_sources(self) -> list[dict[str, str]]:
         """Return audio <source> entries in optimal browser playback order.
 
@@ -355,13 +477,24 @@ class Entry(models.Model):
             original_source["type"] = original_mime
 
         alternate_sources = [
-            {"url": alt.file.url, "type": alt.mime_format} for alt in self.alternate_files.all()
+            {"url": alt.file.url, "type": alt.mime_format}
+            for alt in self.alternate_files.all()
+            if (alt.codec, alt.container) in WEB_AUDIO_FORMATS
         ]
 
         if original_mime:
             return [original_source] + alternate_sources
         return alternate_sources + [original_source]
 
+    def get_video_sources(self) -> list[dict[str, str]]:
+        """Return video <source> entries: adaptive streams first, and the original file as a fallback."""
+        alternate_sources = [
+            {"url": alt.file.url, "type": alt.mime_format}
+            for alt in self.alternate_files.all()
+            if (alt.codec, alt.container) in WEB_VIDEO_FORMATS
+        ]
+        return alternate_sources + [{"url": self.entryfile.url}]
+
     def get_show_list(self) -> dict[str, bool]:
         show = {"youtube": False, "image": False, "noshow": True}
 
@@ -389,21 +522,112 @@ class Entry(models.Model):
         ]
         return "__".join(p for p in file_pieces if p)
 
-    def generate_alternates(self) -> None:
-        """Trigger generating additional formats"""
+    def _update_file_hash(self, name: str, hash_field: str, size_field: str) -> None:
+        file = getattr(self, name)
+        if file:
+            setattr(self, hash_field, file_sha256(file))
+            setattr(self, size_field, file.size)
+        else:
+            setattr(self, hash_field, "")
+            setattr(self, size_field, None)
+
+    def update_entryfile_hash(self) -> None:
+        """Hash the entry file. Called by save() when a new file is assigned."""
+        self._update_file_hash("entryfile", "entryfile_hash", "entryfile_size")
+
+    def update_file_hashes(self, changed_only: bool = False) -> None:
+        """Hash the entry, source and image files, or only the ones assigned since the last save."""
+        entryfile_hash = self.entryfile_hash
+        for name, hash_field, size_field in self.HASHED_FILE_FIELDS:
+            file = getattr(self, name)
+            # Files assigned since the last save have not been written to storage yet
+            changed = not getattr(file, "_committed", True) or (not file and getattr(self, hash_field))
+            if changed or not changed_only:
+                self._update_file_hash(name, hash_field, size_field)
+        if self.entryfile_hash != entryfile_hash:
+            self.has_video = None
+
+    def _get_outdated_formats(
+        self, formats: list[tuple[MediaCodec, MediaContainer]]
+    ) -> list[tuple[MediaCodec, MediaContainer]]:
+        if not self.entryfile_hash:
+            return list(formats)
+        up_to_date = set(
+            AlternateEntryFile.objects.filter(entry=self, source_hash=self.entryfile_hash).values_list(
+                "codec", "container"
+            )
+        )
+        return [fmt for fmt in formats if fmt not in up_to_date]
+
+    def get_outdated_alternate_formats(self) -> list[tuple[MediaCodec, MediaContainer]]:
+        """Web audio formats that are missing, or were built from another version of the entry file"""
+        return self._get_outdated_formats(WEB_AUDIO_FORMATS)
+
+    def get_outdated_video_formats(self) -> list[tuple[MediaCodec, MediaContainer]]:
+        """Web video formats that are missing, or were built from another version of the entry file"""
+        return self._get_outdated_formats(WEB_VIDEO_FORMATS)
+
+    @property
+    def is_waveform_outdated(self) -> bool:
+        """Waveform is missing, or was computed from another version of the entry file.
+
+        The loudness is measured along with the waveform. If it couldn't be measured (silence, or ffmpeg
+        logged no summary), it stays empty until the entry file changes, instead of being retried on
+        every save.
+        """
+        return (
+            not self.waveformfile
+            or not self.entryfile_hash
+            or self.waveform_source_hash != self.entryfile_hash
+        )
+
+    @property
+    def playback_gain(self) -> float | None:
+        """Gain in dB to play the entry at, so that entries sound equally loud"""
+        return playback_gain(self.loudness, self.true_peak)
+
+    def generate_alternates(self, force: bool = False) -> None:
+        """Trigger generating additional formats and the waveform, unless they are up to date"""
         from Instanssi.kompomaatti import tasks
 
-        if self.is_audio:
-            for codec, container in WEB_AUDIO_FORMATS:
-                tasks.generate_alternate_audio_files.apply_async(
-                    countdown=1, args=[self.id, int(codec), int(container)]
-                )
+        # Files like .mp4 may hold either audio or video. Until the file has been probed, both tasks are
+        # queued, and the one that doesn't apply skips it.
+        if (
+            self.is_audio
+            and self.has_video is not True
+            and (force or self.get_outdated_alternate_formats() or self.is_waveform_outdated)
+        ):
+            tasks.generate_alternate_audio_files.apply_async(countdown=1, args=[self.id, force])
+        if self.is_video and self.has_video is not False and (force or self.get_outdated_video_formats()):
+            tasks.generate_alternate_video_files.apply_async(countdown=1, args=[self.id, force])
 
     def save(self, *args: Any, **kwargs: Any) -> None:
-        """Save and force regeneration of alternate files"""
+        """Save, reindex and regenerate alternate files if the entry file has changed"""
+        from Instanssi.arkisto.caching import bump_archive_version
+        from Instanssi.arkisto.search import update_search_index
+        from Instanssi.kompomaatti.misc.voting import invalidate_votable_entry_ids
+
+        self.update_file_hashes(changed_only=True)
         super().save(*args, **kwargs)
+        # Disqualification or reveal state may have changed which entries can be voted for
+        invalidate_votable_entry_ids(self.compo_id)
+        bump_archive_version(self.compo.event_id)
+        update_search_index(pk=self.pk)
         self.generate_alternates()
 
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        from Instanssi.arkisto.caching import bump_archive_version
+        from Instanssi.arkisto.search import remove_from_search_index
+        from Instanssi.kompomaatti.misc.voting import invalidate_votable_entry_ids
+
+        invalidate_votable_entry_ids(self.compo_id)
+        bump_archive_version(self.compo.event_id)
+        remove_from_search_index([self.pk])
+        # Alternate files go with the entry, but the segments of streams are not tracked by any field
+        for alt in self.alternate_files.filter(container=MediaContainer.HLS):
+            alt.delete_stream_files_on_commit()
+        return super().delete(*args, **kwargs)
+
 
 def generate_entry_alternate_file_path(alt: "AlternateEntryFile", filename: str) -> str:
     return generate_upload_path(
@@ -416,6 +640,11 @@ class AlternateEntryFile(models.Model):
     codec = models.IntegerField(choices=MediaCodec.choices)
     container = models.IntegerField(choices=MediaContainer.choices)
     file = models.FileField(max_length=255, upload_to=generate_entry_alternate_file_path)
+    # Entry.entryfile_hash of the file this was transcoded from
+    source_hash = models.CharField(max_length=64, blank=True, editable=False)
+    # Of the file itself. For streams, that is the master playlist.
+    file_hash = models.CharField(max_length=64, blank=True, editable=False)
+    file_size = models.BigIntegerField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(default=timezone.now)
 
@@ -427,30 +656,173 @@ class AlternateEntryFile(models.Model):
     def container_name(self) -> str:
         return MediaContainer(self.container).name.lower()
 
+    @property
+    def is_stream(self) -> bool:
+        """File is the master playlist of an HLS stream, with the renditions and segments next to it"""
+        return self.container == MediaContainer.HLS
+
     @property
     def mime_format(self) -> str:
+        if self.is_stream:
+            return "application/vnd.apple.mpegurl"
         return f"audio/{self.container_name};codecs={self.codec_name}"
 
+    def delete_stream_files_on_commit(self) -> None:
+        """Remove the directory of a stream from storage, once the current transaction commits"""
+        if self.is_stream and self.file.name:
+            directory = str(PurePosixPath(self.file.name).parent)
+            transaction.on_commit(lambda: delete_storage_directory(directory))
+
     def __str__(self) -> str:
         return f"Alternate {self.codec_name}/{self.container_name} file for {self.entry.name}"
 
+    def update_file_hash(self) -> None:
+        """Hash the file. Called by save() when a new file is assigned."""
+        if self.file:
+            self.file_hash = file_sha256(self.file)
+            self.file_size = self.file.size
+        else:
+            self.file_hash = ""
+            self.file_size = None
 
-class VoteGroup(models.Model):
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, verbose_name=_("user"), on_delete=models.CASCADE)
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save and drop the cached archive pages of the event (playlists link to the files)"""
+        from Instanssi.arkisto.caching import bump_archive_version
+
+        if not getattr(self.file, "_committed", True):
+            self.update_file_hash()
+        super().save(*args, **kwargs)
+        bump_archive_version(self.entry.compo.event_id)
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        from Instanssi.arkisto.caching import bump_archive_version
+
+        bump_archive_version(self.entry.compo.event_id)
+        self.delete_stream_files_on_commit()
+        return super().delete(*args, **kwargs)
+
+
+class EntryUpload(models.Model):
+    """An entry or source file that is being uploaded in chunks (see misc/uploads.py).
+
+    The chunks are appended to a file under ENTRY_UPLOAD_ROOT, so the upload offset is the size of
+    that file. Once complete, the upload is attached to an entry in place of a regular file upload.
+    """
+
+    FIELD_TYPES = (
+        ("entryfile", _("File")),
+        ("sourcefile", _("Source code")),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name=_("User"),
+        on_delete=models.CASCADE,
+    )
     compo = models.ForeignKey(Compo, verbose_name=_("compo"), on_delete=models.CASCADE)
+    field = models.CharField(_("Field"), max_length=16, choices=FIELD_TYPES)
+    filename = models.CharField(_("File name"), max_length=255)
+    size = models.BigIntegerField(_("File size"))
+    created_at = models.DateTimeField(_("Created at"), default=timezone.now)
+    # Pushed forward by every chunk, so that only abandoned uploads expire
+    expires_at = models.DateTimeField(_("Expires at"))
+
+    def __str__(self) -> str:
+        return f"Upload of {self.filename} by {self.user}"
+
+    def get_path(self) -> Path:
+        return Path(settings.ENTRY_UPLOAD_ROOT) / f"{self.id}.part"
+
+    @property
+    def offset(self) -> int:
+        """Bytes received so far"""
+        try:
+            return self.get_path().stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    @property
+    def is_complete(self) -> bool:
+        return self.offset == self.size
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        self.get_path().unlink(missing_ok=True)
+        return super().delete(*args, **kwargs)
+
+
+def cascade_ballots(
+    collector: models.deletion.Collector,
+    field: models.Field,  # type: ignore[type-arg]
+    sub_objs: models.QuerySet["VoteGroup"],
+    using: str,
+) -> None:
+    """Delete the ballots of a deleted user or compo, removing them from the entry scores first."""
+    with transaction.atomic(using=using):
+        EntryScore.objects.using(using).remove_ballots(group.ranking for group in sub_objs)
+    models.CASCADE(collector, field, sub_objs, using)
+
+
+class VoteGroup(models.Model):
+    """A single user's ranked ballot for a compo.
+
+    The ballot is stored as an ordered list of entry ids in ``ranking``, best first, so casting or
+    replacing a vote is a single row write no matter how many entries were ranked. Saving and
+    deleting ballots, also in bulk or by cascade, keeps the entry scores (see EntryScore) in sync.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, verbose_name=_("user"), on_delete=cascade_ballots)
+    compo = models.ForeignKey(Compo, verbose_name=_("compo"), on_delete=cascade_ballots)
+    ranking = models.JSONField(_("Ranking"), default=list, blank=True)
+
+    objects = VoteGroupQuerySet.as_manager()
+
+    @property
+    def ranks(self) -> dict[int, int]:
+        """Ballot as entry id -> rank, where the first entry of the ranking has rank 1."""
+        return {entry_id: rank for rank, entry_id in enumerate(self.ranking, start=1)}
 
     @property
     def entries(self) -> list[Entry]:
-        return [v.entry for v in self.votes.order_by("rank")]
+        entries = Entry.objects.in_bulk(self.ranking)
+        return [entries[entry_id] for entry_id in self.ranking if entry_id in entries]
+
+    def set_votes(self, entries: Iterable[Entry]) -> None:
+        """Replace the ballot with the given entries in ranked order, and update the entry scores."""
+        self.set_ranking([entry.id for entry in entries])
+
+    def set_ranking(self, entry_ids: list[int]) -> None:
+        """Replace the ballot with the given entry ids in ranked order, and update the entry scores."""
+        self.ranking = list(entry_ids)
+        self.save()
 
     def delete_votes(self) -> None:
-        Vote.objects.filter(group=self).delete()
+        """Clear the ballot, and remove it from the entry scores."""
+        self.set_votes([])
+
+    def _get_saved_ranks(self) -> dict[int, int]:
+        """Ballot as stored in the database, locked until the end of the transaction."""
+        if self.pk is None:
+            return {}
+        ranking = VoteGroup.objects.select_for_update().filter(pk=self.pk).values_list("ranking", flat=True)
+        return {entry_id: rank for rank, entry_id in enumerate(ranking.first() or [], start=1)}
 
-    def create_votes(self, entries: Iterable[Entry]) -> None:
-        current_rank = 1
-        for entry in entries:
-            Vote(user=self.user, compo=self.compo, rank=current_rank, entry=entry, group=self).save()
-            current_rank += 1
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save, and replace the stored ballot with this one in the entry scores"""
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "ranking" not in update_fields:
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic():
+            old_ranks = self._get_saved_ranks()
+            super().save(*args, **kwargs)
+            EntryScore.objects.replace_votes(old_ranks, self.ranks)
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        """Delete, and remove the stored ballot from the entry scores"""
+        with transaction.atomic():
+            EntryScore.objects.replace_votes(self._get_saved_ranks(), {})
+            return super().delete(*args, **kwargs)
 
     def __str__(self) -> str:
         return "votes for {} by {}".format(self.compo.name, self.user.username)
@@ -459,22 +831,27 @@ class VoteGroup(models.Model):
         unique_together = (("user", "compo"),)
 
 
-class Vote(models.Model):
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, verbose_name=_("user"), on_delete=models.CASCADE)
-    compo = models.ForeignKey(Compo, verbose_name=_("compo"), on_delete=models.CASCADE)
-    entry = models.ForeignKey(Entry, verbose_name=_("entry"), on_delete=models.CASCADE)
-    rank = models.IntegerField(_("Rank"))
-    group = models.ForeignKey(
-        VoteGroup,
-        default=None,
-        null=True,
-        blank=True,
-        related_name="votes",
+class EntryScore(models.Model):
+    """Running vote score of an entry.
+
+    This is derived from the VoteGroup ballots, and kept up to date by VoteGroup as votes are cast
+    and replaced, so that scores and ranks can be read without aggregating over all votes. Use the
+    rebuild_scores management command to recalculate it if it ever gets out of sync.
+    """
+
+    entry = models.OneToOneField(
+        Entry,
+        primary_key=True,
+        related_name="vote_score",
         on_delete=models.CASCADE,
     )
+    score = models.FloatField(_("Score"), default=0.0)
+    vote_count = models.IntegerField(_("Vote count"), default=0)
+
+    objects = EntryScoreQuerySet.as_manager()
 
     def __str__(self) -> str:
-        return "{} by {} as {}".format(self.entry.name, self.user.username, self.rank)
+        return f"Score {self.score} for entry {self.entry_id}"
 
 
 class Competition(models.Model):
@@ -509,6 +886,19 @@ class Competition(models.Model):
     def __str__(self) -> str:
         return "{}: {}".format(self.event.name, self.name)
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save and drop the cached archive pages of the event"""
+        from Instanssi.arkisto.caching import bump_archive_version
+
+        super().save(*args, **kwargs)
+        bump_archive_version(self.event_id)
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        from Instanssi.arkisto.caching import bump_archive_version
+
+        bump_archive_version(self.event_id)
+        return super().delete(*args, **kwargs)
+
 
 class CompetitionParticipation(models.Model):
     computed_rank: int  # Set by with_rank() annotation
@@ -537,33 +927,50 @@ class CompetitionParticipation(models.Model):
     def get_formatted_score(self) -> str:
         return "{} {}".format(self.score, self.competition.score_type)
 
-    def get_rank(self) -> int:
-        # Get results
-        rank_by = "-score"
-        if self.competition.score_sort == 1:
-            rank_by = "score"
-        results = CompetitionParticipation.objects.filter(competition_id=self.competition.id).order_by(
-            rank_by
-        )
-
-        # Find self
-        rank = 1
-        for p in results:
-            if p.id == self.id:
-                return rank
-            else:
-                rank += 1
-        return rank
-
     def __str__(self) -> str:
         return "{}, {}: {}".format(self.competition.name, self.participant_name, self.score)
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save and drop the cached archive pages of the event"""
+        from Instanssi.arkisto.caching import bump_archive_version
+
+        super().save(*args, **kwargs)
+        bump_archive_version(self.competition.event_id)
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        from Instanssi.arkisto.caching import bump_archive_version
+
+        bump_archive_version(self.competition.event_id)
+        return super().delete(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            # Scoreboards rank participations by score within a competition (see with_rank())
+            models.Index(fields=["competition", "score"], name="kompomaatti_part_comp_score"),
+        ]
+
 
 class LiveVotingState(models.Model):
     compo = models.OneToOneField(Compo, on_delete=models.CASCADE, related_name="live_voting_state")
     voting_open = models.BooleanField(_("Voting open"), default=False)
     current_entry = models.ForeignKey(Entry, null=True, blank=True, on_delete=models.SET_NULL)
     updated_at = models.DateTimeField(_("Updated at"), auto_now=True)
+    version = models.PositiveIntegerField(_("Version"), default=0)
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        # Version is bumped on every change, so that clients can tell apart updates that happen
+        # within the same second (which Last-Modified can't). It is incremented in the database,
+        # so that concurrent saves each get a version of their own.
+        if self._state.adding:
+            self.version += 1
+            super().save(*args, **kwargs)
+            return
+        if (update_fields := kwargs.get("update_fields")) is not None:
+            kwargs["update_fields"] = {*update_fields, "version"}
+        with transaction.atomic(using=kwargs.get("using")):
+            self.version = models.F("version") + 1
+            super().save(*args, **kwargs)
+            self.refresh_from_db(fields=["version"])
 
     def __str__(self) -> str:
         return f"Live voting state for {self.compo}"
@@ -572,9 +979,8 @@ class LiveVotingState(models.Model):
 auditlog.register(Compo)
 auditlog.register(Competition)
 auditlog.register(Entry)
-auditlog.register(LiveVotingState)
+auditlog.register(LiveVotingState, exclude_fields=["version"])
 auditlog.register(CompetitionParticipation)
-auditlog.register(Vote)
 auditlog.register(VoteGroup)
 auditlog.register(VoteCodeRequest)
 auditlog.register(Event)
@@ -1,16 +1,14 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Final, Iterable, Mapping
 
+from django.db import transaction
 from django.db.models import (
     Case,
     F,
     FloatField,
     IntegerField,
-    OuterRef,
     QuerySet,
-    Subquery,
-    Sum,
     Value,
     When,
     Window,
@@ -18,7 +16,25 @@ from django.db.models import (
 from django.db.models.functions import Coalesce, DenseRank
 
 if TYPE_CHECKING:
-    from Instanssi.kompomaatti.models import CompetitionParticipation, Entry
+    from Instanssi.kompomaatti.models import (
+        CompetitionParticipation,
+        Compo,
+        Entry,
+        EntryScore,
+        VoteGroup,
+    )
+
+# Stored scores are rounded to this many decimals after every change. Each vote is worth 1/rank,
+# and rounding keeps the running sums independent of the order in which ballots were applied,
+# so tied entries stay tied no matter how the votes came in.
+SCORE_PRECISION: Final[int] = 9
+
+FREEZE_BATCH_SIZE: Final[int] = 500
+
+
+def vote_points(rank: int) -> float:
+    """Points a single vote at the given rank is worth."""
+    return round(1.0 / rank, SCORE_PRECISION)
 
 
 class EntryQuerySet(QuerySet["Entry"]):
@@ -30,22 +46,13 @@ class EntryQuerySet(QuerySet["Entry"]):
         Score is calculated as:
         - -1.0 if entry is disqualified
         - archive_score if set (for archived events)
-        - Otherwise: SUM(1.0 / vote.rank) across all votes
+        - Otherwise: the running vote score from EntryScore (SUM(1.0 / vote.rank) across all votes)
         """
-        from Instanssi.kompomaatti.models import Vote
-
-        vote_score = (
-            Vote.objects.filter(entry_id=OuterRef("pk"))
-            .values("entry_id")
-            .annotate(total=Sum(Value(1.0, output_field=FloatField()) / F("rank")))
-            .values("total")
-        )
-
         return self.annotate(
             computed_score=Case(  # type: ignore[no-redef]
                 When(disqualified=True, then=Value(-1.0, output_field=FloatField())),
                 When(archive_score__isnull=False, then=F("archive_score")),
-                default=Coalesce(Subquery(vote_score), Value(0.0, output_field=FloatField())),
+                default=Coalesce(F("vote_score__score"), Value(0.0, output_field=FloatField())),
                 output_field=FloatField(),
             )
         )
@@ -70,6 +77,115 @@ class EntryQuerySet(QuerySet["Entry"]):
             )
         )
 
+    def freeze_results(self) -> int:
+        """Store the current score and rank of the entries as their archive score and rank.
+
+        Ranks are computed within this queryset, so it should contain whole compos. Entries are
+        written with bulk updates, so Entry.save() side effects (eg. alternate file generation)
+        are skipped.
+
+        Returns:
+            Number of entries updated.
+        """
+        entries = list(self.with_rank().only("id", "archive_score", "archive_rank").order_by("id"))
+        for entry in entries:
+            entry.archive_score = entry.computed_score
+            entry.archive_rank = entry.computed_rank
+        self.bulk_update(entries, ["archive_score", "archive_rank"], batch_size=FREEZE_BATCH_SIZE)
+        return len(entries)
+
+
+class EntryScoreQuerySet(QuerySet["EntryScore"]):
+    """Custom QuerySet for maintaining the denormalized per-entry vote scores."""
+
+    def replace_votes(self, old_ranks: Mapping[int, int], new_ranks: Mapping[int, int]) -> None:
+        """Replace a single ballot (entry_id -> rank) in the running entry scores.
+
+        The old and new ballots are folded into a single delta per entry, so re-ranking only touches
+        the score rows of entries whose points actually changed.
+        """
+        deltas: dict[int, tuple[float, int]] = {}
+        for entry_id, rank in old_ranks.items():
+            deltas[entry_id] = (-vote_points(rank), -1)
+        for entry_id, rank in new_ranks.items():
+            points, count = deltas.get(entry_id, (0.0, 0))
+            deltas[entry_id] = (points + vote_points(rank), count + 1)
+        self._apply({entry_id: delta for entry_id, delta in deltas.items() if delta != (0.0, 0)})
+
+    def remove_ballots(self, rankings: Iterable[list[int]]) -> None:
+        """Remove ballots (entry id lists, best first) from the running entry scores in one go."""
+        deltas: dict[int, tuple[float, int]] = {}
+        for ranking in rankings:
+            for rank, entry_id in enumerate(ranking, start=1):
+                points, count = deltas.get(entry_id, (0.0, 0))
+                deltas[entry_id] = (points - vote_points(rank), count - 1)
+        self._apply(deltas)
+
+    def _apply(self, deltas: dict[int, tuple[float, int]]) -> None:
+        """Apply (points, vote count) deltas to entry scores.
+
+        Must be called inside a transaction. Rows are locked in entry id order, so concurrent
+        ballots touching the same entries serialize instead of deadlocking each other.
+        """
+        if not deltas:
+            return
+        # Only entries gaining a vote can be missing a score row. Removed votes may point to entries
+        # that have since been deleted, so those must not be recreated here.
+        new_ids = [entry_id for entry_id, (_, count) in deltas.items() if count > 0]
+        self.bulk_create([self.model(entry_id=entry_id) for entry_id in new_ids], ignore_conflicts=True)
+        scores = list(self.select_for_update().filter(entry_id__in=deltas).order_by("entry_id"))
+        for score in scores:
+            points, count = deltas[score.entry_id]
+            score.score = round(score.score + points, SCORE_PRECISION)
+            score.vote_count += count
+        self.bulk_update(scores, ["score", "vote_count"])
+
+    def rebuild(self, compos: QuerySet["Compo"] | None = None) -> int:
+        """Recalculate entry scores from scratch from the stored ballots.
+
+        Args:
+            compos: Only rebuild scores for entries in these compos. If not given, all scores are rebuilt.
+
+        Returns:
+            Number of entries that have votes.
+        """
+        from Instanssi.kompomaatti.models import Entry, VoteGroup
+
+        entries = Entry.objects.all() if compos is None else Entry.objects.filter(compo__in=compos)
+        groups = VoteGroup.objects.all() if compos is None else VoteGroup.objects.filter(compo__in=compos)
+
+        totals: dict[int, tuple[float, int]] = {}
+        for ranking in groups.values_list("ranking", flat=True).iterator():
+            for rank, entry_id in enumerate(ranking, start=1):
+                points, count = totals.get(entry_id, (0.0, 0))
+                totals[entry_id] = (round(points + vote_points(rank), SCORE_PRECISION), count + 1)
+
+        # Ballots may still reference entries that have been deleted since.
+        existing = set(entries.filter(pk__in=totals).values_list("pk", flat=True))
+        self.filter(entry__in=entries).delete()
+        self.bulk_create(
+            [
+                self.model(entry_id=entry_id, score=points, vote_count=count)
+                for entry_id, (points, count) in totals.items()
+                if entry_id in existing
+            ],
+            batch_size=1000,
+        )
+        return len(existing)
+
+
+class VoteGroupQuerySet(QuerySet["VoteGroup"]):
+    """Custom QuerySet for VoteGroup that keeps the entry scores in sync on bulk deletes."""
+
+    def delete(self) -> tuple[int, dict[str, Any]]:
+        from Instanssi.kompomaatti.models import EntryScore
+
+        with transaction.atomic(using=self.db):
+            EntryScore.objects.using(self.db).remove_ballots(
+                self.select_for_update().values_list("ranking", flat=True)
+            )
+            return super().delete()
+
 
 class CompetitionParticipationQuerySet(QuerySet["CompetitionParticipation"]):
     """Custom QuerySet for CompetitionParticipation with rank annotation."""
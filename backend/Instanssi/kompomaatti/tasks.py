@@ -1,84 +1,88 @@
 import logging
-from pathlib import Path
-from typing import Dict, Final
+from typing import Final, List, Tuple
 
-import ffmpeg
 from celery import shared_task
-from django.core.files import File
-from django.utils import timezone
 
-from ..common.file_handling import temp_file
 from .enums import MediaCodec, MediaContainer
-from .models import AlternateEntryFile, Entry
+from .misc.alternates import FFMPEG_TIME_LIMIT, transcode_audio_alternates
+from .misc.results import freeze_compo_results, get_unfrozen_finished_compos
+from .misc.uploads import cleanup_expired_uploads
+from .misc.video import (
+    VIDEO_FFMPEG_TIME_LIMIT,
+    entry_has_video,
+    transcode_video_alternates,
+)
+from .misc.waveform import generate_entry_waveform
+from .models import Entry
 
 log = logging.getLogger(__name__)
 
 
-# Predefined bit-rates for known formats. Otherwise, use a guess.
-# These sound pretty good, and make decently small files.
-FFMPEG_BITRATE: Final[Dict[MediaCodec, str]] = {
-    MediaCodec.OPUS: "128k",
-    MediaCodec.AAC: "160k",
-}
+# Time limits of a transcode, in seconds. ffmpeg stops itself at FFMPEG_TIME_LIMIT, these catch the
+# rest (eg. a hung storage read).
+TRANSCODE_SOFT_TIME_LIMIT: Final[int] = FFMPEG_TIME_LIMIT + 60
+TRANSCODE_TIME_LIMIT: Final[int] = FFMPEG_TIME_LIMIT + 120
+VIDEO_TRANSCODE_SOFT_TIME_LIMIT: Final[int] = VIDEO_FFMPEG_TIME_LIMIT + 60
+VIDEO_TRANSCODE_TIME_LIMIT: Final[int] = VIDEO_FFMPEG_TIME_LIMIT + 120
 
-# Map codec to ffmpeg encoder name
-FFMPEG_ENCODERS: Final[Dict[MediaCodec, str]] = {
-    MediaCodec.AAC: "aac",
-    MediaCodec.OPUS: "libopus",
-}
 
+# Routed to the media queue (see CELERY_TASK_ROUTES). Transcodes are idempotent, so they are only
+# acknowledged once done, and are delivered again if the worker goes away mid-transcode.
+@shared_task(  # type: ignore[untyped-decorator]
+    autoretry_for=[Entry.DoesNotExist],
+    retry_backoff=3,
+    retry_kwargs={"max_retries": 3},
+    acks_late=True,
+    soft_time_limit=TRANSCODE_SOFT_TIME_LIMIT,
+    time_limit=TRANSCODE_TIME_LIMIT,
+)
+def generate_alternate_audio_files(
+    entry_id: int, force: bool = False, formats: List[Tuple[int, int]] | None = None
+) -> None:
+    """Transcode an audio entry to the web audio formats that are not up to date (or all, with force),
+    and compute its waveform if that is not up to date.
 
-@shared_task(autoretry_for=[Entry.DoesNotExist], retry_backoff=3, retry_kwargs={"max_retries": 3})  # type: ignore[untyped-decorator]
-def generate_alternate_audio_files(entry_id: int, codec_index: int, container_index: int) -> None:
-    output_codec = MediaCodec(codec_index)
-    output_codec_name = output_codec.name.lower()
-    output_container = MediaContainer(container_index)
-    output_container_name = output_container.name.lower()
+    Formats are given as (codec, container) pairs, and default to all of WEB_AUDIO_FORMATS.
+    """
     entry = Entry.objects.get(pk=entry_id)
-    source_file = Path(entry.entryfile.path)
-
-    # Some quick sanity checks for the input.
-    if not entry.is_audio:
-        log.error("Unable to convert -- Input file is not an audio file")
+    # Files like .mp4 may be either, and videos are streamed instead (see generate_alternate_video_files)
+    if entry_has_video(entry):
+        log.info("Entry %d has video, skipping the audio formats", entry.id)
         return
-
-    log.info(
-        "Received file %s for processing -- converting to %s/%s",
-        source_file,
-        output_codec_name,
-        output_container_name,
+    transcode_audio_alternates(
+        entry,
+        (
+            [(MediaCodec(codec), MediaContainer(container)) for codec, container in formats]
+            if formats
+            else None
+        ),
+        force=force,
     )
+    generate_entry_waveform(entry, force=force)
+
+
+@shared_task(  # type: ignore[untyped-decorator]
+    autoretry_for=[Entry.DoesNotExist],
+    retry_backoff=3,
+    retry_kwargs={"max_retries": 3},
+    acks_late=True,
+    soft_time_limit=VIDEO_TRANSCODE_SOFT_TIME_LIMIT,
+    time_limit=VIDEO_TRANSCODE_TIME_LIMIT,
+)
+def generate_alternate_video_files(entry_id: int, force: bool = False) -> None:
+    """Transcode a video entry to an adaptive HLS stream, unless it is up to date (or with force)."""
+    transcode_video_alternates(Entry.objects.get(pk=entry_id), force=force)
+
 
-    # Create a temporary directory, and write the recoded audio file there.
-    with temp_file(output_container_name) as output_file:
-        log.info("Using temp file %s", output_file)
-        try:
-            input_file = ffmpeg.input(source_file.resolve())
-            pipeline = ffmpeg.output(
-                input_file.audio,
-                filename=output_file,
-                format=output_container_name,
-                acodec=FFMPEG_ENCODERS[output_codec],
-                audio_bitrate=FFMPEG_BITRATE[output_codec],
-            )
-            pipeline.global_args("-hide_banner", "-nostats", "-loglevel", "warning").run()
-        except Exception as e:
-            log.exception("Unable to convert -- %s", str(e))
-            raise
+@shared_task  # type: ignore[untyped-decorator]
+def freeze_finished_compo_results() -> None:
+    """Freeze the results of compos whose voting has ended, so that ranks don't need to be computed."""
+    for compo_id in get_unfrozen_finished_compos().values_list("id", flat=True):
+        count = freeze_compo_results(compo_id)
+        log.info("Froze results of %d entries in compo %d", count, compo_id)
 
-        # Remove existing file and object, if any.
-        params = dict(entry=entry, codec=output_codec, container=output_container)
-        try:
-            alt = AlternateEntryFile.objects.get(**params)
-            alt.updated_at = timezone.now()
-            alt.file.delete(save=False)
-            log.info("Updating existing database entry")
-        except AlternateEntryFile.DoesNotExist:
-            alt = AlternateEntryFile(**params)
-            log.info("Creating a new database entry")
 
-        # Read in the temporary file, save to django storage and database.
-        with open(output_file, "rb") as fd:
-            alt.file.save(output_file.name, File(fd))
-        alt.save()
-        log.info("Entry processed; result saved to %s", alt.file.path)
+@shared_task  # type: ignore[untyped-decorator]
+def cleanup_expired_entry_uploads() -> None:
+    """Remove resumable uploads that have not received a chunk in a while (see CELERY_BEAT_SCHEDULE)."""
+    cleanup_expired_uploads()
@@ -108,6 +108,9 @@ REST_FRAMEWORK["DEFAULT_THROTTLE_CLASSES"] = []
 # Initialize cache configuration
 CACHES = make_cache_conf(DEBUG)
 
+# Initialize pub/sub configuration (live updates pushed to clients)
+PUBSUB = make_pubsub_conf(DEBUG)
+
 # Initializes celery config
 CELERY_BROKER_URL, CELERY_BROKER_TRANSPORT_OPTIONS = make_celery_conf(DEBUG)
 CELERY_TASK_ALWAYS_EAGER = True
@@ -7,9 +7,12 @@ from django.views.i18n import set_language
 from django.views.static import serve
 
 from Instanssi.api.ical.feed import EventFeed
+from Instanssi.common.views import csrf_token, switch_language
 
 urlpatterns = [
     path("i18n/setlang/", set_language, name="set_language"),
+    path("i18n/csrf/", csrf_token, name="csrf_token"),
+    path("i18n/setlang/<str:language>/", switch_language, name="switch_language"),
     path("users/", include("allauth.urls")),
     path("qr/", include("qr_code.urls", namespace="qr_code")),
     path("api/v1/ics/instanssi.ics", EventFeed(), name="ics_feed"),
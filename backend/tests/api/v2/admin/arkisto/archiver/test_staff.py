@@ -1,10 +1,18 @@
+from unittest import mock
+
 import pytest
+from auditlog.models import LogEntry
 from freezegun import freeze_time
 
+from Instanssi.arkisto.jobs import (
+    get_archiver_job,
+    queue_archiver_job,
+    update_archiver_job,
+)
 from Instanssi.kompomaatti.models import (
     CompetitionParticipation,
     Entry,
-    Vote,
+    EntryScore,
     VoteGroup,
 )
 from Instanssi.users.models import User
@@ -126,7 +134,7 @@ def test_staff_can_optimize_scores(staff_api_client, past_event, past_compo_entr
 
     url = get_base_url(past_event.id) + "optimize-scores/"
     req = staff_api_client.post(url)
-    assert req.status_code == 200
+    assert req.status_code == 202
     assert req.data["votes_unoptimized"] is False
 
     # Verify entry now has archive scores
@@ -135,6 +143,51 @@ def test_staff_can_optimize_scores(staff_api_client, past_event, past_compo_entr
     assert past_compo_entry.archive_rank is not None
 
 
+@pytest.mark.django_db
+def test_optimize_scores_does_not_regenerate_alternates(
+    staff_api_client, past_event, past_compo_entry, past_vote
+):
+    """Test that optimizing scores writes entries without Entry.save() side effects."""
+    url = get_base_url(past_event.id) + "optimize-scores/"
+    with mock.patch.object(Entry, "generate_alternates") as generate_alternates:
+        req = staff_api_client.post(url)
+    assert req.status_code == 202
+    generate_alternates.assert_not_called()
+
+    past_compo_entry.refresh_from_db()
+    assert past_compo_entry.archive_score == 1.0
+    assert past_compo_entry.archive_rank == 1
+
+
+@pytest.mark.django_db
+def test_optimize_scores_reports_job_progress(staff_api_client, past_event, past_compo_entry):
+    """Test that the status reports the progress of the optimization job."""
+    base_url = get_base_url(past_event.id)
+    req = staff_api_client.get(base_url + "status/")
+    assert req.data["job"] is None
+
+    req = staff_api_client.post(base_url + "optimize-scores/")
+    assert req.status_code == 202
+    expected = {"action": "optimize_scores", "state": "done", "processed": 1, "total": 1}
+    assert req.data["job"] == expected
+
+    req = staff_api_client.get(base_url + "status/")
+    assert req.data["job"] == expected
+
+
+@pytest.mark.django_db
+def test_optimize_scores_blocked_while_job_is_running(staff_api_client, past_event, past_compo_entry):
+    """Test that a new archiver job can't be started while another one is in progress."""
+    update_archiver_job(past_event.id, "remove_old_votes", "running")
+    url = get_base_url(past_event.id) + "optimize-scores/"
+    req = staff_api_client.post(url)
+    assert req.status_code == 409
+
+    past_compo_entry.refresh_from_db()
+    assert past_compo_entry.archive_score is None
+    assert get_archiver_job(past_event.id)["action"] == "remove_old_votes"
+
+
 @pytest.mark.django_db
 @freeze_time("2025-01-15T12:00:00Z")
 def test_optimize_scores_blocked_for_ongoing_event(staff_api_client, event, open_compo):
@@ -154,16 +207,42 @@ def test_staff_can_remove_old_votes(staff_api_client, past_event, past_compo_ent
     past_compo_entry.save()
 
     # Verify votes exist
-    assert Vote.objects.filter(compo__event=past_event).exists()
+    assert VoteGroup.objects.filter(compo__event=past_event).exists()
+    assert EntryScore.objects.filter(entry=past_compo_entry).exists()
 
     url = get_base_url(past_event.id) + "remove-old-votes/"
     req = staff_api_client.post(url)
-    assert req.status_code == 200
+    assert req.status_code == 202
     assert req.data["old_votes_found"] is False
 
-    # Verify votes and vote groups were deleted
-    assert not Vote.objects.filter(compo__event=past_event).exists()
+    assert req.data["job"] == {"action": "remove_old_votes", "state": "done", "processed": 1, "total": 1}
+
+    # Verify vote groups and the running scores were deleted
     assert not VoteGroup.objects.filter(compo__event=past_event).exists()
+    assert not EntryScore.objects.filter(entry=past_compo_entry).exists()
+
+
+@pytest.mark.django_db
+def test_remove_old_votes_is_audit_logged(staff_api_client, past_event, past_compo_entry, past_vote):
+    """Test that removed ballots leave a deletion record in the audit log."""
+    past_compo_entry.archive_score = 1.0
+    past_compo_entry.archive_rank = 1
+    past_compo_entry.save()
+
+    req = staff_api_client.post(get_base_url(past_event.id) + "remove-old-votes/")
+    assert req.status_code == 202
+    assert LogEntry.objects.get_for_object(past_vote).filter(action=LogEntry.Action.DELETE).exists()
+
+
+@pytest.mark.django_db
+def test_only_one_archiver_job_can_be_queued(past_event):
+    """Test that a job can't be queued over another one, until that one has finished."""
+    assert queue_archiver_job(past_event.id, "optimize_scores") is True
+    assert queue_archiver_job(past_event.id, "remove_old_votes") is False
+    assert get_archiver_job(past_event.id)["action"] == "optimize_scores"
+
+    update_archiver_job(past_event.id, "optimize_scores", "done")
+    assert queue_archiver_job(past_event.id, "remove_old_votes") is True
 
 
 @pytest.mark.django_db
@@ -246,12 +325,12 @@ def test_full_archiving_workflow(
 
     # 2. Optimize scores
     req = staff_api_client.post(base_url + "optimize-scores/")
-    assert req.status_code == 200
+    assert req.status_code == 202
     assert req.data["votes_unoptimized"] is False
 
     # 3. Remove old votes
     req = staff_api_client.post(base_url + "remove-old-votes/")
-    assert req.status_code == 200
+    assert req.status_code == 202
     assert req.data["old_votes_found"] is False
 
     # 4. Transfer rights
@@ -272,4 +351,75 @@ def test_full_archiving_workflow(
     assert past_compo_entry.user == archive_user
     assert past_compo_entry.archive_score is not None
     assert past_competition_participation.user == archive_user
-    assert not Vote.objects.filter(compo__event=past_event).exists()
+    assert not VoteGroup.objects.filter(compo__event=past_event).exists()
+
+
+@pytest.mark.django_db
+def test_status_uses_aggregate_queries(
+    staff_api_client, past_event, past_compo_entry, past_vote, django_assert_max_num_queries
+):
+    """Test that the status is built from aggregate queries instead of loading entries."""
+    url = get_base_url(past_event.id) + "status/"
+    staff_api_client.get(url)  # Warm up the session and user lookups
+    with django_assert_max_num_queries(4):
+        req = staff_api_client.get(url)
+    assert req.status_code == 200
+    assert req.data["old_votes_found"] is True
+
+
+@pytest.mark.django_db
+def test_staff_can_export_static_pages(staff_api_client, settings, tmp_path, past_event, past_compo_entry):
+    """Test that staff can pre-render the archive pages of an archived event."""
+    settings.ARCHIVE_EXPORT_ROOT = tmp_path
+    settings.ARCHIVE_EXPORT_URL = "http://localhost"
+    past_event.archived = True
+    past_event.save()
+    past_compo_entry.compo.show_voting_results = True
+    past_compo_entry.compo.save()
+
+    req = staff_api_client.post(get_base_url(past_event.id) + "export-static/")
+    assert req.status_code == 202
+
+    job = get_archiver_job(past_event.id)
+    assert job["action"] == "export_static"
+    assert job["state"] == "done"
+    assert job["processed"] == job["total"] > 0
+    assert (tmp_path / "en" / "arkisto" / "event" / str(past_event.id) / "index.html").exists()
+    assert (tmp_path / "fi" / "arkisto" / "entry" / str(past_compo_entry.id) / "index.html.gz").exists()
+
+
+@pytest.mark.django_db
+def test_export_static_pages_blocked_for_non_archived_event(
+    staff_api_client, settings, tmp_path, past_event
+):
+    """Test that events hidden from the archive can't be exported."""
+    settings.ARCHIVE_EXPORT_ROOT = tmp_path
+    req = staff_api_client.post(get_base_url(past_event.id) + "export-static/")
+    assert req.status_code == 400
+    assert not any(tmp_path.iterdir())
+
+
+@pytest.mark.django_db
+def test_export_static_pages_blocked_when_disabled(staff_api_client, settings, past_event):
+    """Test that export is refused when no export directory is configured."""
+    settings.ARCHIVE_EXPORT_ROOT = None
+    past_event.archived = True
+    past_event.save()
+    req = staff_api_client.post(get_base_url(past_event.id) + "export-static/")
+    assert req.status_code == 400
+    assert get_archiver_job(past_event.id) is None
+
+
+@pytest.mark.django_db
+def test_hiding_event_removes_static_pages(staff_api_client, settings, tmp_path, past_event, past_compo):
+    """Test that the pre-rendered pages of an event are removed when it is hidden from the archive."""
+    settings.ARCHIVE_EXPORT_ROOT = tmp_path
+    settings.ARCHIVE_EXPORT_URL = "http://localhost"
+    staff_api_client.post(get_base_url(past_event.id) + "show/")
+    staff_api_client.post(get_base_url(past_event.id) + "export-static/")
+    event_dir = tmp_path / "en" / "arkisto" / "event" / str(past_event.id)
+    assert event_dir.exists()
+
+    staff_api_client.post(get_base_url(past_event.id) + "hide/")
+
+    assert not event_dir.exists()
@@ -15,6 +15,7 @@ def get_base_url(event_id):
         ("optimize-scores/", "POST", 401),
         ("remove-old-votes/", "POST", 401),
         ("transfer-rights/", "POST", 401),
+        ("export-static/", "POST", 401),
     ],
 )
 def test_unauthenticated_archiver_endpoints(api_client, past_event, endpoint, method, status):
@@ -15,6 +15,7 @@ def get_base_url(event_id):
         ("optimize-scores/", "POST"),
         ("remove-old-votes/", "POST"),
         ("transfer-rights/", "POST"),
+        ("export-static/", "POST"),
     ],
 )
 def test_unauthorized_archiver_endpoints(auth_client, past_event, endpoint, method):
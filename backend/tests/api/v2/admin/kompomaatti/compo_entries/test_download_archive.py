@@ -3,6 +3,10 @@ from io import BytesIO
 from pathlib import Path
 
 import pytest
+from asgiref.sync import async_to_sync
+
+from Instanssi.api.v2.utils import zip_stream
+from tests.helpers import streaming_content
 
 
 def get_archive_url(event_id: int) -> str:
@@ -46,7 +50,7 @@ def test_archive_contains_entry_file(staff_api_client, editable_compo_entry):
     response = staff_api_client.get(url)
     assert response.status_code == 200
 
-    content = b"".join(response.streaming_content)
+    content = streaming_content(response)
     with zipfile.ZipFile(BytesIO(content)) as zf:
         names = zf.namelist()
 
@@ -64,7 +68,7 @@ def test_archive_excludes_disqualified_entries(staff_api_client, editable_compo_
     response = staff_api_client.get(url)
     assert response.status_code == 200
 
-    content = b"".join(response.streaming_content)
+    content = streaming_content(response)
     with zipfile.ZipFile(BytesIO(content)) as zf:
         names = zf.namelist()
 
@@ -77,7 +81,7 @@ def test_filter_by_compo(staff_api_client, editable_compo_entry, votable_compo_e
     response = staff_api_client.get(url, {"compo": editable_compo_entry.compo_id})
     assert response.status_code == 200
 
-    content = b"".join(response.streaming_content)
+    content = streaming_content(response)
     with zipfile.ZipFile(BytesIO(content)) as zf:
         names = zf.namelist()
 
@@ -90,7 +94,7 @@ def test_empty_archive_when_no_entries(staff_api_client, event):
     response = staff_api_client.get(url)
     assert response.status_code == 200
 
-    content = b"".join(response.streaming_content)
+    content = streaming_content(response)
     with zipfile.ZipFile(BytesIO(content)) as zf:
         names = zf.namelist()
 
@@ -103,7 +107,7 @@ def test_archive_uses_entry_id_prefix(staff_api_client, closed_compo_entry):
     response = staff_api_client.get(url)
     assert response.status_code == 200
 
-    content = b"".join(response.streaming_content)
+    content = streaming_content(response)
     with zipfile.ZipFile(BytesIO(content)) as zf:
         names = zf.namelist()
 
@@ -121,7 +125,7 @@ def test_archive_uses_order_prefix(staff_api_client, editable_compo_entry):
     response = staff_api_client.get(url, {"prefix": "order"})
     assert response.status_code == 200
 
-    content = b"".join(response.streaming_content)
+    content = streaming_content(response)
     with zipfile.ZipFile(BytesIO(content)) as zf:
         names = zf.namelist()
 
@@ -139,3 +143,79 @@ def test_returns_400_when_file_missing(staff_api_client, editable_compo_entry):
     assert response.status_code == 400
     assert "Missing entry files" in response.data["error"]
     assert len(response.data["entries"]) == 1
+
+
+@pytest.mark.django_db
+def test_archive_has_content_length(staff_api_client, editable_compo_entry, votable_compo_entry):
+    url = get_archive_url(editable_compo_entry.compo.event_id)
+    response = staff_api_client.get(url)
+    assert response.status_code == 200
+    assert response["Accept-Ranges"] == "bytes"
+    assert response["ETag"]
+
+    content = streaming_content(response)
+    assert int(response["Content-Length"]) == len(content)
+
+
+@pytest.mark.django_db
+def test_archive_is_streamed_a_chunk_at_a_time(
+    staff_api_client, monkeypatch, editable_compo_entry, votable_compo_entry
+):
+    """Test that the archive is sent as it is read under ASGI, instead of being read into memory first."""
+    monkeypatch.setattr(zip_stream, "CHUNK_SIZE", 16)
+    read_files = []
+    read_file = zip_stream._read_file
+    monkeypatch.setattr(
+        zip_stream, "_read_file", lambda member, *args: read_files.append(member) or read_file(member, *args)
+    )
+    response = staff_api_client.get(get_archive_url(editable_compo_entry.compo.event_id))
+    assert response.is_async
+
+    async def read() -> list[tuple[int, int]]:
+        received = []
+        async for chunk in response.streaming_content:
+            received.append((len(chunk), len(read_files)))
+        return received
+
+    received = async_to_sync(read)()
+    assert sum(size for size, _ in received) == int(response["Content-Length"])
+    # The first header was sent before any file was read, and the first file before the second was
+    read_counts = [count for _, count in received]
+    assert read_counts[0] == 0
+    assert 1 in read_counts
+    assert read_counts[-1] == 2
+    assert len(received) > editable_compo_entry.entryfile.size // 16
+
+
+@pytest.mark.django_db
+def test_resume_with_range(staff_api_client, editable_compo_entry, votable_compo_entry):
+    url = get_archive_url(editable_compo_entry.compo.event_id)
+    response = staff_api_client.get(url)
+    content = streaming_content(response)
+    first = len(content) // 2
+
+    response = staff_api_client.get(url, headers={"Range": f"bytes={first}-", "If-Range": response["ETag"]})
+    assert response.status_code == 206
+    assert response["Content-Range"] == f"bytes {first}-{len(content) - 1}/{len(content)}"
+    assert int(response["Content-Length"]) == len(content) - first
+    assert streaming_content(response) == content[first:]
+
+
+@pytest.mark.django_db
+def test_range_of_changed_archive_sends_whole_archive(staff_api_client, editable_compo_entry):
+    url = get_archive_url(editable_compo_entry.compo.event_id)
+    response = staff_api_client.get(url, headers={"Range": "bytes=10-", "If-Range": '"outdated"'})
+    assert response.status_code == 200
+    content = streaming_content(response)
+    assert int(response["Content-Length"]) == len(content)
+    with zipfile.ZipFile(BytesIO(content)) as zf:
+        assert len(zf.namelist()) == 1
+
+
+@pytest.mark.django_db
+def test_unsatisfiable_range_returns_416(staff_api_client, editable_compo_entry):
+    url = get_archive_url(editable_compo_entry.compo.event_id)
+    size = int(staff_api_client.get(url)["Content-Length"])
+    response = staff_api_client.get(url, headers={"Range": f"bytes={size}-"})
+    assert response.status_code == 416
+    assert response["Content-Range"] == f"bytes */{size}"
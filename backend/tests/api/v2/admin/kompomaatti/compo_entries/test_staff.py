@@ -1,3 +1,5 @@
+import hashlib
+
 import pytest
 
 
@@ -250,3 +252,102 @@ def test_cannot_update_entry_to_other_compo(staff_api_client, editable_compo_ent
     )
     assert req.status_code == 400
     assert "compo" in req.data
+
+
+@pytest.mark.django_db
+def test_replace_entry_file_with_upload(staff_api_client, votable_compo_entry, test_zip):
+    """Test that staff can replace an entry file with a chunked upload, after the deadlines."""
+    compo = votable_compo_entry.compo
+    uploads_url = f"/api/v2/event/{compo.event_id}/user/kompomaatti/uploads/"
+    req = staff_api_client.post(
+        uploads_url,
+        {"compo": compo.id, "field": "entryfile", "filename": "fixed.zip", "size": len(test_zip)},
+        format="json",
+    )
+    assert req.status_code == 201
+    upload_id = req.data["id"]
+    req = staff_api_client.generic(
+        "PATCH",
+        f"{uploads_url}{upload_id}/",
+        test_zip,
+        content_type="application/offset+octet-stream",
+        HTTP_UPLOAD_OFFSET="0",
+    )
+    assert req.status_code == 204
+
+    req = staff_api_client.patch(
+        f"{get_base_url(compo.event_id)}{votable_compo_entry.id}/",
+        format="multipart",
+        data={"entryfile_upload": upload_id},
+    )
+    assert req.status_code == 200
+    votable_compo_entry.refresh_from_db()
+    with votable_compo_entry.entryfile.open("rb") as fd:
+        assert fd.read() == test_zip
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("max_memory_size", [2621440, 0])  # Kept in memory, or written to a temporary file
+def test_post_admin_compo_entry_records_file_hashes(
+    settings,
+    max_memory_size,
+    staff_api_client,
+    open_compo,
+    base_user,
+    entry_zip,
+    source_zip,
+    image_png,
+    test_zip,
+    test_image,
+):
+    """Test that the files of a new entry are hashed as they are uploaded"""
+    settings.FILE_UPLOAD_MAX_MEMORY_SIZE = max_memory_size
+    req = staff_api_client.post(
+        get_base_url(open_compo.event_id),
+        format="multipart",
+        data={
+            "user": base_user.id,
+            "compo": open_compo.id,
+            "name": "Hashed Entry",
+            "description": "Entry with hashed files",
+            "creator": "Admin Creator",
+            "entryfile": entry_zip,
+            "imagefile_original": image_png,
+            "sourcefile": source_zip,
+        },
+    )
+    assert req.status_code == 201
+    assert req.data["entryfile_hash"] == hashlib.sha256(test_zip).hexdigest()
+    assert req.data["entryfile_size"] == len(test_zip)
+    assert req.data["sourcefile_hash"] == hashlib.sha256(test_zip).hexdigest()
+    assert req.data["sourcefile_size"] == len(test_zip)
+    assert req.data["imagefile_hash"] == hashlib.sha256(test_image).hexdigest()
+    assert req.data["imagefile_size"] == len(test_image)
+
+
+@pytest.mark.django_db
+def test_clearing_source_file_clears_hash(staff_api_client, votable_compo_entry):
+    """Test that the hash of a removed source file is removed along with it"""
+    assert votable_compo_entry.sourcefile_hash
+    req = staff_api_client.patch(
+        f"{get_base_url(votable_compo_entry.compo.event_id)}{votable_compo_entry.id}/",
+        format="multipart",
+        data={"sourcefile": ""},
+    )
+    assert req.status_code == 200
+    assert req.data["sourcefile_hash"] == ""
+    assert req.data["sourcefile_size"] is None
+
+
+@pytest.mark.django_db
+def test_filter_duplicates_by_entryfile_hash(staff_api_client, editable_compo_entry, votable_compo_entry):
+    """Test finding the entries with the same entry file"""
+    base_url = get_base_url(editable_compo_entry.compo.event_id)
+    req = staff_api_client.get(base_url, {"entryfile_hash": editable_compo_entry.entryfile_hash})
+    assert req.status_code == 200
+    # Both entries were made from the same test file
+    assert {entry["id"] for entry in req.data} == {editable_compo_entry.id, votable_compo_entry.id}
+
+    req = staff_api_client.get(base_url, {"entryfile_hash": "0" * 64})
+    assert req.status_code == 200
+    assert req.data == []
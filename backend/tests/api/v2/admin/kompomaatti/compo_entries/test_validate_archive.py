@@ -1,7 +1,11 @@
 from pathlib import Path
+from unittest import mock
 
 import pytest
 
+from Instanssi.api.v2.utils import archive_files
+from tests.helpers import streaming_content
+
 
 def get_validate_url(event_id: int) -> str:
     return f"/api/v2/admin/event/{event_id}/kompomaatti/entries/validate-archive/"
@@ -28,6 +32,7 @@ def test_returns_ok_with_count(staff_api_client, editable_compo_entry):
     assert response.status_code == 200
     assert response.data["ok"] is True
     assert response.data["count"] == 1
+    assert response.data["size"] == Path(editable_compo_entry.entryfile.path).stat().st_size
 
 
 @pytest.mark.django_db
@@ -56,6 +61,7 @@ def test_returns_zero_count_when_no_entries(staff_api_client, event):
     assert response.status_code == 200
     assert response.data["ok"] is True
     assert response.data["count"] == 0
+    assert response.data["size"] == 0
 
 
 @pytest.mark.django_db
@@ -75,3 +81,122 @@ def test_returns_404_for_nonexistent_event(staff_api_client):
     url = get_validate_url(99999)
     response = staff_api_client.get(url)
     assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_returns_400_when_file_size_changed(staff_api_client, editable_compo_entry):
+    with open(editable_compo_entry.entryfile.path, "ab") as fd:
+        fd.write(b"truncated or appended")
+
+    url = get_validate_url(editable_compo_entry.compo.event_id)
+    response = staff_api_client.get(url)
+    assert response.status_code == 400
+    assert "changed" in response.data["error"]
+    assert len(response.data["entries"]) == 1
+
+
+@pytest.mark.django_db
+def test_verify_compares_file_hashes(staff_api_client, editable_compo_entry):
+    file_path = Path(editable_compo_entry.entryfile.path)
+    file_path.write_bytes(bytes(len(file_path.read_bytes())))  # Same size, other content
+
+    url = get_validate_url(editable_compo_entry.compo.event_id)
+    response = staff_api_client.get(url)
+    assert response.status_code == 200  # The file is not read without verify
+
+    response = staff_api_client.get(url, {"verify": "true"})
+    assert response.status_code == 400
+    assert "changed" in response.data["error"]
+    assert len(response.data["entries"]) == 1
+
+
+@pytest.mark.django_db
+def test_verify_ok_with_unchanged_files(staff_api_client, editable_compo_entry):
+    url = get_validate_url(editable_compo_entry.compo.event_id)
+    response = staff_api_client.get(url, {"verify": "true"})
+    assert response.status_code == 200
+    assert response.data["count"] == 1
+
+
+@pytest.mark.django_db
+def test_size_is_total_of_entry_files(staff_api_client, editable_compo_entry, votable_compo_entry):
+    url = get_validate_url(editable_compo_entry.compo.event_id)
+    response = staff_api_client.get(url)
+    assert response.status_code == 200
+    assert response.data["count"] == 2
+    assert response.data["size"] == sum(
+        Path(entry.entryfile.path).stat().st_size for entry in (editable_compo_entry, votable_compo_entry)
+    )
+
+
+@pytest.mark.django_db
+def test_validate_and_download_scan_files_once(staff_api_client, editable_compo_entry, votable_compo_entry):
+    event_id = editable_compo_entry.compo.event_id
+    with mock.patch.object(archive_files, "_stat_file", wraps=archive_files._stat_file) as stat_file:
+        response = staff_api_client.get(get_validate_url(event_id))
+        assert response.status_code == 200
+        response = staff_api_client.get(
+            f"/api/v2/admin/event/{event_id}/kompomaatti/entries/download-archive/"
+        )
+        assert response.status_code == 200
+        streaming_content(response)
+    assert stat_file.call_count == 2
+
+
+@pytest.mark.django_db
+def test_changed_entries_are_scanned_again(staff_api_client, editable_compo_entry, votable_compo_entry):
+    url = get_validate_url(editable_compo_entry.compo.event_id)
+    with mock.patch.object(archive_files, "_stat_file", wraps=archive_files._stat_file) as stat_file:
+        staff_api_client.get(url)
+        votable_compo_entry.disqualified = True
+        votable_compo_entry.save()
+        response = staff_api_client.get(url)
+    assert response.data["count"] == 1
+    assert stat_file.call_count == 3
+
+
+@pytest.mark.django_db
+def test_file_modified_after_validation_is_reported(staff_api_client, editable_compo_entry):
+    """Test that files modified in place, under the same path, are not checked against cached results."""
+    url = get_validate_url(editable_compo_entry.compo.event_id)
+    response = staff_api_client.get(url)
+    assert response.status_code == 200
+
+    with open(editable_compo_entry.entryfile.path, "ab") as fd:
+        fd.write(b"appended")
+    response = staff_api_client.get(url)
+    assert response.status_code == 400
+    assert "changed" in response.data["error"]
+    assert len(response.data["entries"]) == 1
+
+
+@pytest.mark.django_db
+def test_download_after_validation_uses_fresh_stats(staff_api_client, editable_compo_entry):
+    event_id = editable_compo_entry.compo.event_id
+    download_url = f"/api/v2/admin/event/{event_id}/kompomaatti/entries/download-archive/"
+    staff_api_client.get(download_url)
+    with open(editable_compo_entry.entryfile.path, "ab") as fd:
+        fd.write(b"appended")
+    staff_api_client.get(get_validate_url(event_id))
+
+    response = staff_api_client.get(download_url)
+    assert response.status_code == 200
+    content = streaming_content(response)
+    assert int(response["Content-Length"]) == len(content)
+    assert content.count(b"appended") == 1
+
+
+@pytest.mark.django_db
+def test_missing_files_are_not_cached(staff_api_client, editable_compo_entry):
+    file_path = Path(editable_compo_entry.entryfile.path)
+    content = file_path.read_bytes()
+    file_path.unlink()
+
+    url = get_validate_url(editable_compo_entry.compo.event_id)
+    response = staff_api_client.get(url)
+    assert response.status_code == 400
+
+    file_path.write_bytes(content)
+    response = staff_api_client.get(url)
+    assert response.status_code == 200
+    assert response.data["count"] == 1
@@ -1,5 +1,16 @@
-import pytest
+from unittest import mock
 
+import orjson
+import pytest
+from django.core.cache import cache
+
+from Instanssi.common.pubsub import InProcessPubSub
+from Instanssi.kompomaatti.misc.live_voting import (
+    build_live_voting_snapshot,
+    get_live_voting_snapshot,
+    live_voting_snapshot_key,
+    store_live_voting_snapshot,
+)
 from Instanssi.kompomaatti.models import Entry, LiveVotingState
 
 
@@ -204,3 +215,70 @@ def test_hide_not_last_revealed_rejected(staff_api_client, event, live_voting_co
     # Hiding the last revealed should work
     resp = staff_api_client.post(hide_url, {"entry_id": live_voting_entries[1].id}, format="json")
     assert resp.status_code == 200
+
+
+@pytest.mark.django_db
+def test_reveal_entry_publishes_state(
+    staff_api_client, event, live_voting_compo, live_voting_entries, django_capture_on_commit_callbacks
+):
+    """Revealing an entry pushes the new public state to live voting subscribers after commit."""
+    url = f"{get_base_url(event.id, live_voting_compo.id)}reveal_entry/"
+    entry = live_voting_entries[0]
+
+    with mock.patch.object(InProcessPubSub, "publish") as publish:
+        with django_capture_on_commit_callbacks(execute=True):
+            resp = staff_api_client.post(url, {"entry_id": entry.id}, format="json")
+        assert resp.status_code == 200
+
+    publish.assert_called_once()
+    channel, message = publish.call_args.args
+    assert channel == f"live_voting:{live_voting_compo.id}"
+    state = LiveVotingState.objects.get(compo=live_voting_compo)
+    assert message.startswith(b"id: %d\nevent: state\n" % (state.version,))
+    data = orjson.loads(message.split(b"data: ")[1])
+    assert data["current_entry"] == entry.id
+    assert data["revealed_entries"] == [entry.id]
+
+    # The cached snapshot served to pollers is refreshed as well
+    snapshot = get_live_voting_snapshot(live_voting_compo.id)
+    assert snapshot["version"] == state.version
+    assert snapshot["data"] == data
+
+
+@pytest.mark.django_db
+def test_rejected_change_is_not_published(
+    staff_api_client, event, live_voting_compo, live_voting_entries, django_capture_on_commit_callbacks
+):
+    """Failed staff actions don't push anything to live voting subscribers."""
+    url = f"{get_base_url(event.id, live_voting_compo.id)}reveal_entry/"
+
+    with mock.patch.object(InProcessPubSub, "publish") as publish:
+        with django_capture_on_commit_callbacks(execute=True):
+            resp = staff_api_client.post(url, {"entry_id": live_voting_entries[1].id}, format="json")
+        assert resp.status_code == 400
+
+    publish.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_older_snapshot_does_not_replace_newer(live_voting_compo, live_voting_state):
+    """A snapshot stored late by a slower writer is not served over a newer one."""
+    older = build_live_voting_snapshot(live_voting_state)
+    live_voting_state.save()
+    newer = build_live_voting_snapshot(live_voting_state)
+
+    store_live_voting_snapshot(newer)
+    store_live_voting_snapshot(older)
+    assert get_live_voting_snapshot(live_voting_compo.id)["version"] == newer["version"]
+
+
+@pytest.mark.django_db
+def test_snapshot_is_dropped_when_lock_is_held(live_voting_compo, live_voting_state):
+    """A writer that can't take the lock drops the snapshot, so it is built again from the database."""
+    snapshot = build_live_voting_snapshot(live_voting_state)
+    store_live_voting_snapshot(snapshot)
+    cache.set(f"{live_voting_snapshot_key(live_voting_compo.id)}:lock", True)
+
+    with mock.patch("Instanssi.kompomaatti.misc.live_voting.time.sleep"):
+        store_live_voting_snapshot({**snapshot, "version": snapshot["version"] + 1})
+    assert cache.get(live_voting_snapshot_key(live_voting_compo.id)) is None
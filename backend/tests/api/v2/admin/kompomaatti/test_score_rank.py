@@ -10,7 +10,6 @@ from freezegun import freeze_time
 
 from Instanssi.kompomaatti.models import (
     CompetitionParticipation,
-    Vote,
     VoteGroup,
 )
 
@@ -34,21 +33,13 @@ class TestAdminCompoEntryScoreRank:
         """Admin sees correct vote-calculated scores regardless of show_voting_results."""
         # User 1: entry1=1st, entry2=2nd
         g1 = VoteGroup.objects.create(user=base_user, compo=votable_compo)
-        Vote.objects.create(user=base_user, compo=votable_compo, entry=votable_compo_entry, rank=1, group=g1)
-        Vote.objects.create(
-            user=base_user, compo=votable_compo, entry=second_votable_entry, rank=2, group=g1
-        )
+        g1.set_votes([votable_compo_entry, second_votable_entry])
 
-        # User 2: entry1=1st, entry2=1st
+        # User 2: entry1=1st
         g2 = VoteGroup.objects.create(user=normal_user, compo=votable_compo)
-        Vote.objects.create(
-            user=normal_user, compo=votable_compo, entry=votable_compo_entry, rank=1, group=g2
-        )
-        Vote.objects.create(
-            user=normal_user, compo=votable_compo, entry=second_votable_entry, rank=1, group=g2
-        )
+        g2.set_votes([votable_compo_entry])
 
-        # entry1: 1/1 + 1/1 = 2.0, entry2: 1/2 + 1/1 = 1.5
+        # entry1: 1/1 + 1/1 = 2.0, entry2: 1/2 = 0.5
         base_url = f"/api/v2/admin/event/{votable_compo.event_id}/kompomaatti/entries/"
         req = staff_api_client.get(base_url)
         assert req.status_code == 200
@@ -56,7 +47,7 @@ class TestAdminCompoEntryScoreRank:
 
         assert entries["Test Entry"]["computed_score"] == pytest.approx(2.0)
         assert entries["Test Entry"]["computed_rank"] == 1
-        assert entries["Second Entry"]["computed_score"] == pytest.approx(1.5)
+        assert entries["Second Entry"]["computed_score"] == pytest.approx(0.5)
         assert entries["Second Entry"]["computed_rank"] == 2
 
     def test_archive_score_rank_exposed_and_used(self, staff_api_client, closed_compo_entry):
@@ -1,3 +1,5 @@
+import hashlib
+
 import pytest
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
@@ -17,7 +19,7 @@ def test_staff_can_list_uploaded_files(staff_api_client, uploaded_file):
 
 
 @pytest.mark.django_db
-def test_staff_can_get_uploaded_file_detail(staff_api_client, uploaded_file):
+def test_staff_can_get_uploaded_file_detail(staff_api_client, uploaded_file, test_zip):
     """Test that staff can get uploaded file details."""
     base_url = get_base_url(uploaded_file.event_id)
     req = staff_api_client.get(f"{base_url}{uploaded_file.id}/")
@@ -30,6 +32,8 @@ def test_staff_can_get_uploaded_file_detail(staff_api_client, uploaded_file):
         "file": req.data["file"],  # Dynamic path
         "file_url": req.data["file_url"],  # Dynamic URL
         "filename": uploaded_file.name(),
+        "file_hash": hashlib.sha256(test_zip).hexdigest(),
+        "file_size": len(test_zip),
         "date": uploaded_file.date.astimezone(settings.ZONE_INFO).isoformat(),
     }
     assert req.data["file"] is not None
@@ -59,6 +63,8 @@ def test_staff_can_create_uploaded_file(staff_api_client, event, staff_user, tes
         "file": req.data["file"],  # Dynamic path
         "file_url": req.data["file_url"],  # Dynamic URL
         "filename": req.data["filename"],  # Dynamic filename with timestamp
+        "file_hash": hashlib.sha256(test_zip).hexdigest(),
+        "file_size": len(test_zip),
         "date": req.data["date"],  # Dynamic timestamp
     }
     assert req.data["file"] is not None
@@ -67,7 +73,7 @@ def test_staff_can_create_uploaded_file(staff_api_client, event, staff_user, tes
 
 
 @pytest.mark.django_db
-def test_staff_can_update_uploaded_file(staff_api_client, uploaded_file):
+def test_staff_can_update_uploaded_file(staff_api_client, uploaded_file, test_zip):
     """Test that staff can update an uploaded file."""
     base_url = get_base_url(uploaded_file.event_id)
     req = staff_api_client.patch(
@@ -82,6 +88,8 @@ def test_staff_can_update_uploaded_file(staff_api_client, uploaded_file):
         "file": req.data["file"],  # Dynamic path
         "file_url": req.data["file_url"],  # Dynamic URL
         "filename": uploaded_file.name(),
+        "file_hash": hashlib.sha256(test_zip).hexdigest(),
+        "file_size": len(test_zip),
         "date": uploaded_file.date.astimezone(settings.ZONE_INFO).isoformat(),
     }
 
@@ -0,0 +1,100 @@
+from datetime import datetime
+from datetime import timezone as dt_tz
+
+import pytest
+
+from Instanssi.kompomaatti.models import Compo, Entry
+
+BASE_URL = "/api/v2/public/archive/search/"
+
+
+@pytest.fixture
+def archived_entries(base_user, archived_event, entry_zip):
+    compo = Compo.objects.create(
+        event=archived_event,
+        name="Demo Compo",
+        description="Demos",
+        adding_end=datetime(2024, 1, 10, 12, 0, 0, tzinfo=dt_tz.utc),
+        editing_end=datetime(2024, 1, 11, 12, 0, 0, tzinfo=dt_tz.utc),
+        compo_start=datetime(2024, 1, 12, 12, 0, 0, tzinfo=dt_tz.utc),
+        voting_end=datetime(2024, 1, 13, 12, 0, 0, tzinfo=dt_tz.utc),
+    )
+    return [
+        Entry.objects.create(
+            compo=compo,
+            user=base_user,
+            name=f"Searchable Demo {index}",
+            description="A demo",
+            creator="Test Group",
+            entryfile=entry_zip,
+        )
+        for index in range(3)
+    ]
+
+
+@pytest.fixture
+def non_archived_entry(base_user, non_archived_event, entry_zip):
+    compo = Compo.objects.create(
+        event=non_archived_event,
+        name="Current Compo",
+        description="Running",
+        adding_end=datetime(2025, 1, 10, 12, 0, 0, tzinfo=dt_tz.utc),
+        editing_end=datetime(2025, 1, 11, 12, 0, 0, tzinfo=dt_tz.utc),
+        compo_start=datetime(2025, 1, 12, 12, 0, 0, tzinfo=dt_tz.utc),
+        voting_end=datetime(2025, 1, 13, 12, 0, 0, tzinfo=dt_tz.utc),
+    )
+    return Entry.objects.create(
+        compo=compo,
+        user=base_user,
+        name="Searchable Secret",
+        description="Not yet archived",
+        creator="Test Group",
+        entryfile=entry_zip,
+    )
+
+
+@pytest.mark.django_db
+def test_anonymous_can_search_archive(api_client, archived_entries, non_archived_entry):
+    """Test that the search finds archived entries by word prefixes, and nothing else."""
+    req = api_client.get(BASE_URL, {"q": "searcha"})
+    assert req.status_code == 200
+    assert req.data["count"] == 3
+    assert {result["id"] for result in req.data["results"]} == {entry.id for entry in archived_entries}
+    result = req.data["results"][0]
+    assert result["event_name"] == "Instanssi Archive 2024"
+    assert result["compo_name"] == "Demo Compo"
+    assert result["creator"] == "Test Group"
+    assert result["search_rank"] > 0
+    assert "computed_rank" not in result
+
+
+@pytest.mark.django_db
+def test_search_is_paginated(api_client, archived_entries):
+    """Test that results are paginated even when no limit is given."""
+    req = api_client.get(BASE_URL, {"q": "demo"})
+    assert req.status_code == 200
+    assert len(req.data["results"]) == 3
+
+    req = api_client.get(BASE_URL, {"q": "demo", "limit": 2})
+    assert req.status_code == 200
+    assert req.data["count"] == 3
+    assert len(req.data["results"]) == 2
+    assert req.data["next"] is not None
+
+    req = api_client.get(BASE_URL, {"q": "demo", "limit": 2, "offset": 2})
+    assert len(req.data["results"]) == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", [{}, {"q": ""}, {"q": "  *&| "}])
+def test_empty_search_returns_nothing(api_client, archived_entries, query):
+    req = api_client.get(BASE_URL, query)
+    assert req.status_code == 200
+    assert req.data["count"] == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("method", ["POST", "PUT", "PATCH", "DELETE"])
+def test_anonymous_cannot_modify_search(api_client, method):
+    """Test that write methods return 405 on the search endpoint."""
+    assert api_client.generic(method, BASE_URL).status_code == 405
@@ -1,6 +1,9 @@
 import pytest
+from django.core.files.base import ContentFile
 from freezegun import freeze_time
 
+from Instanssi.kompomaatti.models import Entry
+
 FROZEN_TIME = "2025-01-15T12:00:00Z"
 
 
@@ -132,6 +135,33 @@ def test_public_can_see_alternate_files(api_client, votable_alternate_entry_file
     assert "url" in alt_file
 
 
+@pytest.mark.django_db
+def test_public_can_see_waveform_url(api_client, votable_compo_entry):
+    """Test that waveform_url links to the waveform file, once one has been computed."""
+    base_url = get_base_url(votable_compo_entry.compo.event_id)
+    req = api_client.get(f"{base_url}{votable_compo_entry.id}/")
+    assert req.data["waveform_url"] is None
+
+    votable_compo_entry.waveformfile.save("waveform.json", ContentFile(b"{}"), save=False)
+    Entry.objects.filter(pk=votable_compo_entry.pk).update(
+        waveformfile=votable_compo_entry.waveformfile.name
+    )
+    req = api_client.get(f"{base_url}{votable_compo_entry.id}/")
+    assert req.data["waveform_url"].startswith("http://testserver/")
+    assert req.data["waveform_url"].endswith(".json")
+
+
+@pytest.mark.django_db
+def test_public_can_see_loudness(api_client, votable_compo_entry):
+    """Test that the measured loudness is shown, along with the gain to play the entry at."""
+    Entry.objects.filter(pk=votable_compo_entry.pk).update(loudness=-20.0, true_peak=-5.5)
+    base_url = get_base_url(votable_compo_entry.compo.event_id)
+    req = api_client.get(f"{base_url}{votable_compo_entry.id}/")
+    assert req.data["loudness"] == -20.0
+    assert req.data["true_peak"] == -5.5
+    assert req.data["playback_gain"] == 4.0
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     "method,status",
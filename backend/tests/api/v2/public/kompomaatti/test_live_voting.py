@@ -1,7 +1,14 @@
+import orjson
 import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncClient
+from freezegun import freeze_time
 
+from Instanssi.kompomaatti.misc.live_voting import publish_live_voting_state
 from Instanssi.kompomaatti.models import Entry, LiveVotingState
 
+FROZEN_TIME = "2025-01-15T12:00:00Z"
+
 
 def get_url(event_id, compo_id):
     return f"/api/v2/public/event/{event_id}/kompomaatti/live_voting/{compo_id}/"
@@ -81,3 +88,117 @@ def test_public_live_voting_inactive_compo(api_client, event, live_voting_compo,
     url = get_url(event.id, live_voting_compo.id)
     resp = api_client.get(url)
     assert resp.status_code == 404
+
+
+@pytest.mark.django_db
+def test_public_live_voting_etag(api_client, event, live_voting_compo, live_voting_state):
+    """Returns a strong ETag, and 304 when it matches If-None-Match."""
+    url = get_url(event.id, live_voting_compo.id)
+
+    resp = api_client.get(url)
+    assert resp.status_code == 200
+    etag = resp["ETag"]
+    assert etag == f'"{live_voting_compo.id}-{live_voting_state.version}"'
+
+    resp = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 304
+    assert resp["ETag"] == etag
+
+
+@pytest.mark.django_db
+def test_public_live_voting_served_from_snapshot(
+    api_client, event, live_voting_compo, live_voting_state, django_assert_num_queries
+):
+    """Once the snapshot is cached, polling doesn't touch the database."""
+    url = get_url(event.id, live_voting_compo.id)
+    assert api_client.get(url).status_code == 200
+
+    with django_assert_num_queries(0):
+        resp = api_client.get(url)
+    assert resp.status_code == 200
+    assert resp.data["compo"] == live_voting_compo.id
+
+
+@pytest.mark.django_db
+def test_public_live_voting_changes_within_same_second(
+    api_client,
+    staff_api_client,
+    event,
+    live_voting_compo,
+    live_voting_state,
+    live_voting_entries,
+    django_capture_on_commit_callbacks,
+):
+    """Two staff changes within the same second are both visible to ETag pollers."""
+    url = get_url(event.id, live_voting_compo.id)
+    reveal_url = (
+        f"/api/v2/admin/event/{event.id}/kompomaatti/live_voting/{live_voting_compo.id}/reveal_entry/"
+    )
+
+    with freeze_time(FROZEN_TIME):
+        resp = api_client.get(url)
+        etag = resp["ETag"]
+        last_modified = resp["Last-Modified"]
+        for entry in live_voting_entries[:2]:
+            with django_capture_on_commit_callbacks(execute=True):
+                assert (
+                    staff_api_client.post(reveal_url, {"entry_id": entry.id}, format="json").status_code
+                    == 200
+                )
+
+            # Last-Modified can't tell the changes apart, but the ETag can
+            assert api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+            resp = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert resp.status_code == 200
+            assert resp.data["revealed_entries"][-1] == entry.id
+            etag = resp["ETag"]
+
+
+@pytest.mark.django_db
+def test_public_live_voting_snapshot_checks_event(api_client, event, live_voting_compo, live_voting_state):
+    """Cached snapshots are not served for compos in another event."""
+    url = get_url(event.id + 1, live_voting_compo.id)
+    assert api_client.get(get_url(event.id, live_voting_compo.id)).status_code == 200
+    assert api_client.get(url).status_code == 404
+
+
+@pytest.mark.django_db(transaction=True)
+def test_public_live_voting_stream(event, live_voting_compo, live_voting_state, live_voting_entries):
+    """Stream sends the current state on connect, and then every published update."""
+    url = f"{get_url(event.id, live_voting_compo.id)}stream/"
+    entry = live_voting_entries[0]
+
+    async def read_stream() -> list[bytes]:
+        resp = await AsyncClient().get(url)
+        assert resp.status_code == 200
+        assert resp["Content-Type"] == "text/event-stream"
+        stream = aiter(resp.streaming_content)
+        initial = await anext(stream)
+
+        @sync_to_async
+        def reveal() -> None:
+            Entry.objects.filter(pk=entry.pk).update(live_voting_revealed=True)
+            live_voting_state.current_entry = entry
+            live_voting_state.save()
+            publish_live_voting_state(live_voting_state)
+
+        await reveal()
+        update = await anext(stream)
+        await stream.aclose()
+        return [initial, update]
+
+    initial, update = async_to_sync(read_stream)()
+    assert initial.startswith(b"retry: ")
+    assert b"event: state\n" in initial
+    assert orjson.loads(initial.split(b"data: ")[1])["revealed_entries"] == []
+    assert update.startswith(b"id: %d\nevent: state\n" % (live_voting_state.version,))
+    data = orjson.loads(update.split(b"data: ")[1])
+    assert data["current_entry"] == entry.id
+    assert data["revealed_entries"] == [entry.id]
+
+
+@pytest.mark.django_db
+def test_public_live_voting_stream_404_no_state(api_client, event, live_voting_compo):
+    """Stream returns 404 when no LiveVotingState exists."""
+    resp = api_client.get(f"{get_url(event.id, live_voting_compo.id)}stream/")
+    assert resp.status_code == 404
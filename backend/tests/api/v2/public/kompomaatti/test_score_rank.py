@@ -14,7 +14,6 @@ from freezegun import freeze_time
 from Instanssi.kompomaatti.models import (
     Competition,
     CompetitionParticipation,
-    Vote,
     VoteGroup,
 )
 
@@ -42,20 +41,11 @@ class TestCompoEntryScoreRank:
 
         # User 1: entry1=1st, entry2=2nd, entry3=3rd
         g1 = VoteGroup.objects.create(user=base_user, compo=votable_compo)
-        Vote.objects.create(user=base_user, compo=votable_compo, entry=votable_compo_entry, rank=1, group=g1)
-        Vote.objects.create(
-            user=base_user, compo=votable_compo, entry=second_votable_entry, rank=2, group=g1
-        )
-        Vote.objects.create(user=base_user, compo=votable_compo, entry=third_votable_entry, rank=3, group=g1)
+        g1.set_votes([votable_compo_entry, second_votable_entry, third_votable_entry])
 
         # User 2: entry1=1st, entry3=2nd (no vote for entry2)
         g2 = VoteGroup.objects.create(user=normal_user, compo=votable_compo)
-        Vote.objects.create(
-            user=normal_user, compo=votable_compo, entry=votable_compo_entry, rank=1, group=g2
-        )
-        Vote.objects.create(
-            user=normal_user, compo=votable_compo, entry=third_votable_entry, rank=2, group=g2
-        )
+        g2.set_votes([votable_compo_entry, third_votable_entry])
 
         base_url = f"/api/v2/public/event/{votable_compo.event_id}/kompomaatti/entries/"
         req = api_client.get(base_url)
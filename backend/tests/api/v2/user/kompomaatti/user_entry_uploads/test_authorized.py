@@ -0,0 +1,285 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from freezegun import freeze_time
+
+from Instanssi.kompomaatti.misc.uploads import UPLOAD_MAX_SESSIONS
+from Instanssi.kompomaatti.models import Entry, EntryUpload
+
+FROZEN_TIME = "2025-01-15T12:00:00Z"
+CHUNK_TYPE = "application/offset+octet-stream"
+
+
+def get_base_url(event_id):
+    return f"/api/v2/event/{event_id}/user/kompomaatti/uploads/"
+
+
+def get_entries_url(event_id):
+    return f"/api/v2/event/{event_id}/user/kompomaatti/entries/"
+
+
+def create_upload(client, compo, content, field="entryfile", filename="entry.zip"):
+    req = client.post(
+        get_base_url(compo.event_id),
+        {"compo": compo.id, "field": field, "filename": filename, "size": len(content)},
+        format="json",
+    )
+    assert req.status_code == 201, req.data
+    return req
+
+
+def send_chunk(client, compo, upload_id, offset, chunk):
+    return client.generic(
+        "PATCH",
+        f"{get_base_url(compo.event_id)}{upload_id}/",
+        chunk,
+        content_type=CHUNK_TYPE,
+        HTTP_UPLOAD_OFFSET=str(offset),
+    )
+
+
+def upload_file(client, compo, content, **kwargs):
+    upload_id = create_upload(client, compo, content, **kwargs).data["id"]
+    assert send_chunk(client, compo, upload_id, 0, content).status_code == 204
+    return upload_id
+
+
+@pytest.mark.django_db
+@freeze_time(FROZEN_TIME)
+def test_upload_entry_file_in_chunks(auth_client, open_compo, test_zip, image_png):
+    req = create_upload(auth_client, open_compo, test_zip)
+    upload_id = req.data["id"]
+    url = f"{get_base_url(open_compo.event_id)}{upload_id}/"
+    assert req["Location"] == f"http://testserver{url}"
+    assert req.data["offset"] == 0
+    assert req.data["size"] == len(test_zip)
+
+    req = send_chunk(auth_client, open_compo, upload_id, 0, test_zip[:100])
+    assert req.status_code == 204
+    assert req["Upload-Offset"] == "100"
+
+    # Resuming starts from the offset the server has
+    req = auth_client.head(url)
+    assert req.status_code == 200
+    assert req["Upload-Offset"] == "100"
+    assert req["Upload-Length"] == str(len(test_zip))
+
+    req = send_chunk(auth_client, open_compo, upload_id, 100, test_zip[100:])
+    assert req.status_code == 204
+    assert req["Upload-Offset"] == str(len(test_zip))
+    assert auth_client.get(url).data["offset"] == len(test_zip)
+
+    part_file = EntryUpload.objects.get(pk=upload_id).get_path()
+    req = auth_client.post(
+        get_entries_url(open_compo.event_id),
+        format="multipart",
+        data={
+            "compo": open_compo.id,
+            "name": "Test Entry",
+            "description": "Uploaded in chunks",
+            "creator": "Test Creator",
+            "entryfile_upload": upload_id,
+            "imagefile_original": image_png,
+        },
+    )
+    assert req.status_code == 201, req.data
+    entry = Entry.objects.get(pk=req.data["id"])
+    assert entry.entryfile.name.endswith(".zip")
+    with entry.entryfile.open("rb") as fd:
+        assert fd.read() == test_zip
+    assert not EntryUpload.objects.filter(pk=upload_id).exists()
+    assert not part_file.exists()
+
+
+@pytest.mark.django_db
+@freeze_time(FROZEN_TIME)
+def test_upload_source_file_to_existing_entry(auth_client, editable_compo_entry, test_zip):
+    compo = editable_compo_entry.compo
+    upload_id = upload_file(auth_client, compo, test_zip, field="sourcefile", filename="source.zip")
+    req = auth_client.patch(
+        f"{get_entries_url(compo.event_id)}{editable_compo_entry.id}/",
+        {"sourcefile_upload": upload_id},
+        format="multipart",
+    )
+    assert req.status_code == 200, req.data
+    editable_compo_entry.refresh_from_db()
+    assert editable_compo_entry.sourcefile.name.endswith(".zip")
+    with editable_compo_entry.sourcefile.open("rb") as fd:
+        assert fd.read() == test_zip
+
+
+@pytest.mark.django_db
+@freeze_time(FROZEN_TIME)
+def test_upload_offset_mismatch(auth_client, open_compo, test_zip):
+    upload_id = create_upload(auth_client, open_compo, test_zip).data["id"]
+    send_chunk(auth_client, open_compo, upload_id, 0, test_zip[:10])
+
+    # Eg. the response to the first chunk was lost, and the client sends it again
+    req = send_chunk(auth_client, open_compo, upload_id, 0, test_zip[:10])
+    assert req.status_code == 409
+    assert req["Upload-Offset"] == "10"
+
+
+@pytest.mark.django_db
+@freeze_time(FROZEN_TIME)
+def test_upload_chunk_past_size(auth_client, open_compo, test_zip):
+    upload_id = create_upload(auth_client, open_compo, test_zip).data["id"]
+    req = send_chunk(auth_client, open_compo, upload_id, 0, test_zip + b"extra")
+    assert req.status_code == 400
+    assert auth_client.get(f"{get_base_url(open_compo.event_id)}{upload_id}/").data["offset"] == 0
+
+
+@pytest.mark.django_db
+@freeze_time(FROZEN_TIME)
+def test_upload_chunk_requires_offset(auth_client, open_compo, test_zip):
+    upload_id = create_upload(auth_client, open_compo, test_zip).data["id"]
+    url = f"{get_base_url(open_compo.event_id)}{upload_id}/"
+    assert auth_client.generic("PATCH", url, test_zip, content_type=CHUNK_TYPE).status_code == 400
+    req = auth_client.generic(
+        "PATCH", url, test_zip, content_type="application/octet-stream", HTTP_UPLOAD_OFFSET="0"
+    )
+    assert req.status_code == 415
+
+
+@pytest.mark.django_db
+@freeze_time(FROZEN_TIME)
+@pytest.mark.parametrize(
+    "filename,size",
+    [
+        ("entry.exe", 1000),  # Format not accepted by the compo
+        ("entry.zip", 1024 * 1024 * 1024),  # Over the size limit of the compo
+    ],
+)
+def test_upload_rejected_before_sending(auth_client, open_compo, filename, size):
+    req = auth_client.post(
+        get_base_url(open_compo.event_id),
+        {"compo": open_compo.id, "field": "entryfile", "filename": filename, "size": size},
+        format="json",
+    )
+    assert req.status_code == 400
+    assert "filename" in req.data
+
+
+@pytest.mark.django_db
+@freeze_time(FROZEN_TIME)
+def test_upload_to_closed_compo(auth_client, closed_compo, test_zip):
+    req = auth_client.post(
+        get_base_url(closed_compo.event_id),
+        {"compo": closed_compo.id, "field": "entryfile", "filename": "entry.zip", "size": len(test_zip)},
+        format="json",
+    )
+    assert req.status_code == 400
+    assert "compo" in req.data
+
+
+@pytest.mark.django_db
+@freeze_time(FROZEN_TIME)
+def test_upload_session_limit(auth_client, open_compo, test_zip):
+    for _ in range(UPLOAD_MAX_SESSIONS):
+        create_upload(auth_client, open_compo, test_zip)
+    req = auth_client.post(
+        get_base_url(open_compo.event_id),
+        {"compo": open_compo.id, "field": "entryfile", "filename": "entry.zip", "size": len(test_zip)},
+        format="json",
+    )
+    assert req.status_code == 400
+
+
+@pytest.mark.django_db
+@freeze_time(FROZEN_TIME)
+def test_attach_incomplete_upload(auth_client, open_compo, test_zip, image_png):
+    upload_id = create_upload(auth_client, open_compo, test_zip).data["id"]
+    send_chunk(auth_client, open_compo, upload_id, 0, test_zip[:10])
+    req = auth_client.post(
+        get_entries_url(open_compo.event_id),
+        format="multipart",
+        data={
+            "compo": open_compo.id,
+            "name": "Test Entry",
+            "description": "Not uploaded yet",
+            "creator": "Test Creator",
+            "entryfile_upload": upload_id,
+            "imagefile_original": image_png,
+        },
+    )
+    assert req.status_code == 400
+    assert "entryfile_upload" in req.data
+    assert EntryUpload.objects.filter(pk=upload_id).exists()
+
+
+@pytest.mark.django_db
+@freeze_time(FROZEN_TIME)
+def test_attach_upload_of_another_field(auth_client, open_compo, test_zip, image_png):
+    upload_id = upload_file(auth_client, open_compo, test_zip, field="sourcefile")
+    req = auth_client.post(
+        get_entries_url(open_compo.event_id),
+        format="multipart",
+        data={
+            "compo": open_compo.id,
+            "name": "Test Entry",
+            "description": "Source file as the entry file",
+            "creator": "Test Creator",
+            "entryfile_upload": upload_id,
+            "imagefile_original": image_png,
+        },
+    )
+    assert req.status_code == 400
+    assert "entryfile_upload" in req.data
+
+
+@pytest.mark.django_db
+@freeze_time(FROZEN_TIME)
+def test_entry_requires_file_or_upload(auth_client, open_compo, image_png):
+    req = auth_client.post(
+        get_entries_url(open_compo.event_id),
+        format="multipart",
+        data={
+            "compo": open_compo.id,
+            "name": "Test Entry",
+            "description": "No entry file",
+            "creator": "Test Creator",
+            "imagefile_original": image_png,
+        },
+    )
+    assert req.status_code == 400
+    assert "entryfile" in req.data
+
+
+@pytest.mark.django_db
+@freeze_time(FROZEN_TIME)
+def test_other_users_uploads_are_hidden(auth_client, normal_user, open_compo, test_zip):
+    upload_id = EntryUpload.objects.create(
+        user=normal_user,
+        compo=open_compo,
+        field="entryfile",
+        filename="entry.zip",
+        size=len(test_zip),
+        expires_at=timezone.now() + timedelta(hours=1),
+    ).id
+    base_url = get_base_url(open_compo.event_id)
+    assert auth_client.get(f"{base_url}{upload_id}/").status_code == 404
+    assert send_chunk(auth_client, open_compo, upload_id, 0, test_zip).status_code == 404
+    assert auth_client.get(base_url).data == []
+
+
+@pytest.mark.django_db
+def test_expired_upload(auth_client, open_compo, test_zip):
+    with freeze_time(FROZEN_TIME) as frozen:
+        upload_id = create_upload(auth_client, open_compo, test_zip).data["id"]
+        send_chunk(auth_client, open_compo, upload_id, 0, test_zip[:10])
+        frozen.tick(timedelta(hours=25))
+        assert auth_client.get(f"{get_base_url(open_compo.event_id)}{upload_id}/").status_code == 404
+        assert EntryUpload.objects.get(pk=upload_id).expires_at < timezone.now()
+
+
+@pytest.mark.django_db
+@freeze_time(FROZEN_TIME)
+def test_delete_upload(auth_client, open_compo, test_zip):
+    upload_id = create_upload(auth_client, open_compo, test_zip).data["id"]
+    send_chunk(auth_client, open_compo, upload_id, 0, test_zip[:10])
+    part_file = EntryUpload.objects.get(pk=upload_id).get_path()
+    assert part_file.exists()
+    assert auth_client.delete(f"{get_base_url(open_compo.event_id)}{upload_id}/").status_code == 204
+    assert not EntryUpload.objects.filter(pk=upload_id).exists()
+    assert not part_file.exists()
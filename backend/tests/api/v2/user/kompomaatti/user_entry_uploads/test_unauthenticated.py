@@ -0,0 +1,24 @@
+import pytest
+
+
+def get_base_url(event_id):
+    return f"/api/v2/event/{event_id}/user/kompomaatti/uploads/"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "obj,method,status",
+    [
+        (False, "GET", 401),
+        (True, "GET", 401),
+        (True, "HEAD", 401),
+        (False, "POST", 401),
+        (True, "PATCH", 401),
+        (True, "DELETE", 401),
+    ],
+)
+def test_unauthenticated_user_entry_uploads(api_client, event, obj, method, status):
+    """Test unauthenticated access (Not logged in)"""
+    base_url = get_base_url(event.id)
+    url = f"{base_url}00000000-0000-0000-0000-000000000000/" if obj else base_url
+    assert api_client.generic(method, url).status_code == status
@@ -1,6 +1,10 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from freezegun import freeze_time
 
+from Instanssi.kompomaatti.models import EntryScore, VoteCodeRequest
+
 FROZEN_TIME = "2025-01-15T12:00:00Z"
 
 
@@ -192,6 +196,34 @@ def test_resubmitting_votes_replaces_previous(
     assert req.data["voted_entries"] == [third_votable_entry.id, votable_compo_entry.id]
 
 
+@pytest.mark.django_db
+@freeze_time(FROZEN_TIME)
+def test_resubmitting_votes_updates_entry_scores(
+    auth_client, ticket_vote_code, votable_compo_entry, second_votable_entry, third_votable_entry
+):
+    """Test that entry scores follow the latest submitted votes."""
+    base_url = get_base_url(votable_compo_entry.compo.event_id)
+    for entries in (
+        [votable_compo_entry.id, second_votable_entry.id],
+        [third_votable_entry.id, votable_compo_entry.id],
+    ):
+        req = auth_client.post(
+            base_url,
+            data={"compo": votable_compo_entry.compo_id, "entries": entries},
+            format="json",
+        )
+        assert req.status_code == 201
+
+    scores = dict(
+        EntryScore.objects.filter(entry__compo=votable_compo_entry.compo).values_list("entry_id", "score")
+    )
+    assert scores == {
+        votable_compo_entry.id: 0.5,
+        second_votable_entry.id: 0.0,
+        third_votable_entry.id: 1.0,
+    }
+
+
 @pytest.mark.django_db
 def test_cannot_update_vote_group(auth_client, entry_vote_group, votable_compo_entry):
     """Test that users cannot update vote groups (use POST to resubmit instead)."""
@@ -280,3 +312,73 @@ def test_user_cannot_create_vote_group_for_hidden_event(
         format="json",
     )
     assert req.status_code == 400
+
+
+@pytest.mark.django_db
+@freeze_time(FROZEN_TIME)
+def test_vote_query_count_does_not_depend_on_ballot_length(
+    auth_client, ticket_vote_code, votable_compo_entry, second_votable_entry, third_votable_entry
+):
+    """Test that submitting a longer ballot doesn't cost more queries."""
+    base_url = get_base_url(votable_compo_entry.compo.event_id)
+    compo_id = votable_compo_entry.compo_id
+
+    def submit(entries):
+        with CaptureQueriesContext(connection) as ctx:
+            req = auth_client.post(base_url, data={"compo": compo_id, "entries": entries}, format="json")
+        assert req.status_code == 201
+        return len(ctx.captured_queries)
+
+    # Warm up the cached voting rights and votable entries, and create the vote group
+    submit([votable_compo_entry.id])
+    short_ballot = submit([second_votable_entry.id])
+    long_ballot = submit([third_votable_entry.id, second_votable_entry.id, votable_compo_entry.id])
+    assert long_ballot == short_ballot
+
+
+@pytest.mark.django_db
+@freeze_time(FROZEN_TIME)
+def test_cannot_vote_for_nonexistent_entry(auth_client, ticket_vote_code, votable_compo_entry):
+    """Test that unknown entry ids are rejected."""
+    base_url = get_base_url(votable_compo_entry.compo.event_id)
+    req = auth_client.post(
+        base_url,
+        data={"compo": votable_compo_entry.compo_id, "entries": [votable_compo_entry.id + 1000]},
+        format="json",
+    )
+    assert req.status_code == 400
+    assert "does not exist" in str(req.data).lower()
+
+
+@pytest.mark.django_db
+@freeze_time(FROZEN_TIME)
+def test_approving_request_grants_voting_rights(auth_client, base_user, votable_compo, votable_compo_entry):
+    """Test that a request approved after the voting rights were cached is picked up."""
+    base_url = get_base_url(votable_compo.event_id)
+    data = {"compo": votable_compo.id, "entries": [votable_compo_entry.id]}
+    request = VoteCodeRequest.objects.create(event=votable_compo.event, user=base_user, text="Please")
+
+    req = auth_client.post(base_url, data=data, format="json")
+    assert req.status_code == 400
+
+    request.status = 1
+    request.save()
+    req = auth_client.post(base_url, data=data, format="json")
+    assert req.status_code == 201
+
+
+@pytest.mark.django_db
+@freeze_time(FROZEN_TIME)
+def test_disqualifying_entry_removes_it_from_votable_entries(
+    auth_client, ticket_vote_code, votable_compo_entry
+):
+    """Test that an entry disqualified after the votable entries were cached can't be voted for."""
+    base_url = get_base_url(votable_compo_entry.compo.event_id)
+    data = {"compo": votable_compo_entry.compo_id, "entries": [votable_compo_entry.id]}
+    assert auth_client.post(base_url, data=data, format="json").status_code == 201
+
+    votable_compo_entry.disqualified = True
+    votable_compo_entry.save()
+    req = auth_client.post(base_url, data=data, format="json")
+    assert req.status_code == 400
+    assert "disqualified" in str(req.data).lower()
@@ -0,0 +1,32 @@
+import pytest
+
+from Instanssi.api.v2.utils.http_range import RangeNotSatisfiable, parse_range_header
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("", None),
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, 999)),
+        ("bytes=900-2000", (900, 999)),
+        ("bytes=-100", (900, 999)),
+        ("bytes=-5000", (0, 999)),
+        (" bytes=5-5 ", (5, 5)),
+        ("bytes=0-99,200-299", None),
+        ("bytes=-", None),
+        ("bytes=99-0", None),
+        ("bytes=+1-2", None),
+        ("items=0-99", None),
+        ("0-99", None),
+    ],
+)
+def test_parse_range_header(header, expected):
+    assert parse_range_header(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=5000-6000", "bytes=-0"])
+def test_unsatisfiable_range(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header(header, 1000)
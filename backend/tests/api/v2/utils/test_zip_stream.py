@@ -0,0 +1,120 @@
+import os
+import zipfile
+from io import BytesIO
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+
+from Instanssi.api.v2.utils import zip_stream
+from Instanssi.api.v2.utils.zip_stream import ZipMember, ZipPlan
+
+
+def make_member(tmp_path, name: str, content: bytes) -> ZipMember:
+    path = tmp_path / f"{len(os.listdir(tmp_path))}.bin"
+    path.write_bytes(content)
+    file_stat = path.stat()
+    return ZipMember(name, path, file_stat.st_size, file_stat.st_mtime)
+
+
+@pytest.fixture
+def members(tmp_path):
+    return [
+        make_member(tmp_path, "Demo/00001__first.zip", os.urandom(200_000)),
+        make_member(tmp_path, "Demo/00002__empty.txt", b""),
+        make_member(tmp_path, "Musiikki/00003__äänitys.mp3", b"music" * 1000),
+    ]
+
+
+def test_archive_has_the_planned_size(members):
+    plan = ZipPlan(members)
+    assert len(b"".join(plan.stream())) == plan.size
+
+
+def test_async_stream_matches_stream(members):
+    plan = ZipPlan(members)
+
+    async def read(first: int = 0, last: int | None = None) -> bytes:
+        return b"".join([chunk async for chunk in plan.astream(first, last)])
+
+    content = b"".join(plan.stream())
+    assert async_to_sync(read)() == content
+    assert async_to_sync(read)(1000, 150_000) == content[1000:150_001]
+
+
+def test_archive_is_valid(members):
+    content = b"".join(ZipPlan(members).stream())
+    with zipfile.ZipFile(BytesIO(content)) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == [member.name for member in members]
+        for member in members:
+            assert zf.read(member.name) == member.path.read_bytes()
+            assert zf.getinfo(member.name).compress_type == zipfile.ZIP_STORED
+
+
+def test_empty_archive_is_valid():
+    plan = ZipPlan([])
+    content = b"".join(plan.stream())
+    assert len(content) == plan.size
+    with zipfile.ZipFile(BytesIO(content)) as zf:
+        assert zf.namelist() == []
+
+
+@pytest.mark.parametrize("cached", [True, False])
+def test_ranges_match_the_whole_archive(members, cached):
+    plan = ZipPlan(members)
+    content = b"".join(plan.stream())
+    if not cached:
+        cache.clear()
+    # Around the boundaries of every record, and within the file data
+    offsets = {0, 1, 29, 30, 100, 65536, 200_000, plan.size - 98, plan.size - 1}
+    for offset in range(200_000, plan.size, 7):
+        offsets.add(offset)
+    for first in sorted(offsets):
+        for last in (first, first + 50, plan.size - 1):
+            last = min(last, plan.size - 1)
+            assert b"".join(plan.stream(first, last)) == content[first : last + 1], (first, last)
+
+
+def test_resume_does_not_read_earlier_files(members):
+    plan = ZipPlan(members)
+    content = b"".join(plan.stream())
+    first = plan.size - 1000
+
+    with mock.patch.object(zip_stream, "_read_file", wraps=zip_stream._read_file) as read_file:
+        assert b"".join(plan.stream(first)) == content[first:]
+    assert [call.args[0] for call in read_file.call_args_list] == [members[2]]
+
+
+def test_resume_reads_checksums_from_files_when_not_cached(members):
+    plan = ZipPlan(members)
+    content = b"".join(plan.stream())
+    cache.clear()
+
+    assert b"".join(plan.stream(plan.size - 10)) == content[-10:]
+    with zipfile.ZipFile(BytesIO(content)) as zf:
+        assert zip_stream.file_crc32(members[0]) == zf.getinfo(members[0].name).CRC
+
+
+def test_truncated_file_fails(members):
+    plan = ZipPlan(members)
+    members[0].path.write_bytes(b"short")
+    with pytest.raises(OSError):
+        b"".join(plan.stream())
+
+
+def test_etag_changes_with_members(members):
+    etag = ZipPlan(members).etag
+    assert ZipPlan(members).etag == etag
+    assert ZipPlan(members[:2]).etag != etag
+    assert ZipPlan([members[0]._replace(modified_at=0.0), *members[1:]]).etag != etag
+
+
+@pytest.mark.parametrize("modified_at", [0.0, -1.0, 5_000_000_000.0])
+def test_modification_times_out_of_zip_range(members, modified_at):
+    plan = ZipPlan([members[0]._replace(modified_at=modified_at)])
+    content = b"".join(plan.stream())
+    assert len(content) == plan.size
+    with zipfile.ZipFile(BytesIO(content)) as zf:
+        assert zf.testzip() is None
@@ -1,16 +1,193 @@
+from datetime import date
+
 import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 
+from Instanssi.kompomaatti.enums import MediaCodec, MediaContainer
+from Instanssi.kompomaatti.models import AlternateEntryFile, Compo, Entry, Event
+from tests.helpers import streaming_content
+
+
+def get_content(response):
+    return streaming_content(response).decode()
+
+
+def get_titles(response):
+    return [
+        line.split(",", 1)[1] for line in get_content(response).split("\r\n") if line.startswith("#EXTINF")
+    ]
+
+
+@pytest.fixture
+def create_audio_entry(base_user, entry_zip):
+    def _create(compo, name, order_index=0, archive_rank=None, with_audio=True):
+        entry = Entry.objects.create(
+            compo=compo,
+            user=base_user,
+            name=name,
+            description="Test",
+            creator="Creator",
+            entryfile=entry_zip,
+            order_index=order_index,
+            archive_score=0.0 if archive_rank else None,
+            archive_rank=archive_rank,
+        )
+        if with_audio:
+            AlternateEntryFile.objects.create(
+                entry=entry,
+                codec=MediaCodec.OPUS,
+                container=MediaContainer.WEBM,
+                file=SimpleUploadedFile(f"{name}.webm", b"fake webm content"),
+            )
+        return entry
+
+    return _create
+
 
 @pytest.mark.django_db
 def test_entries_m3u8_returns_200(page_client, archived_event, archived_compo):
     response = page_client.get(reverse("archive:entries_m3u8", args=[archived_event.id]))
     assert response.status_code == 200
     assert "text/plain" in response["Content-Type"]
-    assert b"#EXTM3U" in response.content
+    assert "#EXTM3U" in get_content(response)
 
 
 @pytest.mark.django_db
 def test_entries_m3u8_404_for_non_archived(page_client, non_archived_event):
     response = page_client.get(reverse("archive:entries_m3u8", args=[non_archived_event.id]))
     assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_entries_m3u8_orders_by_compo_and_rank(
+    page_client, archived_event, archived_compo, create_audio_entry
+):
+    unranked_compo = Compo.objects.create(
+        event=archived_event,
+        name="Unranked Compo",
+        description="Results not shown",
+        show_voting_results=False,
+        adding_end=archived_compo.adding_end,
+        editing_end=archived_compo.editing_end,
+        compo_start=archived_compo.compo_start.replace(hour=18),
+        voting_end=archived_compo.voting_end,
+    )
+    create_audio_entry(unranked_compo, "Shown Second", order_index=2)
+    create_audio_entry(unranked_compo, "Shown First", order_index=1)
+    create_audio_entry(archived_compo, "Third Place", archive_rank=3)
+    create_audio_entry(archived_compo, "Winner", archive_rank=1)
+    create_audio_entry(archived_compo, "No Audio", archive_rank=2, with_audio=False)
+
+    response = page_client.get(reverse("archive:entries_m3u8", args=[archived_event.id]))
+
+    assert get_titles(response) == [
+        "Creator - Winner",
+        "Creator - Third Place",
+        "Creator - Shown First",
+        "Creator - Shown Second",
+    ]
+
+
+@pytest.mark.django_db
+def test_entries_m3u8_query_count_is_independent_of_entries(
+    page_client, archived_event, archived_compo, create_audio_entry, django_assert_max_num_queries
+):
+    for i in range(10):
+        create_audio_entry(archived_compo, f"Entry {i}", archive_rank=i + 1)
+
+    with django_assert_max_num_queries(3):
+        response = page_client.get(reverse("archive:entries_m3u8", args=[archived_event.id]))
+        assert len(get_titles(response)) == 10
+
+
+@pytest.mark.django_db
+def test_entries_m3u8_is_served_from_cache(
+    page_client, archived_event, archived_compo, create_audio_entry, django_assert_num_queries
+):
+    create_audio_entry(archived_compo, "Cached Entry", archive_rank=1)
+    url = reverse("archive:entries_m3u8", args=[archived_event.id])
+    first = get_content(page_client.get(url))
+
+    with django_assert_num_queries(0):
+        response = page_client.get(url)
+        assert get_content(response) == first
+    assert response["Content-Disposition"] == 'attachment; filename="instanssi-archive-2024.m3u8"'
+
+
+@pytest.mark.django_db
+def test_new_audio_file_invalidates_entries_m3u8(
+    page_client, archived_event, archived_compo, create_audio_entry
+):
+    entry = create_audio_entry(archived_compo, "Late Audio", archive_rank=1, with_audio=False)
+    url = reverse("archive:entries_m3u8", args=[archived_event.id])
+    assert get_titles(page_client.get(url)) == []
+
+    AlternateEntryFile.objects.create(
+        entry=entry,
+        codec=MediaCodec.OPUS,
+        container=MediaContainer.WEBM,
+        file=SimpleUploadedFile("late.webm", b"fake webm content"),
+    )
+
+    assert get_titles(page_client.get(url)) == ["Creator - Late Audio"]
+
+
+@pytest.mark.django_db
+def test_compo_m3u8(page_client, archived_event, archived_compo, past_compo, create_audio_entry):
+    create_audio_entry(archived_compo, "In Compo", archive_rank=1)
+    create_audio_entry(past_compo, "Other Compo", archive_rank=1)
+
+    response = page_client.get(reverse("archive:compo_m3u8", args=[archived_event.id, archived_compo.id]))
+
+    assert response.status_code == 200
+    content = get_content(response)
+    assert "#EXTALB:Instanssi Archive 2024 – Archived Compo\r\n" in content
+    assert "#EXTINF:0,Creator - In Compo\r\n" in content
+    assert "Other Compo" not in content
+
+
+@pytest.mark.django_db
+def test_compo_m3u8_404(page_client, archived_event, hidden_from_archive_compo, past_compo):
+    url = reverse("archive:compo_m3u8", args=[archived_event.id, hidden_from_archive_compo.id])
+    assert page_client.get(url).status_code == 404
+    url = reverse("archive:compo_m3u8", args=[archived_event.id, past_compo.id])
+    assert page_client.get(url).status_code == 404
+
+
+@pytest.mark.django_db
+def test_archive_m3u8_contains_archived_events_only(
+    page_client, archived_compo, non_archived_event, create_audio_entry
+):
+    compo = Compo.objects.create(
+        event=non_archived_event,
+        name="Upcoming Compo",
+        description="Not archived",
+        adding_end=archived_compo.adding_end,
+        editing_end=archived_compo.editing_end,
+        compo_start=archived_compo.compo_start,
+        voting_end=archived_compo.voting_end,
+    )
+    create_audio_entry(archived_compo, "Archived", archive_rank=1)
+    create_audio_entry(compo, "Not Archived")
+
+    response = page_client.get(reverse("archive:archive_m3u8"))
+
+    assert response.status_code == 200
+    assert get_titles(response) == ["Creator - Archived"]
+
+
+@pytest.mark.django_db
+def test_archive_m3u8_is_invalidated_by_any_event(page_client, archived_compo, create_audio_entry):
+    url = reverse("archive:archive_m3u8")
+    etag = page_client.get(url)["ETag"]
+    assert page_client.get(url, headers={"if-none-match": etag}).status_code == 304
+
+    create_audio_entry(archived_compo, "New Entry", archive_rank=1)
+    response = page_client.get(url, headers={"if-none-match": etag})
+    assert response.status_code == 200
+    assert get_titles(response) == ["Creator - New Entry"]
+
+    etag = response["ETag"]
+    Event.objects.create(name="Instanssi 2099", tag="i2099", date=date(2099, 1, 1), archived=True)
+    assert page_client.get(url, headers={"if-none-match": etag}).status_code == 200
@@ -1,6 +1,10 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from Instanssi.kompomaatti.models import CompetitionParticipation
+
 
 @pytest.mark.django_db
 def test_event_index_returns_200(page_client, archived_event, archived_compo):
@@ -31,6 +35,24 @@ def test_event_index_shows_competitions(
     assert b"Archived Competition" in response.content
 
 
+@pytest.mark.django_db
+def test_event_index_competition_queries_do_not_depend_on_participant_count(
+    page_client, archived_event, archived_competition, archived_participation, base_user
+):
+    url = reverse("archive:event", args=[archived_event.id])
+    with CaptureQueriesContext(connection) as single:
+        page_client.get(url)
+
+    for i in range(10):
+        CompetitionParticipation.objects.create(
+            competition=archived_competition, user=base_user, participant_name=f"P{i}", score=i
+        )
+    with CaptureQueriesContext(connection) as many:
+        response = page_client.get(url)
+    assert response.status_code == 200
+    assert len(many.captured_queries) == len(single.captured_queries)
+
+
 @pytest.mark.django_db
 def test_event_index_excludes_hidden_compo(page_client, archived_event, hidden_from_archive_compo):
     response = page_client.get(reverse("archive:event", args=[archived_event.id]))
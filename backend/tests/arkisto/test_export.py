@@ -0,0 +1,137 @@
+import fcntl
+import gzip
+import json
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+
+from Instanssi.arkisto import export
+
+
+@pytest.fixture
+def export_root(settings, tmp_path):
+    settings.ARCHIVE_EXPORT_ROOT = tmp_path
+    settings.ARCHIVE_EXPORT_URL = "http://localhost"
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_export_event_writes_pages_in_all_languages(
+    export_root, archived_event, archived_compo, archived_entry, other_video
+):
+    assert export.export_event(archived_event) is True
+
+    for language in ("en", "fi"):
+        base = export_root / language / "arkisto"
+        assert (base / "event" / str(archived_event.id) / "index.html").exists()
+        assert (base / "text_event" / str(archived_event.id) / "index.txt").exists()
+        assert (base / "m3u8" / str(archived_event.id) / "index.m3u8").exists()
+        assert (base / "m3u8" / str(archived_event.id) / str(archived_compo.id) / "index.m3u8").exists()
+        assert (base / "entry" / str(archived_entry.id) / "index.html").exists()
+        assert (base / "video" / str(other_video.id) / "index.html").exists()
+
+    json_page = export_root / "en" / "arkisto" / "json_event" / str(archived_event.id) / "index.json"
+    data = json.loads(json_page.read_bytes())
+    assert data["entries"][0]["entry_name"] == "Archived Entry"
+    assert data["entries"][0]["entry_result_url"].startswith("http://localhost/")
+    assert gzip.decompress(json_page.with_name("index.json.gz").read_bytes()) == json_page.read_bytes()
+
+
+@pytest.mark.django_db
+def test_exported_pages_are_rendered_for_anonymous_visitors(
+    export_root, archived_event, archived_compo, archived_entry
+):
+    export.export_event(archived_event)
+    page = (export_root / "fi" / "arkisto" / "event" / str(archived_event.id) / "index.html").read_text()
+    assert "Archived Entry" in page
+    assert f'href="{reverse("account_login")}"' in page
+    assert "http://localhost/arkisto/event/" in page
+
+
+@pytest.mark.django_db
+def test_export_event_skips_unchanged_events(export_root, archived_event, archived_compo, archived_entry):
+    assert export.export_event(archived_event) is True
+    assert export.export_event(archived_event) is False
+    assert export.export_event(archived_event, force=True) is True
+
+    archived_entry.name = "Renamed Entry"
+    archived_entry.save()
+
+    assert export.export_event(archived_event) is True
+    page = export_root / "en" / "arkisto" / "event" / str(archived_event.id) / "index.html"
+    assert "Renamed Entry" in page.read_text()
+
+
+@pytest.mark.django_db
+def test_export_event_removes_pages_of_deleted_entries(
+    export_root, archived_event, archived_compo, archived_entry
+):
+    export.export_event(archived_event)
+    entry_dir = export_root / "en" / "arkisto" / "entry" / str(archived_entry.id)
+    assert entry_dir.exists()
+
+    archived_entry.delete()
+    export.export_event(archived_event)
+
+    assert not entry_dir.exists()
+    manifest = export.load_manifest()[export.event_key(archived_event.id)]
+    assert not any(f"/entry/{archived_entry.id}/" in path for path in manifest["files"])
+
+
+@pytest.mark.django_db
+def test_export_event_holds_manifest_lock(
+    export_root, monkeypatch, archived_event, archived_compo, archived_entry
+):
+    """Test that the manifest is locked from reading it to saving it, so concurrent exports don't lose entries."""
+    export_pages = export._export_pages
+    locked = []
+
+    def export_pages_checking_lock(pages, progress=None):
+        with open(export_root / export.MANIFEST_LOCK_NAME) as fd:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                locked.append(True)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        return export_pages(pages, progress)
+
+    monkeypatch.setattr(export, "_export_pages", export_pages_checking_lock)
+    assert export.export_event(archived_event) is True
+    assert locked == [True]
+
+
+@pytest.mark.django_db
+def test_update_export(export_root, archived_event, archived_compo, archived_entry):
+    assert export.update_export() == ([archived_event.id], [])
+    assert (export_root / "en" / "arkisto" / "index.html").exists()
+    assert export.update_export() == ([], [])
+
+    archived_event.archived = False
+    archived_event.save()
+
+    assert export.update_export() == ([], [archived_event.id])
+    assert not (export_root / "en" / "arkisto" / "event").exists()
+    assert export.event_key(archived_event.id) not in export.load_manifest()
+
+
+@pytest.mark.django_db
+def test_export_requires_export_root(settings, archived_event):
+    settings.ARCHIVE_EXPORT_ROOT = None
+    assert export.is_export_enabled() is False
+    with pytest.raises(ImproperlyConfigured):
+        export.export_event(archived_event)
+
+
+@pytest.mark.django_db
+def test_export_archive_command(
+    export_root, archived_event, archived_compo, archived_entry, non_archived_event
+):
+    call_command("export_archive")
+    assert export.event_key(archived_event.id) in export.load_manifest()
+    assert (export_root / "en" / "arkisto" / "index.html.gz").exists()
+
+    with pytest.raises(CommandError):
+        call_command("export_archive", event=non_archived_event.id)
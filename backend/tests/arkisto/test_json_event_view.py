@@ -1,5 +1,17 @@
+import json
+
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from imagekit.signals import existence_required
+
+from Instanssi.kompomaatti.models import Compo, Entry
+from tests.helpers import streaming_chunks, streaming_content
+
+
+def get_json(response):
+    return json.loads(streaming_content(response))
 
 
 @pytest.mark.django_db
@@ -7,7 +19,7 @@ def test_json_event_returns_200_json(page_client, archived_event, archived_compo
     response = page_client.get(reverse("archive:json_event", args=[archived_event.id]))
     assert response.status_code == 200
     assert response["Content-Type"] == "application/json"
-    data = response.json()
+    data = get_json(response)
     assert "entries" in data
     assert "compos" in data
 
@@ -15,7 +27,7 @@ def test_json_event_returns_200_json(page_client, archived_event, archived_compo
 @pytest.mark.django_db
 def test_json_event_includes_compo_data(page_client, archived_event, archived_compo, archived_entry):
     response = page_client.get(reverse("archive:json_event", args=[archived_event.id]))
-    data = response.json()
+    data = get_json(response)
     assert len(data["compos"]) == 1
     assert data["compos"][0]["name"] == "Archived Compo"
     assert len(data["entries"]) == 1
@@ -25,3 +37,100 @@ def test_json_event_includes_compo_data(page_client, archived_event, archived_co
 def test_json_event_404_for_non_archived(page_client, non_archived_event):
     response = page_client.get(reverse("archive:json_event", args=[non_archived_event.id]))
     assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_json_event_entries_are_ranked_per_compo(
+    page_client, archived_event, archived_compo, archived_entry, base_user, entry_zip
+):
+    Entry.objects.filter(pk=archived_entry.pk).update(archive_score=1.0, archive_rank=2)
+    winner = Entry.objects.create(
+        compo=archived_compo,
+        user=base_user,
+        name="Winner",
+        creator="Winner Creator",
+        entryfile=entry_zip,
+        archive_score=2.0,
+        archive_rank=1,
+    )
+
+    data = get_json(page_client.get(reverse("archive:json_event", args=[archived_event.id])))
+    assert [(e["id"], e["entry_rank"], e["entry_score"]) for e in data["entries"]] == [
+        (winner.id, 1, 2.0),
+        (archived_entry.id, 2, 1.0),
+    ]
+    assert data["entries"][1]["entry_result_url"].startswith("http://testserver/")
+    assert data["entries"][1]["entry_image_original"].startswith("http://testserver/")
+    assert data["entries"][0]["entry_image_original"] is None
+    assert data["compos"] == [{"id": archived_compo.id, "name": "Archived Compo", "entry_count": 2}]
+
+
+@pytest.mark.django_db
+def test_json_event_hides_results_of_compos_without_shown_results(
+    page_client, archived_event, archived_compo, archived_entry
+):
+    Compo.objects.filter(pk=archived_compo.pk).update(show_voting_results=False)
+    Entry.objects.filter(pk=archived_entry.pk).update(archive_score=1.0, archive_rank=1)
+
+    data = get_json(page_client.get(reverse("archive:json_event", args=[archived_event.id])))
+    assert data["entries"][0]["entry_rank"] == 0
+    assert data["entries"][0]["entry_score"] == 0
+
+
+@pytest.mark.django_db
+def test_json_event_query_count_does_not_depend_on_compo_count(
+    page_client, archived_event, archived_compo, archived_entry, base_user, entry_zip
+):
+    url = reverse("archive:json_event", args=[archived_event.id])
+    with CaptureQueriesContext(connection) as single:
+        get_json(page_client.get(url))
+
+    for i in range(3):
+        compo = Compo.objects.create(
+            event=archived_event,
+            name=f"Compo {i}",
+            description="Another compo",
+            show_voting_results=True,
+            adding_end=archived_compo.adding_end,
+            editing_end=archived_compo.editing_end,
+            compo_start=archived_compo.compo_start,
+            voting_end=archived_compo.voting_end,
+        )
+        Entry.objects.create(
+            compo=compo, user=base_user, name=f"Entry {i}", creator="C", entryfile=entry_zip
+        )
+    with CaptureQueriesContext(connection) as many:
+        data = get_json(page_client.get(url))
+    assert len(data["entries"]) == 4
+    assert len(many.captured_queries) == len(single.captured_queries)
+
+
+@pytest.mark.django_db
+def test_json_event_is_streamed_asynchronously(page_client, archived_event, archived_compo, archived_entry):
+    response = page_client.get(reverse("archive:json_event", args=[archived_event.id]))
+    assert response.is_async
+    chunks = streaming_chunks(response)
+    assert chunks[0] == b'{"entries":['
+    assert len(chunks) > 1
+    assert json.loads(b"".join(chunks))["entries"][0]["entry_name"] == "Archived Entry"
+
+
+@pytest.mark.django_db
+def test_json_event_image_urls_skip_storage_checks(
+    page_client, archived_event, archived_compo, archived_entry
+):
+    """Test that the URLs of generated images are worked out without asking imagekit for the files."""
+    checked = []
+
+    def receiver(sender, file, **kwargs):
+        checked.append(file)
+
+    existence_required.connect(receiver)
+    try:
+        data = get_json(page_client.get(reverse("archive:json_event", args=[archived_event.id])))
+    finally:
+        existence_required.disconnect(receiver)
+    assert checked == []
+    entry = data["entries"][0]
+    assert entry["entry_image_thumbnail"] == f"http://testserver{archived_entry.imagefile_thumbnail.url}"
+    assert entry["entry_image_medium"] == f"http://testserver{archived_entry.imagefile_medium.url}"
@@ -4,6 +4,7 @@ from django.urls import reverse
 
 from Instanssi.kompomaatti.enums import MediaCodec, MediaContainer
 from Instanssi.kompomaatti.models import AlternateEntryFile, Entry
+from tests.helpers import streaming_content
 
 
 @pytest.mark.django_db
@@ -29,7 +30,7 @@ def test_m3u8_strips_crlf_from_creator_and_name(
     response = page_client.get(reverse("archive:entries_m3u8", args=[archived_event.id]))
     assert response.status_code == 200
 
-    content = response.content.decode()
+    content = streaming_content(response).decode()
     # The EXTINF line should not contain raw \r or \n from the entry fields
     lines = content.split("\r\n")
     extinf_lines = [line for line in lines if line.startswith("#EXTINF")]
@@ -0,0 +1,183 @@
+from datetime import date
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.urls import reverse
+
+from Instanssi.arkisto.caching import cache_archive_page
+from Instanssi.arkisto.models import OtherVideoCategory
+from Instanssi.kompomaatti.misc.results import recompute_compo_results
+from Instanssi.kompomaatti.models import Entry, Event
+from tests.helpers import streaming_chunks, streaming_content
+
+
+@pytest.mark.django_db
+def test_event_index_is_served_from_cache(
+    page_client, archived_event, archived_compo, archived_entry, django_assert_num_queries
+):
+    url = reverse("archive:event", args=[archived_event.id])
+    first = page_client.get(url)
+    with django_assert_num_queries(0):
+        second = page_client.get(url)
+    assert second.status_code == 200
+    assert second.content == first.content
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view", ["archive:event", "archive:text_event", "archive:json_event"])
+def test_archive_page_conditional_get(page_client, archived_event, archived_compo, view):
+    url = reverse(view, args=[archived_event.id])
+    response = page_client.get(url)
+    assert response.status_code == 200
+    assert response.has_header("ETag")
+    assert response.has_header("Last-Modified")
+
+    assert page_client.get(url, headers={"if-none-match": response["ETag"]}).status_code == 304
+    assert page_client.get(url, headers={"if-modified-since": response["Last-Modified"]}).status_code == 304
+
+
+@pytest.mark.django_db
+def test_saving_entry_invalidates_event_pages(page_client, archived_event, archived_compo, archived_entry):
+    url = reverse("archive:text_event", args=[archived_event.id])
+    etag = page_client.get(url)["ETag"]
+
+    archived_entry.name = "Renamed Entry"
+    archived_entry.save()
+
+    response = page_client.get(url, headers={"if-none-match": etag})
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert b"Renamed Entry" in response.content
+
+
+@pytest.mark.django_db
+def test_changes_in_other_events_do_not_invalidate_event_pages(
+    page_client, archived_event, archived_compo, archived_entry, past_compo
+):
+    url = reverse("archive:text_event", args=[archived_event.id])
+    etag = page_client.get(url)["ETag"]
+    past_compo.name = "Renamed Compo"
+    past_compo.save()
+    OtherVideoCategory.objects.create(event=past_compo.event, name="Videos")
+    assert page_client.get(url, headers={"if-none-match": etag}).status_code == 304
+
+
+@pytest.mark.django_db
+def test_new_archived_event_invalidates_all_event_pages(page_client, archived_event, archived_compo):
+    url = reverse("archive:event", args=[archived_event.id])
+    page_client.get(url)
+
+    Event.objects.create(name="Instanssi 2099", tag="i2099", date=date(2099, 1, 1), archived=True)
+
+    assert b"i2099" in page_client.get(url).content
+
+
+@pytest.mark.django_db
+def test_frozen_results_invalidate_event_pages(page_client, archived_event, archived_compo, archived_entry):
+    url = reverse("archive:text_event", args=[archived_event.id])
+    etag = page_client.get(url)["ETag"]
+    Entry.objects.filter(pk=archived_entry.pk).update(disqualified=True)
+
+    recompute_compo_results(archived_compo.id)
+
+    assert page_client.get(url, headers={"if-none-match": etag}).status_code == 200
+
+
+@pytest.mark.django_db
+def test_event_index_is_not_cached_for_logged_in_users(
+    page_client, base_user, archived_event, archived_compo, archived_entry
+):
+    url = reverse("archive:event", args=[archived_event.id])
+    anonymous = page_client.get(url)
+
+    page_client.force_login(base_user)
+    response = page_client.get(url, headers={"if-none-match": anonymous["ETag"]})
+
+    assert response.status_code == 200
+    assert response["ETag"] != anonymous["ETag"]
+    assert base_user.username.encode() in response.content or base_user.email.encode() in response.content
+
+
+@pytest.mark.django_db
+def test_cached_event_index_has_no_csrf_token(page_client, archived_event, archived_compo, archived_entry):
+    url = reverse("archive:event", args=[archived_event.id])
+    page_client.get(url)
+    response = page_client.get(url)
+    assert b'name="csrfmiddlewaretoken"' not in response.content
+    assert "csrftoken" not in response.cookies
+
+
+@pytest.mark.django_db
+def test_event_index_is_cached_per_language(page_client, archived_event, archived_compo, archived_entry):
+    url = reverse("archive:event", args=[archived_event.id])
+    finnish = page_client.get(url, headers={"accept-language": "fi"})
+    english = page_client.get(url, headers={"accept-language": "en"})
+
+    assert finnish["Content-Language"] == "fi"
+    assert english["Content-Language"] == "en"
+    assert finnish["ETag"] != english["ETag"]
+    assert finnish.content != english.content
+
+
+def test_page_with_csrf_token_is_not_cached(rf):
+    calls = []
+
+    @cache_archive_page
+    def view(request, event_id):
+        calls.append(event_id)
+        return HttpResponse(get_token(request))
+
+    def get():
+        request = rf.get("/arkisto/event/1/")
+        request.user = AnonymousUser()
+        return view(request, event_id=1)
+
+    first, second = get(), get()
+    assert len(calls) == 2
+    assert first.content != second.content
+
+
+def test_async_streaming_page_is_cached_once_sent(rf):
+    """Test that asynchronous content is passed on a chunk at a time, and cached when it has been sent."""
+    calls = []
+
+    async def chunks():
+        yield b"first"
+        yield b"second"
+
+    @cache_archive_page
+    def view(request, event_id):
+        calls.append(event_id)
+        return StreamingHttpResponse(chunks(), content_type="text/plain")
+
+    def get():
+        request = rf.get("/arkisto/m3u8/1/")
+        request.user = AnonymousUser()
+        return view(request, event_id=1)
+
+    first = get()
+    assert first.is_async
+    assert streaming_chunks(first) == [b"first", b"second"]
+    second = get()
+    assert second.is_async
+    assert streaming_content(second) == b"firstsecond"
+    assert second["Content-Type"] == "text/plain"
+    assert calls == [1]
+
+
+@pytest.mark.django_db
+def test_playlist_is_streamed_asynchronously(
+    page_client, archived_event, archived_compo, archived_entry, django_assert_num_queries
+):
+    url = reverse("archive:entries_m3u8", args=[archived_event.id])
+    first = page_client.get(url)
+    assert first.is_async
+    content = streaming_content(first)
+    assert content.startswith(b"#EXTM3U")
+    with django_assert_num_queries(0):
+        second = page_client.get(url)
+    assert second.is_async
+    assert streaming_content(second) == content
+    assert second["Content-Disposition"] == first["Content-Disposition"]
@@ -0,0 +1,120 @@
+import pytest
+from django.core.management import call_command
+
+from Instanssi.arkisto.search import (
+    parse_query_terms,
+    rebuild_search_index,
+    search_entries,
+)
+from Instanssi.kompomaatti.models import Entry
+
+
+def search_ids(query):
+    return list(search_entries(query).values_list("id", flat=True))
+
+
+@pytest.fixture
+def second_archived_entry(base_user, archived_compo, entry_zip2):
+    return Entry.objects.create(
+        compo=archived_compo,
+        user=base_user,
+        name="Pixel Sunset",
+        description="Made with a tracker and too much coffee",
+        creator="Archived Group",
+        platform="Amiga 500",
+        entryfile=entry_zip2,
+    )
+
+
+def test_parse_query_terms():
+    assert parse_query_terms('  Foo-Bar "baz" * ') == ["foo", "bar", "baz"]
+    assert parse_query_terms("a b c d e f g h i j") == ["a", "b", "c", "d", "e", "f", "g", "h"]
+    assert parse_query_terms("*:&|") == []
+
+
+@pytest.mark.django_db
+def test_search_matches_prefixes_of_all_terms(archived_entry, second_archived_entry):
+    assert search_ids("pix") == [second_archived_entry.id]
+    assert search_ids("pixel sun") == [second_archived_entry.id]
+    assert search_ids("pixel archived") == [second_archived_entry.id]
+    assert search_ids("pixel nomatch") == []
+    assert search_ids("amiga") == [second_archived_entry.id]
+    assert search_ids("coffee") == [second_archived_entry.id]
+    assert set(search_ids("instanssi 2024")) == {archived_entry.id, second_archived_entry.id}
+    assert search_ids("") == []
+
+
+@pytest.mark.django_db
+def test_search_ranks_name_over_description(archived_entry, second_archived_entry):
+    second_archived_entry.description = "Not an archived entry, just tracking"
+    second_archived_entry.save()
+    # Both mention "entry", but only archived_entry has it in the name
+    results = list(search_entries("entry"))
+    assert [entry.id for entry in results] == [archived_entry.id, second_archived_entry.id]
+    assert results[0].search_rank > results[1].search_rank
+
+
+@pytest.mark.django_db
+def test_search_ignores_diacritics_and_case(archived_entry):
+    archived_entry.name = "Ääniä Öisin"
+    archived_entry.save()
+    assert search_ids("AANIA") == [archived_entry.id]
+    assert search_ids("öis") == [archived_entry.id]
+
+
+@pytest.mark.django_db
+def test_search_index_follows_saves_and_deletes(archived_entry):
+    assert search_ids("renamed") == []
+    archived_entry.name = "Renamed Demo"
+    archived_entry.creator = "Somebody Else"
+    archived_entry.save()
+    assert search_ids("renamed") == [archived_entry.id]
+    assert search_ids("test creator") == []
+
+    archived_entry.delete()
+    assert search_ids("renamed") == []
+
+
+@pytest.mark.django_db
+def test_search_index_follows_compo_and_event(archived_entry):
+    compo = archived_entry.compo
+    compo.hide_from_archive = True
+    compo.save()
+    assert search_ids("archived entry") == []
+
+    compo.hide_from_archive = False
+    compo.name = "Wild Compo"
+    compo.save()
+    assert search_ids("wild") == [archived_entry.id]
+
+    event = compo.event
+    event.archived = False
+    event.save()
+    assert search_ids("wild") == []
+
+    event.archived = True
+    event.save()
+    assert search_ids("wild") == [archived_entry.id]
+
+
+@pytest.mark.django_db
+def test_search_skips_entries_not_in_archive(hidden_compo_entry, non_archived_event):
+    assert search_ids("hidden") == []
+
+
+@pytest.mark.django_db
+def test_rebuild_search_index(archived_entry, second_archived_entry):
+    # Bulk updates skip save(), so the index is stale until it is rebuilt
+    Entry.objects.filter(pk=archived_entry.pk).update(name="Bulk Renamed")
+    assert search_ids("bulk") == []
+
+    assert rebuild_search_index() == 2
+    assert search_ids("bulk") == [archived_entry.id]
+
+
+@pytest.mark.django_db
+def test_rebuild_search_index_command(archived_entry, capsys):
+    Entry.objects.filter(pk=archived_entry.pk).update(name="Bulk Renamed")
+    call_command("rebuild_search_index")
+    assert "Indexed 1 entries" in capsys.readouterr().err
+    assert search_ids("bulk") == [archived_entry.id]
@@ -0,0 +1,44 @@
+import pytest
+from freezegun import freeze_time
+
+from Instanssi.arkisto.utils import get_event_lifecycle_status
+from Instanssi.kompomaatti.models import Entry
+
+
+@pytest.mark.django_db
+def test_lifecycle_status_of_empty_past_event(past_event, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        lifecycle = get_event_lifecycle_status(past_event)
+    assert lifecycle.ongoing is False
+    assert lifecycle.votes_unoptimized is False
+    assert lifecycle.old_votes_found is False
+    assert lifecycle.has_non_archived_items is False
+
+
+@pytest.mark.django_db
+def test_lifecycle_status_of_past_event_with_votes(past_event, past_vote, past_competition_participation):
+    lifecycle = get_event_lifecycle_status(past_event)
+    assert lifecycle.ongoing is False
+    assert lifecycle.votes_unoptimized is True
+    assert lifecycle.old_votes_found is True
+    assert lifecycle.has_non_archived_items is True
+
+
+@pytest.mark.django_db
+def test_lifecycle_status_after_archiving(past_event, past_compo_entry, archive_user):
+    Entry.objects.filter(pk=past_compo_entry.pk).update(user=archive_user, archive_score=1.0, archive_rank=1)
+    lifecycle = get_event_lifecycle_status(past_event)
+    assert lifecycle.votes_unoptimized is False
+    assert lifecycle.has_non_archived_items is False
+
+
+@pytest.mark.django_db
+def test_lifecycle_status_requires_both_archive_fields(past_event, past_compo_entry):
+    Entry.objects.filter(pk=past_compo_entry.pk).update(archive_score=1.0)
+    assert get_event_lifecycle_status(past_event).votes_unoptimized is True
+
+
+@pytest.mark.django_db
+@freeze_time("2025-01-15T12:00:00Z")
+def test_lifecycle_status_of_event_with_open_compo(event, open_compo):
+    assert get_event_lifecycle_status(event).ongoing is True
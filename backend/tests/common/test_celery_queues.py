@@ -0,0 +1,70 @@
+from importlib import import_module
+from unittest import mock
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from kombu import Connection, Queue
+
+from Instanssi.celery import app, get_queue_depths
+
+
+@pytest.mark.parametrize(
+    "task,queue",
+    [
+        ("Instanssi.kompomaatti.tasks.generate_alternate_audio_files", "media"),
+        ("Instanssi.kompomaatti.tasks.generate_alternate_video_files", "media"),
+        ("Instanssi.arkisto.tasks.export_event_static", "media"),
+        ("Instanssi.arkisto.tasks.optimize_event_scores", "media"),
+        ("Instanssi.store.tasks.send_receipt", "mail"),
+        ("Instanssi.notifications.tasks.notify_new_vote_code_request", "notifications"),
+        ("Instanssi.notifications.tasks.check_upcoming_events", "notifications"),
+        ("Instanssi.kompomaatti.tasks.freeze_finished_compo_results", "notifications"),
+        ("Instanssi.notifications.tasks.cleanup_old_sent_notifications", "default"),
+        ("Instanssi.common.tasks.cleanup_old_audit_logs", "default"),
+    ],
+)
+def test_task_routes(task, queue):
+    """Slow media work must not share a queue with mail and notifications."""
+    import_module(task.rsplit(".", 1)[0])
+    assert task in app.tasks
+    assert app.amqp.router.route({}, task)["queue"].name == queue
+
+
+def test_routed_queues_are_declared():
+    declared = {queue.name for queue in settings.CELERY_TASK_QUEUES}
+    assert {route["queue"] for route in settings.CELERY_TASK_ROUTES.values()} <= declared
+    assert settings.CELERY_TASK_DEFAULT_QUEUE in declared
+
+
+def test_visibility_timeout_outlasts_late_acked_tasks():
+    """Unacknowledged tasks are delivered again after the visibility timeout, even if still running."""
+    import_module("Instanssi.kompomaatti.tasks")
+    late_acked = [task for task in app.tasks.values() if task.acks_late]
+    assert late_acked
+    timeout = settings.CELERY_BROKER_TRANSPORT_OPTIONS["visibility_timeout"]
+    assert all(task.time_limit < timeout for task in late_acked)
+
+
+@pytest.fixture
+def memory_broker():
+    connection = Connection("memory://")
+    with mock.patch.object(app, "connection_for_read", return_value=connection):
+        yield connection
+    for name in app.amqp.queues:
+        try:
+            connection.default_channel.queue_purge(name)
+        except Exception:
+            pass
+
+
+def test_get_queue_depths(memory_broker, capsys):
+    with memory_broker.Producer() as producer:
+        for _ in range(3):
+            producer.publish({}, routing_key="media", declare=[Queue("media")])
+        producer.publish({}, routing_key="mail", declare=[Queue("mail")])
+
+    assert get_queue_depths() == {"notifications": 0, "mail": 1, "default": 0, "media": 3}
+
+    call_command("celery_queues")
+    assert "media: 3\n" in capsys.readouterr().err
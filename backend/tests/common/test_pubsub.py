@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from Instanssi.common.pubsub import SUBSCRIPTION_BUFFER_SIZE, InProcessPubSub, PubSub
+
+
+def test_publish_fans_out_to_all_subscribers():
+    """Test that a message reaches every subscriber of its channel, and only them."""
+    pubsub = InProcessPubSub()
+
+    async def run() -> list[bytes | None]:
+        async with pubsub.subscribe("a") as first, pubsub.subscribe("a") as second:
+            async with pubsub.subscribe("b") as other:
+                pubsub.publish("a", b"hello")
+                return [await first.get(1.0), await second.get(1.0), await other.get(0.01)]
+
+    assert asyncio.run(run()) == [b"hello", b"hello", None]
+
+
+def test_closed_subscriptions_are_detached():
+    """Test that leaving the subscription context removes the subscriber."""
+    pubsub = InProcessPubSub()
+
+    async def run() -> None:
+        async with pubsub.subscribe("a"):
+            assert "a" in pubsub._subscribers
+
+    asyncio.run(run())
+    assert pubsub._subscribers == {}
+
+
+def test_slow_subscriber_drops_oldest_messages():
+    """Test that a subscriber that doesn't keep up loses its oldest messages instead of buffering."""
+    pubsub = InProcessPubSub()
+
+    async def run() -> list[bytes | None]:
+        async with pubsub.subscribe("a") as subscription:
+            for n in range(SUBSCRIPTION_BUFFER_SIZE + 2):
+                pubsub.publish("a", str(n).encode())
+            await asyncio.sleep(0)
+            return [await subscription.get(0.01) for _ in range(SUBSCRIPTION_BUFFER_SIZE + 1)]
+
+    messages = asyncio.run(run())
+    assert messages[0] == b"2"
+    assert messages[-2] == str(SUBSCRIPTION_BUFFER_SIZE + 1).encode()
+    assert messages[-1] is None
+
+
+def test_backend_without_publish_can_not_be_created():
+    """Test that a backend missing publish() fails when it is created, not when it is used."""
+
+    class IncompleteBackend(PubSub):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteBackend()  # type: ignore[abstract]
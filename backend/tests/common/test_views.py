@@ -0,0 +1,45 @@
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+
+@pytest.mark.django_db
+def test_language_can_be_set_with_fetched_csrf_token():
+    """Test that the language switcher works with a token fetched for it."""
+    client = Client(enforce_csrf_checks=True)
+    data = {"language": "fi", "next": "/arkisto/"}
+    assert client.post(reverse("set_language"), data).status_code == 403
+
+    response = client.get(reverse("csrf_token"))
+    assert response.status_code == 200
+    assert "no-cache" in response["Cache-Control"]
+
+    response = client.post(
+        reverse("set_language"), {**data, "csrfmiddlewaretoken": response.json()["token"]}
+    )
+    assert response.status_code == 302
+    assert response.cookies["django_language"].value == "fi"
+
+
+@pytest.mark.django_db
+def test_language_can_be_set_with_plain_link():
+    """Test that the switcher works without JavaScript, and goes back to the page it came from."""
+    client = Client(enforce_csrf_checks=True)
+    response = client.get(reverse("switch_language", args=["fi"]), {"next": "/arkisto/"})
+    assert response.status_code == 302
+    assert response["Location"] == "/arkisto/"
+    assert response.cookies["django_language"].value == "fi"
+
+
+@pytest.mark.django_db
+def test_language_link_does_not_redirect_to_other_sites():
+    response = Client().get(reverse("switch_language", args=["fi"]), {"next": "https://example.com/"})
+    assert response.status_code == 302
+    assert response["Location"] == "/"
+
+
+@pytest.mark.django_db
+def test_language_link_ignores_unknown_language():
+    response = Client().get(reverse("switch_language", args=["xx"]), {"next": "/arkisto/"})
+    assert response.status_code == 302
+    assert "django_language" not in response.cookies
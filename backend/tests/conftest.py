@@ -11,6 +11,7 @@ from typing import Any, Callable, Dict
 from uuid import uuid4
 
 from django.contrib.auth.models import Permission
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, RequestFactory, override_settings
 from django.urls import reverse
@@ -33,7 +34,6 @@ from Instanssi.kompomaatti.models import (
     Event,
     LiveVotingState,
     TicketVoteCode,
-    Vote,
     VoteCodeRequest,
     VoteGroup,
 )
@@ -66,12 +66,18 @@ def set_media_root():
     """
     tmp_path = Path(tempfile.mkdtemp(prefix="pytest_"))
     try:
-        with override_settings(MEDIA_ROOT=tmp_path):
+        with override_settings(MEDIA_ROOT=tmp_path, ENTRY_UPLOAD_ROOT=tmp_path / "entry_uploads"):
             yield
     finally:
         rmtree(tmp_path)
 
 
+@fixture(autouse=True)
+def clear_cache():
+    """Start every test with an empty cache, so that cached state can't leak between tests."""
+    cache.clear()
+
+
 @fixture
 def test_image() -> bytes:
     return base64.decodebytes(
@@ -209,8 +215,8 @@ def staff_user(create_user) -> User:
         "kompomaatti.add_entry",
         "kompomaatti.change_entry",
         "kompomaatti.delete_entry",
-        "kompomaatti.view_vote",
-        "kompomaatti.delete_vote",
+        "kompomaatti.view_votegroup",
+        "kompomaatti.delete_votegroup",
         "kompomaatti.view_competition",
         "kompomaatti.add_competition",
         "kompomaatti.change_competition",
@@ -1001,14 +1007,10 @@ def other_user_vote_group(normal_user, votable_compo) -> VoteGroup:
 
 
 @fixture
-def entry_vote(base_user, votable_compo_entry, votable_compo, entry_vote_group) -> Vote:
-    return Vote.objects.create(
-        user=base_user,
-        compo=votable_compo,
-        entry=votable_compo_entry,
-        rank=0,
-        group=entry_vote_group,
-    )
+def entry_vote(votable_compo_entry, entry_vote_group) -> VoteGroup:
+    """Ballot ranking the votable entry first."""
+    entry_vote_group.set_votes([votable_compo_entry])
+    return entry_vote_group
 
 
 @fixture
@@ -1480,15 +1482,10 @@ def past_vote_group(base_user, past_compo) -> VoteGroup:
 
 
 @fixture
-def past_vote(base_user, past_compo, past_compo_entry, past_vote_group) -> Vote:
-    """Vote in a past compo."""
-    return Vote.objects.create(
-        user=base_user,
-        compo=past_compo,
-        entry=past_compo_entry,
-        rank=1,
-        group=past_vote_group,
-    )
+def past_vote(past_compo_entry, past_vote_group) -> VoteGroup:
+    """Ballot in a past compo, ranking the past entry first."""
+    past_vote_group.set_votes([past_compo_entry])
+    return past_vote_group
 
 
 # Hidden event fixtures - for testing hidden event filtering
@@ -1680,3 +1677,21 @@ def audio_entry(base_user, open_compo, source_zip, image_png) -> Entry:
     # Save without calling the overridden save() that triggers generate_alternates
     Entry.objects.bulk_create([entry])
     return Entry.objects.get(name="Audio Entry")
+
+
+@fixture
+def video_entry(base_user, open_compo) -> Entry:
+    """Entry with a video file (mp4 extension triggers is_video=True, and is_audio=True too)."""
+    video_file = SimpleUploadedFile("test_video.mp4", b"fake video data", content_type="video/mp4")
+    entry = Entry(
+        compo=open_compo,
+        user=base_user,
+        name="Video Entry",
+        description="A video test entry",
+        creator="Video Creator",
+        platform="PC",
+        entryfile=video_file,
+    )
+    # Save without calling the overridden save() that triggers generate_alternates
+    Entry.objects.bulk_create([entry])
+    return Entry.objects.get(name="Video Entry")
@@ -0,0 +1,14 @@
+from asgiref.sync import async_to_sync
+
+
+def streaming_chunks(response) -> list[bytes]:
+    """Read a streaming response with asynchronous content chunk by chunk, as an ASGI server would."""
+
+    async def read() -> list[bytes]:
+        return [chunk async for chunk in response.streaming_content]
+
+    return async_to_sync(read)()
+
+
+def streaming_content(response) -> bytes:
+    return b"".join(streaming_chunks(response))
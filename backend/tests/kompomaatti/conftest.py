@@ -0,0 +1,102 @@
+from array import array
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from ffmpeg.nodes import OutputStream
+
+# Ten seconds of a rising ramp, at the waveform sample rate
+FAKE_PCM = array("h", (i * 65535 // 80000 - 32768 for i in range(80000)))
+
+# What the ebur128 filter logs once it is done
+FAKE_EBUR128_SUMMARY = b"""[Parsed_ebur128_0 @ 0x5581d5c0] Summary:
+
+  Integrated loudness:
+    I:         -19.5 LUFS
+    Threshold: -29.8 LUFS
+
+  Loudness range:
+    LRA:         6.1 LU
+    Threshold: -39.9 LUFS
+    LRA low:   -24.0 LUFS
+    LRA high:  -17.9 LUFS
+
+  True peak:
+    Peak:        -0.3 dBFS
+"""
+
+
+class FfmpegCommands(list):
+    """Command lines of the transcodes that were run. Waveform decodes are listed in decodes.
+
+    Waveform decodes log ebur128_summary, which tests can change.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.decodes = []
+        self.ebur128_summary = FAKE_EBUR128_SUMMARY
+
+
+def write_hls_stream(command):
+    """Write the playlists and segments of an HLS stream, with a segment per rendition."""
+    output_dir = Path(next(arg for arg in command if arg.endswith("index.m3u8"))).parent.parent
+    variants = command[command.index("-var_stream_map") + 1].split()
+    for index in range(len(variants)):
+        variant_dir = output_dir / f"v{index}"
+        variant_dir.mkdir()
+        (variant_dir / "init.mp4").write_bytes(b"init")
+        (variant_dir / "segment000.m4s").write_bytes(b"segment")
+        (variant_dir / "index.m3u8").write_text('#EXTM3U\n#EXT-X-MAP:URI="init.mp4"\nsegment000.m4s\n')
+    master = "".join(
+        f"#EXT-X-STREAM-INF:BANDWIDTH=1\nv{index}/index.m3u8\n" for index in range(len(variants))
+    )
+    (output_dir / command[command.index("-master_pl_name") + 1]).write_text(f"#EXTM3U\n{master}")
+
+
+@pytest.fixture
+def fake_ffmpeg():
+    """Replace running ffmpeg with writing every output file of the command line.
+
+    Raw PCM outputs (waveform decoding) get FAKE_PCM and FAKE_EBUR128_SUMMARY on stderr, HLS
+    outputs a small stream, and the rest a line of text.
+    """
+    commands = FfmpegCommands()
+
+    def run(stream, *args, **kwargs):
+        command = stream.get_args()
+        if "pcm_s16le" in command:
+            commands.decodes.append(command)
+        else:
+            commands.append(command)
+        if "hls" in command:
+            write_hls_stream(command)
+            return None
+        for index, arg in enumerate(command):
+            if arg == "-acodec" and command[index + 1] == "pcm_s16le":
+                Path(command[index + 2]).write_bytes(FAKE_PCM.tobytes())
+            elif arg == "-acodec":
+                Path(command[index + 2]).write_bytes(f"converted with {command[index + 1]}".encode())
+        if "pcm_s16le" in command:
+            return b"", commands.ebur128_summary
+        return None
+
+    with mock.patch.object(OutputStream, "run", autospec=True, side_effect=run):
+        yield commands
+
+
+@pytest.fixture
+def fake_ffprobe():
+    """Make every file look like a 1080p video with a soundtrack. Tests can change the streams."""
+    streams = [
+        {
+            "index": 0,
+            "codec_type": "video",
+            "width": 1920,
+            "height": 1080,
+            "disposition": {"attached_pic": 0},
+        },
+        {"index": 1, "codec_type": "audio", "disposition": {"attached_pic": 0}},
+    ]
+    with mock.patch("ffmpeg.probe", return_value={"streams": streams}):
+        yield streams
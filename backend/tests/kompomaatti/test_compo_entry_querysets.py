@@ -1,8 +1,12 @@
 """Tests for kompomaatti queryset methods (with_score, with_rank)."""
 
+from io import StringIO
+
 import pytest
+from django.core.management import call_command
+from freezegun import freeze_time
 
-from Instanssi.kompomaatti.models import Entry, Vote, VoteGroup
+from Instanssi.kompomaatti.models import Entry, EntryScore, VoteGroup
 
 # --- Score calculation tests ---
 
@@ -23,15 +27,7 @@ def test_score_calculation_single_voter(
     Score = sum(1/rank) for each vote on the entry.
     """
     vote_group = VoteGroup.objects.create(user=base_user, compo=votable_compo)
-    Vote.objects.create(
-        user=base_user, group=vote_group, compo=votable_compo, entry=votable_compo_entry, rank=1
-    )
-    Vote.objects.create(
-        user=base_user, group=vote_group, compo=votable_compo, entry=second_votable_entry, rank=2
-    )
-    Vote.objects.create(
-        user=base_user, group=vote_group, compo=votable_compo, entry=third_votable_entry, rank=3
-    )
+    vote_group.set_votes([votable_compo_entry, second_votable_entry, third_votable_entry])
 
     scores = {e.pk: e.computed_score for e in Entry.objects.filter(compo=votable_compo).with_score()}
 
@@ -41,19 +37,17 @@ def test_score_calculation_single_voter(
 
 
 @pytest.mark.django_db
-def test_score_calculation_multiple_voters(votable_compo, votable_compo_entry, base_user, normal_user):
+def test_score_calculation_multiple_voters(
+    votable_compo, votable_compo_entry, second_votable_entry, base_user, normal_user
+):
     """Test score aggregation across multiple voters."""
     # First voter gives rank 1 (score contribution: 1.0)
     vote_group1 = VoteGroup.objects.create(user=base_user, compo=votable_compo)
-    Vote.objects.create(
-        user=base_user, group=vote_group1, compo=votable_compo, entry=votable_compo_entry, rank=1
-    )
+    vote_group1.set_votes([votable_compo_entry])
 
     # Second voter gives rank 2 (score contribution: 0.5)
     vote_group2 = VoteGroup.objects.create(user=normal_user, compo=votable_compo)
-    Vote.objects.create(
-        user=normal_user, group=vote_group2, compo=votable_compo, entry=votable_compo_entry, rank=2
-    )
+    vote_group2.set_votes([second_votable_entry, votable_compo_entry])
 
     result = Entry.objects.filter(pk=votable_compo_entry.pk).with_score().first()
     assert result.computed_score == 1.5  # 1/1 + 1/2
@@ -73,7 +67,7 @@ def test_disqualified_entry_gets_negative_score(votable_compo, base_user):
     )
 
     vote_group = VoteGroup.objects.create(user=base_user, compo=votable_compo)
-    Vote.objects.create(user=base_user, group=vote_group, compo=votable_compo, entry=entry, rank=1)
+    vote_group.set_votes([entry])
 
     result = Entry.objects.filter(pk=entry.pk).with_score().first()
     assert result.computed_score == -1.0
@@ -93,7 +87,7 @@ def test_archived_entry_uses_archive_score(votable_compo, base_user):
     )
 
     vote_group = VoteGroup.objects.create(user=base_user, compo=votable_compo)
-    Vote.objects.create(user=base_user, group=vote_group, compo=votable_compo, entry=entry, rank=1)
+    vote_group.set_votes([entry])
 
     result = Entry.objects.filter(pk=entry.pk).with_score().first()
     assert result.computed_score == 42.5  # Uses archive_score, not calculated
@@ -109,15 +103,7 @@ def test_entries_ranked_by_score_descending(
     """Test that entries are ranked by score in descending order."""
     vote_group = VoteGroup.objects.create(user=base_user, compo=votable_compo)
     # Give second_votable_entry the best rank, then votable_compo_entry, then third
-    Vote.objects.create(
-        user=base_user, group=vote_group, compo=votable_compo, entry=second_votable_entry, rank=1
-    )
-    Vote.objects.create(
-        user=base_user, group=vote_group, compo=votable_compo, entry=votable_compo_entry, rank=2
-    )
-    Vote.objects.create(
-        user=base_user, group=vote_group, compo=votable_compo, entry=third_votable_entry, rank=3
-    )
+    vote_group.set_votes([second_votable_entry, votable_compo_entry, third_votable_entry])
 
     results = {e.pk: e for e in Entry.objects.filter(compo=votable_compo).with_rank()}
 
@@ -128,21 +114,15 @@ def test_entries_ranked_by_score_descending(
 
 @pytest.mark.django_db
 def test_tied_scores_get_same_rank_with_sequential_next(
-    votable_compo, votable_compo_entry, second_votable_entry, third_votable_entry, base_user
+    votable_compo, votable_compo_entry, second_votable_entry, third_votable_entry, base_user, normal_user
 ):
     """Test DenseRank behavior: tied scores get same rank, next rank is sequential."""
-    # Both votable_compo_entry and second_votable_entry get rank 1 votes (score = 1.0 each)
-    # third_votable_entry gets rank 2 vote (score = 0.5)
-    vote_group = VoteGroup.objects.create(user=base_user, compo=votable_compo)
-    Vote.objects.create(
-        user=base_user, group=vote_group, compo=votable_compo, entry=votable_compo_entry, rank=1
-    )
-    Vote.objects.create(
-        user=base_user, group=vote_group, compo=votable_compo, entry=second_votable_entry, rank=1
-    )
-    Vote.objects.create(
-        user=base_user, group=vote_group, compo=votable_compo, entry=third_votable_entry, rank=2
-    )
+    # Both votable_compo_entry and second_votable_entry get 1/1 + 1/2 (score = 1.5 each)
+    # third_votable_entry gets a single rank 3 vote (score = 1/3)
+    vote_group1 = VoteGroup.objects.create(user=base_user, compo=votable_compo)
+    vote_group1.set_votes([votable_compo_entry, second_votable_entry, third_votable_entry])
+    vote_group2 = VoteGroup.objects.create(user=normal_user, compo=votable_compo)
+    vote_group2.set_votes([second_votable_entry, votable_compo_entry])
 
     results = {e.pk: e for e in Entry.objects.filter(compo=votable_compo).with_rank()}
 
@@ -159,15 +139,7 @@ def test_unique_scores_get_sequential_ranks(
 ):
     """Test that entries with unique scores get sequential ranks 1, 2, 3."""
     vote_group = VoteGroup.objects.create(user=base_user, compo=votable_compo)
-    Vote.objects.create(
-        user=base_user, group=vote_group, compo=votable_compo, entry=votable_compo_entry, rank=1
-    )
-    Vote.objects.create(
-        user=base_user, group=vote_group, compo=votable_compo, entry=second_votable_entry, rank=2
-    )
-    Vote.objects.create(
-        user=base_user, group=vote_group, compo=votable_compo, entry=third_votable_entry, rank=3
-    )
+    vote_group.set_votes([votable_compo_entry, second_votable_entry, third_votable_entry])
 
     entries = Entry.objects.filter(compo=votable_compo).with_rank().order_by("computed_rank")
     ranks = [e.computed_rank for e in entries]
@@ -206,14 +178,10 @@ def test_ranks_partitioned_by_compo(votable_compo, second_votable_compo, votable
     )
 
     vote_group1 = VoteGroup.objects.create(user=base_user, compo=votable_compo)
-    Vote.objects.create(
-        user=base_user, group=vote_group1, compo=votable_compo, entry=votable_compo_entry, rank=1
-    )
+    vote_group1.set_votes([votable_compo_entry])
 
     vote_group2 = VoteGroup.objects.create(user=base_user, compo=second_votable_compo)
-    Vote.objects.create(
-        user=base_user, group=vote_group2, compo=second_votable_compo, entry=entry_in_compo2, rank=1
-    )
+    vote_group2.set_votes([entry_in_compo2])
 
     results = {
         e.pk: e for e in Entry.objects.filter(compo__in=[votable_compo, second_votable_compo]).with_rank()
@@ -230,9 +198,7 @@ def test_entry_with_no_votes_ranked_last(
 ):
     """Test that an entry with no votes gets ranked after voted entries."""
     vote_group = VoteGroup.objects.create(user=base_user, compo=votable_compo)
-    Vote.objects.create(
-        user=base_user, group=vote_group, compo=votable_compo, entry=votable_compo_entry, rank=1
-    )
+    vote_group.set_votes([votable_compo_entry])
 
     results = {e.pk: e for e in Entry.objects.filter(compo=votable_compo).with_rank()}
 
@@ -256,12 +222,7 @@ def test_disqualified_entry_ranked_last(votable_compo, votable_compo_entry, base
     )
 
     vote_group = VoteGroup.objects.create(user=base_user, compo=votable_compo)
-    Vote.objects.create(
-        user=base_user, group=vote_group, compo=votable_compo, entry=votable_compo_entry, rank=2
-    )
-    Vote.objects.create(
-        user=base_user, group=vote_group, compo=votable_compo, entry=disqualified_entry, rank=1
-    )
+    vote_group.set_votes([disqualified_entry, votable_compo_entry])
 
     results = {e.pk: e for e in Entry.objects.filter(compo=votable_compo).with_rank()}
 
@@ -278,9 +239,7 @@ def test_multiple_unvoted_entries_tied_at_last_rank(
 ):
     """Test that multiple entries with no votes are tied at the last rank."""
     vote_group = VoteGroup.objects.create(user=base_user, compo=votable_compo)
-    Vote.objects.create(
-        user=base_user, group=vote_group, compo=votable_compo, entry=votable_compo_entry, rank=1
-    )
+    vote_group.set_votes([votable_compo_entry])
 
     results = {e.pk: e for e in Entry.objects.filter(compo=votable_compo).with_rank()}
 
@@ -288,3 +247,165 @@ def test_multiple_unvoted_entries_tied_at_last_rank(
     # Both unvoted entries should be tied at rank 2 (both have computed_score 0.0)
     assert results[second_votable_entry.pk].computed_rank == 2
     assert results[third_votable_entry.pk].computed_rank == 2
+
+
+# --- Score table maintenance tests ---
+
+
+@pytest.mark.django_db
+def test_replacing_votes_updates_scores(
+    votable_compo, votable_compo_entry, second_votable_entry, third_votable_entry, base_user
+):
+    """Test that replacing a group's ballot moves the points to the new ranking."""
+    vote_group = VoteGroup.objects.create(user=base_user, compo=votable_compo)
+    vote_group.set_votes([votable_compo_entry, second_votable_entry, third_votable_entry])
+    vote_group.set_votes([third_votable_entry, votable_compo_entry])
+
+    scores = {s.entry_id: s for s in EntryScore.objects.filter(entry__compo=votable_compo)}
+    assert scores[third_votable_entry.pk].score == 1.0
+    assert scores[third_votable_entry.pk].vote_count == 1
+    assert scores[votable_compo_entry.pk].score == 0.5
+    assert scores[votable_compo_entry.pk].vote_count == 1
+    assert scores[second_votable_entry.pk].score == 0.0
+    assert scores[second_votable_entry.pk].vote_count == 0
+
+
+@pytest.mark.django_db
+def test_scores_do_not_depend_on_vote_order(
+    votable_compo, votable_compo_entry, second_votable_entry, third_votable_entry, base_user, normal_user
+):
+    """Test that entries that got the same votes in a different order stay tied."""
+    group1 = VoteGroup.objects.create(user=base_user, compo=votable_compo)
+    group1.set_votes([votable_compo_entry, third_votable_entry, second_votable_entry])
+    group2 = VoteGroup.objects.create(user=normal_user, compo=votable_compo)
+    group2.set_votes([second_votable_entry, third_votable_entry, votable_compo_entry])
+    group1.delete_votes()
+    group1.set_votes([votable_compo_entry, third_votable_entry, second_votable_entry])
+
+    results = {e.pk: e for e in Entry.objects.filter(compo=votable_compo).with_rank()}
+    assert results[votable_compo_entry.pk].computed_score == results[second_votable_entry.pk].computed_score
+    assert results[votable_compo_entry.pk].computed_rank == 1
+    assert results[second_votable_entry.pk].computed_rank == 1
+    assert results[third_votable_entry.pk].computed_rank == 2
+
+
+@pytest.mark.django_db
+def test_rebuild_scores_command(
+    votable_compo, votable_compo_entry, second_votable_entry, base_user, normal_user
+):
+    """Test that the rebuild_scores command recalculates scores from the stored ballots."""
+    VoteGroup.objects.create(user=base_user, compo=votable_compo).set_votes(
+        [votable_compo_entry, second_votable_entry]
+    )
+    VoteGroup.objects.create(user=normal_user, compo=votable_compo).set_votes([second_votable_entry])
+    expected = {s.entry_id: (s.score, s.vote_count) for s in EntryScore.objects.all()}
+    EntryScore.objects.all().update(score=100.0, vote_count=100)
+
+    call_command("rebuild_scores", event=votable_compo.event_id, stderr=StringIO())
+
+    assert {s.entry_id: (s.score, s.vote_count) for s in EntryScore.objects.all()} == expected
+    assert expected[votable_compo_entry.pk] == (1.0, 1)
+    assert expected[second_votable_entry.pk] == (1.5, 2)
+
+
+def _scores() -> dict[int, tuple[float, int]]:
+    return {s.entry_id: (s.score, s.vote_count) for s in EntryScore.objects.all()}
+
+
+@pytest.mark.django_db
+def test_deleting_ballot_updates_scores(
+    votable_compo, votable_compo_entry, second_votable_entry, base_user, normal_user
+):
+    """Test that ballots deleted one by one or in bulk (as the admin does) are removed from the scores."""
+    group = VoteGroup.objects.create(user=base_user, compo=votable_compo)
+    group.set_votes([votable_compo_entry, second_votable_entry])
+    VoteGroup.objects.create(user=normal_user, compo=votable_compo).set_votes([second_votable_entry])
+
+    group.delete()
+    assert _scores() == {votable_compo_entry.pk: (0.0, 0), second_votable_entry.pk: (1.0, 1)}
+
+    VoteGroup.objects.filter(compo=votable_compo).delete()
+    assert _scores() == {votable_compo_entry.pk: (0.0, 0), second_votable_entry.pk: (0.0, 0)}
+
+
+@pytest.mark.django_db
+def test_saving_edited_ranking_updates_scores(
+    votable_compo, votable_compo_entry, second_votable_entry, base_user
+):
+    """Test that a ranking edited directly, as in the admin form, replaces the old ballot in the scores."""
+    VoteGroup.objects.create(user=base_user, compo=votable_compo).set_votes([votable_compo_entry])
+
+    group = VoteGroup.objects.get(user=base_user, compo=votable_compo)
+    group.ranking = [second_votable_entry.pk, votable_compo_entry.pk]
+    group.save()
+    assert _scores() == {votable_compo_entry.pk: (0.5, 1), second_votable_entry.pk: (1.0, 1)}
+
+
+@pytest.mark.django_db
+def test_deleting_voter_removes_ballot_from_scores(
+    create_user, votable_compo, votable_compo_entry, second_votable_entry, base_user
+):
+    """Test that ballots deleted by cascade, when their user is deleted, are removed from the scores."""
+    voter = create_user()
+    VoteGroup.objects.create(user=voter, compo=votable_compo).set_votes(
+        [second_votable_entry, votable_compo_entry]
+    )
+    VoteGroup.objects.create(user=base_user, compo=votable_compo).set_votes([second_votable_entry])
+
+    voter.delete()
+    assert not VoteGroup.objects.filter(user_id=voter.pk).exists()
+    assert _scores() == {votable_compo_entry.pk: (0.0, 0), second_votable_entry.pk: (1.0, 1)}
+
+
+@pytest.mark.django_db
+def test_ballot_is_stored_as_ranking(votable_compo, votable_compo_entry, second_votable_entry, base_user):
+    """Test that the ballot is stored in ranked order, and deleted entries drop out of it."""
+    vote_group = VoteGroup.objects.create(user=base_user, compo=votable_compo)
+    vote_group.set_votes([second_votable_entry, votable_compo_entry])
+
+    vote_group.refresh_from_db()
+    assert vote_group.ranking == [second_votable_entry.pk, votable_compo_entry.pk]
+    assert vote_group.ranks == {second_votable_entry.pk: 1, votable_compo_entry.pk: 2}
+
+    second_votable_entry.delete()
+    assert vote_group.entries == [votable_compo_entry]
+
+    # Replacing a ballot that references a deleted entry must not resurrect its score row
+    vote_group.set_votes([votable_compo_entry])
+    assert list(EntryScore.objects.values_list("entry_id", "score")) == [(votable_compo_entry.pk, 1.0)]
+
+
+@pytest.mark.django_db
+@freeze_time("2025-01-16T12:00:00Z")
+def test_freeze_results_command_recomputes_after_disqualification(
+    votable_compo, votable_compo_entry, second_votable_entry, base_user
+):
+    """Test that recomputing frozen results takes disqualifications into account."""
+    VoteGroup.objects.create(user=base_user, compo=votable_compo).set_votes(
+        [second_votable_entry, votable_compo_entry]
+    )
+    call_command("freeze_results", event=votable_compo.event_id, stderr=StringIO())
+    assert Entry.objects.get(pk=votable_compo_entry.pk).archive_rank == 2
+
+    Entry.objects.filter(pk=second_votable_entry.pk).update(disqualified=True)
+    call_command("freeze_results", compo=votable_compo.pk, recompute=True, stderr=StringIO())
+
+    ranks = dict(Entry.objects.values_list("pk", "archive_rank"))
+    assert ranks == {votable_compo_entry.pk: 1, second_votable_entry.pk: 2}
+    assert Entry.objects.get(pk=votable_compo_entry.pk).archive_score == 0.5
+
+
+@pytest.mark.django_db
+def test_freeze_results_recompute_without_ballots(
+    votable_compo, votable_compo_entry, second_votable_entry, base_user
+):
+    """Test that results are re-ranked from the frozen scores once the ballots are gone."""
+    Entry.objects.filter(pk=votable_compo_entry.pk).update(archive_score=2.0, archive_rank=1)
+    Entry.objects.filter(pk=second_votable_entry.pk).update(archive_score=1.0, archive_rank=2)
+    Entry.objects.filter(pk=votable_compo_entry.pk).update(disqualified=True)
+
+    call_command("freeze_results", compo=votable_compo.pk, recompute=True, stderr=StringIO())
+
+    ranks = dict(Entry.objects.values_list("pk", "archive_rank"))
+    assert ranks == {second_votable_entry.pk: 1, votable_compo_entry.pk: 2}
+    assert Entry.objects.get(pk=second_votable_entry.pk).archive_score == 1.0
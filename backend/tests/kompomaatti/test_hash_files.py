@@ -0,0 +1,47 @@
+import hashlib
+
+import pytest
+from django.core.management import call_command
+
+from Instanssi.admin_upload.models import UploadedFile
+from Instanssi.kompomaatti.enums import MediaCodec, MediaContainer
+from Instanssi.kompomaatti.models import AlternateEntryFile, Entry
+
+
+@pytest.mark.django_db
+def test_hash_files_fills_in_missing_hashes(votable_compo_entry, uploaded_file, test_zip):
+    """Test that files saved before hashes were recorded get them"""
+    alt = AlternateEntryFile.objects.create(
+        entry=votable_compo_entry,
+        codec=MediaCodec.AAC,
+        container=MediaContainer.MP4,
+        file=votable_compo_entry.entryfile.name,
+    )
+    Entry.objects.filter(pk=votable_compo_entry.pk).update(
+        entryfile_hash="", entryfile_size=None, sourcefile_hash="", sourcefile_size=None
+    )
+    UploadedFile.objects.filter(pk=uploaded_file.pk).update(file_hash="", file_size=None)
+
+    call_command("hash_files", event=votable_compo_entry.compo.event_id)
+
+    expected = hashlib.sha256(test_zip).hexdigest()
+    votable_compo_entry.refresh_from_db()
+    assert votable_compo_entry.entryfile_hash == expected
+    assert votable_compo_entry.entryfile_size == len(test_zip)
+    assert votable_compo_entry.sourcefile_hash == expected
+    alt.refresh_from_db()
+    assert alt.file_hash == expected
+    assert alt.file_size == len(test_zip)
+    uploaded_file.refresh_from_db()
+    assert uploaded_file.file_hash == expected
+
+
+@pytest.mark.django_db
+def test_hash_files_skips_missing_files(votable_compo_entry):
+    Entry.objects.filter(pk=votable_compo_entry.pk).update(entryfile_hash="", entryfile_size=None)
+    votable_compo_entry.entryfile.storage.delete(votable_compo_entry.entryfile.name)
+
+    call_command("hash_files")
+
+    votable_compo_entry.refresh_from_db()
+    assert votable_compo_entry.entryfile_hash == ""
@@ -43,3 +43,20 @@ def test_is_voting_open_past_voting_end(live_voting_compo, live_voting_state):
 
     live_voting_compo.refresh_from_db()
     assert live_voting_compo.is_voting_open() is False
+
+
+@pytest.mark.django_db
+def test_concurrent_saves_get_their_own_versions(live_voting_state):
+    """Saves of copies loaded at the same version still bump the version once each."""
+    first = LiveVotingState.objects.get(pk=live_voting_state.pk)
+    second = LiveVotingState.objects.get(pk=live_voting_state.pk)
+    version = first.version
+
+    first.voting_open = True
+    first.save()
+    second.save(update_fields=["current_entry"])
+
+    assert first.version == version + 1
+    assert second.version == version + 2
+    live_voting_state.refresh_from_db()
+    assert live_voting_state.version == version + 2
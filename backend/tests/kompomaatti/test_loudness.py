@@ -0,0 +1,39 @@
+import pytest
+
+from Instanssi.kompomaatti.misc.loudness import (
+    Loudness,
+    parse_ebur128_summary,
+    playback_gain,
+)
+
+from .conftest import FAKE_EBUR128_SUMMARY
+
+
+def test_parse_ebur128_summary():
+    log = "Stream mapping:\n  Stream #0:0 -> #0:0 (mp3 (mp3float) -> pcm_s16le (native))\n"
+    assert parse_ebur128_summary(log + FAKE_EBUR128_SUMMARY.decode()) == Loudness(-19.5, -0.3)
+
+
+def test_parse_ebur128_summary_silence():
+    summary = (
+        FAKE_EBUR128_SUMMARY.decode().replace("-19.5 LUFS", "-70.0 LUFS").replace("-0.3 dBFS", "-inf dBFS")
+    )
+    assert parse_ebur128_summary(summary) == Loudness(-70.0, None)
+
+
+def test_parse_ebur128_summary_missing():
+    assert parse_ebur128_summary("Error while decoding stream #0:0: Invalid data found\n") is None
+
+
+@pytest.mark.parametrize(
+    "loudness,true_peak,gain",
+    [
+        (-19.5, -6.0, 3.5),  # Quiet entries are turned up to the target
+        (-10.0, -0.1, -6.0),  # Loud ones down
+        (-25.0, -3.0, 2.0),  # ... but never so much that the peaks go over the ceiling
+        (-70.0, None, None),  # Silence
+        (None, None, None),  # Not measured
+    ],
+)
+def test_playback_gain(loudness, true_peak, gain):
+    assert playback_gain(loudness, true_peak) == gain
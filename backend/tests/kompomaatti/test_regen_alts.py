@@ -0,0 +1,165 @@
+import threading
+from unittest import mock
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+
+from Instanssi.kompomaatti.enums import WEB_AUDIO_FORMATS, MediaCodec
+from Instanssi.kompomaatti.management.commands.regen_alts import _regenerate
+from Instanssi.kompomaatti.models import AlternateEntryFile, Entry
+
+
+@pytest.fixture
+def second_audio_entry(base_user, open_compo):
+    entry = Entry(
+        compo=open_compo,
+        user=base_user,
+        name="Second Audio Entry",
+        description="Another audio test entry",
+        creator="Audio Creator",
+        entryfile=SimpleUploadedFile("second_audio.ogg", b"more fake audio data"),
+    )
+    # Save without calling the overridden save() that triggers generate_alternates
+    Entry.objects.bulk_create([entry])
+    return Entry.objects.get(name="Second Audio Entry")
+
+
+def acodecs(command):
+    return [command[index + 1] for index, arg in enumerate(command) if arg == "-acodec"]
+
+
+@pytest.mark.django_db
+def test_regen_alts_regenerates_all_audio_entries(
+    audio_entry, second_audio_entry, editable_compo_entry, fake_ffmpeg, capsys
+):
+    """Test that every audio entry is transcoded to every format, and non-audio entries are skipped."""
+    call_command("regen_alts")
+    assert len(fake_ffmpeg) == 2
+    assert AlternateEntryFile.objects.count() == 2 * len(WEB_AUDIO_FORMATS)
+    err = capsys.readouterr().err
+    assert "[2/2] Generated" in err
+    assert "ETA" in err
+    assert "Regenerated 2 entries, 0 failed" in err
+
+    # Without --missing-only, everything is transcoded again
+    call_command("regen_alts")
+    assert len(fake_ffmpeg) == 4
+
+
+@pytest.mark.django_db
+def test_regen_alts_missing_only(audio_entry, second_audio_entry, fake_ffmpeg, capsys):
+    """Test that --missing-only skips formats that are up to date."""
+    call_command("regen_alts")
+    AlternateEntryFile.objects.filter(entry=second_audio_entry, codec=MediaCodec.AAC).delete()
+
+    call_command("regen_alts", "--missing-only")
+    assert len(fake_ffmpeg) == 3
+    assert acodecs(fake_ffmpeg[2]) == ["aac"]
+    assert "Regenerated 1 entries" in capsys.readouterr().err
+
+
+@pytest.mark.django_db
+def test_regen_alts_filters(audio_entry, second_audio_entry, fake_ffmpeg):
+    """Test the compo and codec filters."""
+    call_command("regen_alts", "--codec", "opus")
+    assert [acodecs(command) for command in fake_ffmpeg] == [["libopus"], ["libopus"]]
+
+    call_command("regen_alts", "--compo", audio_entry.compo_id + 1000)
+    assert len(fake_ffmpeg) == 2
+
+
+@pytest.mark.django_db
+def test_regen_alts_dry_run(audio_entry, fake_ffmpeg, capsys):
+    call_command("regen_alts", "--dry-run")
+    assert fake_ffmpeg == []
+    err = capsys.readouterr().err
+    assert f"Would generate opus/webm, aac/mp4 for {audio_entry}" in err
+    assert "1 entries would be regenerated" in err
+
+
+@pytest.mark.django_db
+def test_regen_alts_resumes_from_state_file(audio_entry, second_audio_entry, fake_ffmpeg, tmp_path):
+    """Test that entries recorded in the state file are skipped, and finished ones are recorded."""
+    state_file = tmp_path / "regen.state"
+    state_file.write_text(f"{audio_entry.id}\n")
+
+    call_command("regen_alts", "--state-file", str(state_file))
+    assert len(fake_ffmpeg) == 1
+    assert not AlternateEntryFile.objects.filter(entry=audio_entry).exists()
+    assert state_file.read_text().split() == [str(audio_entry.id), str(second_audio_entry.id)]
+
+    call_command("regen_alts", "--state-file", str(state_file))
+    assert len(fake_ffmpeg) == 1
+
+
+@pytest.mark.django_db
+def test_regen_alts_reports_failures(audio_entry, second_audio_entry, fake_ffmpeg, tmp_path, capsys):
+    """Test that a failing entry doesn't stop the run, and isn't recorded as finished."""
+    state_file = tmp_path / "regen.state"
+    second_audio_entry.entryfile.delete(save=False)
+    Entry.objects.filter(pk=second_audio_entry.pk).update(entryfile="missing/file.ogg")
+
+    call_command("regen_alts", "--state-file", str(state_file))
+    assert state_file.read_text().split() == [str(audio_entry.id)]
+    err = capsys.readouterr().err
+    assert "Failed Second Audio Entry" in err
+    assert "Regenerated 1 entries, 1 failed" in err
+
+
+@pytest.mark.django_db
+def test_regen_alts_celery(audio_entry, fake_ffmpeg, capsys):
+    """Test that --celery queues a task per entry (run eagerly in tests)."""
+    call_command("regen_alts", "--celery", "--codec", "aac")
+    assert [acodecs(command) for command in fake_ffmpeg] == [["aac"]]
+    assert "Queued 1 entries" in capsys.readouterr().err
+
+
+@pytest.mark.django_db
+def test_regen_alts_skips_videos(audio_entry, video_entry, fake_ffmpeg, fake_ffprobe, capsys):
+    """Test that files with video (eg. .mp4) are left to the video transcodes, as with Celery."""
+    call_command("regen_alts", "--dry-run")
+    assert f"for {audio_entry}" in capsys.readouterr().err
+    assert Entry.objects.get(pk=video_entry.pk).has_video
+
+    call_command("regen_alts")
+    assert len(fake_ffmpeg) == 1
+    assert not AlternateEntryFile.objects.filter(entry=video_entry).exists()
+
+
+@pytest.mark.django_db
+def test_regen_alts_transcodes_audio_only_mp4(video_entry, fake_ffmpeg, fake_ffprobe):
+    fake_ffprobe[:] = [{"index": 0, "codec_type": "audio", "disposition": {"attached_pic": 0}}]
+    call_command("regen_alts")
+    assert AlternateEntryFile.objects.filter(entry=video_entry).count() == len(WEB_AUDIO_FORMATS)
+
+
+@pytest.mark.django_db
+def test_regen_alts_skips_entries_that_became_videos(audio_entry, fake_ffmpeg):
+    """Test that an entry replaced with a video after planning is not transcoded to audio."""
+    Entry.objects.filter(pk=audio_entry.pk).update(has_video=True)
+    _regenerate(audio_entry.id, list(WEB_AUDIO_FORMATS), force=True, in_thread=False)
+    assert fake_ffmpeg == []
+
+
+def test_regen_alts_rejects_bad_jobs():
+    with pytest.raises(CommandError):
+        call_command("regen_alts", "--jobs", "0")
+
+
+@pytest.mark.django_db
+def test_regen_alts_parallel(audio_entry, second_audio_entry, capsys):
+    """Test that entries are handed to a pool of worker threads."""
+    threads = {}
+
+    def regenerate(entry_id, formats, force, in_thread):
+        threads[entry_id] = (threading.current_thread(), in_thread)
+
+    with mock.patch(
+        "Instanssi.kompomaatti.management.commands.regen_alts._regenerate", side_effect=regenerate
+    ):
+        call_command("regen_alts", "--jobs", "2")
+
+    assert set(threads) == {audio_entry.id, second_audio_entry.id}
+    assert all(thread is not threading.main_thread() and in_thread for thread, in_thread in threads.values())
+    assert "Regenerated 2 entries, 0 failed" in capsys.readouterr().err
@@ -1,52 +1,46 @@
+import hashlib
 import logging
-from pathlib import Path
+from datetime import UTC, datetime
 from unittest import mock
 
 import pytest
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import override_settings
+from ffmpeg.nodes import OutputStream
+from freezegun import freeze_time
 
-from Instanssi.kompomaatti.enums import MediaCodec, MediaContainer
-from Instanssi.kompomaatti.models import AlternateEntryFile, Entry
-from Instanssi.kompomaatti.tasks import generate_alternate_audio_files
+from Instanssi.kompomaatti.enums import WEB_AUDIO_FORMATS, MediaCodec, MediaContainer
+from Instanssi.kompomaatti.models import AlternateEntryFile, Entry, VoteGroup
+from Instanssi.kompomaatti.tasks import (
+    freeze_finished_compo_results,
+    generate_alternate_audio_files,
+)
 
 
 @pytest.mark.django_db
 @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
-def test_generate_alternate_audio_files_success(audio_entry, caplog):
-    """Test successful audio file conversion creates an AlternateEntryFile."""
-    caplog.set_level(logging.INFO)
-
-    # Mock ffmpeg pipeline
-    with (
-        mock.patch("Instanssi.kompomaatti.tasks.ffmpeg.input") as mock_input,
-        mock.patch("Instanssi.kompomaatti.tasks.temp_file") as mock_temp_file,
-    ):
-        # Set up mocks
-        mock_pipeline = mock.MagicMock()
-        mock_input.return_value.audio = mock_pipeline
-        mock_output = mock.MagicMock()
-        mock_pipeline.return_value = mock_output
-        mock_output.global_args.return_value.run = mock.MagicMock()
-
-        # Create a fake output file
-        mock_temp_file.return_value.__enter__ = mock.MagicMock(return_value=Path("/tmp/fake_output.webm"))
-        mock_temp_file.return_value.__exit__ = mock.MagicMock(return_value=False)
-
-        # Mock open to return fake audio data
-        with mock.patch("builtins.open", mock.mock_open(read_data=b"converted audio data")):
-            with mock.patch("Instanssi.kompomaatti.tasks.ffmpeg.output", mock_output):
-                mock_output.return_value = mock_output
-                generate_alternate_audio_files.delay(
-                    audio_entry.id, int(MediaCodec.OPUS), int(MediaContainer.WEBM)
-                )
-
-        # Verify AlternateEntryFile was created
-        alt = AlternateEntryFile.objects.filter(
-            entry=audio_entry, codec=MediaCodec.OPUS, container=MediaContainer.WEBM
-        ).first()
-        assert alt is not None
-        assert alt.entry == audio_entry
+def test_generate_alternate_audio_files_success(audio_entry, fake_ffmpeg):
+    """Test that a single ffmpeg run creates an AlternateEntryFile for every web audio format."""
+    generate_alternate_audio_files.delay(audio_entry.id)
+
+    # The source is read once, and mapped to one output per format
+    assert len(fake_ffmpeg) == 1
+    command = fake_ffmpeg[0]
+    assert command.count("-i") == 1
+    assert command.count("-map") == len(WEB_AUDIO_FORMATS)
+    assert [command[index + 1] for index, arg in enumerate(command) if arg == "-acodec"] == [
+        "libopus",
+        "aac",
+    ]
+
+    alts = AlternateEntryFile.objects.filter(entry=audio_entry)
+    assert sorted((alt.codec, alt.container) for alt in alts) == sorted(WEB_AUDIO_FORMATS)
+    opus = alts.get(codec=MediaCodec.OPUS, container=MediaContainer.WEBM)
+    assert opus.file.name.endswith(".webm")
+    assert opus.file.read() == b"converted with libopus"
+    assert opus.file_hash == hashlib.sha256(b"converted with libopus").hexdigest()
+    assert opus.file_size == len(b"converted with libopus")
 
 
 @pytest.mark.django_db
@@ -55,9 +49,7 @@ def test_generate_alternate_audio_files_skips_non_audio(editable_compo_entry, ca
     """Test that non-audio files are skipped without error."""
     caplog.set_level(logging.ERROR)
 
-    generate_alternate_audio_files.delay(
-        editable_compo_entry.id, int(MediaCodec.OPUS), int(MediaContainer.WEBM)
-    )
+    generate_alternate_audio_files.delay(editable_compo_entry.id)
 
     # Verify no AlternateEntryFile was created
     assert AlternateEntryFile.objects.filter(entry=editable_compo_entry).count() == 0
@@ -74,14 +66,15 @@ def test_generate_alternate_audio_files_missing_entry(caplog):
 
     # Call with non-existent entry ID - should retry and eventually fail
     with pytest.raises(Entry.DoesNotExist):
-        generate_alternate_audio_files(999999, int(MediaCodec.OPUS), int(MediaContainer.WEBM))
+        generate_alternate_audio_files(999999)
 
 
 @pytest.mark.django_db
 @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
-def test_generate_alternate_audio_files_updates_existing(audio_entry, test_zip):
-    """Test that existing alternate file is updated (not duplicated)."""
-    # Create an existing AlternateEntryFile
+def test_generate_alternate_audio_files_updates_existing(
+    audio_entry, test_zip, fake_ffmpeg, django_capture_on_commit_callbacks
+):
+    """Test that existing alternate files are updated (not duplicated), and old files removed."""
     existing_file = SimpleUploadedFile("old_alternate.webm", test_zip, content_type="audio/webm")
     existing_alt = AlternateEntryFile.objects.create(
         entry=audio_entry,
@@ -90,39 +83,24 @@ def test_generate_alternate_audio_files_updates_existing(audio_entry, test_zip):
         file=existing_file,
     )
     original_created_at = existing_alt.created_at
+    old_file_name = existing_alt.file.name
+
+    with django_capture_on_commit_callbacks(execute=True):
+        generate_alternate_audio_files.delay(audio_entry.id)
 
-    # Mock ffmpeg pipeline
-    with (
-        mock.patch("Instanssi.kompomaatti.tasks.ffmpeg.input") as mock_input,
-        mock.patch("Instanssi.kompomaatti.tasks.temp_file") as mock_temp_file,
-        mock.patch("Instanssi.kompomaatti.tasks.ffmpeg.output") as mock_ffmpeg_output,
-    ):
-        # Set up mocks
-        mock_pipeline = mock.MagicMock()
-        mock_input.return_value.audio = mock_pipeline
-        mock_output = mock.MagicMock()
-        mock_ffmpeg_output.return_value = mock_output
-        mock_output.global_args.return_value.run = mock.MagicMock()
-
-        # Create a fake output file
-        mock_temp_file.return_value.__enter__ = mock.MagicMock(return_value=Path("/tmp/fake_output.webm"))
-        mock_temp_file.return_value.__exit__ = mock.MagicMock(return_value=False)
-
-        # Mock open to return fake audio data
-        with mock.patch("builtins.open", mock.mock_open(read_data=b"new converted audio data")):
-            generate_alternate_audio_files.delay(
-                audio_entry.id, int(MediaCodec.OPUS), int(MediaContainer.WEBM)
-            )
-
-    # Verify only one AlternateEntryFile exists (updated, not duplicated)
+    # Verify only one AlternateEntryFile exists per format (updated, not duplicated)
     alts = AlternateEntryFile.objects.filter(
         entry=audio_entry, codec=MediaCodec.OPUS, container=MediaContainer.WEBM
     )
     assert alts.count() == 1
+    assert AlternateEntryFile.objects.filter(entry=audio_entry).count() == len(WEB_AUDIO_FORMATS)
 
-    # Verify updated_at was changed
+    # Verify updated_at was changed, and the old file is gone
     updated_alt = alts.first()
+    assert updated_alt.pk == existing_alt.pk
     assert updated_alt.updated_at > original_created_at
+    assert updated_alt.file.name != old_file_name
+    assert not default_storage.exists(old_file_name)
 
 
 @pytest.mark.django_db
@@ -131,27 +109,153 @@ def test_generate_alternate_audio_files_ffmpeg_error(audio_entry, caplog):
     """Test that ffmpeg errors are logged and re-raised."""
     caplog.set_level(logging.ERROR)
 
-    with (
-        mock.patch("Instanssi.kompomaatti.tasks.ffmpeg.input") as mock_input,
-        mock.patch("Instanssi.kompomaatti.tasks.temp_file") as mock_temp_file,
-        mock.patch("Instanssi.kompomaatti.tasks.ffmpeg.output") as mock_ffmpeg_output,
-    ):
-        # Set up mocks
-        mock_pipeline = mock.MagicMock()
-        mock_input.return_value.audio = mock_pipeline
-        mock_output = mock.MagicMock()
-        mock_ffmpeg_output.return_value = mock_output
-        mock_output.global_args.return_value.run.side_effect = Exception("ffmpeg failed")
-
-        # Create a fake output file
-        mock_temp_file.return_value.__enter__ = mock.MagicMock(return_value=Path("/tmp/fake_output.webm"))
-        mock_temp_file.return_value.__exit__ = mock.MagicMock(return_value=False)
-
+    with mock.patch.object(OutputStream, "run", side_effect=Exception("ffmpeg failed")):
         with pytest.raises(Exception, match="ffmpeg failed"):
-            generate_alternate_audio_files(audio_entry.id, int(MediaCodec.OPUS), int(MediaContainer.WEBM))
+            generate_alternate_audio_files(audio_entry.id)
 
     # Verify error was logged
     assert any("Unable to convert" in r.message for r in caplog.records)
 
     # Verify no AlternateEntryFile was created
     assert AlternateEntryFile.objects.filter(entry=audio_entry).count() == 0
+
+
+@pytest.mark.django_db
+def test_entry_save_queues_single_transcode(audio_entry):
+    """Test that saving an audio entry queues one transcoding task for all formats."""
+    with mock.patch("Instanssi.kompomaatti.tasks.generate_alternate_audio_files.apply_async") as apply_async:
+        audio_entry.save()
+    apply_async.assert_called_once_with(countdown=1, args=[audio_entry.id, False])
+
+
+@pytest.mark.django_db
+def test_entry_save_hashes_new_entry_file(audio_entry):
+    """Test that the entry file is hashed when a new file is assigned, and not on other saves."""
+    with mock.patch("Instanssi.kompomaatti.tasks.generate_alternate_audio_files.apply_async"):
+        audio_entry.entryfile = SimpleUploadedFile("new_audio.mp3", b"new audio data")
+        audio_entry.save()
+        assert audio_entry.entryfile_hash == hashlib.sha256(b"new audio data").hexdigest()
+        assert audio_entry.entryfile_size == len(b"new audio data")
+
+        with mock.patch("Instanssi.kompomaatti.models.file_sha256") as file_sha256:
+            audio_entry.description = "Edited"
+            audio_entry.save()
+        file_sha256.assert_not_called()
+
+    audio_entry.refresh_from_db()
+    assert audio_entry.entryfile_hash == hashlib.sha256(b"new audio data").hexdigest()
+
+
+@pytest.mark.django_db
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+def test_entry_save_skips_up_to_date_alternates(audio_entry, fake_ffmpeg):
+    """Test that saving an entry doesn't transcode again unless the entry file changes."""
+    generate_alternate_audio_files.delay(audio_entry.id)
+    assert len(fake_ffmpeg) == 1
+    audio_entry.refresh_from_db()
+    assert audio_entry.entryfile_hash == hashlib.sha256(b"fake audio data").hexdigest()
+    assert set(AlternateEntryFile.objects.values_list("source_hash", flat=True)) == {
+        audio_entry.entryfile_hash
+    }
+
+    audio_entry.description = "Edited"
+    audio_entry.save()
+    assert len(fake_ffmpeg) == 1
+
+    audio_entry.entryfile = SimpleUploadedFile("new_audio.mp3", b"new audio data")
+    audio_entry.save()
+    assert len(fake_ffmpeg) == 2
+    assert set(AlternateEntryFile.objects.values_list("source_hash", flat=True)) == {
+        hashlib.sha256(b"new audio data").hexdigest()
+    }
+
+
+@pytest.mark.django_db
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+def test_generate_alternate_audio_files_only_missing_formats(audio_entry, fake_ffmpeg):
+    """Test that only missing formats are transcoded, unless forced."""
+    generate_alternate_audio_files.delay(audio_entry.id)
+    AlternateEntryFile.objects.filter(codec=MediaCodec.AAC).delete()
+
+    generate_alternate_audio_files.delay(audio_entry.id)
+    assert [arg for arg in fake_ffmpeg[1] if arg in ("libopus", "aac")] == ["aac"]
+    assert AlternateEntryFile.objects.filter(entry=audio_entry).count() == len(WEB_AUDIO_FORMATS)
+
+    generate_alternate_audio_files.delay(audio_entry.id)
+    assert len(fake_ffmpeg) == 2
+
+    generate_alternate_audio_files.delay(audio_entry.id, force=True)
+    assert len(fake_ffmpeg) == 3
+    assert [arg for arg in fake_ffmpeg[2] if arg in ("libopus", "aac")] == ["libopus", "aac"]
+
+
+@pytest.mark.django_db
+def test_freeze_finished_compo_results(votable_compo, votable_compo_entry, second_votable_entry, base_user):
+    """Test that results of compos whose voting has ended are frozen into the archive fields."""
+    VoteGroup.objects.create(user=base_user, compo=votable_compo).set_votes(
+        [second_votable_entry, votable_compo_entry]
+    )
+
+    with freeze_time("2025-01-15T21:00:00Z"), mock.patch.object(Entry, "generate_alternates") as generate:
+        freeze_finished_compo_results()
+    generate.assert_not_called()
+
+    second_votable_entry.refresh_from_db()
+    votable_compo_entry.refresh_from_db()
+    assert (second_votable_entry.archive_score, second_votable_entry.archive_rank) == (1.0, 1)
+    assert (votable_compo_entry.archive_score, votable_compo_entry.archive_rank) == (0.5, 2)
+
+
+@pytest.mark.django_db
+@freeze_time("2025-01-15T12:00:00Z")
+def test_freeze_finished_compo_results_skips_open_compos(votable_compo, votable_compo_entry):
+    """Test that compos whose voting hasn't ended yet are left alone."""
+    freeze_finished_compo_results()
+    votable_compo_entry.refresh_from_db()
+    assert votable_compo_entry.archive_score is None
+    assert votable_compo_entry.archive_rank is None
+
+
+@pytest.mark.django_db
+def test_freeze_finished_compo_results_is_idempotent(votable_compo, votable_compo_entry, base_user):
+    """Test that already frozen results are not overwritten by later runs."""
+    with freeze_time("2025-01-15T21:00:00Z"):
+        freeze_finished_compo_results()
+        Entry.objects.filter(pk=votable_compo_entry.pk).update(archive_score=5.0, archive_rank=1)
+        freeze_finished_compo_results()
+
+    votable_compo_entry.refresh_from_db()
+    assert votable_compo_entry.archive_score == 5.0
+
+
+@pytest.mark.django_db
+def test_extending_voting_clears_frozen_results(
+    votable_compo, votable_compo_entry, second_votable_entry, base_user
+):
+    """Test that results frozen when voting first ended are recomputed after voting is extended."""
+    VoteGroup.objects.create(user=base_user, compo=votable_compo).set_votes(
+        [second_votable_entry, votable_compo_entry]
+    )
+    with freeze_time("2025-01-15T21:00:00Z"):
+        freeze_finished_compo_results()
+        votable_compo.voting_end = datetime(2025, 1, 15, 22, 0, 0, tzinfo=UTC)
+        votable_compo.save()
+
+    votable_compo_entry.refresh_from_db()
+    assert (votable_compo_entry.archive_score, votable_compo_entry.archive_rank) == (None, None)
+
+    with freeze_time("2025-01-15T23:00:00Z"):
+        freeze_finished_compo_results()
+    votable_compo_entry.refresh_from_db()
+    assert (votable_compo_entry.archive_score, votable_compo_entry.archive_rank) == (0.5, 2)
+
+
+@pytest.mark.django_db
+def test_extending_voting_keeps_results_without_ballots(votable_compo, votable_compo_entry):
+    """Test that frozen results are kept when the ballots they came from have been removed."""
+    Entry.objects.filter(pk=votable_compo_entry.pk).update(archive_score=5.0, archive_rank=1)
+    with freeze_time("2025-01-15T12:00:00Z"):
+        votable_compo.save()
+
+    votable_compo_entry.refresh_from_db()
+    assert (votable_compo_entry.archive_score, votable_compo_entry.archive_rank) == (5.0, 1)
@@ -0,0 +1,72 @@
+import io
+import os
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from Instanssi.kompomaatti.misc.uploads import (
+    UPLOAD_EXPIRY,
+    UploadOffsetMismatch,
+    append_chunk,
+    cleanup_expired_uploads,
+)
+from Instanssi.kompomaatti.models import EntryUpload
+
+
+class BrokenStream(io.BytesIO):
+    """Request body of a client that goes away in the middle of a chunk."""
+
+    def read(self, size=-1):
+        data = super().read(size)
+        if not data:
+            raise OSError("Connection reset by peer")
+        return data
+
+
+@pytest.fixture
+def entry_upload(base_user, open_compo) -> EntryUpload:
+    return EntryUpload.objects.create(
+        user=base_user,
+        compo=open_compo,
+        field="entryfile",
+        filename="entry.zip",
+        size=100,
+        expires_at=timezone.now() + UPLOAD_EXPIRY,
+    )
+
+
+@pytest.mark.django_db
+def test_append_chunk_keeps_interrupted_chunk(entry_upload):
+    """Test that what was received of a chunk is kept, so that the client can resume from there."""
+    assert append_chunk(entry_upload, 0, BrokenStream(b"x" * 30), 50) == 30
+    assert entry_upload.offset == 30
+    with pytest.raises(UploadOffsetMismatch):
+        append_chunk(entry_upload, 50, io.BytesIO(b"x" * 50), 50)
+    assert append_chunk(entry_upload, 30, io.BytesIO(b"x" * 70), 70) == 100
+    assert entry_upload.is_complete
+
+
+@pytest.mark.django_db
+def test_cleanup_expired_uploads(entry_upload, base_user, open_compo, settings):
+    expired = EntryUpload.objects.create(
+        user=base_user,
+        compo=open_compo,
+        field="sourcefile",
+        filename="source.zip",
+        size=100,
+        expires_at=timezone.now() - timedelta(minutes=1),
+    )
+    append_chunk(entry_upload, 0, io.BytesIO(b"x" * 10), 10)
+    expired.get_path().write_bytes(b"x" * 10)
+    # Left behind by an upload that was removed in bulk
+    orphan = settings.ENTRY_UPLOAD_ROOT / "orphan.part"
+    orphan.write_bytes(b"x")
+    old = (timezone.now() - UPLOAD_EXPIRY - timedelta(hours=1)).timestamp()
+    os.utime(orphan, (old, old))
+
+    assert cleanup_expired_uploads() == 1
+    assert list(EntryUpload.objects.all()) == [entry_upload]
+    assert entry_upload.get_path().exists()
+    assert not expired.get_path().exists()
+    assert not orphan.exists()
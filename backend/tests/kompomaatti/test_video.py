@@ -0,0 +1,172 @@
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+
+from Instanssi.kompomaatti.enums import MediaCodec, MediaContainer
+from Instanssi.kompomaatti.misc.video import (
+    HLS_RENDITIONS,
+    probe_video,
+    select_renditions,
+    transcode_video_alternates,
+)
+from Instanssi.kompomaatti.models import AlternateEntryFile, Entry
+from Instanssi.kompomaatti.tasks import (
+    generate_alternate_audio_files,
+    generate_alternate_video_files,
+)
+
+
+def test_probe_video(fake_ffprobe):
+    assert probe_video(Path("demo.mp4")) == (1080, True)
+
+    # Cover art of an audio file is not a video
+    fake_ffprobe[0]["disposition"]["attached_pic"] = 1
+    assert probe_video(Path("song.mp4")) is None
+
+
+@pytest.mark.parametrize(
+    "height,heights",
+    [
+        (2160, [360, 720, 1080]),
+        (1080, [360, 720, 1080]),
+        (800, [360, 720]),
+        (241, [240]),
+    ],
+)
+def test_select_renditions(height, heights):
+    """Test that videos are never scaled up, and small ones are kept at their own size."""
+    assert [rendition.height for rendition in select_renditions(height)] == heights
+
+
+@pytest.mark.django_db
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+def test_generate_alternate_video_files(video_entry, fake_ffmpeg, fake_ffprobe):
+    """Test that every rendition is encoded by a single ffmpeg run into one HLS stream."""
+    generate_alternate_video_files.delay(video_entry.id)
+
+    assert len(fake_ffmpeg) == 1
+    command = fake_ffmpeg[0]
+    assert command.count("-i") == 1
+    assert command[command.index("-var_stream_map") + 1] == "v:0,a:0 v:1,a:1 v:2,a:2"
+    assert command[command.index("-hls_segment_type") + 1] == "fmp4"
+    assert [command[command.index(f"-b:v:{index}") + 1] for index in range(3)] == [
+        rendition.video_bitrate for rendition in HLS_RENDITIONS
+    ]
+
+    alt = AlternateEntryFile.objects.get(entry=video_entry)
+    assert (alt.codec, alt.container) == (MediaCodec.H264, MediaContainer.HLS)
+    assert alt.mime_format == "application/vnd.apple.mpegurl"
+    assert alt.source_hash == Entry.objects.get(pk=video_entry.pk).entryfile_hash
+    assert alt.file.name.endswith(".hls/master.m3u8")
+    stream_dir = str(Path(alt.file.name).parent)
+    assert default_storage.exists(f"{stream_dir}/v2/segment000.m4s")
+    assert b"v0/index.m3u8" in alt.file.read()
+    assert alt.file_size == alt.file.size
+    assert len(alt.file_hash) == 64
+
+    # The stream is offered first, with the original as a fallback
+    video_entry.refresh_from_db()
+    assert [source.get("type") for source in video_entry.get_video_sources()] == [
+        "application/vnd.apple.mpegurl",
+        None,
+    ]
+    assert video_entry.get_audio_sources() == [{"url": video_entry.entryfile.url, "type": "audio/mp4"}]
+
+
+@pytest.mark.django_db
+def test_transcode_video_without_audio(video_entry, fake_ffmpeg, fake_ffprobe):
+    del fake_ffprobe[1]
+    fake_ffprobe[0]["height"] = 720
+    assert transcode_video_alternates(video_entry)
+    command = fake_ffmpeg[0]
+    assert command[command.index("-var_stream_map") + 1] == "v:0 v:1"
+    assert "-b:a:0" not in command
+
+
+@pytest.mark.django_db
+def test_transcode_video_replaces_stream(
+    video_entry, fake_ffmpeg, fake_ffprobe, django_capture_on_commit_callbacks
+):
+    """Test that the stream is only transcoded again once the entry file changes, and old files are removed."""
+    assert transcode_video_alternates(video_entry)
+    assert not transcode_video_alternates(video_entry)
+    old_stream = AlternateEntryFile.objects.get(entry=video_entry).file.name
+
+    video_entry.entryfile = SimpleUploadedFile("final.mp4", b"final version", content_type="video/mp4")
+    video_entry.update_entryfile_hash()
+    with django_capture_on_commit_callbacks(execute=True):
+        assert transcode_video_alternates(video_entry)
+
+    assert len(fake_ffmpeg) == 2
+    alt = AlternateEntryFile.objects.get(entry=video_entry)
+    assert alt.file.name != old_stream
+    assert not default_storage.exists(old_stream)
+    assert not default_storage.exists(f"{Path(old_stream).parent}/v0/segment000.m4s")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        video_entry.delete()
+    assert not default_storage.exists(str(Path(alt.file.name).parent))
+
+
+@pytest.mark.django_db
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+def test_audio_formats_skip_videos(video_entry, fake_ffmpeg, fake_ffprobe):
+    """Test that .mp4 files are transcoded to audio formats only if they have no video."""
+    generate_alternate_audio_files.delay(video_entry.id)
+    assert fake_ffmpeg == []
+
+    fake_ffprobe[0]["disposition"]["attached_pic"] = 1
+    # The probe result is kept until a new entry file is assigned
+    generate_alternate_audio_files.delay(video_entry.id)
+    assert fake_ffmpeg == []
+    Entry.objects.filter(pk=video_entry.pk).update(has_video=None)
+    generate_alternate_audio_files.delay(video_entry.id)
+    assert len(fake_ffmpeg) == 1
+    assert not AlternateEntryFile.objects.filter(entry=video_entry, container=MediaContainer.HLS).exists()
+
+
+@pytest.mark.django_db
+def test_transcode_video_skips_audio_only(video_entry, fake_ffmpeg, fake_ffprobe):
+    fake_ffprobe.pop(0)
+    assert not transcode_video_alternates(video_entry)
+    assert fake_ffmpeg == []
+
+
+@pytest.mark.django_db
+def test_transcode_video_stores_probe_result(video_entry, fake_ffmpeg, fake_ffprobe):
+    fake_ffprobe.pop(0)
+    transcode_video_alternates(video_entry)
+    video_entry.refresh_from_db()
+    assert video_entry.has_video is False
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "has_video,audio_queued,video_queued",
+    [(None, True, True), (True, False, True), (False, True, False)],
+)
+def test_generate_alternates_uses_probe_result(video_entry, has_video, audio_queued, video_queued):
+    """Test that once an .mp4 file is known to be audio or video, the other task is no longer queued."""
+    video_entry.has_video = has_video
+    with (
+        mock.patch("Instanssi.kompomaatti.tasks.generate_alternate_audio_files.apply_async") as audio,
+        mock.patch("Instanssi.kompomaatti.tasks.generate_alternate_video_files.apply_async") as video,
+    ):
+        video_entry.generate_alternates()
+    assert audio.called is audio_queued
+    assert video.called is video_queued
+
+
+@pytest.mark.django_db
+def test_new_entry_file_resets_probe_result(video_entry):
+    video_entry.has_video = True
+    video_entry.update_file_hashes(changed_only=True)
+    assert video_entry.has_video is True
+
+    video_entry.entryfile = SimpleUploadedFile("other.mp4", b"other video data", content_type="video/mp4")
+    video_entry.update_file_hashes(changed_only=True)
+    assert video_entry.has_video is None
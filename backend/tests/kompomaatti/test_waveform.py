@@ -0,0 +1,111 @@
+import json
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+
+from Instanssi.kompomaatti.misc.waveform import (
+    WAVEFORM_PEAKS,
+    compute_waveform,
+    generate_entry_waveform,
+    reduce_peaks,
+)
+from Instanssi.kompomaatti.models import Entry
+from Instanssi.kompomaatti.tasks import generate_alternate_audio_files
+
+from .conftest import FAKE_PCM
+
+
+def test_compute_waveform(tmp_path):
+    """Test that the peaks of a ramp rise from the lowest to the highest value, at every level."""
+    pcm_file = tmp_path / "audio.pcm"
+    pcm_file.write_bytes(FAKE_PCM.tobytes())
+
+    waveform = compute_waveform(pcm_file)
+
+    assert waveform["version"] == 1
+    assert waveform["duration"] == 10.0
+    assert [level["length"] for level in waveform["levels"]] == [WAVEFORM_PEAKS, 512, 128]
+    for level in waveform["levels"]:
+        peaks = level["peaks"]
+        assert len(peaks) == level["length"] * 2
+        assert peaks[0] == -128
+        assert peaks[-1] == 127
+        assert all(low <= high for low, high in zip(peaks[0::2], peaks[1::2]))
+        assert peaks[0::2] == sorted(peaks[0::2])
+
+
+def test_compute_waveform_short_and_empty(tmp_path):
+    """Test that tracks shorter than the peak count get a pair per sample, and silence no levels."""
+    pcm_file = tmp_path / "audio.pcm"
+    pcm_file.write_bytes(FAKE_PCM[:3].tobytes())
+    assert [level["length"] for level in compute_waveform(pcm_file)["levels"]] == [3, 1]
+
+    pcm_file.write_bytes(b"")
+    assert compute_waveform(pcm_file) == {"version": 1, "duration": 0.0, "levels": []}
+
+
+def test_reduce_peaks():
+    assert reduce_peaks([-1, 1, -5, 2, 0, 7], factor=2) == [-5, 2, 0, 7]
+
+
+@pytest.mark.django_db
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+def test_generate_alternate_audio_files_computes_waveform(audio_entry, fake_ffmpeg):
+    """Test that the waveform and loudness are measured after transcoding, with the entry file hash."""
+    generate_alternate_audio_files.delay(audio_entry.id)
+
+    assert len(fake_ffmpeg.decodes) == 1
+    assert (
+        "[0:a]ebur128=framelog=verbose:peak=true[s0];"
+        "[s0]aformat=channel_layouts=mono:sample_fmts=s16:sample_rates=8000[s1]"
+    ) in fake_ffmpeg.decodes[0]
+
+    entry = Entry.objects.get(pk=audio_entry.id)
+    assert entry.waveform_source_hash == entry.entryfile_hash
+    assert (entry.loudness, entry.true_peak, entry.playback_gain) == (-19.5, -0.3, -0.7)
+    assert not entry.is_waveform_outdated
+    waveform = json.loads(entry.waveformfile.read())
+    assert waveform["levels"][0]["length"] == WAVEFORM_PEAKS
+
+
+@pytest.mark.django_db
+def test_generate_entry_waveform_only_when_outdated(
+    audio_entry, fake_ffmpeg, django_capture_on_commit_callbacks
+):
+    """Test that the waveform is computed again only once the entry file changes."""
+    assert generate_entry_waveform(audio_entry)
+    assert not generate_entry_waveform(audio_entry)
+    assert len(fake_ffmpeg.decodes) == 1
+    old_waveform = audio_entry.waveformfile.name
+
+    audio_entry.entryfile = SimpleUploadedFile("remix.mp3", b"another song", content_type="audio/mpeg")
+    audio_entry.update_entryfile_hash()
+    assert audio_entry.is_waveform_outdated
+    with django_capture_on_commit_callbacks(execute=True):
+        assert generate_entry_waveform(audio_entry)
+    assert len(fake_ffmpeg.decodes) == 2
+    assert audio_entry.waveformfile.name != old_waveform
+    assert not default_storage.exists(old_waveform)
+
+
+@pytest.mark.django_db
+def test_unmeasured_loudness_is_not_retried(audio_entry, fake_ffmpeg):
+    """Test that an entry whose loudness can't be measured isn't decoded again on every save."""
+    fake_ffmpeg.ebur128_summary = b"[Parsed_ebur128_0 @ 0x5581d5c0] Summary:\n"
+    assert generate_entry_waveform(audio_entry)
+
+    entry = Entry.objects.get(pk=audio_entry.id)
+    assert entry.waveformfile
+    assert entry.waveform_source_hash == entry.entryfile_hash
+    assert (entry.loudness, entry.true_peak, entry.playback_gain) == (None, None, None)
+    assert not entry.is_waveform_outdated
+    assert not generate_entry_waveform(entry)
+    assert len(fake_ffmpeg.decodes) == 1
+
+
+@pytest.mark.django_db
+def test_generate_entry_waveform_skips_non_audio(editable_compo_entry, fake_ffmpeg):
+    assert not generate_entry_waveform(editable_compo_entry)
+    assert fake_ffmpeg.decodes == []
@@ -9,6 +9,7 @@ export {
     adminBlogPartialUpdate,
     adminBlogRetrieve,
     adminBlogUpdate,
+    adminEventArkistoArchiverExportStaticCreate,
     adminEventArkistoArchiverHideCreate,
     adminEventArkistoArchiverOptimizeScoresCreate,
     adminEventArkistoArchiverRemoveOldVotesCreate,
@@ -162,6 +163,7 @@ export {
     notificationsSubscriptionsDestroy,
     notificationsSubscriptionsList,
     type Options,
+    publicArchiveSearchList,
     publicBlogEntriesList,
     publicBlogEntriesRetrieve,
     publicEventArchiveVideoCategoriesList,
@@ -219,6 +221,9 @@ export type {
     AdminBlogUpdateData,
     AdminBlogUpdateResponse,
     AdminBlogUpdateResponses,
+    AdminEventArkistoArchiverExportStaticCreateData,
+    AdminEventArkistoArchiverExportStaticCreateResponse,
+    AdminEventArkistoArchiverExportStaticCreateResponses,
     AdminEventArkistoArchiverHideCreateData,
     AdminEventArkistoArchiverHideCreateResponse,
     AdminEventArkistoArchiverHideCreateResponses,
@@ -763,6 +768,8 @@ export type {
     PaginatedPublicCompoEntryListWritable,
     PaginatedPublicCompoList,
     PaginatedPublicCompoListWritable,
+    PaginatedPublicEntrySearchResultList,
+    PaginatedPublicEntrySearchResultListWritable,
     PaginatedPublicEventList,
     PaginatedPublicEventListWritable,
     PaginatedPublicOtherVideoCategoryList,
@@ -829,6 +836,9 @@ export type {
     ProgramEventRequest,
     ProgramEventWritable,
     PublicAlternateEntryFile,
+    PublicArchiveSearchListData,
+    PublicArchiveSearchListResponse,
+    PublicArchiveSearchListResponses,
     PublicBlogEntriesListData,
     PublicBlogEntriesListResponse,
     PublicBlogEntriesListResponses,
@@ -845,6 +855,8 @@ export type {
     PublicCompoEntry,
     PublicCompoEntryWritable,
     PublicCompoWritable,
+    PublicEntrySearchResult,
+    PublicEntrySearchResultWritable,
     PublicEvent,
     PublicEventArchiveVideoCategoriesListData,
     PublicEventArchiveVideoCategoriesListResponse,
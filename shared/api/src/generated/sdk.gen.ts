@@ -26,6 +26,8 @@ import type {
     AdminBlogRetrieveResponses,
     AdminBlogUpdateData,
     AdminBlogUpdateResponses,
+    AdminEventArkistoArchiverExportStaticCreateData,
+    AdminEventArkistoArchiverExportStaticCreateResponses,
     AdminEventArkistoArchiverHideCreateData,
     AdminEventArkistoArchiverHideCreateResponses,
     AdminEventArkistoArchiverOptimizeScoresCreateData,
@@ -103,6 +105,7 @@ import type {
     AdminEventKompomaattiEntriesDestroyData,
     AdminEventKompomaattiEntriesDestroyResponses,
     AdminEventKompomaattiEntriesDownloadArchiveRetrieveData,
+    AdminEventKompomaattiEntriesDownloadArchiveRetrieveErrors,
     AdminEventKompomaattiEntriesDownloadArchiveRetrieveResponses,
     AdminEventKompomaattiEntriesListData,
     AdminEventKompomaattiEntriesListResponses,
@@ -293,6 +296,16 @@ import type {
     EventUserKompomaattiTicketVoteCodesListResponses,
     EventUserKompomaattiTicketVoteCodesRetrieveData,
     EventUserKompomaattiTicketVoteCodesRetrieveResponses,
+    EventUserKompomaattiUploadsCreateData,
+    EventUserKompomaattiUploadsCreateResponses,
+    EventUserKompomaattiUploadsDestroyData,
+    EventUserKompomaattiUploadsDestroyResponses,
+    EventUserKompomaattiUploadsListData,
+    EventUserKompomaattiUploadsListResponses,
+    EventUserKompomaattiUploadsPartialUpdateData,
+    EventUserKompomaattiUploadsPartialUpdateResponses,
+    EventUserKompomaattiUploadsRetrieveData,
+    EventUserKompomaattiUploadsRetrieveResponses,
     EventUserKompomaattiVoteCodeRequestsCreateData,
     EventUserKompomaattiVoteCodeRequestsCreateResponses,
     EventUserKompomaattiVoteCodeRequestsListData,
@@ -332,6 +345,8 @@ import type {
     NotificationsSubscriptionsDestroyResponses,
     NotificationsSubscriptionsListData,
     NotificationsSubscriptionsListResponses,
+    PublicArchiveSearchListData,
+    PublicArchiveSearchListResponses,
     PublicBlogEntriesListData,
     PublicBlogEntriesListResponses,
     PublicBlogEntriesRetrieveData,
@@ -579,6 +594,31 @@ export const adminBlogUpdate = <ThrowOnError extends boolean = false>(
         },
     });
 
+/**
+ * Export static archive pages
+ *
+ * Starts a background job that pre-renders the public archive pages of the event into static files served by nginx. Progress is reported in the archiver status. The event must be visible in the archive, and the export must be enabled in the settings.
+ */
+export const adminEventArkistoArchiverExportStaticCreate = <ThrowOnError extends boolean = false>(
+    options: Options<AdminEventArkistoArchiverExportStaticCreateData, ThrowOnError>
+): RequestResult<AdminEventArkistoArchiverExportStaticCreateResponses, unknown, ThrowOnError> =>
+    (options.client ?? client).post<
+        AdminEventArkistoArchiverExportStaticCreateResponses,
+        unknown,
+        ThrowOnError
+    >({
+        security: [
+            { name: "Authorization", type: "apiKey" },
+            {
+                in: "cookie",
+                name: "sessionid",
+                type: "apiKey",
+            },
+        ],
+        url: "/api/v2/admin/event/{event_pk}/arkisto/archiver/export-static/",
+        ...options,
+    });
+
 /**
  * Hide event from archive
  *
@@ -1687,7 +1727,7 @@ export const adminEventKompomaattiEntriesUpdate = <ThrowOnError extends boolean
 /**
  * Download entry files archive
  *
- * Streams all entry files as a ZIP archive organized by compo directory.
+ * Streams all entry files as a ZIP archive organized by compo directory. The size of the archive is known up front, and an interrupted download can be resumed with a Range request.
  */
 export const adminEventKompomaattiEntriesDownloadArchiveRetrieve = <
     ThrowOnError extends boolean = false,
@@ -1695,12 +1735,12 @@ export const adminEventKompomaattiEntriesDownloadArchiveRetrieve = <
     options: Options<AdminEventKompomaattiEntriesDownloadArchiveRetrieveData, ThrowOnError>
 ): RequestResult<
     AdminEventKompomaattiEntriesDownloadArchiveRetrieveResponses,
-    unknown,
+    AdminEventKompomaattiEntriesDownloadArchiveRetrieveErrors,
     ThrowOnError
 > =>
     (options.client ?? client).get<
         AdminEventKompomaattiEntriesDownloadArchiveRetrieveResponses,
-        unknown,
+        AdminEventKompomaattiEntriesDownloadArchiveRetrieveErrors,
         ThrowOnError
     >({
         security: [
@@ -1747,7 +1787,7 @@ export const adminEventKompomaattiEntriesReorderCreate = <ThrowOnError extends b
 /**
  * Validate entry files archive
  *
- * Checks that all entry files exist on disk before downloading. Call this before download-archive to get actionable error messages.
+ * Checks that all entry files exist on disk before downloading, and that their sizes match the ones recorded when they were uploaded. With verify=true, the files are also hashed and compared to their recorded SHA-256. Call this before download-archive to get actionable error messages.
  */
 export const adminEventKompomaattiEntriesValidateArchiveRetrieve = <
     ThrowOnError extends boolean = false,
@@ -4017,6 +4057,172 @@ export const eventUserKompomaattiTicketVoteCodesRetrieve = <ThrowOnError extends
         ...options,
     });
 
+/**
+ * Resumable uploads of the current user's entry and source files.
+ *
+ * Create an upload with the name and size of the file, then send the file in chunks as PATCH
+ * requests (Content-Type: application/offset+octet-stream), each with an Upload-Offset header
+ * telling where the chunk starts. After a dropped connection, HEAD or GET the upload for the
+ * offset to resume from. Give the id of a complete upload as entryfile_upload or
+ * sourcefile_upload when creating or editing an entry.
+ *
+ * Uploads expire 24 hours after their last chunk.
+ */
+export const eventUserKompomaattiUploadsList = <ThrowOnError extends boolean = false>(
+    options: Options<EventUserKompomaattiUploadsListData, ThrowOnError>
+): RequestResult<EventUserKompomaattiUploadsListResponses, unknown, ThrowOnError> =>
+    (options.client ?? client).get<
+        EventUserKompomaattiUploadsListResponses,
+        unknown,
+        ThrowOnError
+    >({
+        security: [
+            { name: "Authorization", type: "apiKey" },
+            {
+                in: "cookie",
+                name: "sessionid",
+                type: "apiKey",
+            },
+        ],
+        url: "/api/v2/event/{event_pk}/user/kompomaatti/uploads/",
+        ...options,
+    });
+
+/**
+ * Resumable uploads of the current user's entry and source files.
+ *
+ * Create an upload with the name and size of the file, then send the file in chunks as PATCH
+ * requests (Content-Type: application/offset+octet-stream), each with an Upload-Offset header
+ * telling where the chunk starts. After a dropped connection, HEAD or GET the upload for the
+ * offset to resume from. Give the id of a complete upload as entryfile_upload or
+ * sourcefile_upload when creating or editing an entry.
+ *
+ * Uploads expire 24 hours after their last chunk.
+ */
+export const eventUserKompomaattiUploadsCreate = <ThrowOnError extends boolean = false>(
+    options: Options<EventUserKompomaattiUploadsCreateData, ThrowOnError>
+): RequestResult<EventUserKompomaattiUploadsCreateResponses, unknown, ThrowOnError> =>
+    (options.client ?? client).post<
+        EventUserKompomaattiUploadsCreateResponses,
+        unknown,
+        ThrowOnError
+    >({
+        security: [
+            { name: "Authorization", type: "apiKey" },
+            {
+                in: "cookie",
+                name: "sessionid",
+                type: "apiKey",
+            },
+        ],
+        url: "/api/v2/event/{event_pk}/user/kompomaatti/uploads/",
+        ...options,
+        headers: {
+            "Content-Type": "application/json",
+            ...options.headers,
+        },
+    });
+
+/**
+ * Resumable uploads of the current user's entry and source files.
+ *
+ * Create an upload with the name and size of the file, then send the file in chunks as PATCH
+ * requests (Content-Type: application/offset+octet-stream), each with an Upload-Offset header
+ * telling where the chunk starts. After a dropped connection, HEAD or GET the upload for the
+ * offset to resume from. Give the id of a complete upload as entryfile_upload or
+ * sourcefile_upload when creating or editing an entry.
+ *
+ * Uploads expire 24 hours after their last chunk.
+ */
+export const eventUserKompomaattiUploadsDestroy = <ThrowOnError extends boolean = false>(
+    options: Options<EventUserKompomaattiUploadsDestroyData, ThrowOnError>
+): RequestResult<EventUserKompomaattiUploadsDestroyResponses, unknown, ThrowOnError> =>
+    (options.client ?? client).delete<
+        EventUserKompomaattiUploadsDestroyResponses,
+        unknown,
+        ThrowOnError
+    >({
+        security: [
+            { name: "Authorization", type: "apiKey" },
+            {
+                in: "cookie",
+                name: "sessionid",
+                type: "apiKey",
+            },
+        ],
+        url: "/api/v2/event/{event_pk}/user/kompomaatti/uploads/{id}/",
+        ...options,
+    });
+
+/**
+ * Get the state of an upload, including the offset to resume from
+ *
+ * Resumable uploads of the current user's entry and source files.
+ *
+ * Create an upload with the name and size of the file, then send the file in chunks as PATCH
+ * requests (Content-Type: application/offset+octet-stream), each with an Upload-Offset header
+ * telling where the chunk starts. After a dropped connection, HEAD or GET the upload for the
+ * offset to resume from. Give the id of a complete upload as entryfile_upload or
+ * sourcefile_upload when creating or editing an entry.
+ *
+ * Uploads expire 24 hours after their last chunk.
+ */
+export const eventUserKompomaattiUploadsRetrieve = <ThrowOnError extends boolean = false>(
+    options: Options<EventUserKompomaattiUploadsRetrieveData, ThrowOnError>
+): RequestResult<EventUserKompomaattiUploadsRetrieveResponses, unknown, ThrowOnError> =>
+    (options.client ?? client).get<
+        EventUserKompomaattiUploadsRetrieveResponses,
+        unknown,
+        ThrowOnError
+    >({
+        security: [
+            { name: "Authorization", type: "apiKey" },
+            {
+                in: "cookie",
+                name: "sessionid",
+                type: "apiKey",
+            },
+        ],
+        url: "/api/v2/event/{event_pk}/user/kompomaatti/uploads/{id}/",
+        ...options,
+    });
+
+/**
+ * Append a chunk to an upload
+ *
+ * The request body is the chunk, of at most 16 MiB. Responds with the new offset in the Upload-Offset header. If the offset does not match, responds with 409 and the current offset.
+ */
+export const eventUserKompomaattiUploadsPartialUpdate = <
+    ThrowOnError extends boolean = false,
+>(
+    options: Options<EventUserKompomaattiUploadsPartialUpdateData, ThrowOnError>
+): RequestResult<
+    EventUserKompomaattiUploadsPartialUpdateResponses,
+    unknown,
+    ThrowOnError
+> =>
+    (options.client ?? client).patch<
+        EventUserKompomaattiUploadsPartialUpdateResponses,
+        unknown,
+        ThrowOnError
+    >({
+        bodySerializer: null,
+        security: [
+            { name: "Authorization", type: "apiKey" },
+            {
+                in: "cookie",
+                name: "sessionid",
+                type: "apiKey",
+            },
+        ],
+        url: "/api/v2/event/{event_pk}/user/kompomaatti/uploads/{id}/",
+        ...options,
+        headers: {
+            "Content-Type": "application/offset+octet-stream",
+            ...options.headers,
+        },
+    });
+
 /**
  * API endpoint for managing user's own vote code requests.
  *
@@ -4508,6 +4714,21 @@ export const notificationsSubscriptionsDestroy = <ThrowOnError extends boolean =
         ...options,
     });
 
+/**
+ * Public full-text search over the entries of all archived events.
+ *
+ * Every word of the query must match the beginning of a word in the entry name, creator,
+ * platform, compo, event or description. Results are ordered by relevance, and are always
+ * paginated since a short query can match most of the archive.
+ */
+export const publicArchiveSearchList = <ThrowOnError extends boolean = false>(
+    options?: Options<PublicArchiveSearchListData, ThrowOnError>
+): RequestResult<PublicArchiveSearchListResponses, unknown, ThrowOnError> =>
+    (options?.client ?? client).get<PublicArchiveSearchListResponses, unknown, ThrowOnError>({
+        url: "/api/v2/public/archive/search/",
+        ...options,
+    });
+
 /**
  * Public read-only endpoint for blog entries. Only public entries are shown.
  */
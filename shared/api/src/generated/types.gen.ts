@@ -31,6 +31,33 @@ export type AlternateEntryFile = {
     readonly url: string;
 };
 
+/**
+ * Serializer for the progress of a background archiver job.
+ */
+export type ArchiverJob = {
+    /**
+     * Archiver action being run (optimize_scores, remove_old_votes or export_static)
+     */
+    action: string;
+    /**
+     * State of the job
+     *
+     * * `queued` - queued
+     * * `running` - running
+     * * `done` - done
+     * * `failed` - failed
+     */
+    state: StateEnum;
+    /**
+     * Number of items processed so far
+     */
+    processed: number;
+    /**
+     * Total number of items to process, if known
+     */
+    total: number;
+};
+
 /**
  * Serializer for archiver status response.
  */
@@ -55,6 +82,10 @@ export type ArchiverStatus = {
      * Whether there are old vote records to clean up
      */
     old_votes_found: boolean;
+    /**
+     * Current or most recently finished background job, if any
+     */
+    job: ArchiverJob | null;
 };
 
 /**
@@ -302,7 +333,7 @@ export type CompoEntry = {
     /**
      * File
      */
-    entryfile: string;
+    entryfile?: string | null;
     /**
      * Source code
      */
@@ -343,6 +374,38 @@ export type CompoEntry = {
      */
     readonly computed_rank: number;
     readonly alternate_files: Array<AlternateEntryFile>;
+    /**
+     * Integrated loudness (LUFS)
+     */
+    readonly loudness: number | null;
+    /**
+     * True peak (dBTP)
+     */
+    readonly true_peak: number | null;
+    /**
+     * File SHA-256
+     */
+    readonly entryfile_hash: string;
+    /**
+     * File size
+     */
+    readonly entryfile_size: number | null;
+    /**
+     * Source code SHA-256
+     */
+    readonly sourcefile_hash: string;
+    /**
+     * Source code size
+     */
+    readonly sourcefile_size: number | null;
+    /**
+     * Image SHA-256
+     */
+    readonly imagefile_hash: string;
+    /**
+     * Image size
+     */
+    readonly imagefile_size: number | null;
 };
 
 /**
@@ -359,7 +422,7 @@ export type CompoEntryRequest = {
     /**
      * File
      */
-    entryfile: Blob | File;
+    entryfile?: Blob | File;
     /**
      * Source code
      */
@@ -1019,6 +1082,12 @@ export type EventRequest = {
  */
 export type EventTypeEnum = 0 | 1;
 
+/**
+ * * `entryfile` - File
+ * * `sourcefile` - Source code
+ */
+export type FieldEnum = "entryfile" | "sourcefile";
+
 /**
  * Serializer for user groups (used in user info responses).
  */
@@ -1356,6 +1425,13 @@ export type PaginatedPublicCompoList = {
     results: Array<PublicCompo>;
 };
 
+export type PaginatedPublicEntrySearchResultList = {
+    count: number;
+    next?: string | null;
+    previous?: string | null;
+    results: Array<PublicEntrySearchResult>;
+};
+
 export type PaginatedPublicEventList = {
     count: number;
     next?: string | null;
@@ -1454,6 +1530,13 @@ export type PaginatedUserCompoEntryList = {
     results: Array<UserCompoEntry>;
 };
 
+export type PaginatedUserEntryUploadList = {
+    count: number;
+    next?: string | null;
+    previous?: string | null;
+    results: Array<UserEntryUpload>;
+};
+
 export type PaginatedUserList = {
     count: number;
     next?: string | null;
@@ -2236,6 +2319,36 @@ export type PublicCompoEntry = {
     readonly computed_score: number | null;
     readonly computed_rank: number | null;
     readonly alternate_files: Array<PublicAlternateEntryFile>;
+    readonly waveform_url: string | null;
+    /**
+     * Integrated loudness (LUFS)
+     */
+    readonly loudness: number | null;
+    /**
+     * True peak (dBTP)
+     */
+    readonly true_peak: number | null;
+    readonly playback_gain: number | null;
+};
+
+/**
+ * Public serializer for archive search results.
+ *
+ * Results are filtered rows, so rank and score are left out (use the compo entries endpoint
+ * for those). search_rank tells how well the entry matched the query, higher is better.
+ */
+export type PublicEntrySearchResult = {
+    readonly id: number;
+    readonly event: number;
+    readonly event_name: string;
+    compo: number;
+    readonly compo_name: string;
+    name: string;
+    creator: string;
+    platform?: string | null;
+    description: string;
+    readonly imagefile_thumbnail_url: string | null;
+    readonly search_rank: number;
 };
 
 /**
@@ -2550,6 +2663,14 @@ export type SocialAuthUrl = {
     name: string;
 };
 
+/**
+ * * `queued` - queued
+ * * `running` - running
+ * * `done` - done
+ * * `failed` - failed
+ */
+export type StateEnum = "queued" | "running" | "done" | "failed";
+
 /**
  * * `0` - Pending approval
  * * `1` - Approved
@@ -2969,6 +3090,11 @@ export type UploadedFile = {
      * Return just the filename without path.
      */
     readonly filename: string;
+    /**
+     * File SHA-256
+     */
+    readonly file_hash: string;
+    readonly file_size: number | null;
     readonly date: string;
 };
 
@@ -3073,6 +3199,56 @@ export type UserCompoEntryRequest = {
     youtube_url?: string | null;
 };
 
+/**
+ * Serializer for the user's own resumable uploads of entry files.
+ *
+ * The file itself is sent in chunks after the upload is created. The offset is the number of
+ * bytes received so far, and the upload is complete once it reaches the size.
+ *
+ * Field values:
+ * - entryfile: Entry file
+ * - sourcefile: Source code
+ */
+export type UserEntryUpload = {
+    readonly id: string;
+    compo: number;
+    field: FieldEnum;
+    /**
+     * File name
+     */
+    filename: string;
+    /**
+     * File size
+     */
+    size: number;
+    readonly offset: number;
+    readonly created_at: string;
+    readonly expires_at: string;
+};
+
+/**
+ * Serializer for the user's own resumable uploads of entry files.
+ *
+ * The file itself is sent in chunks after the upload is created. The offset is the number of
+ * bytes received so far, and the upload is complete once it reaches the size.
+ *
+ * Field values:
+ * - entryfile: Entry file
+ * - sourcefile: Source code
+ */
+export type UserEntryUploadRequest = {
+    compo: number;
+    field: FieldEnum;
+    /**
+     * File name
+     */
+    filename: string;
+    /**
+     * File size
+     */
+    size: number;
+};
+
 /**
  * Serializer for the authenticated user's own profile and permissions.
  */
@@ -3240,6 +3416,10 @@ export type ValidateArchiveError = {
 export type ValidateArchiveOk = {
     ok: boolean;
     count: number;
+    /**
+     * Total size of the files in bytes
+     */
+    size: number;
 };
 
 export type VapidPublicKey = {
@@ -3419,7 +3599,7 @@ export type CompoEntryWritable = {
     /**
      * File
      */
-    entryfile: string;
+    entryfile?: string | null;
     /**
      * Source code
      */
@@ -3448,6 +3628,57 @@ export type CompoEntryWritable = {
     archive_rank?: number | null;
 };
 
+/**
+ * Staff serializer for compo entries.
+ */
+export type CompoEntryRequestWritable = {
+    user: number;
+    compo: number;
+    name: string;
+    description: string;
+    creator: string;
+    platform?: string | null;
+    order_index?: number;
+    /**
+     * File
+     */
+    entryfile?: Blob | File;
+    /**
+     * Source code
+     */
+    sourcefile?: Blob | File | null;
+    /**
+     * Id of a complete upload to use as the entry file
+     */
+    entryfile_upload?: string;
+    /**
+     * Id of a complete upload to use as the source file
+     */
+    sourcefile_upload?: string;
+    /**
+     * Image
+     */
+    imagefile_original?: Blob | File | null;
+    youtube_url?: string | null;
+    /**
+     * Revealed in live voting
+     */
+    live_voting_revealed?: boolean;
+    disqualified?: boolean;
+    /**
+     * Disqualification reason
+     */
+    disqualified_reason?: string;
+    /**
+     * Score
+     */
+    archive_score?: number | null;
+    /**
+     * Rank
+     */
+    archive_rank?: number | null;
+};
+
 /**
  * Serializer for content type information.
  */
@@ -3656,6 +3887,13 @@ export type PaginatedPublicCompoListWritable = {
     results: Array<PublicCompoWritable>;
 };
 
+export type PaginatedPublicEntrySearchResultListWritable = {
+    count: number;
+    next?: string | null;
+    previous?: string | null;
+    results: Array<PublicEntrySearchResultWritable>;
+};
+
 export type PaginatedPublicEventListWritable = {
     count: number;
     next?: string | null;
@@ -3754,6 +3992,13 @@ export type PaginatedUserCompoEntryListWritable = {
     results: Array<UserCompoEntryWritable>;
 };
 
+export type PaginatedUserEntryUploadListWritable = {
+    count: number;
+    next?: string | null;
+    previous?: string | null;
+    results: Array<UserEntryUploadWritable>;
+};
+
 export type PaginatedUserListWritable = {
     count: number;
     next?: string | null;
@@ -3789,6 +4034,57 @@ export type PaginatedVoteCodeRequestListWritable = {
     results: Array<VoteCodeRequestWritable>;
 };
 
+/**
+ * Staff serializer for compo entries.
+ */
+export type PatchedCompoEntryRequestWritable = {
+    user?: number;
+    compo?: number;
+    name?: string;
+    description?: string;
+    creator?: string;
+    platform?: string | null;
+    order_index?: number;
+    /**
+     * File
+     */
+    entryfile?: Blob | File;
+    /**
+     * Source code
+     */
+    sourcefile?: Blob | File | null;
+    /**
+     * Id of a complete upload to use as the entry file
+     */
+    entryfile_upload?: string;
+    /**
+     * Id of a complete upload to use as the source file
+     */
+    sourcefile_upload?: string;
+    /**
+     * Image
+     */
+    imagefile_original?: Blob | File | null;
+    youtube_url?: string | null;
+    /**
+     * Revealed in live voting
+     */
+    live_voting_revealed?: boolean;
+    disqualified?: boolean;
+    /**
+     * Disqualification reason
+     */
+    disqualified_reason?: string;
+    /**
+     * Score
+     */
+    archive_score?: number | null;
+    /**
+     * Rank
+     */
+    archive_rank?: number | null;
+};
+
 /**
  * User serializer for managing own compo entries.
  */
@@ -3806,6 +4102,14 @@ export type PatchedUserCompoEntryRequestWritable = {
      * Source code
      */
     sourcefile?: Blob | File | null;
+    /**
+     * Id of a complete upload to use as the entry file
+     */
+    entryfile_upload?: string;
+    /**
+     * Id of a complete upload to use as the source file
+     */
+    sourcefile_upload?: string;
     /**
      * Image
      */
@@ -3957,6 +4261,20 @@ export type PublicCompoEntryWritable = {
     youtube_url?: string | null;
 };
 
+/**
+ * Public serializer for archive search results.
+ *
+ * Results are filtered rows, so rank and score are left out (use the compo entries endpoint
+ * for those). search_rank tells how well the entry matched the query, higher is better.
+ */
+export type PublicEntrySearchResultWritable = {
+    compo: number;
+    name: string;
+    creator: string;
+    platform?: string | null;
+    description: string;
+};
+
 /**
  * Public read-only serializer for events.
  */
@@ -4338,11 +4656,19 @@ export type UserCompoEntryRequestWritable = {
     /**
      * File
      */
-    entryfile: Blob | File;
+    entryfile?: Blob | File;
     /**
      * Source code
      */
     sourcefile?: Blob | File | null;
+    /**
+     * Id of a complete upload to use as the entry file
+     */
+    entryfile_upload?: string;
+    /**
+     * Id of a complete upload to use as the source file
+     */
+    sourcefile_upload?: string;
     /**
      * Image
      */
@@ -4350,6 +4676,29 @@ export type UserCompoEntryRequestWritable = {
     youtube_url?: string | null;
 };
 
+/**
+ * Serializer for the user's own resumable uploads of entry files.
+ *
+ * The file itself is sent in chunks after the upload is created. The offset is the number of
+ * bytes received so far, and the upload is complete once it reaches the size.
+ *
+ * Field values:
+ * - entryfile: Entry file
+ * - sourcefile: Source code
+ */
+export type UserEntryUploadWritable = {
+    compo: number;
+    field: FieldEnum;
+    /**
+     * File name
+     */
+    filename: string;
+    /**
+     * File size
+     */
+    size: number;
+};
+
 /**
  * Serializer for the authenticated user's own profile and permissions.
  */
@@ -4592,6 +4941,22 @@ export type AdminBlogUpdateResponses = {
 
 export type AdminBlogUpdateResponse = AdminBlogUpdateResponses[keyof AdminBlogUpdateResponses];
 
+export type AdminEventArkistoArchiverExportStaticCreateData = {
+    body?: never;
+    path: {
+        event_pk: number;
+    };
+    query?: never;
+    url: "/api/v2/admin/event/{event_pk}/arkisto/archiver/export-static/";
+};
+
+export type AdminEventArkistoArchiverExportStaticCreateResponses = {
+    202: ArchiverStatus;
+};
+
+export type AdminEventArkistoArchiverExportStaticCreateResponse =
+    AdminEventArkistoArchiverExportStaticCreateResponses[keyof AdminEventArkistoArchiverExportStaticCreateResponses];
+
 export type AdminEventArkistoArchiverHideCreateData = {
     body?: never;
     path: {
@@ -4618,7 +4983,7 @@ export type AdminEventArkistoArchiverOptimizeScoresCreateData = {
 };
 
 export type AdminEventArkistoArchiverOptimizeScoresCreateResponses = {
-    200: ArchiverStatus;
+    202: ArchiverStatus;
 };
 
 export type AdminEventArkistoArchiverOptimizeScoresCreateResponse =
@@ -4634,7 +4999,7 @@ export type AdminEventArkistoArchiverRemoveOldVotesCreateData = {
 };
 
 export type AdminEventArkistoArchiverRemoveOldVotesCreateResponses = {
-    200: ArchiverStatus;
+    202: ArchiverStatus;
 };
 
 export type AdminEventArkistoArchiverRemoveOldVotesCreateResponse =
@@ -5367,6 +5732,7 @@ export type AdminEventKompomaattiEntriesListData = {
     query?: {
         compo?: number;
         disqualified?: boolean;
+        entryfile_hash?: string;
         /**
          * Number of results to return per page.
          */
@@ -5396,7 +5762,7 @@ export type AdminEventKompomaattiEntriesListResponse =
     AdminEventKompomaattiEntriesListResponses[keyof AdminEventKompomaattiEntriesListResponses];
 
 export type AdminEventKompomaattiEntriesCreateData = {
-    body: CompoEntryRequest;
+    body: CompoEntryRequestWritable;
     path: {
         event_pk: number;
     };
@@ -5455,7 +5821,7 @@ export type AdminEventKompomaattiEntriesRetrieveResponse =
     AdminEventKompomaattiEntriesRetrieveResponses[keyof AdminEventKompomaattiEntriesRetrieveResponses];
 
 export type AdminEventKompomaattiEntriesPartialUpdateData = {
-    body?: PatchedCompoEntryRequest;
+    body?: PatchedCompoEntryRequestWritable;
     path: {
         event_pk: number;
         /**
@@ -5475,7 +5841,7 @@ export type AdminEventKompomaattiEntriesPartialUpdateResponse =
     AdminEventKompomaattiEntriesPartialUpdateResponses[keyof AdminEventKompomaattiEntriesPartialUpdateResponses];
 
 export type AdminEventKompomaattiEntriesUpdateData = {
-    body: CompoEntryRequest;
+    body: CompoEntryRequestWritable;
     path: {
         event_pk: number;
         /**
@@ -5496,6 +5862,16 @@ export type AdminEventKompomaattiEntriesUpdateResponse =
 
 export type AdminEventKompomaattiEntriesDownloadArchiveRetrieveData = {
     body?: never;
+    headers?: {
+        /**
+         * ETag of the archive the range is from. The whole archive is sent if it has changed.
+         */
+        "If-Range"?: string;
+        /**
+         * Single byte range of the archive to download, e.g. 'bytes=1000-'
+         */
+        Range?: string;
+    };
     path: {
         event_pk: number;
     };
@@ -5512,8 +5888,16 @@ export type AdminEventKompomaattiEntriesDownloadArchiveRetrieveData = {
     url: "/api/v2/admin/event/{event_pk}/kompomaatti/entries/download-archive/";
 };
 
+export type AdminEventKompomaattiEntriesDownloadArchiveRetrieveErrors = {
+    /**
+     * No response body
+     */
+    416: unknown;
+};
+
 export type AdminEventKompomaattiEntriesDownloadArchiveRetrieveResponses = {
     200: Blob | File;
+    206: Blob | File;
 };
 
 export type AdminEventKompomaattiEntriesDownloadArchiveRetrieveResponse =
@@ -5549,6 +5933,10 @@ export type AdminEventKompomaattiEntriesValidateArchiveRetrieveData = {
          * Filename prefix mode: 'id' (default), 'rank', or 'order'
          */
         prefix?: "id" | "order" | "rank";
+        /**
+         * Also read the files and compare them to their SHA-256 hashes
+         */
+        verify?: boolean;
     };
     url: "/api/v2/admin/event/{event_pk}/kompomaatti/entries/validate-archive/";
 };
@@ -7556,6 +7944,119 @@ export type EventUserKompomaattiTicketVoteCodesRetrieveResponses = {
 export type EventUserKompomaattiTicketVoteCodesRetrieveResponse =
     EventUserKompomaattiTicketVoteCodesRetrieveResponses[keyof EventUserKompomaattiTicketVoteCodesRetrieveResponses];
 
+export type EventUserKompomaattiUploadsListData = {
+    body?: never;
+    path: {
+        event_pk: number;
+    };
+    query?: {
+        /**
+         * Number of results to return per page.
+         */
+        limit?: number;
+        /**
+         * The initial index from which to return the results.
+         */
+        offset?: number;
+    };
+    url: "/api/v2/event/{event_pk}/user/kompomaatti/uploads/";
+};
+
+export type EventUserKompomaattiUploadsListResponses = {
+    200: PaginatedUserEntryUploadList;
+};
+
+export type EventUserKompomaattiUploadsListResponse =
+    EventUserKompomaattiUploadsListResponses[keyof EventUserKompomaattiUploadsListResponses];
+
+export type EventUserKompomaattiUploadsCreateData = {
+    body: UserEntryUploadRequest;
+    path: {
+        event_pk: number;
+    };
+    query?: never;
+    url: "/api/v2/event/{event_pk}/user/kompomaatti/uploads/";
+};
+
+export type EventUserKompomaattiUploadsCreateResponses = {
+    201: UserEntryUpload;
+};
+
+export type EventUserKompomaattiUploadsCreateResponse =
+    EventUserKompomaattiUploadsCreateResponses[keyof EventUserKompomaattiUploadsCreateResponses];
+
+export type EventUserKompomaattiUploadsDestroyData = {
+    body?: never;
+    path: {
+        event_pk: number;
+        /**
+         * A UUID string identifying this entry upload.
+         */
+        id: string;
+    };
+    query?: never;
+    url: "/api/v2/event/{event_pk}/user/kompomaatti/uploads/{id}/";
+};
+
+export type EventUserKompomaattiUploadsDestroyResponses = {
+    /**
+     * No response body
+     */
+    204: void;
+};
+
+export type EventUserKompomaattiUploadsDestroyResponse =
+    EventUserKompomaattiUploadsDestroyResponses[keyof EventUserKompomaattiUploadsDestroyResponses];
+
+export type EventUserKompomaattiUploadsRetrieveData = {
+    body?: never;
+    path: {
+        event_pk: number;
+        /**
+         * A UUID string identifying this entry upload.
+         */
+        id: string;
+    };
+    query?: never;
+    url: "/api/v2/event/{event_pk}/user/kompomaatti/uploads/{id}/";
+};
+
+export type EventUserKompomaattiUploadsRetrieveResponses = {
+    200: UserEntryUpload;
+};
+
+export type EventUserKompomaattiUploadsRetrieveResponse =
+    EventUserKompomaattiUploadsRetrieveResponses[keyof EventUserKompomaattiUploadsRetrieveResponses];
+
+export type EventUserKompomaattiUploadsPartialUpdateData = {
+    body?: Blob | File;
+    headers: {
+        /**
+         * Offset of the chunk in the file. Must match the offset of the upload.
+         */
+        "Upload-Offset": number;
+    };
+    path: {
+        event_pk: number;
+        /**
+         * A UUID string identifying this entry upload.
+         */
+        id: string;
+    };
+    query?: never;
+    url: "/api/v2/event/{event_pk}/user/kompomaatti/uploads/{id}/";
+};
+
+export type EventUserKompomaattiUploadsPartialUpdateResponses = {
+    /**
+     * No response body
+     */
+    204: void;
+};
+
+export type EventUserKompomaattiUploadsPartialUpdateResponse =
+    EventUserKompomaattiUploadsPartialUpdateResponses[keyof EventUserKompomaattiUploadsPartialUpdateResponses];
+
 export type EventUserKompomaattiVoteCodeRequestsListData = {
     body?: never;
     path: {
@@ -7911,6 +8412,33 @@ export type NotificationsSubscriptionsDestroyResponses = {
 export type NotificationsSubscriptionsDestroyResponse =
     NotificationsSubscriptionsDestroyResponses[keyof NotificationsSubscriptionsDestroyResponses];
 
+export type PublicArchiveSearchListData = {
+    body?: never;
+    path?: never;
+    query?: {
+        /**
+         * Number of results to return per page.
+         */
+        limit?: number;
+        /**
+         * The initial index from which to return the results.
+         */
+        offset?: number;
+        /**
+         * Search query. Returns no results if empty.
+         */
+        q?: string;
+    };
+    url: "/api/v2/public/archive/search/";
+};
+
+export type PublicArchiveSearchListResponses = {
+    200: PaginatedPublicEntrySearchResultList;
+};
+
+export type PublicArchiveSearchListResponse =
+    PublicArchiveSearchListResponses[keyof PublicArchiveSearchListResponses];
+
 export type PublicBlogEntriesListData = {
     body?: never;
     path?: never;